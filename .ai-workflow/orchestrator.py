@@ -40,16 +40,29 @@ import time
 import re
 import signal
 import hashlib
+import heapq
+import bisect
+import contextlib
+import gzip
+import itertools
+import shutil
+import struct
 import subprocess
 import threading
 import traceback
+from concurrent.futures import Future, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass, field, asdict
 from enum import Enum
+from functools import cached_property
 from collections import deque
+from html.parser import HTMLParser
 from http.server import HTTPServer, SimpleHTTPRequestHandler
+from socketserver import ThreadingMixIn
 from urllib.parse import urlparse, parse_qs
 import socket
 
@@ -64,25 +77,141 @@ CODENAME = "Swiss Watch"
 DEFAULT_DASHBOARD_PORT = 3000
 DEFAULT_PREVIEW_PORT = 8000
 
+# HTTP responses
+GZIP_MIN_BYTES = 1024      # smaller bodies are sent uncompressed
+GZIP_LEVEL = 6             # zlib level for API responses and dashboard assets
+
 # Phase splitting parameters
 MAX_TASKS_PER_PHASE = 6
 TARGET_TOKENS_PER_PHASE = 90000
 CHARS_PER_TOKEN = 4
+SHARED_BLOCK_MIN_CHARS = 120  # shorter blocks repeated across tasks are left inline
+CONTEXT_SNIPPET_TOKENS = 4000  # per-phase budget for embedded code snippets
+COMMAND_BUILDER_VERSION = 5    # bump when command file layout changes (invalidates phase files)
 
 # Timing parameters
 STATUS_CHECK_INTERVAL = 2  # seconds - how often to check status.json
+COMMAND_TIMEOUT = 30       # seconds an API call waits for its queued command
+MAX_QUEUED_COMMANDS = 20   # API commands allowed to wait on one orchestrator
 AUTO_CASCADE_DELAY = 5     # seconds - delay before starting next phase
 MAX_RETRIES = 3            # maximum retry attempts per phase
 RETRY_DELAY = 10           # seconds - delay before retrying
+STALL_TIMEOUT = 600        # seconds - silence from a v2 agent before the phase is retried
+CONFIG_WATCH_INTERVAL = 2  # seconds - how often to check config.json for edits
+
+# Log store (/api/logs)
+LOG_INDEX_INTERVAL = 256    # entries per offset index record
+LOG_QUERY_MAX_SCAN = 20000  # entries one /api/logs call reads before returning a cursor
+LOG_QUERY_MAX_LIMIT = 1000  # entries one /api/logs call returns
+
+# Host mode (many projects in one process)
+HOST_WORKERS = 4            # shared loop threads for all projects
+HOST_PROJECT_LIMITS = {     # caps applied over each project's config
+    "max_queued_commands": MAX_QUEUED_COMMANDS,
+    "max_log_entries": 200,     # in-memory log buffer per project
+    "slow_job_seconds": 300     # log jobs that hold a loop thread longer
+}
+
+# Metrics (/metrics, Prometheus text format)
+METRIC_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+METRIC_DEFINITIONS = {  # name → (type, help)
+    "orchestrator_info": ("gauge", "Orchestrator version (always 1)"),
+    "orchestrator_status_check_seconds": ("histogram", "Time to check v2 events and status.json once"),
+    "orchestrator_phase_completions_total": ("counter", "Phases reported completed by the agent"),
+    "orchestrator_phase_errors_total": ("counter", "Phases reported failed or stalled"),
+    "orchestrator_completion_seconds": ("histogram", "Completion detected to commit and tests done"),
+    "orchestrator_handoff_seconds": ("histogram", "Completion detected to next command file written, cascade delay included"),
+    "orchestrator_git_command_seconds": ("histogram", "Git subprocess duration by subcommand"),
+    "orchestrator_git_failures_total": ("counter", "Git subprocesses that failed, by subcommand"),
+    "orchestrator_test_run_seconds": ("histogram", "Duration of a phase's test run"),
+    "orchestrator_test_suite_seconds": ("histogram", "Duration of one test suite (reused suites excluded)"),
+    "orchestrator_test_results_total": ("counter", "Test suite results by status"),
+    "orchestrator_session_save_seconds": ("histogram", "Time to serialize and write session.json"),
+    "orchestrator_session_bytes": ("gauge", "Size of session.json after the last save"),
+    "orchestrator_http_request_seconds": ("histogram", "Dashboard and API request duration by route"),
+    "orchestrator_http_requests_total": ("counter", "Dashboard and API requests by route, method and status"),
+    "orchestrator_log_entries_total": ("counter", "Log entries written, by level"),
+    "orchestrator_tasks": ("gauge", "Tasks in the session, by state"),
+    "orchestrator_phases": ("gauge", "Phases in the session, by state"),
+    "orchestrator_queued_commands": ("gauge", "API commands waiting for the orchestrator loop"),
+    "orchestrator_scheduled_jobs": ("gauge", "Pending scheduler jobs, by tag"),
+    "orchestrator_push_queue_depth": ("gauge", "Commits waiting to be pushed")
+}
+
+# Tracing (/api/trace/<phase>, Chrome trace-event JSON)
+TRACE_MAX_SPANS = 400       # spans kept per phase handoff
+
+# Debug endpoints (/api/debug/..., off by default)
+DEBUG_PROFILE_MAX_SECONDS = 60  # longest profile capture
+DEBUG_TRACEMALLOC_FRAMES = 5    # frames kept per allocation (group=traceback shows them)
+
+# Config validation beyond "same type as the default" (see LayeredConfig).
+# Numbers are >= 0 unless "min" says otherwise; "restart" keys are only
+# read at startup because changing them under an in-flight phase is unsafe.
+# "secret" values are masked wherever config is shown; "locked" keys cannot
+# be set through POST /api/config, only in config.json, env or the CLI.
+CONFIG_RULES = {
+    "dashboard_port": {"min": 1, "max": 65535, "restart": True},
+    "preview_port": {"min": 1, "max": 65535, "restart": True},
+    "phase_worktrees": {"restart": True},
+    "worktree_branch_prefix": {"restart": True},
+    "git_backend": {"choices": ["plumbing", "porcelain"]},
+    "budget_action": {"choices": ["pause", "retry", "warn"]},
+    "log_level": {"choices": ["DEBUG", "INFO", "WARN", "ERROR"]},
+    "status_check_interval": {"type": "number", "min": 0.01},
+    "command_timeout": {"type": "number", "min": 1},
+    "auto_cascade_delay": {"type": "number"},
+    "retry_delay": {"type": "number"},
+    "stall_timeout": {"type": "number"},
+    "slow_job_seconds": {"type": "number"},
+    "push_coalesce_window": {"type": "number"},
+    "push_backoff_base": {"type": "number"},
+    "push_backoff_max": {"type": "number"},
+    "max_queued_commands": {"min": 1},
+    "max_tasks_per_phase": {"min": 1},
+    "max_log_entries": {"min": 1},
+    "image_variant_quality": {"min": 1, "max": 100},
+    "debug_endpoints": {"locked": True},
+    "debug_token": {"locked": True, "secret": True}
+}
 
 # File names (relative to .ai-workflow directory)
 CONFIG_FILE = "config.json"
 STATE_FILE = "state.json"
 SESSION_FILE = "session.json"
 STATUS_FILE = "status.json"
+STATUS_EVENTS_FILE = "status-events.jsonl"      # protocol v2 append-only event log
 CURRENT_COMMAND_FILE = "current-command.md"
+HOST_DASHBOARD_FILE = "host-dashboard.html"         # next to orchestrator.py
 PLANNING_FILE = "planning.md"
 LOG_FILE = "orchestrator.log"
+LOG_STORE_FILE = "orchestrator.jsonl"           # structured log behind /api/logs (+ ".idx")
+IMAGE_CACHE_DIR = "image-cache"
+IMAGE_CACHE_MANIFEST = "manifest.json"
+COMMAND_REPORT_FILE = "command-report.json"
+PHASE_MANIFEST_FILE = "manifest.json"           # in phases/: render key per phase file
+WORKTREE_DIR = "ai-workflow-worktrees"          # under the git common directory
+WORKTREE_BRANCH_PREFIX = "ai-workflow/phase-"
+WORKTREE_CONFLICT_REF = "refs/ai-workflow/conflicts/phase-"  # work of discarded worktrees
+
+# Background push queue
+PUSH_COALESCE_WINDOW = 2    # seconds - wait for more commits before pushing
+PUSH_BACKOFF_BASE = 5       # seconds - first retry delay after a failed push
+PUSH_BACKOFF_MAX = 300      # seconds - retry delay cap
+PUSH_MAX_ATTEMPTS = 8       # failed attempts before waiting for the next commit
+PUSH_WORKER_IDLE = 60       # seconds - idle time before the worker thread exits
+
+# Performance budget defaults
+BUDGET_REGRESSION_THRESHOLD = 0.10  # fraction of growth vs previous phase that gates
+BUDGET_MIN_DELTA_BYTES = 2048       # ignore byte regressions smaller than this
+
+# Render cost guidance (Lighthouse "avoid an excessive DOM size")
+LIGHTHOUSE_MAX_DOM_NODES = 1400
+LIGHTHOUSE_MAX_DOM_DEPTH = 32
+
+# Responsive image variant defaults
+IMAGE_VARIANT_WIDTHS = [500, 800, 1080, 1600]
+IMAGE_VARIANT_QUALITY = 80
 
 
 # ╔══════════════════════════════════════════════════════════════════════════════════════════╗
@@ -206,7 +335,10 @@ class Phase:
     error: Optional[str] = None                      # Error message if failed
     test_results: Optional[Dict] = None              # Test results after completion
     files_modified: List[str] = field(default_factory=list)  # Files changed
+    diffstat: Optional[Dict] = None                  # Cached per-file line counts of the phase commit
+    baseline: Optional[Dict] = None                  # Git state when the phase started
     retry_count: int = 0                             # Number of retry attempts
+    trace: List[Dict] = field(default_factory=list)  # Handoff spans after completion (see Tracer)
     
     @property
     def token_estimate(self) -> int:
@@ -230,7 +362,10 @@ class Phase:
             "error": self.error,
             "test_results": self.test_results,
             "files_modified": self.files_modified,
+            "diffstat": self.diffstat,
+            "baseline": self.baseline,
             "retry_count": self.retry_count,
+            "trace": list(self.trace),  # copy: the push thread may append meanwhile
             "token_estimate": self.token_estimate,
             "task_count": self.task_count
         }
@@ -307,7 +442,9 @@ class Logger:
     
     Features:
     - Logs to file and console simultaneously
-    - Maintains circular buffer for recent logs (accessible via API)
+    - Maintains circular buffer for recent logs
+    - Keeps every entry in a queryable LogStore (/api/logs), tagged with
+      the phase that was current
     - Color-coded console output for easy reading
     - Thread-safe operations
     - Supports log listeners for real-time updates
@@ -336,6 +473,10 @@ class Logger:
         self.max_buffer_size = max_buffer_size
         self.buffer: deque = deque(maxlen=max_buffer_size)
         self.listeners: List[Callable] = []
+        self.console = True  # Echo entries to stdout (off for benchmarks)
+        self.prefix = ""     # Console prefix (project id in host mode)
+        self.phase: Optional[str] = None  # Current phase, recorded with each entry
+        self.store = LogStore(log_dir)
         self._lock = threading.Lock()
     
     def add_listener(self, callback: Callable[[Dict], None]):
@@ -354,6 +495,7 @@ class Logger:
         return {
             "timestamp": datetime.now().isoformat(),
             "level": level,
+            "phase": self.phase,
             "message": message
         }
     
@@ -365,7 +507,8 @@ class Logger:
         entry = self._format_entry(level, message)
         
         with self._lock:
-            # Add to in-memory buffer
+            # Number and store the entry, then add it to the in-memory buffer
+            self.store.append(entry)
             self.buffer.append(entry)
             
             # Write to log file
@@ -379,7 +522,8 @@ class Logger:
             color = self.COLORS.get(level, "")
             reset = self.COLORS["RESET"]
             timestamp_short = entry['timestamp'].split('T')[1].split('.')[0]
-            print(f"{color}[{entry['timestamp'][:19]}] [{level}] {message}{reset}")
+            if self.console:
+                print(f"{color}[{entry['timestamp'][:19]}] [{level}] {self.prefix}{message}{reset}")
             
             # Notify listeners (for real-time updates)
             for listener in self.listeners:
@@ -404,10 +548,18 @@ class Logger:
         """Log an error message."""
         self._write("ERROR", message)
     
+    def set_buffer_size(self, max_buffer_size: int):
+        """Resize the in-memory buffer, keeping the newest entries."""
+        with self._lock:
+            self.max_buffer_size = max_buffer_size
+            self.buffer = deque(self.buffer, maxlen=max_buffer_size)
+    
     def get_recent(self, count: int = 100) -> List[Dict]:
-        """Get the most recent log entries."""
+        """Get the most recent log entries (copies only those, not the buffer)."""
         with self._lock:
-            return list(self.buffer)[-count:]
+            recent = list(itertools.islice(reversed(self.buffer), count))
+        recent.reverse()
+        return recent
     
     def clear(self):
         """Clear the log buffer (does not clear file)."""
@@ -415,833 +567,5281 @@ class Logger:
             self.buffer.clear()
 
 
-# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
-# ║ TASK PARSER - Planning.md Parser                                                         ║
-# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
-
-class TaskParser:
+class LogStore:
     """
-    Parser for planning.md files.
+    Append-only JSON-lines log with a sparse offset index, behind /api/logs.
     
-    ╔═══════════════════════════════════════════════════════════════════════════════════════╗
-    ║ CRITICAL: TASK IDENTIFICATION RULES                                                   ║
-    ╠═══════════════════════════════════════════════════════════════════════════════════════╣
-    ║                                                                                       ║
-    ║ This parser ONLY matches task headers in the EXACT format:                            ║
-    ║                                                                                       ║
-    ║     ### Task [Letter][Number]: Title                                                  ║
-    ║                                                                                       ║
-    ║ EXAMPLES OF VALID TASKS (will be parsed):                                             ║
-    ║     ### Task A1: Fix broken navigation link                                           ║
-    ║     ### Task B2: Update image paths                                                   ║
-    ║     ### Task C10: Refactor CSS structure                                              ║
-    ║                                                                                       ║
-    ║ EXAMPLES OF INVALID (will NOT be parsed as tasks):                                    ║
-    ║     Step 1: Do something          ← Sub-step within a task                            ║
-    ║     **Step 2:** Format something  ← Formatted sub-step                                ║
-    ║     1. First action item          ← Numbered list item                                ║
-    ║     ## Task A1: Wrong heading     ← Wrong heading level (## not ###)                  ║
-    ║     ### Fix something             ← Missing "Task X#:" prefix                         ║
-    ║                                                                                       ║
-    ╚═══════════════════════════════════════════════════════════════════════════════════════╝
+    Files (in logs/):
+    ─────────────────
+    orchestrator.jsonl       one entry per line:
+                             {"seq": 812, "timestamp": "...", "level": "INFO",
+                              "phase": "B", "message": "..."}
+    orchestrator.jsonl.idx   every LOG_INDEX_INTERVAL-th entry as a fixed-size
+                             record (seq, byte offset, epoch seconds)
     
-    The regex pattern: ^###\s+Task\s+([A-Z])(\d+):\s*(.+)$
-    - Must start with "### Task"
-    - Followed by a single uppercase letter (A-Z)
-    - Followed by one or more digits (1-999)
-    - Followed by a colon and the task title
-    """
+    Entries are numbered by "seq", which doubles as the pagination cursor.
+    The index maps a cursor or a time to the block of lines to start from,
+    so a query reads only the blocks it needs instead of the whole file.
     
-    # CRITICAL: This pattern ONLY matches "### Task X#:" format
-    # It explicitly does NOT match "Step X:" or numbered lists
-    TASK_PATTERN = re.compile(
-        r'^###\s+Task\s+([A-Z])(\d+):\s*(.+)$',
-        re.MULTILINE
-    )
+    Queries open their own file handle and read up to the size recorded
+    when they started; they never take the lock that append() holds, so a
+    slow search does not hold up logging.
+    """
     
-    # Phase header pattern for organization (optional)
-    PHASE_PATTERN = re.compile(
-        r'^##\s+(?:PHASE\s+)?([A-Z])[\s:\-]+(.+)$',
-        re.MULTILINE | re.IGNORECASE
-    )
+    INDEX_RECORD = struct.Struct("<QQd")  # seq, byte offset, epoch seconds
+    LEVEL_RANK = {"DEBUG": 0, "INFO": 1, "WARN": 2, "ERROR": 3}
     
-    @classmethod
-    def parse(cls, content: str, logger: Logger) -> List[Task]:
+    def __init__(self, log_dir: Path, index_interval: int = LOG_INDEX_INTERVAL):
         """
-        Parse planning.md content and extract tasks.
+        Initialize LogStore and recover its position from existing files.
         
         Args:
-            content: The full text content of planning.md
-            logger: Logger instance for output
-            
-        Returns:
-            List of Task objects, ordered by appearance in file
+            log_dir: Directory holding the store
+            index_interval: Entries per index record
         """
-        tasks = []
-        lines = content.split('\n')
-        
-        logger.info("Parsing planning.md...")
-        logger.debug(f"File has {len(lines)} lines, {len(content):,} characters")
-        
-        # Find all task matches using the strict pattern
-        for match in cls.TASK_PATTERN.finditer(content):
-            phase_letter = match.group(1).upper()
-            task_num = match.group(2)
-            title = match.group(3).strip()
-            task_id = f"{phase_letter}{task_num}"
-            
-            # Calculate line numbers
-            start_pos = match.start()
-            line_start = content[:start_pos].count('\n') + 1
-            
-            # Find the end of this task (next task header or next phase header or EOF)
-            search_start = match.end()
-            next_task = cls.TASK_PATTERN.search(content, search_start)
-            next_phase = cls.PHASE_PATTERN.search(content, search_start)
-            
-            # Determine end position (whichever comes first)
-            end_positions = [len(content)]  # Default to EOF
-            if next_task:
-                end_positions.append(next_task.start())
-            if next_phase:
-                end_positions.append(next_phase.start())
-            end_pos = min(end_positions)
-            
-            # Extract task content
-            task_content = content[match.start():end_pos].strip()
-            line_end = line_start + task_content.count('\n')
-            
-            # Estimate tokens (rough approximation: 1 token ≈ 4 characters)
-            token_estimate = len(task_content) // CHARS_PER_TOKEN
-            
-            task = Task(
-                id=task_id,
-                title=title,
-                content=task_content,
-                phase=phase_letter,
-                line_start=line_start,
-                line_end=line_end,
-                token_estimate=token_estimate
-            )
-            tasks.append(task)
-            
-            logger.debug(f"  Found Task {task_id}: {title[:50]}{'...' if len(title) > 50 else ''}")
-        
-        # Log parsing summary
-        logger.info(f"Parsed {len(tasks)} tasks from planning.md")
+        self.path = log_dir / LOG_STORE_FILE
+        self.index_path = log_dir / (LOG_STORE_FILE + ".idx")
+        self.index_interval = index_interval
+        self.index: List[Tuple[int, int, float]] = []
+        self.next_seq = 0
+        self.size = 0
+        self._lock = threading.Lock()
+        try:
+            self._recover()
+        except OSError:
+            pass  # Logging must work even if the store cannot be read
+    
+    def _recover(self):
+        """Load the index and find the next seq (rebuilding the index if it does not match)."""
+        if not self.path.exists():
+            self.index_path.unlink(missing_ok=True)
+            return
         
-        # Count tasks per original phase
-        phase_counts: Dict[str, int] = {}
-        for task in tasks:
-            phase_counts[task.phase] = phase_counts.get(task.phase, 0) + 1
+        # Drop a line cut short by a crash, so the next entry starts on its own line
+        with open(self.path, 'rb+') as f:
+            data_end = f.seek(0, os.SEEK_END)
+            tail_start = max(0, data_end - 65536)
+            f.seek(tail_start)
+            tail = f.read()
+            if tail and not tail.endswith(b'\n'):
+                cut = tail.rfind(b'\n')
+                data_end = tail_start + cut + 1 if cut >= 0 else 0
+                f.truncate(data_end)
+        self.size = data_end
         
-        for phase_letter, count in sorted(phase_counts.items()):
-            logger.debug(f"  Original Phase {phase_letter}: {count} tasks")
+        try:
+            raw = self.index_path.read_bytes()
+        except OSError:
+            raw = b""
+        record_size = self.INDEX_RECORD.size
+        index = [self.INDEX_RECORD.unpack_from(raw, i) for i in range(0, len(raw) - record_size + 1, record_size)]
+        valid = all(
+            offset < self.size and seq == position * self.index_interval
+            and (position == 0 or offset > index[position - 1][1])
+            for position, (seq, offset, _) in enumerate(index)
+        )
         
-        return tasks
+        start_seq, start_offset = 0, 0
+        if valid and index:
+            self.index = index
+            start_seq, start_offset = index[-1][0], index[-1][1]
+            if len(raw) % record_size:
+                # Drop a record cut short, so new records stay aligned
+                with open(self.index_path, 'rb+') as f:
+                    f.truncate(len(index) * record_size)
+        elif index or self.size:
+            self.index = []
+            self.index_path.unlink(missing_ok=True)
+        
+        # Walk the unindexed tail (the whole file when rebuilding)
+        seq = start_seq
+        rebuild = not (valid and index)
+        with open(self.path, 'rb') as f:
+            f.seek(start_offset)
+            offset = start_offset
+            for line in f:
+                if rebuild and seq % self.index_interval == 0:
+                    self._add_index(seq, offset, self._entry_time(line))
+                offset += len(line)
+                seq += 1
+        self.next_seq = seq
     
-    @classmethod
-    def split_into_phases(
-        cls,
-        tasks: List[Task],
-        max_tasks: int = MAX_TASKS_PER_PHASE,
-        max_tokens: int = TARGET_TOKENS_PER_PHASE,
-        logger: Optional[Logger] = None
-    ) -> List[Phase]:
+    @staticmethod
+    def _entry_time(line: bytes) -> float:
+        """Get the epoch time of a stored line (0 if unreadable)."""
+        try:
+            return datetime.fromisoformat(json.loads(line)["timestamp"]).timestamp()
+        except (ValueError, KeyError, TypeError):
+            return 0.0
+    
+    def _add_index(self, seq: int, offset: int, timestamp: float):
+        """Append one index record (disk, then memory)."""
+        with open(self.index_path, 'ab') as f:
+            f.write(self.INDEX_RECORD.pack(seq, offset, timestamp))
+        self.index.append((seq, offset, timestamp))
+    
+    def append(self, entry: Dict):
         """
-        Split tasks into phases based on task count and token limits.
+        Number an entry and append it.
         
-        The algorithm:
-        1. Groups tasks by their original phase letter
-        2. Within each group, splits based on max_tasks or max_tokens
-        3. Assigns new sequential phase letters (A, B, C, ...)
+        The line is written before it is indexed, so a failed write leaves
+        neither a torn line nor an index record behind; the entry is then
+        not stored, gets no "seq", and the next entry takes its number.
         
         Args:
-            tasks: List of tasks to split
-            max_tasks: Maximum tasks per phase (default: 6)
-            max_tokens: Maximum tokens per phase (default: 90,000)
-            logger: Optional logger for output
+            entry: Log entry from Logger (gets "seq" once stored)
+        """
+        with self._lock:
+            seq = self.next_seq
+            line = (json.dumps({**entry, "seq": seq}, ensure_ascii=False) + "\n").encode("utf-8")
+            try:
+                with open(self.path, 'ab') as f:
+                    try:
+                        f.write(line)
+                        f.flush()
+                    except OSError:
+                        f.truncate(self.size)  # Drop a partial line
+                        raise
+            except OSError:
+                return
             
-        Returns:
-            List of Phase objects
+            if seq % self.index_interval == 0:
+                try:
+                    self._add_index(seq, self.size, self._entry_time(line))
+                except OSError:
+                    pass  # Queries fall back to the previous block; restart rebuilds the index
+            entry["seq"] = seq
+            self.size += len(line)
+            self.next_seq += 1
+    
+    def query(
+        self,
+        limit: int = 100,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+        level: Optional[str] = None,
+        phase: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        text: Optional[str] = None
+    ) -> Dict:
         """
-        if not tasks:
-            return []
-        
-        # Group tasks by their original phase letter
-        phase_groups: Dict[str, List[Task]] = {}
-        for task in tasks:
-            if task.phase not in phase_groups:
-                phase_groups[task.phase] = []
-            phase_groups[task.phase].append(task)
-        
-        phases: List[Phase] = []
-        phase_counter = 0
+        Find log entries, newest first by default.
         
-        # Process each original phase group
-        for original_phase in sorted(phase_groups.keys()):
-            group_tasks = phase_groups[original_phase]
-            current_batch: List[Task] = []
-            current_tokens = 0
-            
-            for task in group_tasks:
-                # Check if adding this task would exceed limits
-                would_exceed_tasks = len(current_batch) >= max_tasks
-                would_exceed_tokens = (current_tokens + task.token_estimate) > max_tokens and current_batch
-                
-                if would_exceed_tasks or would_exceed_tokens:
-                    # Save current batch as a new phase
-                    new_phase_id = chr(ord('A') + phase_counter)
-                    phases.append(Phase(
-                        id=new_phase_id,
-                        name=f"Phase {new_phase_id}",
-                        tasks=current_batch.copy()
-                    ))
-                    phase_counter += 1
-                    current_batch = []
-                    current_tokens = 0
-                
-                # Add task to current batch
-                current_batch.append(task)
-                current_tokens += task.token_estimate
-            
-            # Save remaining tasks in final batch
-            if current_batch:
-                new_phase_id = chr(ord('A') + phase_counter)
-                phases.append(Phase(
-                    id=new_phase_id,
-                    name=f"Phase {new_phase_id}",
-                    tasks=current_batch.copy()
-                ))
-                phase_counter += 1
+        Without "after" the store is read backwards from "before" (default:
+        the end); with "after" it is read forwards, for tailing ("after"
+        wins over "before"). At most LOG_QUERY_MAX_SCAN entries are read
+        per call; "next" continues where the scan stopped, whether or not
+        it found "limit" matches.
         
-        # Log summary
-        if logger:
-            logger.info(f"Split {len(tasks)} tasks into {len(phases)} phases")
-            for phase in phases:
-                logger.debug(
-                    f"  {phase.name}: {phase.task_count} tasks, "
-                    f"~{phase.token_estimate:,} tokens"
-                )
+        Args:
+            limit: Matching entries to return
+            before: Only entries with a smaller seq (older page)
+            after: Only entries with a larger seq (newer entries)
+            level: Minimum level (DEBUG, INFO, WARN, ERROR)
+            phase: Only entries logged while this phase was current
+            since: Only entries at or after this epoch time
+            until: Only entries at or before this epoch time
+            text: Case-insensitive substring of the message
         
-        return phases
+        Returns:
+            {"entries": [...] (oldest first),
+             "next": {"before": 700} (older page; None when nothing is left)
+                     or {"after": 812} (tailing; always set),
+             "more": True, "scanned": 300, "last_seq": 812}
+        """
+        with self._lock:
+            end = self.size
+            index = self.index[:]
+            last_seq = self.next_seq - 1
+        
+        min_level = self.LEVEL_RANK.get(level, 0) if level else 0
+        needle = text.lower() if text else None
+        # Cheap check on the raw line first; only valid for ASCII needles
+        # that JSON leaves unescaped
+        raw_needle = None
+        if needle and needle.isascii() and json.dumps(needle)[1:-1] == needle:
+            raw_needle = needle.encode("ascii")
+        
+        def matches(line: bytes) -> Optional[Dict]:
+            if raw_needle is not None and raw_needle not in line.lower():
+                return None
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                return None
+            if min_level and self.LEVEL_RANK.get(entry.get("level"), 0) < min_level:
+                return None
+            if phase is not None and entry.get("phase") != phase:
+                return None
+            if needle is not None and needle not in entry.get("message", "").lower():
+                return None
+            if since is not None or until is not None:
+                stamp = datetime.fromisoformat(entry["timestamp"]).timestamp()
+                if (since is not None and stamp < since) or (until is not None and stamp > until):
+                    return None
+            return entry
+        
+        # Blocks between index records: (first seq, start offset, end offset)
+        blocks = [
+            (seq, offset, index[i + 1][1] if i + 1 < len(index) else end)
+            for i, (seq, offset, _) in enumerate(index)
+        ]
+        block_seqs = [record[0] for record in index]
+        block_times = [record[2] for record in index]
+        
+        def read_block(f, i: int) -> List[Tuple[int, bytes]]:
+            first_seq, start, stop = blocks[i]
+            f.seek(start)
+            return [(first_seq + n, line) for n, line in enumerate(f.read(stop - start).splitlines())]
+        
+        def forwards(f):
+            # From the block holding after + 1, or the first that can reach "since"
+            position = max(0, bisect.bisect_right(block_seqs, after + 1) - 1)
+            if since is not None:
+                position = max(position, bisect.bisect_left(block_times, since) - 1)
+            for i in range(position, len(blocks)):
+                if until is not None and block_times[i] > until:
+                    return  # Index times only grow: nothing later is in range
+                for seq, line in read_block(f, i):
+                    if seq > after:
+                        yield seq, line
+        
+        def backwards(f):
+            # From the block holding before - 1, or the last that can reach "until"
+            top = last_seq + 1 if before is None else min(before, last_seq + 1)
+            position = bisect.bisect_right(block_seqs, top - 1) - 1
+            if until is not None:
+                position = min(position, bisect.bisect_right(block_times, until) - 1)
+            for i in range(position, -1, -1):
+                for seq, line in reversed(read_block(f, i)):
+                    if seq < top:
+                        yield seq, line
+                if since is not None and block_times[i] < since:
+                    return  # Older blocks are older still
+        
+        entries: List[Dict] = []
+        scanned = 0
+        cursor = None
+        exhausted = True
+        try:
+            with open(self.path, 'rb') as f:
+                for seq, line in (forwards(f) if after is not None else backwards(f)):
+                    if len(entries) >= limit or scanned >= LOG_QUERY_MAX_SCAN:
+                        exhausted = False
+                        break
+                    cursor = seq
+                    scanned += 1
+                    entry = matches(line)
+                    if entry is not None:
+                        entries.append(entry)
+        except OSError:
+            pass
+        
+        if after is not None:
+            # Tailing always gets a cursor to poll with
+            next_cursor = {"after": after if cursor is None else cursor}
+        else:
+            entries.reverse()
+            next_cursor = None if exhausted or cursor is None else {"before": cursor}
+        return {
+            "entries": entries,
+            "next": next_cursor,
+            "more": not exhausted,
+            "scanned": scanned,
+            "last_seq": last_seq
+        }
 
 
 # ╔══════════════════════════════════════════════════════════════════════════════════════════╗
-# ║ STATUS PROTOCOL - Claude Code Communication                                              ║
+# ║ CONFIGURATION - Layered, Validated, Hot-Reloaded                                         ║
 # ╚══════════════════════════════════════════════════════════════════════════════════════════╝
 
-class StatusProtocol:
+class LayeredConfig(dict):
     """
-    Protocol for bidirectional communication between orchestrator and Claude Code.
+    Configuration merged from layers, each overriding the ones before it.
     
-    Communication Flow:
-    ══════════════════
+    Layers:
+    ───────
+    - defaults: built-in values (see Orchestrator._load_config)
+    - file:     config.json, re-read by reload() whenever it changes
+    - env:      AI_WORKFLOW_<KEY> variables, values parsed as JSON
+                (e.g. AI_WORKFLOW_AUTO_CASCADE_DELAY=2)
+    - cli:      command-line options
+    - runtime:  POST /api/config, kept until the orchestrator restarts
     
-    ┌─────────────────────────────────────────────────────────────────────────────┐
-    │                                                                             │
-    │   ORCHESTRATOR                              CLAUDE CODE                     │
-    │   ────────────                              ──────────                      │
-    │        │                                         │                          │
-    │        │  1. Writes current-command.md           │                          │
-    │        │ ───────────────────────────────────────►│                          │
-    │        │                                         │                          │
-    │        │                                         │  2. Reads tasks          │
-    │        │                                         │  3. Executes work        │
-    │        │                                         │  4. Commits & pushes     │
-    │        │                                         │                          │
-    │        │         5. Updates status.json          │                          │
-    │        │ ◄───────────────────────────────────────│                          │
-    │        │                                         │                          │
-    │        │  6. Detects change (polling)            │                          │
-    │        │  7. Runs tests                          │                          │
-    │        │  8. Starts next phase                   │                          │
-    │        │                                         │                          │
-    └─────────────────────────────────────────────────────────────────────────────┘
+    The object itself is the merged dictionary. Every component holds this
+    one instance and reads settings when it uses them, so a reload reaches
+    them without any plumbing; code that caches a setting subscribes to
+    change notifications instead.
     
-    Status File Format (status.json):
-    ═════════════════════════════════
-    {
-        "version": "4.1.0",
-        "protocol": "v1",
-        "state": "idle|running|completed|error",
-        "current_phase": "A",
-        "phases_completed": ["A", "B"],
-        "files_modified": ["file1.html", "file2.css"],
-        "errors": [],
-        "last_updated": "2026-01-21T12:00:00.000Z"
-    }
+    Validation:
+    ───────────
+    Values must have the type of their default and pass CONFIG_RULES.
+    Unknown keys (typos) and bad values are logged and ignored; on reload a
+    bad value keeps the one already in effect. Keys marked "restart" keep
+    their startup value until the orchestrator restarts.
     """
     
-    @staticmethod
-    def create_initial_status(workflow_dir: Path) -> Dict:
+    LAYERS = ("defaults", "file", "env", "cli", "runtime")
+    ENV_PREFIX = "AI_WORKFLOW_"
+    
+    def __init__(
+        self,
+        defaults: Dict,
+        config_file: Path,
+        logger: Logger,
+        overrides: Optional[Dict] = None,
+        caps: Optional[Dict] = None,
+        environ: Optional[Dict[str, str]] = None
+    ):
         """
-        Create the initial status.json file.
+        Initialize LayeredConfig and write missing defaults to config.json.
         
         Args:
-            workflow_dir: Path to .ai-workflow directory
-            
-        Returns:
-            The status dictionary that was written
+            defaults: Built-in settings; their keys are the known settings
+            config_file: Path to config.json
+            logger: Logger instance
+            overrides: Command-line settings
+            caps: Upper limits applied over the merged values (host mode);
+                a value of 0 ("no limit") is capped too
+            environ: Environment to read (default: os.environ)
         """
-        status = {
-            "version": VERSION,
-            "protocol": "v1",
-            "last_updated": datetime.now().isoformat(),
-            "state": "idle",
-            "current_phase": None,
-            "phases_completed": [],
-            "files_modified": [],
-            "errors": [],
-            "messages": []
-        }
-        
-        status_file = workflow_dir / STATUS_FILE
-        with open(status_file, 'w', encoding='utf-8') as f:
-            json.dump(status, f, indent=2)
-        
-        return status
+        super().__init__()
+        self.config_file = config_file
+        self.logger = logger
+        self.caps = dict(caps or {})
+        self.layers: Dict[str, Dict] = {name: {} for name in self.LAYERS}
+        self.layers["defaults"] = dict(defaults)
+        self.errors: Dict[str, List[str]] = {}           # source → problems found on last read
+        self.pending_restart: Dict[str, Any] = {}        # restart-only key → value waiting for it
+        self._listeners: List[Tuple[Optional[frozenset], Callable]] = []
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.RLock()
+        
+        saved, saved_text = self._read_file()
+        self.layers["file"] = self._validate(saved or {}, "config.json")
+        self.layers["env"] = self._validate(
+            self._read_env(os.environ if environ is None else environ), "environment"
+        )
+        self.layers["cli"] = self._validate(overrides or {}, "command line")
+        self.update(self._merge())
+        
+        # Show every setting in config.json; a file that failed to parse is left alone
+        if saved is not None or saved_text is None:
+            content = json.dumps({**self.layers["defaults"], **(saved or {})}, indent=2)
+            if content != saved_text:
+                with open(config_file, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                self._stamp = self._file_stamp()
     
-    @staticmethod
-    def read_status(workflow_dir: Path) -> Optional[Dict]:
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        """Get (mtime_ns, size) of config.json, or None if it is missing."""
+        try:
+            stat = self.config_file.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def _read_file(self) -> Tuple[Optional[Dict], Optional[str]]:
         """
-        Read the current status.json file.
+        Read config.json.
         
-        Args:
-            workflow_dir: Path to .ai-workflow directory
-            
         Returns:
-            Status dictionary or None if file doesn't exist or is invalid
+            (settings, text); settings is None if the file is missing or
+            not a JSON object, text is None if it is missing
         """
-        status_file = workflow_dir / STATUS_FILE
-        if not status_file.exists():
-            return None
+        self._stamp = self._file_stamp()
+        try:
+            text = self.config_file.read_text(encoding='utf-8')
+        except OSError:
+            return None, None
         
         try:
-            with open(status_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return None
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            self.logger.error(f"Config: {self.config_file.name} is not valid JSON ({e})")
+            return None, text
+        if not isinstance(data, dict):
+            self.logger.error(f"Config: {self.config_file.name} must contain a JSON object")
+            return None, text
+        return data, text
     
-    @staticmethod
-    def update_status(workflow_dir: Path, updates: Dict):
+    def _read_env(self, environ: Dict[str, str]) -> Dict:
+        """Collect AI_WORKFLOW_<KEY> variables for known keys."""
+        values = {}
+        for key in self.layers["defaults"]:
+            raw = environ.get(self.ENV_PREFIX + key.upper())
+            if raw is None:
+                continue
+            try:
+                values[key] = json.loads(raw)
+            except json.JSONDecodeError:
+                values[key] = raw  # Plain strings need no JSON quotes
+        return values
+    
+    def _check(self, key: str, value: Any) -> Optional[str]:
         """
-        Update the status.json file with new values.
+        Validate one setting.
         
-        Args:
-            workflow_dir: Path to .ai-workflow directory
-            updates: Dictionary of values to update
+        Returns:
+            Problem description, or None if the value is acceptable
         """
-        status_file = workflow_dir / STATUS_FILE
-        
-        # Read current status
-        status = StatusProtocol.read_status(workflow_dir) or {}
-        
-        # Apply updates
-        status.update(updates)
-        status["last_updated"] = datetime.now().isoformat()
-        
-        # Write back
-        with open(status_file, 'w', encoding='utf-8') as f:
-            json.dump(status, f, indent=2)
+        defaults = self.layers["defaults"]
+        if key not in defaults:
+            import difflib
+            
+            close = difflib.get_close_matches(key, defaults, n=1)
+            return f"unknown setting '{key}'" + (f" (did you mean '{close[0]}'?)" if close else "")
+        
+        default = defaults[key]
+        rule = CONFIG_RULES.get(key, {})
+        is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if rule.get("type") == "number" or isinstance(default, float):
+            expected, valid = "a number", is_number
+        elif isinstance(default, bool):
+            expected, valid = "true or false", isinstance(value, bool)
+        elif isinstance(default, int):
+            expected, valid = "an integer", is_number and isinstance(value, int)
+        else:
+            expected, valid = f"a {type(default).__name__}", isinstance(value, type(default))
+        if not valid:
+            return f"'{key}' must be {expected}, got {self._shown(key, value)}"
+        
+        if is_number:
+            low, high = rule.get("min", 0), rule.get("max")
+            if value < low or (high is not None and value > high):
+                bounds = f"between {low} and {high}" if high is not None else f"at least {low}"
+                return f"'{key}' must be {bounds}, got {value}"
+        if "choices" in rule and value not in rule["choices"]:
+            return f"'{key}' must be one of {', '.join(rule['choices'])}, got {json.dumps(value)}"
+        return None
     
     @staticmethod
-    def get_file_hash(workflow_dir: Path) -> str:
+    def _shown(key: str, value: Any) -> str:
+        """Format a value for messages, masking secrets."""
+        if CONFIG_RULES.get(key, {}).get("secret") and value:
+            return '"***"'
+        return json.dumps(value)
+    
+    def _validate(self, values: Dict, source: str, previous: Optional[Dict] = None) -> Dict:
         """
-        Get MD5 hash of status.json for change detection.
-        
-        The orchestrator uses this to detect when Claude Code has
-        updated the status file.
+        Keep the valid settings of a layer.
         
         Args:
-            workflow_dir: Path to .ai-workflow directory
-            
+            values: Settings as read from the source
+            source: Source name for messages
+            previous: The layer as it was before (a bad value keeps its old one)
+        
         Returns:
-            MD5 hash string or empty string if file doesn't exist
+            Validated layer
         """
-        status_file = workflow_dir / STATUS_FILE
-        if not status_file.exists():
-            return ""
-        
-        try:
-            with open(status_file, 'rb') as f:
-                return hashlib.md5(f.read()).hexdigest()
-        except IOError:
-            return ""
-
-
-# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
-# ║ GIT MANAGER - Git Integration                                                            ║
-# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
-
-class GitManager:
-    """
-    Git integration for automatic commits and pushes.
+        layer = {}
+        problems = []
+        for key, value in values.items():
+            problem = self._check(key, value)
+            if problem is None:
+                layer[key] = value
+                continue
+            problems.append(problem)
+            if previous is not None and key in previous:
+                layer[key] = previous[key]
+                self.logger.warn(f"Config ({source}): {problem}; keeping {self._shown(key, previous[key])}")
+            else:
+                self.logger.warn(f"Config ({source}): {problem}; ignored")
+        self.errors[source] = problems
+        return layer
     
-    Features:
-    - Detect if project is a git repository
-    - Stage all changes (git add -A)
-    - Create semantic commits with phase information
-    - Push to remote repository
-    - Track modified files
-    """
+    def _merge(self) -> Dict:
+        """Merge the layers and apply the caps."""
+        merged = {}
+        for name in self.LAYERS:
+            merged.update(self.layers[name])
+        for key, cap in self.caps.items():
+            value = merged.get(key) or cap  # 0 means "no limit", so the cap applies
+            merged[key] = min(value, cap)
+        return merged
     
-    def __init__(self, project_path: Path, logger: Logger):
+    def _apply(self, source: str) -> Dict[str, Tuple[Any, Any]]:
         """
-        Initialize GitManager.
+        Re-merge after a layer changed and notify subscribers.
         
         Args:
-            project_path: Path to project root
-            logger: Logger instance
-        """
-        self.project_path = project_path
-        self.logger = logger
-        self.is_git_repo = (project_path / ".git").exists()
-        
-        if not self.is_git_repo:
-            self.logger.warn("Project is not a git repository - git features disabled")
-    
-    def _run_git(self, *args, timeout: int = 60) -> Tuple[bool, str]:
-        """
-        Run a git command.
+            source: What changed (passed to subscribers)
         
-        Args:
-            *args: Git command arguments
-            timeout: Command timeout in seconds
-            
         Returns:
-            Tuple of (success: bool, output: str)
+            {key: (old, new)} for the settings that took effect
         """
-        try:
-            result = subprocess.run(
-                ["git"] + list(args),
-                cwd=self.project_path,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-            output = result.stdout + result.stderr
-            return result.returncode == 0, output.strip()
-        except subprocess.TimeoutExpired:
-            return False, "Git command timed out"
-        except FileNotFoundError:
-            return False, "Git executable not found"
-        except Exception as e:
-            return False, str(e)
+        with self._lock:
+            merged = self._merge()
+            changes = {}
+            for key, new in merged.items():
+                old = self.get(key)
+                if CONFIG_RULES.get(key, {}).get("restart"):
+                    if new == old:
+                        self.pending_restart.pop(key, None)
+                    elif self.pending_restart.get(key, old) != new:
+                        self.pending_restart[key] = new
+                        self.logger.warn(f"Config: '{key}' changed ({source}); restart to apply it")
+                    continue
+                if new != old:
+                    changes[key] = (old, new)
+                    self[key] = new
+            listeners = list(self._listeners)
+        
+        for key, (old, new) in changes.items():
+            self.logger.info(f"Config: {key} = {self._shown(key, new)} (was {self._shown(key, old)}, {source})")
+        
+        for keys, callback in listeners:
+            relevant = {key: change for key, change in changes.items() if keys is None or key in keys}
+            if relevant:
+                try:
+                    callback(relevant, source)
+                except Exception as e:
+                    self.logger.error(f"Config listener failed: {e}")
+        return changes
     
-    def get_modified_files(self) -> List[str]:
+    def subscribe(self, callback: Callable[[Dict, str], None], keys: Optional[List[str]] = None):
         """
-        Get list of modified files in the working directory.
+        Get notified when settings change.
         
-        Returns:
-            List of modified file paths relative to project root
+        Args:
+            callback: Called with ({key: (old, new)}, source)
+            keys: Only these settings (default: all)
         """
-        if not self.is_git_repo:
-            return []
-        
-        success, output = self._run_git("status", "--porcelain")
-        if not success:
-            return []
-        
-        files = []
-        for line in output.strip().split('\n'):
-            if line.strip():
-                # Format: "XY filename" where XY is status code
-                parts = line.split(maxsplit=1)
-                if len(parts) == 2:
-                    files.append(parts[1].strip())
-        
-        return files
+        with self._lock:
+            self._listeners.append((frozenset(keys) if keys else None, callback))
     
-    def stage_all(self) -> bool:
+    def reload(self) -> Dict[str, Tuple[Any, Any]]:
         """
-        Stage all changes (git add -A).
+        Re-read config.json if it changed since the last read.
+        
+        A file that no longer parses is reported and the previous file
+        layer stays in effect.
         
         Returns:
-            True if successful
+            {key: (old, new)} for the settings that took effect
         """
-        if not self.is_git_repo:
-            return False
-        
-        success, output = self._run_git("add", "-A")
-        if success:
-            self.logger.info("Staged all changes")
-        else:
-            self.logger.error(f"Failed to stage changes: {output}")
+        if self._file_stamp() == self._stamp:
+            return {}
         
-        return success
+        saved, _ = self._read_file()
+        if saved is None:
+            return {}
+        with self._lock:
+            self.layers["file"] = self._validate(saved, "config.json", previous=self.layers["file"])
+        return self._apply("config.json")
     
-    def commit(self, message: str) -> Optional[str]:
+    def set_runtime(self, values: Dict) -> Tuple[Dict[str, Tuple[Any, Any]], List[str]]:
         """
-        Create a commit with the given message.
+        Set runtime overrides (POST /api/config).
         
         Args:
-            message: Commit message
-            
+            values: {key: value}; None removes the key's runtime override
+        
         Returns:
-            Commit hash if successful, None otherwise
+            ({key: (old, new)} for settings that took effect, problems)
         """
-        if not self.is_git_repo:
-            return None
-        
-        success, output = self._run_git("commit", "-m", message)
-        
-        if success:
-            # Extract commit hash from output
-            hash_match = re.search(r'\[[\w\s]+\s+([a-f0-9]+)\]', output)
-            commit_hash = hash_match.group(1) if hash_match else "unknown"
-            self.logger.info(f"Committed: {commit_hash[:8]} - {message[:50]}...")
-            return commit_hash
-        else:
-            if "nothing to commit" in output:
-                self.logger.info("Nothing to commit")
-                return None
-            self.logger.error(f"Failed to commit: {output}")
-            return None
+        problems = []
+        with self._lock:
+            for key, value in values.items():
+                if value is None:
+                    self.layers["runtime"].pop(key, None)
+                    continue
+                if CONFIG_RULES.get(key, {}).get("locked"):
+                    problems.append(f"'{key}' can only be set in config.json, the environment or the command line")
+                    continue
+                problem = self._check(key, value)
+                if problem:
+                    problems.append(problem)
+                else:
+                    self.layers["runtime"][key] = value
+        return self._apply("runtime"), problems
     
-    def push(self) -> bool:
+    def public(self, values: Optional[Dict] = None) -> Dict:
         """
-        Push to remote repository.
+        Get settings safe to show through the API (secrets masked).
         
-        Returns:
-            True if successful
+        Args:
+            values: Settings to mask (default: the merged config)
         """
-        if not self.is_git_repo:
-            return False
-        
-        success, output = self._run_git("push", timeout=120)
-        
-        if success:
-            self.logger.info("Pushed to remote")
-        else:
-            self.logger.warn(f"Failed to push: {output}")
-        
-        return success
+        values = self if values is None else values
+        return {
+            key: "***" if CONFIG_RULES.get(key, {}).get("secret") and value else value
+            for key, value in values.items()
+        }
     
-    def commit_and_push(self, phase_id: str, description: str) -> Optional[str]:
+    def describe(self) -> Dict:
         """
-        Stage, commit, and push in one operation.
+        Get where each setting comes from, for GET /api/config/layers.
         
-        Args:
-            phase_id: Phase identifier for commit message
-            description: Description for commit message
-            
         Returns:
-            Commit hash if successful, None otherwise
+            {"sources": {"auto_cascade_delay": "runtime", ...},
+             "layers": {"file": {...}, "env": {...}, "cli": {...}, "runtime": {...}},
+             "pending_restart": {...}, "errors": {"config.json": [...]}}
         """
-        if not self.is_git_repo:
-            return None
-        
-        # Check for changes
-        modified = self.get_modified_files()
-        if not modified:
-            self.logger.info("No changes to commit")
-            return None
-        
-        self.logger.info(f"Committing {len(modified)} modified files")
-        
-        # Stage all
-        if not self.stage_all():
-            return None
-        
-        # Commit with semantic message
-        message = f"fix: Phase {phase_id} - {description}"
-        commit_hash = self.commit(message)
-        
-        # Push if commit succeeded
-        if commit_hash:
-            self.push()
-        
-        return commit_hash
+        with self._lock:
+            sources = {}
+            for name in self.LAYERS:
+                for key in self.layers[name]:
+                    sources[key] = name
+            return {
+                "sources": sources,
+                "layers": {name: self.public(self.layers[name]) for name in self.LAYERS[1:]},
+                "caps": dict(self.caps),
+                "pending_restart": dict(self.pending_restart),
+                "errors": {source: list(problems) for source, problems in self.errors.items() if problems}
+            }
 
 
 # ╔══════════════════════════════════════════════════════════════════════════════════════════╗
-# ║ TEST RUNNER - Built-in Testing Framework                                                 ║
+# ║ METRICS - Counters, Gauges and Histograms for /metrics                                   ║
 # ╚══════════════════════════════════════════════════════════════════════════════════════════╝
 
-class TestRunner:
+class Metrics:
     """
-    Built-in testing framework for validating changes.
+    In-process metrics registry rendered in Prometheus text format.
     
-    Tests Performed:
-    ────────────────
-    1. Internal Link Validation - Check all internal hrefs point to existing files
-    2. HTML Structure Validation - Check for DOCTYPE, title, charset
-    3. Image Reference Check - Verify all referenced images exist
-    4. CSS Validation - Basic CSS syntax validation
+    Recording:
+    ──────────
+    - inc(name, value, **labels)     counters (only go up)
+    - set(name, value, **labels)     gauges
+    - observe(name, value, **labels) histograms (METRIC_BUCKETS, seconds)
+    - time(name, **labels)           context manager around observe()
+    - add_collector(fn)              gauges computed at scrape time
     
-    Test results are saved to test-results/ directory and included in session data.
+    Every metric is declared in METRIC_DEFINITIONS (type and help text).
+    When disabled (config "metrics": false) every recording call returns
+    at its first line and time() hands out a shared no-op context, so the
+    instrumented hot paths pay a method call and nothing else.
     """
     
-    def __init__(
+    def __init__(self, enabled: bool = True, buckets: Tuple[float, ...] = METRIC_BUCKETS):
+        """
+        Initialize Metrics.
+        
+        Args:
+            enabled: Record anything at all
+            buckets: Histogram upper bounds
+        """
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._values: Dict[str, Dict[Tuple, Any]] = {}  # name → label tuple → value or histogram
+        self._collectors: List[Callable[[], List[Tuple[str, Dict, float]]]] = []
+        self._lock = threading.Lock()
+        self._noop = contextlib.nullcontext()
+    
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add to a counter."""
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+    
+    def set(self, name: str, value: float, **labels):
+        """Set a gauge."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._values.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+    
+    def observe(self, name: str, value: float, **labels):
+        """Add one observation to a histogram."""
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                # Per-bucket counts (the last one is +Inf), sum, count
+                histogram = series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+    
+    def time(self, name: str, **labels):
+        """
+        Time a block into a histogram.
+        
+        Example:
+            with metrics.time("orchestrator_session_save_seconds"):
+                write()
+        """
+        if not self.enabled:
+            return self._noop
+        return _MetricTimer(self, name, labels)
+    
+    def add_collector(self, collector: Callable[[], List[Tuple[str, Dict, float]]]):
+        """Register a function returning [(gauge name, labels, value)] at scrape time."""
+        self._collectors.append(collector)
+    
+    def samples(self) -> Dict[str, List[Tuple[str, Dict, float]]]:
+        """
+        Get every sample, grouped by metric.
+        
+        Returns:
+            {"orchestrator_git_command_seconds":
+                [("orchestrator_git_command_seconds_bucket", {"command": "add", "le": "0.01"}, 3), ...]}
+        """
+        families: Dict[str, List[Tuple[str, Dict, float]]] = {}
+        with self._lock:
+            for name, series in self._values.items():
+                samples = families.setdefault(name, [])
+                for key, value in series.items():
+                    labels = dict(key)
+                    if not isinstance(value, list):
+                        samples.append((name, labels, value))
+                        continue
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                        cumulative += bucket_count
+                        le = "+Inf" if bound == float("inf") else repr(float(bound))
+                        samples.append((f"{name}_bucket", {**labels, "le": le}, cumulative))
+                    samples.append((f"{name}_sum", labels, total))
+                    samples.append((f"{name}_count", labels, count))
+        
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    families.setdefault(name, []).append((name, labels, value))
+            except Exception:
+                pass  # A failing collector must not break the scrape
+        return families
+    
+    def render(self, labels: Optional[Dict[str, str]] = None) -> str:
+        """Render this registry in Prometheus text format (see render_metrics())."""
+        return render_metrics([(self, labels or {})])
+
+
+class _MetricTimer:
+    """Context manager behind Metrics.time()."""
+    
+    __slots__ = ("metrics", "name", "labels", "started")
+    
+    def __init__(self, metrics: Metrics, name: str, labels: Dict):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+def render_metrics(registries: List[Tuple[Metrics, Dict[str, str]]]) -> str:
+    """
+    Render registries in Prometheus text exposition format (version 0.0.4).
+    
+    Args:
+        registries: (registry, labels added to all its samples) pairs; host
+            mode passes one per project with {"project": id}
+    
+    Returns:
+        Exposition text, one # HELP / # TYPE block per metric
+    """
+    def escape(value: Any) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    
+    families: Dict[str, List[str]] = {}
+    for registry, extra in registries:
+        for name, samples in registry.samples().items():
+            lines = families.setdefault(name, [])
+            for sample, labels, value in samples:
+                labels = {**extra, **labels}
+                label_text = ",".join(f'{key}="{escape(val)}"' for key, val in labels.items())
+                lines.append(f"{sample}{{{label_text}}} {float(value)!r}" if label_text
+                             else f"{sample} {float(value)!r}")
+    
+    output = []
+    for name in sorted(families):
+        kind, help_text = METRIC_DEFINITIONS.get(name, ("untyped", ""))
+        output.append(f"# HELP {name} {help_text}")
+        output.append(f"# TYPE {name} {kind}")
+        output.extend(families[name])
+    return "\n".join(output) + "\n"
+
+
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ TRACING - Phase Handoff Timelines                                                        ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+class Tracer:
+    """
+    Records where a phase's handoff time goes, as spans on a timeline.
+    
+    A handoff starts when the agent's "completed" is detected (begin()) and
+    ends once the next command file is written or the workflow stops
+    cascading (end()). Spans recorded in between land in the phase's
+    Phase.trace, which is saved with the session:
+    
+    Spans:
+    ──────
+    detect          agent wrote "completed" → orchestrator noticed it
+    git <command>   every git subprocess (stage, commit, diffstat, ...)
+    git push        background pushes, attributed to the phases they carry
+    test <suite>    each test suite (inside one "tests" span)
+    session save    serializing and writing session.json
+    cascade wait    auto_cascade_delay plus scheduler latency
+    command write   rendering and writing the next phase's command file
+    handoff         the whole handoff, detection to end()
+    
+    Span format (see chrome_trace() for the export):
+        {"name": "git commit-tree", "cat": "git", "ts": 1768996800.123456,
+         "dur": 0.004213, "thread": "orchestrator-loop", "args": {...}}
+    
+    Spans come from the loop and from the push-queue thread, so appends
+    are locked. When disabled (config "tracing": false) nothing is recorded.
+    """
+    
+    def __init__(self, enabled: bool = True, max_spans: int = TRACE_MAX_SPANS):
+        """
+        Initialize Tracer.
+        
+        Args:
+            enabled: Record anything at all
+            max_spans: Spans kept per phase; later ones are dropped
+        """
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self.active: Optional[str] = None                # phase whose handoff is being traced
+        self._began = 0.0
+        self._traces: Dict[str, List[Dict]] = {}         # phase id → its Phase.trace list
+        self._lock = threading.Lock()
+        self._noop = contextlib.nullcontext()
+    
+    def begin(self, phase: Phase):
+        """Start the handoff trace of a phase (replacing one from an earlier attempt)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            phase.trace = []
+            self._traces[phase.id] = phase.trace
+            self.active = phase.id
+            self._began = time.time()
+    
+    def end(self):
+        """Close the active handoff with its "handoff" span."""
+        if self.active is None:
+            return
+        now = time.time()
+        self.record("handoff", self._began, now - self._began, "handoff")
+        self.active = None
+    
+    def record(
         self,
-        project_path: Path,
-        workflow_dir: Path,
-        logger: Logger,
-        config: Dict
+        name: str,
+        start: float,
+        duration: float,
+        cat: str = "orchestrator",
+        phase_id: Optional[str] = None,
+        **args
     ):
         """
-        Initialize TestRunner.
+        Add a finished span.
+        
+        Args:
+            name: Span name
+            start: Start time (time.time())
+            duration: Seconds
+            cat: Category (git, tests, session, ...)
+            phase_id: Phase the span belongs to (default: the active handoff)
+            **args: Details shown with the span
+        """
+        if not self.enabled:
+            return
+        span = {
+            "name": name,
+            "cat": cat,
+            "ts": round(start, 6),
+            "dur": round(max(duration, 0.0), 6),
+            "thread": threading.current_thread().name
+        }
+        if args:
+            span["args"] = args
+        with self._lock:
+            trace = self._traces.get(phase_id or self.active)
+            if trace is not None and len(trace) < self.max_spans:
+                trace.append(span)
+    
+    def span(self, name: str, cat: str = "orchestrator", **args):
+        """
+        Time a block into the active handoff (no-op outside one).
+        
+        Example:
+            with tracer.span("command write", next_phase="B"):
+                write()
+        """
+        if not self.enabled or self.active is None:
+            return self._noop
+        return _TraceSpan(self, name, cat, args)
+
+
+class _TraceSpan:
+    """Context manager behind Tracer.span()."""
+    
+    __slots__ = ("tracer", "name", "cat", "args", "started", "started_wall")
+    
+    def __init__(self, tracer: Tracer, name: str, cat: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+    
+    def __enter__(self):
+        self.started_wall = time.time()
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.started_wall, time.perf_counter() - self.started, self.cat, **self.args)
+        return False
+
+
+def chrome_trace(phase: Dict) -> Dict:
+    """
+    Export a phase's spans as Chrome trace-event JSON.
+    
+    The result loads in chrome://tracing and ui.perfetto.dev: one track
+    per thread, spans as complete ("X") events in microseconds. otherData
+    adds up the spans by name, largest first, as a per-stage breakdown.
+    
+    Args:
+        phase: Phase dictionary (Phase.to_dict() or the session snapshot)
+    
+    Returns:
+        {"traceEvents": [...], "displayTimeUnit": "ms",
+         "otherData": {"phase": "A", "spans": 24, "handoff_ms": 2140.5,
+                       "totals_ms": {"cascade wait": 2001.3, "tests": 310.8, ...}}}
+    """
+    spans = phase.get("trace") or []
+    threads: Dict[str, int] = {}
+    events = [{
+        "name": "process_name", "ph": "M", "pid": 1, "tid": 0,
+        "args": {"name": f"{phase.get('name') or phase.get('id')} handoff"}
+    }]
+    totals: Dict[str, float] = {}
+    handoff_ms = None
+    
+    for span in spans:
+        tid = threads.setdefault(span.get("thread") or "main", len(threads) + 1)
+        events.append({
+            "name": span["name"],
+            "cat": span.get("cat", "orchestrator"),
+            "ph": "X",
+            "ts": round(span["ts"] * 1e6),
+            "dur": round(span["dur"] * 1e6),
+            "pid": 1,
+            "tid": tid,
+            "args": span.get("args", {})
+        })
+        if span["name"] == "handoff":
+            handoff_ms = round(span["dur"] * 1000, 1)
+        else:
+            totals[span["name"]] = totals.get(span["name"], 0.0) + span["dur"] * 1000
+    
+    for name, tid in threads.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}})
+    
+    return {
+        "traceEvents": events,
+        "displayTimeUnit": "ms",
+        "otherData": {
+            "phase": phase.get("id"),
+            "spans": len(spans),
+            "handoff_ms": handoff_ms,
+            "totals_ms": {name: round(ms, 1) for name, ms in sorted(totals.items(), key=lambda item: -item[1])}
+        }
+    }
+
+
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ DIAGNOSTICS - Live Debug Endpoints                                                       ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+class ProfileCapture:
+    """
+    A time-bounded cProfile capture of loop jobs and API requests.
+    
+    cProfile only sees the thread that enables it, so instead of profiling
+    threads from outside, each unit of work (a scheduler job, an API
+    request) runs under its own Profile while the capture is open, and
+    report() merges them. Work already profiled on this thread (nested
+    calls) is not profiled twice.
+    """
+    
+    def __init__(self, seconds: float):
+        """
+        Initialize ProfileCapture.
+        
+        Args:
+            seconds: How long the capture stays open
+        """
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.deadline = self.started + seconds
+        self.units = 0
+        self._profiles: List[Any] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    @property
+    def open(self) -> bool:
+        """True until the capture's time is up."""
+        return time.monotonic() < self.deadline
+    
+    def start(self) -> Optional[Any]:
+        """
+        Start profiling the current thread.
+        
+        Returns:
+            The running cProfile.Profile (pass it to stop()), or None if
+            the capture is closed or this thread is already profiled
+        """
+        if not self.open or getattr(self._local, "profile", None) is not None or sys.getprofile() is not None:
+            return None
+        import cProfile
+        
+        profile = cProfile.Profile()
+        self._local.profile = profile
+        profile.enable()
+        return profile
+    
+    def stop(self, profile: Optional[Any]):
+        """Stop a profile returned by start() and keep it for the report."""
+        if profile is None:
+            return
+        profile.disable()
+        self._local.profile = None
+        with self._lock:
+            self._profiles.append(profile)
+            self.units += 1
+    
+    def call(self, callback: Callable, *args) -> Any:
+        """Run a callback under the capture."""
+        profile = self.start()
+        try:
+            return callback(*args)
+        finally:
+            self.stop(profile)
+    
+    def report(self, sort: str = "cumulative", limit: int = 30) -> Dict:
+        """
+        Merge the captured profiles.
+        
+        Args:
+            sort: pstats sort key (cumulative, tottime, calls, ...)
+            limit: Functions listed
+        
+        Returns:
+            {"seconds": 5, "units": 42, "sort": "cumulative",
+             "functions": [{"function": "orchestrator.py:7096(_check_status)", "calls": 98,
+                            "primitive_calls": 98, "tottime_ms": 3.1, "cumtime_ms": 41.7}, ...],
+             "text": "<pstats table>"}
+        """
+        import io
+        import pstats
+        
+        with self._lock:
+            profiles = list(self._profiles)
+        result = {"seconds": self.seconds, "units": len(profiles), "sort": sort, "functions": [], "text": ""}
+        if not profiles:
+            return result
+        
+        stream = io.StringIO()
+        stats = pstats.Stats(profiles[0], stream=stream)
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.strip_dirs().sort_stats(sort)
+        stats.print_stats(limit)
+        
+        for func in stats.fcn_list[:limit]:
+            primitive, calls, tottime, cumtime, _ = stats.stats[func]
+            result["functions"].append({
+                "function": pstats.func_std_string(func),
+                "calls": calls,
+                "primitive_calls": primitive,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3)
+            })
+        result["text"] = stream.getvalue()
+        return result
+
+
+class Diagnostics:
+    """
+    Opt-in live diagnosis for a running orchestrator (/api/debug/...).
+    
+    Endpoints:
+    ──────────
+    threads   stack of every thread in the process (sys._current_frames)
+    profile   cProfile capture of loop jobs and API requests for ?seconds=N
+    memory    tracemalloc top-N allocation sites (?limit=N&group=lineno);
+              the first call starts tracing, later calls also report the
+              growth since the previous one, ?stop=1 stops tracing
+    
+    Disabled by default ("debug_endpoints": false answers 404). Requests
+    must carry "debug_token" in an X-Debug-Token or "Authorization: Bearer"
+    header; without a configured token every request is refused. Neither
+    setting can be changed through POST /api/config.
+    """
+    
+    PROFILE_SORTS = ("cumulative", "tottime", "calls", "ncalls", "time")
+    MEMORY_GROUPS = ("lineno", "filename", "traceback")
+    
+    def __init__(self, config: Dict, logger: Logger, scheduler: "ScheduleView"):
+        """
+        Initialize Diagnostics.
+        
+        Args:
+            config: Configuration dictionary
+            logger: Logger instance
+            scheduler: The orchestrator's scheduler (loop jobs are profiled there)
+        """
+        self.config = config
+        self.logger = logger
+        self.scheduler = scheduler
+        self.capture: Optional[ProfileCapture] = None   # open profile capture, if any
+        self._memory_snapshot = None                     # last tracemalloc snapshot (for growth)
+        self._lock = threading.Lock()
+    
+    def authorize(self, headers) -> Tuple[int, Optional[str]]:
+        """
+        Check whether a request may use the debug endpoints.
+        
+        Args:
+            headers: Request headers
+        
+        Returns:
+            (0, None) if allowed, else (HTTP status, error message)
+        """
+        import hmac
+        
+        if not self.config.get("debug_endpoints"):
+            return 404, "Debug endpoints are disabled (config: debug_endpoints)"
+        token = self.config.get("debug_token", "")
+        if not token:
+            return 403, "Set debug_token to use the debug endpoints"
+        
+        given = headers.get("X-Debug-Token", "")
+        authorization = headers.get("Authorization", "")
+        if not given and authorization.startswith("Bearer "):
+            given = authorization[len("Bearer "):]
+        if not hmac.compare_digest(given.strip().encode(), token.encode()):
+            self.logger.warn("Debug endpoint request with a missing or wrong token")
+            return 401, "Missing or wrong debug token"
+        return 0, None
+    
+    def thread_stacks(self) -> Dict:
+        """
+        Get the current stack of every thread.
+        
+        Returns:
+            {"threads": [{"name": "orchestrator-loop-1", "ident": 1402..., "daemon": True,
+                          "stack": ["orchestrator.py:6210 in _run", ...]}, ...]}
+        """
+        threads = {thread.ident: thread for thread in threading.enumerate()}
+        result = []
+        for ident, frame in sys._current_frames().items():
+            thread = threads.get(ident)
+            result.append({
+                "name": thread.name if thread else f"thread-{ident}",
+                "ident": ident,
+                "daemon": thread.daemon if thread else None,
+                "stack": [
+                    f"{Path(entry.filename).name}:{entry.lineno} in {entry.name}"
+                    + (f" | {entry.line}" if entry.line else "")
+                    for entry in traceback.extract_stack(frame)
+                ]
+            })
+        result.sort(key=lambda entry: entry["name"])
+        return {"count": len(result), "threads": result}
+    
+    def profile(self, seconds: float, sort: str = "cumulative", limit: int = 30) -> Tuple[int, Dict]:
+        """
+        Profile loop jobs and API requests for a while (blocks the caller).
+        
+        Args:
+            seconds: Capture length (capped at DEBUG_PROFILE_MAX_SECONDS)
+            sort: pstats sort key
+            limit: Functions listed
+        
+        Returns:
+            (HTTP status, ProfileCapture.report() or an error)
+        """
+        if sort not in self.PROFILE_SORTS:
+            return 400, {"error": f"sort must be one of {', '.join(self.PROFILE_SORTS)}"}
+        seconds = max(0.1, min(seconds, DEBUG_PROFILE_MAX_SECONDS))
+        
+        with self._lock:
+            if self.capture is not None:
+                return 409, {"error": "A profile capture is already running"}
+            capture = self.capture = ProfileCapture(seconds)
+            self.scheduler.set_profiler(capture)
+        self.logger.info(f"Debug: profiling for {seconds:g}s")
+        
+        try:
+            time.sleep(seconds)
+        finally:
+            with self._lock:
+                self.scheduler.set_profiler(None)
+                self.capture = None
+        return 200, capture.report(sort, max(1, limit))
+    
+    def memory(self, limit: int = 20, group: str = "lineno", stop: bool = False) -> Tuple[int, Dict]:
+        """
+        Report the top allocation sites traced by tracemalloc.
+        
+        Args:
+            limit: Sites listed
+            group: lineno, filename or traceback
+            stop: Stop tracing (frees its memory) instead of reporting
+        
+        Returns:
+            (HTTP status, {"tracing": True, "current_kb": 812.4, "peak_kb": 990.1,
+                           "top": [{"site": "orchestrator.py:1240", "size_kb": 120.5, "count": 310}],
+                           "growth": [...] (since the previous call)})
+        """
+        import tracemalloc
+        
+        if group not in self.MEMORY_GROUPS:
+            return 400, {"error": f"group must be one of {', '.join(self.MEMORY_GROUPS)}"}
+        limit = max(1, limit)
+        
+        with self._lock:
+            if stop:
+                tracemalloc.stop()
+                self._memory_snapshot = None
+                self.logger.info("Debug: tracemalloc stopped")
+                return 200, {"tracing": False}
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(DEBUG_TRACEMALLOC_FRAMES)
+                self._memory_snapshot = None
+                self.logger.info("Debug: tracemalloc started")
+                return 200, {
+                    "tracing": True,
+                    "started": True,
+                    "message": "Tracing started; allocations made from now on show up in the next call"
+                }
+            
+            # Leave out tracemalloc's own bookkeeping
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ))
+            previous, self._memory_snapshot = self._memory_snapshot, snapshot
+            current, peak = tracemalloc.get_traced_memory()
+        
+        def site(stat) -> str:
+            frames = stat.traceback if group == "traceback" else stat.traceback[:1]
+            return " <- ".join(f"{Path(frame.filename).name}:{frame.lineno}" for frame in frames)
+        
+        result = {
+            "tracing": True,
+            "current_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "top": [
+                {"site": site(stat), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+                for stat in snapshot.statistics(group)[:limit]
+            ]
+        }
+        if previous is not None:
+            result["growth"] = [
+                {"site": site(stat), "size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+                for stat in snapshot.compare_to(previous, group)[:limit]
+                if stat.size_diff
+            ]
+        return 200, result
+
+
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ TASK PARSER - Planning.md Parser                                                         ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+class TaskParser:
+    """
+    Parser for planning.md files.
+    
+    ╔═══════════════════════════════════════════════════════════════════════════════════════╗
+    ║ CRITICAL: TASK IDENTIFICATION RULES                                                   ║
+    ╠═══════════════════════════════════════════════════════════════════════════════════════╣
+    ║                                                                                       ║
+    ║ This parser ONLY matches task headers in the EXACT format:                            ║
+    ║                                                                                       ║
+    ║     ### Task [Letter][Number]: Title                                                  ║
+    ║                                                                                       ║
+    ║ EXAMPLES OF VALID TASKS (will be parsed):                                             ║
+    ║     ### Task A1: Fix broken navigation link                                           ║
+    ║     ### Task B2: Update image paths                                                   ║
+    ║     ### Task C10: Refactor CSS structure                                              ║
+    ║                                                                                       ║
+    ║ EXAMPLES OF INVALID (will NOT be parsed as tasks):                                    ║
+    ║     Step 1: Do something          ← Sub-step within a task                            ║
+    ║     **Step 2:** Format something  ← Formatted sub-step                                ║
+    ║     1. First action item          ← Numbered list item                                ║
+    ║     ## Task A1: Wrong heading     ← Wrong heading level (## not ###)                  ║
+    ║     ### Fix something             ← Missing "Task X#:" prefix                         ║
+    ║                                                                                       ║
+    ╚═══════════════════════════════════════════════════════════════════════════════════════╝
+    
+    The regex pattern: ^###\s+Task\s+([A-Z])(\d+):\s*(.+)$
+    - Must start with "### Task"
+    - Followed by a single uppercase letter (A-Z)
+    - Followed by one or more digits (1-999)
+    - Followed by a colon and the task title
+    """
+    
+    # CRITICAL: This pattern ONLY matches "### Task X#:" format
+    # It explicitly does NOT match "Step X:" or numbered lists
+    TASK_PATTERN = re.compile(
+        r'^###\s+Task\s+([A-Z])(\d+):\s*(.+)$',
+        re.MULTILINE
+    )
+    
+    # Phase header pattern for organization (optional)
+    PHASE_PATTERN = re.compile(
+        r'^##\s+(?:PHASE\s+)?([A-Z])[\s:\-]+(.+)$',
+        re.MULTILINE | re.IGNORECASE
+    )
+    
+    @classmethod
+    def parse(cls, content: str, logger: Logger) -> List[Task]:
+        """
+        Parse planning.md content and extract tasks.
+        
+        Args:
+            content: The full text content of planning.md
+            logger: Logger instance for output
+            
+        Returns:
+            List of Task objects, ordered by appearance in file
+        """
+        tasks = []
+        lines = content.split('\n')
+        
+        logger.info("Parsing planning.md...")
+        logger.debug(f"File has {len(lines)} lines, {len(content):,} characters")
+        
+        # Find all task matches using the strict pattern
+        for match in cls.TASK_PATTERN.finditer(content):
+            phase_letter = match.group(1).upper()
+            task_num = match.group(2)
+            title = match.group(3).strip()
+            task_id = f"{phase_letter}{task_num}"
+            
+            # Calculate line numbers
+            start_pos = match.start()
+            line_start = content[:start_pos].count('\n') + 1
+            
+            # Find the end of this task (next task header or next phase header or EOF)
+            search_start = match.end()
+            next_task = cls.TASK_PATTERN.search(content, search_start)
+            next_phase = cls.PHASE_PATTERN.search(content, search_start)
+            
+            # Determine end position (whichever comes first)
+            end_positions = [len(content)]  # Default to EOF
+            if next_task:
+                end_positions.append(next_task.start())
+            if next_phase:
+                end_positions.append(next_phase.start())
+            end_pos = min(end_positions)
+            
+            # Extract task content
+            task_content = content[match.start():end_pos].strip()
+            line_end = line_start + task_content.count('\n')
+            
+            # Estimate tokens (rough approximation: 1 token ≈ 4 characters)
+            token_estimate = len(task_content) // CHARS_PER_TOKEN
+            
+            task = Task(
+                id=task_id,
+                title=title,
+                content=task_content,
+                phase=phase_letter,
+                line_start=line_start,
+                line_end=line_end,
+                token_estimate=token_estimate
+            )
+            tasks.append(task)
+            
+            logger.debug(f"  Found Task {task_id}: {title[:50]}{'...' if len(title) > 50 else ''}")
+        
+        # Log parsing summary
+        logger.info(f"Parsed {len(tasks)} tasks from planning.md")
+        
+        # Count tasks per original phase
+        phase_counts: Dict[str, int] = {}
+        for task in tasks:
+            phase_counts[task.phase] = phase_counts.get(task.phase, 0) + 1
+        
+        for phase_letter, count in sorted(phase_counts.items()):
+            logger.debug(f"  Original Phase {phase_letter}: {count} tasks")
+        
+        return tasks
+    
+    @classmethod
+    def split_into_phases(
+        cls,
+        tasks: List[Task],
+        max_tasks: int = MAX_TASKS_PER_PHASE,
+        max_tokens: int = TARGET_TOKENS_PER_PHASE,
+        logger: Optional[Logger] = None
+    ) -> List[Phase]:
+        """
+        Split tasks into phases based on task count and token limits.
+        
+        The algorithm:
+        1. Groups tasks by their original phase letter
+        2. Within each group, splits based on max_tasks or max_tokens
+        3. Assigns new sequential phase letters (A, B, C, ...)
+        
+        Args:
+            tasks: List of tasks to split
+            max_tasks: Maximum tasks per phase (default: 6)
+            max_tokens: Maximum tokens per phase (default: 90,000)
+            logger: Optional logger for output
+            
+        Returns:
+            List of Phase objects
+        """
+        if not tasks:
+            return []
+        
+        # Group tasks by their original phase letter
+        phase_groups: Dict[str, List[Task]] = {}
+        for task in tasks:
+            if task.phase not in phase_groups:
+                phase_groups[task.phase] = []
+            phase_groups[task.phase].append(task)
+        
+        phases: List[Phase] = []
+        phase_counter = 0
+        
+        # Process each original phase group
+        for original_phase in sorted(phase_groups.keys()):
+            group_tasks = phase_groups[original_phase]
+            current_batch: List[Task] = []
+            current_tokens = 0
+            
+            for task in group_tasks:
+                # Check if adding this task would exceed limits
+                would_exceed_tasks = len(current_batch) >= max_tasks
+                would_exceed_tokens = (current_tokens + task.token_estimate) > max_tokens and current_batch
+                
+                if would_exceed_tasks or would_exceed_tokens:
+                    # Save current batch as a new phase
+                    new_phase_id = chr(ord('A') + phase_counter)
+                    phases.append(Phase(
+                        id=new_phase_id,
+                        name=f"Phase {new_phase_id}",
+                        tasks=current_batch.copy()
+                    ))
+                    phase_counter += 1
+                    current_batch = []
+                    current_tokens = 0
+                
+                # Add task to current batch
+                current_batch.append(task)
+                current_tokens += task.token_estimate
+            
+            # Save remaining tasks in final batch
+            if current_batch:
+                new_phase_id = chr(ord('A') + phase_counter)
+                phases.append(Phase(
+                    id=new_phase_id,
+                    name=f"Phase {new_phase_id}",
+                    tasks=current_batch.copy()
+                ))
+                phase_counter += 1
+        
+        # Log summary
+        if logger:
+            logger.info(f"Split {len(tasks)} tasks into {len(phases)} phases")
+            for phase in phases:
+                logger.debug(
+                    f"  {phase.name}: {phase.task_count} tasks, "
+                    f"~{phase.token_estimate:,} tokens"
+                )
+        
+        return phases
+
+
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ STATUS PROTOCOL - Claude Code Communication                                              ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+class StatusProtocol:
+    """
+    Protocol for bidirectional communication between orchestrator and Claude Code.
+    
+    Communication Flow:
+    ══════════════════
+    
+    ┌─────────────────────────────────────────────────────────────────────────────┐
+    │                                                                             │
+    │   ORCHESTRATOR                              CLAUDE CODE                     │
+    │   ────────────                              ──────────                      │
+    │        │                                         │                          │
+    │        │  1. Writes current-command.md           │                          │
+    │        │ ───────────────────────────────────────►│                          │
+    │        │                                         │                          │
+    │        │                                         │  2. Reads tasks          │
+    │        │                                         │  3. Executes work        │
+    │        │                                         │  4. Commits & pushes     │
+    │        │                                         │                          │
+    │        │         5. Updates status.json          │                          │
+    │        │ ◄───────────────────────────────────────│                          │
+    │        │                                         │                          │
+    │        │  6. Detects change (polling)            │                          │
+    │        │  7. Runs tests                          │                          │
+    │        │  8. Starts next phase                   │                          │
+    │        │                                         │                          │
+    └─────────────────────────────────────────────────────────────────────────────┘
+    
+    Status File Format (status.json):
+    ═════════════════════════════════
+    {
+        "version": "4.1.0",
+        "protocol": "v1",
+        "state": "idle|running|completed|error",
+        "current_phase": "A",
+        "phases_completed": ["A", "B"],
+        "files_modified": ["file1.html", "file2.css"],
+        "errors": [],
+        "last_updated": "2026-01-21T12:00:00.000Z"
+    }
+    
+    Protocol v2 (status-events.jsonl):
+    ══════════════════════════════════
+    Agents may also append one JSON object per line while they work:
+    
+        {"type": "task_started",  "phase": "A", "task": "A1"}
+        {"type": "task_progress", "phase": "A", "task": "A1", "percent": 50, "message": "..."}
+        {"type": "heartbeat",     "phase": "A"}
+        {"type": "task_completed", "phase": "A", "task": "A1"}
+        {"type": "phase_completed", "phase": "A", "files_modified": [...]}
+    
+    status.json keeps working unchanged (v1). An agent that sends events is
+    watched for stalls: no event for "stall_timeout" seconds retries the phase.
+    """
+    
+    @staticmethod
+    def create_initial_status(workflow_dir: Path) -> Dict:
+        """
+        Create the initial status.json file.
+        
+        Args:
+            workflow_dir: Path to .ai-workflow directory
+            
+        Returns:
+            The status dictionary that was written
+        """
+        status = {
+            "version": VERSION,
+            "protocol": "v2",
+            "events_file": STATUS_EVENTS_FILE,
+            "last_updated": datetime.now().isoformat(),
+            "state": "idle",
+            "current_phase": None,
+            "phases_completed": [],
+            "files_modified": [],
+            "errors": [],
+            "messages": []
+        }
+        
+        status_file = workflow_dir / STATUS_FILE
+        with open(status_file, 'w', encoding='utf-8') as f:
+            json.dump(status, f, indent=2)
+        
+        return status
+    
+    @staticmethod
+    def read_status(workflow_dir: Path) -> Optional[Dict]:
+        """
+        Read the current status.json file.
+        
+        Args:
+            workflow_dir: Path to .ai-workflow directory
+            
+        Returns:
+            Status dictionary or None if file doesn't exist or is invalid
+        """
+        status_file = workflow_dir / STATUS_FILE
+        if not status_file.exists():
+            return None
+        
+        try:
+            with open(status_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return None
+    
+    @staticmethod
+    def update_status(workflow_dir: Path, updates: Dict):
+        """
+        Update the status.json file with new values.
+        
+        Args:
+            workflow_dir: Path to .ai-workflow directory
+            updates: Dictionary of values to update
+            
+        Returns:
+            MD5 hash of the written file (same as get_file_hash() right after)
+        """
+        status_file = workflow_dir / STATUS_FILE
+        
+        # Read current status
+        status = StatusProtocol.read_status(workflow_dir) or {}
+        
+        # Apply updates
+        status.update(updates)
+        status["last_updated"] = datetime.now().isoformat()
+        
+        # Write back
+        content = json.dumps(status, indent=2).encode('utf-8')
+        with open(status_file, 'wb') as f:
+            f.write(content)
+        return hashlib.md5(content).hexdigest()
+    
+    @staticmethod
+    def get_file_hash(workflow_dir: Path) -> str:
+        """
+        Get MD5 hash of status.json for change detection.
+        
+        The orchestrator uses this to detect when Claude Code has
+        updated the status file.
+        
+        Args:
+            workflow_dir: Path to .ai-workflow directory
+            
+        Returns:
+            MD5 hash string or empty string if file doesn't exist
+        """
+        status_file = workflow_dir / STATUS_FILE
+        if not status_file.exists():
+            return ""
+        
+        try:
+            with open(status_file, 'rb') as f:
+                return hashlib.md5(f.read()).hexdigest()
+        except IOError:
+            return ""
+    
+    # ── Protocol v2: append-only event file ─────────────────────────────────────────────
+    
+    EVENT_TYPES = (
+        "phase_started",    # written by the orchestrator
+        "heartbeat",        # agent is alive (no other change)
+        "task_started",     # {"task": "A1"}
+        "task_progress",    # {"task": "A1", "percent": 40, "message": "..."}
+        "task_completed",   # {"task": "A1"}
+        "phase_completed",  # {"files_modified": [...]} - same as status.json "completed"
+        "error"             # {"message": "..."} - same as status.json "error"
+    )
+    
+    @staticmethod
+    def append_event(workflow_dir: Path, event: Dict):
+        """
+        Append one event to status-events.jsonl.
+        
+        Args:
+            workflow_dir: Path to .ai-workflow directory
+            event: Event dictionary (needs "type"; "ts" is added if missing)
+        """
+        event = {"ts": datetime.now().isoformat(), **event}
+        with open(workflow_dir / STATUS_EVENTS_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+    
+    @staticmethod
+    def read_events(workflow_dir: Path, offset: int = 0) -> Tuple[List[Dict], int]:
+        """
+        Read events appended since a byte offset.
+        
+        Only complete lines are consumed, so an event being written while
+        we read is picked up on the next call. Malformed lines are skipped.
+        
+        Args:
+            workflow_dir: Path to .ai-workflow directory
+            offset: Byte offset returned by the previous call
+            
+        Returns:
+            Tuple of (events, new offset)
+        """
+        events_file = workflow_dir / STATUS_EVENTS_FILE
+        try:
+            with open(events_file, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return [], offset
+        
+        end = data.rfind(b'\n') + 1
+        events = []
+        for line in data[:end].splitlines():
+            try:
+                event = json.loads(line.decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                continue
+            if isinstance(event, dict) and event.get("type") in StatusProtocol.EVENT_TYPES:
+                events.append(event)
+        return events, offset + end
+    
+    @staticmethod
+    def events_size(workflow_dir: Path) -> int:
+        """Get the current size of the event file (0 if missing)."""
+        try:
+            return (workflow_dir / STATUS_EVENTS_FILE).stat().st_size
+        except OSError:
+            return 0
+
+
+class ProgressTracker:
+    """
+    Follow protocol v2 events for the running phase.
+    
+    Tracks per-task state and the time of the last agent activity. An agent
+    that has sent at least one event is known to speak v2, so a long silence
+    from it means it is stuck rather than slow; v1 agents (status.json only)
+    are never considered stalled.
+    """
+    
+    def __init__(self, workflow_dir: Path, logger: Logger):
+        """
+        Initialize ProgressTracker.
+        
+        Args:
+            workflow_dir: Path to .ai-workflow directory
+            logger: Logger instance
+        """
+        self.workflow_dir = workflow_dir
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._offset = 0
+        self.phase_id: Optional[str] = None
+        self.tasks: Dict[str, Dict] = {}
+        self.started_at = 0.0
+        self.last_activity = 0.0
+        self.last_heartbeat: Optional[float] = None
+        self.event_count = 0
+    
+    def start(self, phase: Phase):
+        """
+        Begin tracking a phase; earlier events in the file are ignored.
+        
+        Args:
+            phase: Phase that is starting
+        """
+        StatusProtocol.append_event(self.workflow_dir, {
+            "type": "phase_started",
+            "phase": phase.id,
+            "tasks": [task.id for task in phase.tasks],
+            "source": "orchestrator"
+        })
+        with self._lock:
+            self._offset = StatusProtocol.events_size(self.workflow_dir)
+            self.phase_id = phase.id
+            self.tasks = {
+                task.id: {"title": task.title, "state": "pending", "percent": 0, "message": ""}
+                for task in phase.tasks
+            }
+            self.started_at = self.last_activity = time.time()
+            self.last_heartbeat = None
+            self.event_count = 0
+    
+    def stop(self):
+        """Stop tracking (no phase is running)."""
+        with self._lock:
+            self.phase_id = None
+    
+    @property
+    def speaks_v2(self) -> bool:
+        """Whether the agent has sent any event for the current phase."""
+        return self.event_count > 0
+    
+    def silence(self) -> float:
+        """Seconds since the last agent activity (or phase start)."""
+        return time.time() - self.last_activity
+    
+    def poll(self) -> List[Dict]:
+        """
+        Consume new events for the current phase and update task state.
+        
+        Returns:
+            New events belonging to the current phase
+        """
+        with self._lock:
+            if self.phase_id is None:
+                return []
+            events, self._offset = StatusProtocol.read_events(self.workflow_dir, self._offset)
+            events = [e for e in events if e.get("phase", self.phase_id) == self.phase_id
+                      and e.get("source") != "orchestrator"]
+            
+            for event in events:
+                self.event_count += 1
+                self.last_activity = time.time()
+                kind = event["type"]
+                if kind == "heartbeat":
+                    self.last_heartbeat = self.last_activity
+                    continue
+                
+                task = self.tasks.get(str(event.get("task")))
+                if task is None:
+                    continue
+                if kind == "task_started":
+                    task["state"] = "running"
+                elif kind == "task_progress":
+                    task["state"] = "running"
+                    try:
+                        task["percent"] = max(0, min(100, int(event.get("percent", task["percent"]))))
+                    except (TypeError, ValueError):
+                        pass
+                elif kind == "task_completed":
+                    task["state"] = "completed"
+                    task["percent"] = 100
+                if event.get("message"):
+                    task["message"] = str(event["message"])[:200]
+            
+            return events
+    
+    def snapshot(self, stall_timeout: int = 0) -> Optional[Dict]:
+        """
+        Get the progress of the current phase for the API.
+        
+        Args:
+            stall_timeout: Configured stall window (for the "stalled" flag)
+            
+        Returns:
+            {"phase": "A", "protocol": "v2", "tasks": {...}, "percent": 40,
+             "silence_s": 12.0, "heartbeat_age_s": 3.1, "events": 9,
+             "stalled": False} or None when no phase is running
+        """
+        with self._lock:
+            if self.phase_id is None:
+                return None
+            silence = self.silence()
+            percents = [t["percent"] for t in self.tasks.values()]
+            return {
+                "phase": self.phase_id,
+                "protocol": "v2" if self.speaks_v2 else "v1",
+                "tasks": {task_id: dict(task) for task_id, task in self.tasks.items()},
+                "percent": round(sum(percents) / len(percents)) if percents else 0,
+                "silence_s": round(silence, 1),
+                "heartbeat_age_s": (
+                    round(time.time() - self.last_heartbeat, 1) if self.last_heartbeat else None
+                ),
+                "events": self.event_count,
+                "stalled": bool(stall_timeout) and self.speaks_v2 and silence > stall_timeout
+            }
+
+
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ GIT MANAGER - Git Integration                                                            ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+@dataclass
+class StatusEntry:
+    """
+    One changed path from `git status -z --porcelain=v2`.
+    
+    Paths come straight from the NUL-delimited output, so names with spaces,
+    quotes or non-ASCII characters are never C-quoted, and renames carry
+    their source path separately instead of an "old -> new" string.
+    """
+    status: str                                      # Two-letter XY code ("M.", ".D", "R.", "??")
+    path: str                                        # Path relative to the repository root
+    orig_path: Optional[str] = None                  # Source path for renames and copies
+    is_untracked: bool = False                       # Not yet known to git
+    
+    @property
+    def paths(self) -> List[str]:
+        """Every path touched by this entry (destination first)."""
+        return [self.path, self.orig_path] if self.orig_path else [self.path]
+    
+    def to_dict(self) -> Dict:
+        """Convert to dictionary for JSON serialization."""
+        return asdict(self)
+
+
+class GitManager:
+    """
+    Git integration for automatic commits and pushes.
+    
+    Features:
+    - Detect if project is a git repository
+    - Take one status snapshot (git status -z --porcelain=v2) per commit and
+      reuse it for change detection, staging and the commit file list
+    - Stage only the reported paths instead of re-walking the tree
+    - Create semantic commits with phase information
+    - Push to remote repository through a background, coalescing PushQueue
+    - Track modified files as structured StatusEntry records
+    - Cache a per-phase diffstat of each phase commit
+    - Attribute changes to a phase by diffing against a baseline snapshot
+    - Record per-command timing
+    
+    Backends ("git_backend" config):
+    ─────────────────────────────────
+    plumbing   update-index → write-tree → commit-tree → update-ref
+               Only the changed paths are rehashed; nothing rescans the tree.
+               Falls back to porcelain when commit hooks are installed, since
+               commit-tree does not run them.
+    porcelain  git add -- <paths> → git commit
+    """
+    
+    # Hooks that `git commit` runs but commit-tree skips
+    COMMIT_HOOKS = ("pre-commit", "prepare-commit-msg", "commit-msg", "post-commit")
+    
+    def __init__(
+        self,
+        project_path: Path,
+        logger: Logger,
+        config: Optional[Dict] = None,
+        metrics: Optional[Metrics] = None,
+        tracer: Optional[Tracer] = None
+    ):
+        """
+        Initialize GitManager.
+        
+        Args:
+            project_path: Path to project root
+            logger: Logger instance
+            config: Optional configuration dictionary
+            metrics: Optional metrics registry (git command timings)
+            tracer: Optional tracer (git commands as handoff spans)
+        """
+        self.project_path = project_path
+        self.logger = logger
+        self.config = config if config is not None else {}
+        self.metrics = metrics or Metrics(enabled=False)
+        self.tracer = tracer or Tracer(enabled=False)
+        self.is_git_repo = (project_path / ".git").exists()
+        
+        # Per-subcommand timing aggregates
+        self.timings: Dict[str, Dict] = {}
+        self._timing_lock = threading.Lock()
+        self._has_hooks: Optional[bool] = None
+        
+        # Diffstats are keyed by commit hash, which never changes content
+        self._diffstats: Dict[str, Dict] = {}
+        
+        # Background pushes (worker thread starts on first enqueue)
+        self.push_queue = PushQueue(self, logger, self.config)
+        
+        if not self.is_git_repo:
+            self.logger.warn("Project is not a git repository - git features disabled")
+    
+    def _exec_git(
+        self,
+        *args,
+        timeout: int = 60,
+        input_text: Optional[str] = None,
+        traced: bool = True
+    ) -> Tuple[int, str, str]:
+        """
+        Run a git command and record its timing.
+        
+        Args:
+            *args: Git command arguments
+            timeout: Command timeout in seconds
+            input_text: Optional text passed on stdin
+            traced: Add a span to the active handoff trace
+            
+        Returns:
+            Tuple of (return code, stdout, stderr); return code -1 if git could not run
+        """
+        started = time.time()
+        try:
+            result = subprocess.run(
+                ["git"] + list(args),
+                cwd=self.project_path,
+                input=input_text,
+                capture_output=True,
+                encoding="utf-8",
+                errors="surrogateescape",
+                timeout=timeout
+            )
+            code, stdout, stderr = result.returncode, result.stdout, result.stderr
+        except subprocess.TimeoutExpired:
+            code, stdout, stderr = -1, "", "Git command timed out"
+        except FileNotFoundError:
+            code, stdout, stderr = -1, "", "Git executable not found"
+        except Exception as e:
+            code, stdout, stderr = -1, "", str(e)
+        
+        elapsed = time.time() - started
+        self._record_timing(args[0] if args else "git", elapsed * 1000, code == 0)
+        if traced:
+            self.tracer.record(f"git {args[0] if args else ''}".strip(), started, elapsed, "git",
+                               **({} if code == 0 else {"failed": True}))
+        return code, stdout, stderr
+    
+    def _run_git(self, *args, timeout: int = 60, traced: bool = True) -> Tuple[bool, str]:
+        """
+        Run a git command.
+        
+        Args:
+            *args: Git command arguments
+            timeout: Command timeout in seconds
+            traced: Add a span to the active handoff trace
+            
+        Returns:
+            Tuple of (success: bool, output: str)
+        """
+        code, stdout, stderr = self._exec_git(*args, timeout=timeout, traced=traced)
+        return code == 0, (stdout + stderr).strip()
+    
+    def _record_timing(self, command: str, elapsed_ms: float, success: bool):
+        """Add one command execution to the timing aggregates."""
+        with self._timing_lock:
+            stats = self.timings.setdefault(command, {
+                "count": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0
+            })
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["last_ms"] = elapsed_ms
+            if not success:
+                stats["failures"] += 1
+        self.metrics.observe("orchestrator_git_command_seconds", elapsed_ms / 1000, command=command)
+        if not success:
+            self.metrics.inc("orchestrator_git_failures_total", command=command)
+        self.logger.debug(f"git {command}: {elapsed_ms:.1f}ms")
+    
+    def get_timing_stats(self) -> Dict[str, Dict]:
+        """
+        Get per-subcommand timing statistics.
+        
+        Returns:
+            {"status": {"count": 4, "failures": 0, "avg_ms": 12.5, "max_ms": 20.1,
+                        "last_ms": 11.0, "total_ms": 50.0}, ...}
+        """
+        with self._timing_lock:
+            return {
+                command: {
+                    "count": stats["count"],
+                    "failures": stats["failures"],
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 1),
+                    "max_ms": round(stats["max_ms"], 1),
+                    "last_ms": round(stats["last_ms"], 1),
+                    "total_ms": round(stats["total_ms"], 1)
+                }
+                for command, stats in self.timings.items()
+            }
+    
+    def status_snapshot(self) -> Optional[Dict]:
+        """
+        Take one porcelain v2 status snapshot of the working tree.
+        
+        Uses --untracked-files=all so new directories are expanded into
+        individual files that can be staged by path.
+        
+        Returns:
+            {"head": "<oid>" or None (initial commit), "branch": "main",
+             "upstream": "origin/main" or None, "ahead": 0, "behind": 0,
+             "entries": [StatusEntry, ...], "paths": [...]}
+            or None if git status failed
+        """
+        if not self.is_git_repo:
+            return None
+        
+        code, stdout, stderr = self._exec_git(
+            "status", "-z", "--porcelain=v2", "--branch", "--untracked-files=all"
+        )
+        if code != 0:
+            self.logger.error(f"git status failed: {stderr.strip()}")
+            return None
+        
+        snapshot = {
+            "head": None,
+            "branch": None,
+            "upstream": None,
+            "ahead": 0,
+            "behind": 0,
+            "entries": [],
+            "paths": []
+        }
+        
+        records = stdout.split('\0')
+        i = 0
+        while i < len(records):
+            record = records[i]
+            i += 1
+            if not record:
+                continue
+            
+            kind = record[0]
+            if kind == '#':
+                _, key, *value = record.split(' ')
+                if key == "branch.oid":
+                    snapshot["head"] = None if value[0] == "(initial)" else value[0]
+                elif key == "branch.head":
+                    snapshot["branch"] = None if value[0] == "(detached)" else value[0]
+                elif key == "branch.upstream":
+                    snapshot["upstream"] = value[0]
+                elif key == "branch.ab":
+                    snapshot["ahead"] = int(value[0].lstrip('+'))
+                    snapshot["behind"] = int(value[1].lstrip('-'))
+            elif kind == '1':
+                # 1 XY sub mH mI mW hH hI path
+                fields = record.split(' ', 8)
+                snapshot["entries"].append(StatusEntry(fields[1], fields[8]))
+            elif kind == '2':
+                # 2 XY sub mH mI mW hH hI Xscore path, followed by origPath record
+                fields = record.split(' ', 9)
+                orig_path = records[i] if i < len(records) else None
+                i += 1
+                snapshot["entries"].append(StatusEntry(fields[1], fields[9], orig_path))
+            elif kind == 'u':
+                # u XY sub m1 m2 m3 mW h1 h2 h3 path
+                fields = record.split(' ', 10)
+                snapshot["entries"].append(StatusEntry(fields[1], fields[10]))
+            elif kind == '?':
+                snapshot["entries"].append(StatusEntry("??", record[2:], is_untracked=True))
+        
+        snapshot["paths"] = [path for entry in snapshot["entries"] for path in entry.paths]
+        
+        return snapshot
+    
+    def get_status_entries(self) -> List[StatusEntry]:
+        """
+        Get structured status entries for the working directory.
+        
+        Returns:
+            List of StatusEntry (empty if not a repository or git failed)
+        """
+        snapshot = self.status_snapshot()
+        return snapshot["entries"] if snapshot else []
+    
+    def get_modified_files(self) -> List[str]:
+        """
+        Get list of modified files in the working directory.
+        
+        Renamed files are reported by their new path, and untracked
+        directories are expanded into the files they contain.
+        
+        Returns:
+            List of modified file paths relative to project root
+        """
+        return [entry.path for entry in self.get_status_entries()]
+    
+    def diffstat(self, commit_hash: str) -> Optional[Dict]:
+        """
+        Get per-file line counts for one commit, cached by commit hash.
+        
+        Args:
+            commit_hash: Commit to describe (compared with its first parent,
+                or with the empty tree for a root commit)
+            
+        Returns:
+            {"commit": "<oid>", "files": [{"path", "orig_path", "added",
+             "deleted", "binary"}, ...], "added": 12, "deleted": 3}
+            or None if git failed
+        """
+        if not self.is_git_repo or not commit_hash:
+            return None
+        
+        cached = self._diffstats.get(commit_hash)
+        if cached is not None:
+            return cached
+        
+        code, stdout, stderr = self._exec_git(
+            "diff-tree", "-r", "-M", "--root", "--no-commit-id", "--numstat", "-z", commit_hash
+        )
+        if code != 0:
+            self.logger.warn(f"git diff-tree failed for {commit_hash[:8]}: {stderr.strip()}")
+            return None
+        
+        files = []
+        records = stdout.split('\0')
+        i = 0
+        while i < len(records):
+            record = records[i]
+            i += 1
+            if not record:
+                continue
+            
+            # "added<TAB>deleted<TAB>path", or "added<TAB>deleted<TAB>" followed
+            # by the source and destination records for a rename
+            added, deleted, path = record.split('\t', 2)
+            orig_path = None
+            if not path:
+                orig_path, path = records[i], records[i + 1]
+                i += 2
+            
+            binary = added == '-'
+            files.append({
+                "path": path,
+                "orig_path": orig_path,
+                "added": 0 if binary else int(added),
+                "deleted": 0 if binary else int(deleted),
+                "binary": binary
+            })
+        
+        stat = {
+            "commit": commit_hash,
+            "files": files,
+            "added": sum(f["added"] for f in files),
+            "deleted": sum(f["deleted"] for f in files)
+        }
+        self._diffstats[commit_hash] = stat
+        return stat
+    
+    def baseline_snapshot(self, exclude: Tuple[str, ...] = ()) -> Optional[Dict]:
+        """
+        Record the repository state at the start of a phase.
+        
+        Only HEAD and the paths that are already dirty are recorded, with
+        their size and mtime, so the cost follows the number of changed
+        files rather than the size of the tree (git status itself relies
+        on the index stat cache).
+        
+        Args:
+            exclude: Path prefixes to leave out (e.g. ".ai-workflow/")
+            
+        Returns:
+            {"head": "<oid>" or None, "dirty": {path: [xy, size, mtime_ns]}}
+            or None if git status failed
+        """
+        snapshot = self.status_snapshot()
+        if snapshot is None:
+            return None
+        
+        return {
+            "head": snapshot["head"],
+            "dirty": {
+                path: [entry.status, *self._stat_signature(path)]
+                for entry in snapshot["entries"] for path in entry.paths
+                if not path.startswith(exclude)
+            }
+        }
+    
+    def _stat_signature(self, path: str) -> Tuple[int, int]:
+        """Get (size, mtime_ns) of a working tree path, (-1, -1) if missing."""
+        try:
+            stat = (self.project_path / path).stat()
+            return stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return -1, -1
+    
+    def phase_delta(self, baseline: Dict, exclude: Tuple[str, ...] = ()) -> Optional[List[str]]:
+        """
+        Get the paths changed since a baseline snapshot.
+        
+        A path belongs to the delta if it was committed since the baseline
+        HEAD, became dirty, or was already dirty but changed status, size or
+        mtime (or stopped being dirty).
+        
+        Args:
+            baseline: Result of baseline_snapshot()
+            exclude: Path prefixes to leave out (e.g. ".ai-workflow/")
+            
+        Returns:
+            Sorted list of paths, or None if git failed
+        """
+        snapshot = self.status_snapshot()
+        if snapshot is None:
+            return None
+        
+        changed = set()
+        
+        # Commits made during the phase (by the agent or anyone else)
+        if snapshot["head"] and snapshot["head"] != baseline.get("head"):
+            if baseline.get("head"):
+                args = ("diff", "--name-only", "--no-renames", "-z", baseline["head"], snapshot["head"])
+            else:
+                args = ("ls-tree", "-r", "--name-only", "-z", snapshot["head"])
+            code, stdout, stderr = self._exec_git(*args)
+            if code != 0:
+                self.logger.warn(f"Failed to diff against phase baseline: {stderr.strip()}")
+                return None
+            changed.update(path for path in stdout.split('\0') if path)
+        
+        # Working tree changes
+        before = baseline.get("dirty", {})
+        now = set()
+        for entry in snapshot["entries"]:
+            for path in entry.paths:
+                now.add(path)
+                previous = before.get(path)
+                if previous is None or previous != [entry.status, *self._stat_signature(path)]:
+                    changed.add(path)
+        changed.update(path for path in before if path not in now)
+        
+        return sorted(path for path in changed if not path.startswith(exclude))
+    
+    def stage_all(self) -> bool:
+        """
+        Stage all changes (git add -A).
+        
+        Returns:
+            True if successful
+        """
+        if not self.is_git_repo:
+            return False
+        
+        success, output = self._run_git("add", "-A")
+        if success:
+            self.logger.info("Staged all changes")
+        else:
+            self.logger.error(f"Failed to stage changes: {output}")
+        
+        return success
+    
+    def stage_paths(self, paths: List[str]) -> bool:
+        """
+        Stage only the given paths (additions, modifications and deletions).
+        
+        Args:
+            paths: Paths relative to project root, as reported by status_snapshot()
+            
+        Returns:
+            True if successful
+        """
+        if not self.is_git_repo:
+            return False
+        if not paths:
+            return True
+        
+        code, stdout, stderr = self._exec_git(
+            "add", "-A", "--pathspec-from-file=-", "--pathspec-file-nul",
+            input_text='\0'.join(paths) + '\0'
+        )
+        if code == 0:
+            self.logger.info(f"Staged {len(paths)} paths")
+        else:
+            self.logger.error(f"Failed to stage changes: {(stdout + stderr).strip()}")
+        
+        return code == 0
+    
+    def has_commit_hooks(self) -> bool:
+        """Check (once) whether the repository has commit hooks installed."""
+        if self._has_hooks is None:
+            success, hooks_path = self._run_git("rev-parse", "--git-path", "hooks")
+            hooks_dir = self.project_path / hooks_path if success else self.project_path / ".git" / "hooks"
+            self._has_hooks = any(
+                (hooks_dir / hook).is_file() and os.access(hooks_dir / hook, os.X_OK)
+                for hook in self.COMMIT_HOOKS
+            )
+        return self._has_hooks
+    
+    def commit_paths(self, paths: List[str], message: str, head: Optional[str]) -> Optional[str]:
+        """
+        Commit the given paths with index plumbing, without scanning the tree.
+        
+        Args:
+            paths: Paths to update in the index (deleted paths are removed)
+            message: Commit message
+            head: Current HEAD commit from the status snapshot (None if initial)
+            
+        Returns:
+            Commit hash if successful, None otherwise
+        """
+        if not self.is_git_repo:
+            return None
+        
+        code, stdout, stderr = self._exec_git(
+            "update-index", "--add", "--remove", "-z", "--stdin",
+            input_text='\0'.join(paths) + '\0'
+        )
+        if code != 0:
+            self.logger.error(f"Failed to update index: {stderr.strip()}")
+            return None
+        
+        code, tree, stderr = self._exec_git("write-tree")
+        if code != 0:
+            self.logger.error(f"Failed to write tree: {stderr.strip()}")
+            return None
+        tree = tree.strip()
+        
+        if head:
+            code, head_tree, _ = self._exec_git("rev-parse", f"{head}^{{tree}}")
+            if code == 0 and head_tree.strip() == tree:
+                self.logger.info("Nothing to commit")
+                return None
+        
+        args = ["commit-tree", tree, "-m", message]
+        if head:
+            args += ["-p", head]
+        code, commit_hash, stderr = self._exec_git(*args)
+        if code != 0:
+            self.logger.error(f"Failed to commit: {stderr.strip()}")
+            return None
+        commit_hash = commit_hash.strip()
+        
+        # Move HEAD (and its branch) only if nobody else committed meanwhile
+        code, _, stderr = self._exec_git(
+            "update-ref", "-m", f"commit: {message}", "HEAD", commit_hash, head or ""
+        )
+        if code != 0:
+            self.logger.error(f"Failed to update HEAD: {stderr.strip()}")
+            return None
+        
+        self.logger.info(f"Committed: {commit_hash[:8]} - {message[:50]}...")
+        return commit_hash
+    
+    def commit(self, message: str) -> Optional[str]:
+        """
+        Create a commit with the given message.
+        
+        Args:
+            message: Commit message
+            
+        Returns:
+            Commit hash if successful, None otherwise
+        """
+        if not self.is_git_repo:
+            return None
+        
+        success, output = self._run_git("commit", "-m", message)
+        
+        if success:
+            # Extract commit hash from output
+            hash_match = re.search(r'\[[\w\s]+\s+([a-f0-9]+)\]', output)
+            commit_hash = hash_match.group(1) if hash_match else "unknown"
+            self.logger.info(f"Committed: {commit_hash[:8]} - {message[:50]}...")
+            return commit_hash
+        else:
+            if "nothing to commit" in output:
+                self.logger.info("Nothing to commit")
+                return None
+            self.logger.error(f"Failed to commit: {output}")
+            return None
+    
+    def push(self) -> bool:
+        """
+        Push to remote repository.
+        
+        With "async_push" enabled the push is handed to the background push
+        queue and this returns immediately; use push_queue.flush() to wait.
+        
+        Returns:
+            True if successful (or queued)
+        """
+        if not self.is_git_repo:
+            return False
+        
+        if self.config.get("async_push", True):
+            success, head = self._run_git("rev-parse", "HEAD")
+            self.push_queue.enqueue(head if success else "HEAD")
+            return True
+        
+        return self.push_now()[0]
+    
+    def push_now(self, traced: bool = True) -> Tuple[bool, str]:
+        """
+        Push to remote repository synchronously.
+        
+        Args:
+            traced: Add a span to the active handoff trace (the push queue
+                records its own, per phase)
+        
+        Returns:
+            Tuple of (success, error output)
+        """
+        if not self.is_git_repo:
+            return False, "Not a git repository"
+        
+        success, output = self._run_git("push", timeout=120, traced=traced)
+        
+        if success:
+            self.logger.info("Pushed to remote")
+        else:
+            self.logger.warn(f"Failed to push: {output}")
+        
+        return success, ("" if success else output)
+    
+    def commit_and_push(
+        self,
+        phase_id: str,
+        description: str,
+        paths: Optional[List[str]] = None,
+        push: bool = True
+    ) -> Optional[str]:
+        """
+        Stage, commit, and push in one operation.
+        
+        A single status snapshot drives change detection, staging and the
+        commit file list.
+        
+        Args:
+            phase_id: Phase identifier for commit message
+            description: Description for commit message
+            paths: Optional scope; only these paths (and the other side of
+                renames touching them) are committed
+            push: False to only commit (publish later with push_commit)
+            
+        Returns:
+            Commit hash if successful, None otherwise
+        """
+        if not self.is_git_repo:
+            return None
+        
+        # Check for changes
+        snapshot = self.status_snapshot()
+        if snapshot is None:
+            return None
+        
+        entries = snapshot["entries"]
+        if paths is not None:
+            scope = set(paths)
+            entries = [entry for entry in entries if scope.intersection(entry.paths)]
+        
+        modified = [path for entry in entries for path in entry.paths]
+        if not modified:
+            self.logger.info("No changes to commit")
+            return None
+        
+        self.logger.info(f"Committing {len(entries)} modified files")
+        
+        # Commit with semantic message
+        message = f"fix: Phase {phase_id} - {description}"
+        
+        if self.config.get("git_backend", "plumbing") == "plumbing" and not self.has_commit_hooks():
+            commit_hash = self.commit_paths(modified, message, snapshot["head"])
+        else:
+            if not self.stage_paths(modified):
+                return None
+            commit_hash = self.commit(message)
+        
+        # Push if commit succeeded
+        if commit_hash and push:
+            self.push_commit(commit_hash, phase_id)
+        
+        return commit_hash
+    
+    def push_commit(self, commit_hash: str, phase_id: Optional[str] = None):
+        """
+        Push a commit if "auto_push" is enabled (queued with "async_push").
+        
+        Args:
+            commit_hash: Commit that should reach the remote
+            phase_id: Optional phase identifier (for logging)
+        """
+        if not self.config.get("auto_push", True):
+            return
+        if self.config.get("async_push", True):
+            self.push_queue.enqueue(commit_hash, phase_id)
+        else:
+            self.push_now()
+    
+    def rewind(self, commit_hash: str, target: Optional[str] = None, keep_worktree: bool = True) -> bool:
+        """
+        Move HEAD (and its branch) back from a commit that was not pushed.
+        
+        Nothing happens unless HEAD still points at the commit, so work
+        committed on top of it meanwhile is never dropped.
+        
+        Args:
+            commit_hash: Commit HEAD is expected to point at
+            target: Commit to move back to (default: its first parent)
+            keep_worktree: Leave the working tree as it is (reset --mixed);
+                False checks out the target, refusing if that would
+                overwrite local changes (reset --keep)
+            
+        Returns:
+            True if HEAD was moved
+        """
+        if not self.is_git_repo:
+            return False
+        
+        code_head, head, _ = self._exec_git("rev-parse", "HEAD")
+        code_commit, commit, _ = self._exec_git("rev-parse", "--verify", "--quiet", f"{commit_hash}^{{commit}}")
+        if code_head != 0 or code_commit != 0 or head.strip() != commit.strip():
+            self.logger.warn(f"Not rewinding {commit_hash[:8]}: HEAD has moved")
+            return False
+        
+        target = target or f"{commit.strip()}^"
+        mode = "--mixed" if keep_worktree else "--keep"
+        code, _, stderr = self._exec_git("reset", "-q", mode, target)
+        if code != 0:
+            self.logger.warn(f"Failed to rewind {commit_hash[:8]}: {stderr.strip()}")
+            return False
+        
+        self.logger.info(f"Rewound {commit_hash[:8]}")
+        return True
+
+
+class PushQueue:
+    """
+    Background push queue that keeps slow pushes out of the phase cascade.
+    
+    Behaviour:
+    ──────────
+    - enqueue() records a commit and returns immediately
+    - The worker waits a short coalescing window, then runs one `git push`
+      covering every commit queued so far (a push sends the whole branch)
+    - Failures are retried with exponential backoff:
+          delay = min(push_backoff_base * 2^(attempt-1), push_backoff_max)
+    - After push_max_attempts failures the batch stays queued and is
+      retried with the next enqueue() or flush()
+    - The worker exits after PUSH_WORKER_IDLE idle seconds and is restarted
+      by the next enqueue(), so idle projects hold no thread
+    
+    Queue depth and push latency are exposed through get_stats().
+    """
+    
+    def __init__(self, git: "GitManager", logger: Logger, config: Dict):
+        """
+        Initialize PushQueue.
+        
+        Args:
+            git: GitManager used to run the push
+            logger: Logger instance
+            config: Configuration dictionary
+        """
+        self.git = git
+        self.logger = logger
+        self.config = config
+        self.pending: List[Dict] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._pushing = False
+        self._attempt = 0
+        self._retry_at = 0.0
+        self.stats = {
+            "pushes": 0,
+            "failures": 0,
+            "commits_pushed": 0,
+            "last_push_latency_ms": None,
+            "last_push_at": None,
+            "last_error": None
+        }
+    
+    def _ensure_worker(self):
+        """Start the worker thread on first use."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._worker, name="push-queue", daemon=True)
+            self._thread.start()
+    
+    def enqueue(self, commit_hash: str, phase_id: Optional[str] = None):
+        """
+        Queue a commit for pushing.
+        
+        Args:
+            commit_hash: Commit that should reach the remote
+            phase_id: Optional phase identifier (for logging)
+        """
+        with self._cond:
+            self.pending.append({
+                "commit": commit_hash,
+                "phase": phase_id,
+                "queued_at": time.time()
+            })
+            # A new commit resets a give-up state so the batch is retried
+            if self._attempt >= self.config.get("push_max_attempts", PUSH_MAX_ATTEMPTS):
+                self._attempt = 0
+                self._retry_at = 0.0
+            self._ensure_worker()
+            self._cond.notify_all()
+        self.logger.debug(f"Queued push for {commit_hash[:8]} (depth {len(self.pending)})")
+    
+    def _worker(self):
+        """Worker loop: coalesce, push, back off on failure."""
+        while True:
+            with self._cond:
+                while not self._stopped and (not self.pending or self._gave_up()):
+                    if not self._cond.wait(PUSH_WORKER_IDLE) and (not self.pending or self._gave_up()):
+                        self._thread = None
+                        return
+                if self._stopped:
+                    return
+                
+                # Coalescing window (or backoff delay after a failure); recomputed
+                # on every wake-up since flush() clears both
+                window = self.config.get("push_coalesce_window", PUSH_COALESCE_WINDOW)
+                while not self._stopped:
+                    wake_at = max(self.pending[0]["queued_at"] + window, self._retry_at)
+                    if time.time() >= wake_at:
+                        break
+                    self._cond.wait(wake_at - time.time())
+                
+                batch = list(self.pending)
+                self._pushing = True
+            
+            started = time.time()
+            success, error = self.git.push_now(traced=False)
+            elapsed_ms = (time.time() - started) * 1000
+            for phase_id in dict.fromkeys(item["phase"] for item in batch if item["phase"]):
+                self.git.tracer.record("git push", started, elapsed_ms / 1000, "git", phase_id,
+                                       commits=len(batch), success=success)
+            
+            with self._cond:
+                self._pushing = False
+                self.stats["last_push_latency_ms"] = round(elapsed_ms, 1)
+                if success:
+                    del self.pending[:len(batch)]
+                    self._attempt = 0
+                    self._retry_at = 0.0
+                    self.stats["pushes"] += 1
+                    self.stats["commits_pushed"] += len(batch)
+                    self.stats["last_push_at"] = datetime.now().isoformat()
+                    self.stats["last_error"] = None
+                    if len(batch) > 1:
+                        self.logger.info(f"Pushed {len(batch)} coalesced commits ({elapsed_ms:.0f}ms)")
+                else:
+                    self._attempt += 1
+                    self.stats["failures"] += 1
+                    self.stats["last_error"] = error
+                    max_attempts = self.config.get("push_max_attempts", PUSH_MAX_ATTEMPTS)
+                    if self._attempt >= max_attempts:
+                        self._retry_at = 0.0
+                        self.logger.error(
+                            f"Push failed {self._attempt} times - "
+                            f"{len(self.pending)} commits stay queued until the next commit"
+                        )
+                    else:
+                        delay = min(
+                            self.config.get("push_backoff_base", PUSH_BACKOFF_BASE) * (2 ** (self._attempt - 1)),
+                            self.config.get("push_backoff_max", PUSH_BACKOFF_MAX)
+                        )
+                        self._retry_at = time.time() + delay
+                        self.logger.warn(f"Push attempt {self._attempt} failed - retrying in {delay:.0f}s")
+                self._cond.notify_all()
+                if self._stopped:
+                    return
+    
+    def _gave_up(self) -> bool:
+        """True once the current batch has exhausted its attempts."""
+        return self._attempt >= self.config.get("push_max_attempts", PUSH_MAX_ATTEMPTS)
+    
+    def flush(self, timeout: float = 30.0) -> bool:
+        """
+        Push queued commits now and wait until the queue drains.
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True if the queue is empty
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            if not self.pending:
+                return True
+            self._attempt = 0
+            self._retry_at = 0.0
+            for item in self.pending:
+                item["queued_at"] = 0.0  # Skip the coalescing window
+            self._ensure_worker()
+            self._cond.notify_all()
+            while self.pending and time.time() < deadline:
+                if self._gave_up() and not self._pushing:
+                    break
+                self._cond.wait(min(0.5, max(0.0, deadline - time.time())))
+            return not self.pending
+    
+    def stop(self, flush_timeout: float = 10.0):
+        """
+        Stop the worker, first trying to flush queued commits.
+        
+        Args:
+            flush_timeout: Seconds to spend flushing before giving up
+        """
+        if self.pending:
+            self.flush(flush_timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+    
+    def get_stats(self) -> Dict:
+        """
+        Get queue statistics for the API.
+        
+        Returns:
+            {"depth": 2, "pushing": False, "attempt": 1, "next_retry_in": 4.0,
+             "pushes": 5, "failures": 1, "commits_pushed": 7,
+             "last_push_latency_ms": 850.2, "last_push_at": "...", "last_error": None}
+        """
+        with self._cond:
+            stats = dict(self.stats)
+            stats["depth"] = len(self.pending)
+            stats["pushing"] = self._pushing
+            stats["attempt"] = self._attempt
+            stats["next_retry_in"] = (
+                round(max(0.0, self._retry_at - time.time()), 1) if self._retry_at else None
+            )
+            return stats
+
+
+class WorktreeManager:
+    """
+    Per-phase git worktrees so each phase edits an isolated checkout.
+    
+    Layout:
+    ───────
+    <git common dir>/ai-workflow-worktrees/phase-<id>   worktree
+    ai-workflow/phase-<id>                              phase branch
+    
+    Keeping the checkouts inside the git directory means the main working
+    tree never sees them in `git status`.
+    
+    Lifecycle:
+    ──────────
+    acquire()  create the worktree on a fresh phase branch from the current
+               base branch, or reuse the cached one (retries keep their work)
+    commit()   commit whatever the phase left uncommitted on its branch
+    merge()    bring the phase branch back into the base branch:
+               fast-forward if possible, otherwise rebase the phase branch
+               onto the base and fast-forward; a conflicting rebase is
+               aborted and reported with the conflicting paths
+    release()  remove the worktree and its branch after a successful merge
+    discard()  release a worktree whose branch conflicts with the base, so a
+               retry starts from the current base; its last commit is kept
+               under refs/ai-workflow/conflicts/phase-<id>
+    cleanup()  release every phase worktree (workflow reset)
+    """
+    
+    def __init__(self, git: GitManager, logger: Logger, config: Dict):
+        """
+        Initialize WorktreeManager.
+        
+        Args:
+            git: GitManager for the main working tree
+            logger: Logger instance
+            config: Configuration dictionary
+        """
+        self.git = git
+        self.logger = logger
+        self.config = config
+        # phase_id -> {"path", "branch", "base", "git"}
+        self._worktrees: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+    
+    def branch_for(self, phase_id: str) -> str:
+        """Get the branch name used for a phase."""
+        return f"{self.config.get('worktree_branch_prefix', WORKTREE_BRANCH_PREFIX)}{phase_id}"
+    
+    def path_for(self, phase_id: str) -> Optional[Path]:
+        """Get the checkout path used for a phase (None if not a repository)."""
+        code, common_dir, _ = self.git._exec_git("rev-parse", "--git-common-dir")
+        if code != 0:
+            return None
+        return (self.git.project_path / common_dir.strip()).resolve() / WORKTREE_DIR / f"phase-{phase_id}"
+    
+    def acquire(self, phase_id: str) -> Optional[Path]:
+        """
+        Get the worktree for a phase, creating it if needed.
+        
+        Args:
+            phase_id: Phase identifier
+            
+        Returns:
+            Path to the worktree, or None if it could not be created
+        """
+        if not self.git.is_git_repo:
+            return None
+        
+        with self._lock:
+            cached = self._worktrees.get(phase_id)
+            if cached and cached["path"].exists():
+                self.logger.info(f"Reusing worktree for Phase {phase_id}")
+                return cached["path"]
+            
+            code, base, stderr = self.git._exec_git("symbolic-ref", "--short", "HEAD")
+            if code != 0:
+                self.logger.error(f"Worktrees need a checked-out branch: {stderr.strip()}")
+                return None
+            base = base.strip()
+            
+            path = self.path_for(phase_id)
+            if path is None:
+                return None
+            branch = self.branch_for(phase_id)
+            
+            if path.exists():
+                # Left over from a previous run of the orchestrator
+                self.logger.info(f"Reusing existing worktree {path}")
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self.git._exec_git("worktree", "prune")
+                code, _, _ = self.git._exec_git("rev-parse", "--verify", "--quiet", f"refs/heads/{branch}")
+                args = ["worktree", "add", str(path), branch] if code == 0 else \
+                       ["worktree", "add", "-b", branch, str(path), base]
+                code, _, stderr = self.git._exec_git(*args)
+                if code != 0:
+                    self.logger.error(f"Failed to create worktree for Phase {phase_id}: {stderr.strip()}")
+                    return None
+                self.logger.info(f"Created worktree {path} on {branch}")
+            
+            self._worktrees[phase_id] = {
+                "path": path,
+                "branch": branch,
+                "base": base,
+                "git": GitManager(path, self.logger, {**self.config, "auto_push": False}, self.git.metrics, self.git.tracer)
+            }
+            return path
+    
+    def commit(self, phase_id: str, description: str) -> Optional[str]:
+        """
+        Commit uncommitted changes in a phase worktree onto its branch.
+        
+        Args:
+            phase_id: Phase identifier
+            description: Description for commit message
+            
+        Returns:
+            Commit hash, or None if there was nothing to commit
+        """
+        worktree = self._worktrees.get(phase_id)
+        if not worktree:
+            return None
+        return worktree["git"].commit_and_push(phase_id, description)
+    
+    def merge(self, phase_id: str) -> Dict:
+        """
+        Merge a phase branch back into the base branch of the main tree.
+        
+        Args:
+            phase_id: Phase identifier
+            
+        Returns:
+            {"status": "fast-forward" | "rebased" | "up-to-date" | "conflict" | "failed",
+             "commit": "<oid>" or None, "previous": "<base oid before the merge>" or None,
+             "files": [...], "conflicts": [...], "error": None}
+        """
+        result = {"status": "failed", "commit": None, "previous": None, "files": [], "conflicts": [], "error": None}
+        
+        worktree = self._worktrees.get(phase_id)
+        if not worktree:
+            result["error"] = f"No worktree for Phase {phase_id}"
+            return result
+        
+        wt_git, branch, base = worktree["git"], worktree["branch"], worktree["base"]
+        
+        code, merge_base, _ = self.git._exec_git("merge-base", base, branch)
+        code_base, base_head, _ = self.git._exec_git("rev-parse", base)
+        code_branch, branch_head, _ = self.git._exec_git("rev-parse", branch)
+        if code != 0 or code_base != 0 or code_branch != 0:
+            result["error"] = f"Cannot compare {branch} with {base}"
+            return result
+        merge_base, base_head, branch_head = merge_base.strip(), base_head.strip(), branch_head.strip()
+        result["previous"] = base_head
+        
+        if branch_head == merge_base:
+            result["status"] = "up-to-date"
+            result["commit"] = base_head
+            return result
+        
+        status = "fast-forward"
+        if merge_base != base_head:
+            # The base moved on since the phase started: replay the phase on top
+            code, _, stderr = wt_git._exec_git("rebase", base, timeout=300)
+            if code != 0:
+                _, conflicts, _ = wt_git._exec_git("diff", "--name-only", "--diff-filter=U", "-z")
+                wt_git._exec_git("rebase", "--abort")
+                result["status"] = "conflict"
+                result["conflicts"] = [path for path in conflicts.split('\0') if path]
+                result["error"] = stderr.strip()
+                self.logger.error(
+                    f"Phase {phase_id} conflicts with {base}: {', '.join(result['conflicts']) or stderr.strip()}"
+                )
+                return result
+            status = "rebased"
+        
+        code, _, stderr = self.git._exec_git("merge", "--ff-only", branch)
+        if code != 0:
+            result["error"] = stderr.strip()
+            self.logger.error(f"Failed to fast-forward {base} to {branch}: {result['error']}")
+            return result
+        
+        _, head, _ = self.git._exec_git("rev-parse", "HEAD")
+        _, files, _ = self.git._exec_git("diff", "--name-only", "-z", base_head, "HEAD")
+        result["status"] = status
+        result["commit"] = head.strip()
+        result["files"] = [path for path in files.split('\0') if path]
+        self.logger.info(f"Merged Phase {phase_id} into {base} ({status}, {len(result['files'])} files)")
+        return result
+    
+    def release(self, phase_id: str):
+        """
+        Remove a phase worktree and its branch.
+        
+        Args:
+            phase_id: Phase identifier
+        """
+        with self._lock:
+            worktree = self._worktrees.pop(phase_id, None)
+            path = worktree["path"] if worktree else self.path_for(phase_id)
+            branch = worktree["branch"] if worktree else self.branch_for(phase_id)
+            
+            if path and path.exists():
+                code, _, stderr = self.git._exec_git("worktree", "remove", "--force", str(path))
+                if code != 0:
+                    self.logger.warn(f"Failed to remove worktree {path}: {stderr.strip()}")
+            self.git._exec_git("branch", "-D", branch)
+    
+    def discard(self, phase_id: str) -> Optional[str]:
+        """
+        Remove a phase worktree that cannot be merged, keeping its work reachable.
+        
+        Args:
+            phase_id: Phase identifier
+            
+        Returns:
+            Ref holding the phase branch's last commit, or None if there was none
+        """
+        branch = self.branch_for(phase_id)
+        code, tip, _ = self.git._exec_git("rev-parse", "--verify", "--quiet", f"refs/heads/{branch}")
+        saved = None
+        if code == 0:
+            ref = f"{WORKTREE_CONFLICT_REF}{phase_id}"
+            if self.git._exec_git("update-ref", ref, tip.strip())[0] == 0:
+                saved = ref
+        self.release(phase_id)
+        return saved
+    
+    def cleanup(self):
+        """Remove every phase worktree and branch, including ones from earlier runs."""
+        if not self.git.is_git_repo:
+            return
+        
+        phase_ids = set(self._worktrees)
+        code, listing, _ = self.git._exec_git("worktree", "list", "--porcelain", "-z")
+        if code == 0:
+            for record in listing.split('\0'):
+                if record.startswith("worktree "):
+                    path = Path(record[len("worktree "):])
+                    if path.parent.name == WORKTREE_DIR and path.name.startswith("phase-"):
+                        phase_ids.add(path.name[len("phase-"):])
+        
+        for phase_id in sorted(phase_ids):
+            self.release(phase_id)
+        self.git._exec_git("worktree", "prune")
+        
+        if phase_ids:
+            self.logger.info(f"Removed {len(phase_ids)} phase worktrees")
+    
+    def get_stats(self) -> Dict:
+        """Get the active worktrees for the API."""
+        return {
+            phase_id: {"path": str(wt["path"]), "branch": wt["branch"], "base": wt["base"]}
+            for phase_id, wt in self._worktrees.items()
+        }
+
+
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ HTML PARSE CACHE - Single-Pass Page Parsing                                              ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+@dataclass
+class ParsedPage:
+    """
+    Facts extracted from one HTML page in a single parser pass.
+    
+    Test suites share these instead of re-reading and re-scanning each page.
+    Entries are cached by file size and mtime, so unchanged pages are only
+    parsed once per orchestrator run.
+    """
+    path: str                                             # Path relative to project root
+    size: int                                             # File size in bytes
+    classes: set = field(default_factory=set)             # All class names used
+    ids: set = field(default_factory=set)                 # All element ids used
+    stylesheets: List[Dict] = field(default_factory=list) # <link rel=stylesheet> entries
+    scripts: List[Dict] = field(default_factory=list)     # <script> entries (src or inline)
+    images: List[str] = field(default_factory=list)       # <img src> values
+    node_count: int = 0                                   # Number of elements
+    max_depth: int = 0                                    # Deepest element nesting
+    inline_style_bytes: int = 0                           # <style> blocks + style="" attributes
+    parse_ms: float = 0.0                                 # Time spent parsing
+
+
+class PageParser(HTMLParser):
+    """Collects ParsedPage facts while streaming through an HTML document."""
+    
+    # Elements that never have content or an end tag
+    VOID_ELEMENTS = {
+        "area", "base", "br", "col", "embed", "hr", "img", "input",
+        "link", "meta", "param", "source", "track", "wbr"
+    }
+    
+    def __init__(self, page: ParsedPage):
+        super().__init__(convert_charrefs=True)
+        self.page = page
+        self.in_head = False
+        self.in_style = False
+        self.current_script: Optional[Dict] = None
+        self.open_tags: List[str] = []
+    
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self._element(tag, attrs)
+        if tag not in self.VOID_ELEMENTS:
+            self.open_tags.append(tag)
+            self.page.max_depth = max(self.page.max_depth, len(self.open_tags))
+    
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self._element(tag, attrs)
+        self.current_script = None
+        self.in_style = False
+    
+    def _element(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        """Record facts about one element."""
+        attributes = {name: (value or "") for name, value in attrs}
+        self.page.node_count += 1
+        
+        if tag == "head":
+            self.in_head = True
+        elif tag == "body":
+            self.in_head = False
+        elif tag == "style":
+            self.in_style = True
+        
+        if attributes.get("class"):
+            self.page.classes.update(attributes["class"].split())
+        if attributes.get("id"):
+            self.page.ids.add(attributes["id"])
+        if attributes.get("style"):
+            self.page.inline_style_bytes += len(attributes["style"].encode('utf-8'))
+        
+        if tag == "link" and "stylesheet" in attributes.get("rel", "").lower().split():
+            self.page.stylesheets.append({
+                "href": attributes.get("href", ""),
+                "in_head": self.in_head,
+                "media": attributes.get("media")
+            })
+        elif tag == "script":
+            self.current_script = {
+                "src": attributes.get("src"),
+                "type": attributes.get("type", "").lower(),
+                "in_head": self.in_head,
+                "defer": "defer" in attributes,
+                "async": "async" in attributes,
+                "inline_bytes": 0
+            }
+            self.page.scripts.append(self.current_script)
+        elif tag == "img" and attributes.get("src"):
+            self.page.images.append(attributes["src"])
+    
+    def handle_data(self, data: str):
+        if self.current_script is not None:
+            self.current_script["inline_bytes"] += len(data.encode('utf-8'))
+        elif self.in_style:
+            self.page.inline_style_bytes += len(data.encode('utf-8'))
+    
+    def handle_endtag(self, tag: str):
+        if tag == "head":
+            self.in_head = False
+        elif tag == "script":
+            self.current_script = None
+        elif tag == "style":
+            self.in_style = False
+        
+        # Pop back to the matching open tag (implicitly closing unclosed children)
+        if tag in self.open_tags:
+            while self.open_tags and self.open_tags.pop() != tag:
+                pass
+
+
+class HtmlParseCache:
+    """
+    Thread-safe cache of ParsedPage entries keyed by path, size and mtime.
+    """
+    
+    def __init__(self):
+        self._entries: Dict[Path, Tuple[int, int, ParsedPage]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, path: Path, project_path: Path) -> Optional[ParsedPage]:
+        """
+        Get the parsed page for a file, parsing it if unseen or changed.
+        
+        Args:
+            path: HTML file path
+            project_path: Project root (used for the relative page path)
+        
+        Returns:
+            ParsedPage or None if the file cannot be read
+        """
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        
+        with self._lock:
+            cached = self._entries.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        
+        started = time.time()
+        try:
+            content = path.read_text(encoding='utf-8', errors='ignore')
+        except OSError:
+            return None
+        
+        try:
+            relative = str(path.relative_to(project_path))
+        except ValueError:
+            relative = path.name
+        
+        page = ParsedPage(path=relative, size=stat.st_size)
+        parser = PageParser(page)
+        try:
+            parser.feed(content)
+            parser.close()
+        except Exception:
+            pass  # Keep whatever was collected before the parser gave up
+        page.parse_ms = round((time.time() - started) * 1000, 2)
+        
+        with self._lock:
+            self._entries[path] = (stat.st_size, stat.st_mtime_ns, page)
+        return page
+    
+    def pages(self, project_path: Path, exclude: Optional[Path] = None) -> List[ParsedPage]:
+        """
+        Get parsed pages for every HTML file under the project.
+        
+        Args:
+            project_path: Project root
+            exclude: Optional directory to skip (e.g. .ai-workflow)
+        
+        Returns:
+            List of ParsedPage objects, sorted by path
+        """
+        pages = []
+        for html_file in sorted(project_path.glob("**/*.html")):
+            if exclude is not None and exclude in html_file.parents:
+                continue
+            page = self.get(html_file, project_path)
+            if page:
+                pages.append(page)
+        return pages
+
+
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ CSS TOKENIZER - Structural CSS Analysis                                                  ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+class CssTokenizer:
+    """
+    Streaming tokenizer for CSS source.
+    
+    Yields (kind, text, offset) tuples in a single regex pass. Braces that
+    appear inside comments, strings or url(...) are part of those tokens,
+    so they never affect block structure.
+    
+    Token kinds: comment, string, url, open, close, semicolon, colon,
+    comma, at, text, and the error kinds bad-comment / bad-string.
+    """
+    
+    TOKEN_PATTERN = re.compile(r'''
+        (?P<comment>/\*.*?\*/)
+      | (?P<bad_comment>/\*.*\Z)
+      | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+      | (?P<bad_string>["'][^\n]*)
+      | (?P<url>url\(\s*(?:"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|[^)]*)\s*\))
+      | (?P<open>\{)
+      | (?P<close>\})
+      | (?P<semicolon>;)
+      | (?P<colon>:)
+      | (?P<comma>,)
+      | (?P<at>@[\w-]+)
+      | (?P<text>(?:[^{};:,"'/@u]|u(?!rl\()|/(?!\*))+|.)
+    ''', re.VERBOSE | re.DOTALL | re.IGNORECASE)
+    
+    @classmethod
+    def tokenize(cls, content: str):
+        """
+        Tokenize CSS content.
+        
+        Args:
+            content: CSS source text
+        
+        Yields:
+            Tuples of (kind, text, offset)
+        """
+        for match in cls.TOKEN_PATTERN.finditer(content):
+            kind = match.lastgroup.replace('_', '-')
+            yield kind, match.group(), match.start()
+
+
+class CssAnalyzer:
+    """
+    Builds rule/selector/declaration statistics from the CSS token stream.
+    
+    Block Handling:
+    ───────────────
+    - Qualified rules:    selector list { declarations }
+    - Grouping at-rules:  @media / @supports / @document / @layer { rules }
+    - Other block at-rules (@font-face, @page, @keyframes frames) are counted
+      as rules, but their preludes are not selectors.
+    """
+    
+    GROUPING_AT_RULES = {"@media", "@supports", "@document", "@layer", "@container",
+                         "@-moz-document"}
+    
+    @classmethod
+    def analyze(cls, content: str) -> Dict:
+        """
+        Analyze CSS content.
+        
+        Args:
+            content: CSS source text
+        
+        Returns:
+            Dictionary with counts, structural errors and the rule list:
+            {
+                "rules": 120, "selectors": 180, "declarations": 640,
+                "at_rules": 12, "imports": [...], "errors": [...],
+                "rule_list": [{"context", "selectors", "body", "start", "end"}, ...]
+            }
+        """
+        stats = {
+            "rules": 0,
+            "selectors": 0,
+            "declarations": 0,
+            "at_rules": 0,
+            "imports": [],
+            "errors": [],
+            "rule_list": []
+        }
+        
+        # Stack of open blocks: (kind, context, prelude_start)
+        stack: List[Tuple[str, str, int]] = []
+        prelude: List[str] = []
+        prelude_start: Optional[int] = None
+        body_parts: List[str] = []
+        
+        def line_of(offset: int) -> int:
+            return content.count('\n', 0, offset) + 1
+        
+        for kind, text, offset in CssTokenizer.tokenize(content):
+            if kind == "comment":
+                continue
+            
+            if kind in ("bad-comment", "bad-string"):
+                label = "Unterminated comment" if kind == "bad-comment" else "Unterminated string"
+                stats["errors"].append(f"line {line_of(offset)}: {label}")
+                continue
+            
+            in_declarations = bool(stack) and stack[-1][0] == "declarations"
+            
+            if kind == "open":
+                selector_text = ''.join(prelude).strip()
+                context = stack[-1][1] if stack else ""
+                start = prelude_start if prelude_start is not None else offset
+                
+                if selector_text.startswith('@'):
+                    stats["at_rules"] += 1
+                    at_name = selector_text.split(None, 1)[0].lower()
+                    if at_name in cls.GROUPING_AT_RULES:
+                        stack.append(("group", f"{context} {selector_text}".strip(), start))
+                    elif at_name.endswith("keyframes"):
+                        stack.append(("keyframes", f"{context} {selector_text}".strip(), start))
+                    else:
+                        stack.append(("declarations", f"{context} {at_name}".strip(), start))
+                        body_parts = []
+                elif in_declarations:
+                    # Nested block inside declarations (CSS nesting) - track it structurally
+                    stack.append(("nested", context, start))
+                elif stack and stack[-1][0] == "keyframes":
+                    stats["rules"] += 1
+                    stack.append(("frame", context, start))
+                    body_parts = []
+                else:
+                    selectors = [s.strip() for s in cls._split_selectors(selector_text) if s.strip()]
+                    if not selectors:
+                        stats["errors"].append(f"line {line_of(offset)}: Block without selector")
+                    stats["rules"] += 1
+                    stats["selectors"] += len(selectors)
+                    stats["rule_list"].append({
+                        "context": context,
+                        "selectors": selectors,
+                        "body": None,
+                        "start": start,
+                        "end": None
+                    })
+                    stack.append(("declarations", context, start))
+                    body_parts = []
+                
+                prelude = []
+                prelude_start = None
+                continue
+            
+            if kind == "close":
+                if not stack:
+                    stats["errors"].append(f"line {line_of(offset)}: Unmatched closing brace")
+                    prelude = []
+                    prelude_start = None
+                    continue
+                
+                block_kind = stack.pop()[0]
+                if block_kind in ("declarations", "frame"):
+                    if ''.join(prelude).strip():
+                        stats["declarations"] += 1
+                    body_parts.append(''.join(prelude))
+                    if block_kind == "declarations":
+                        rule = stats["rule_list"][-1] if stats["rule_list"] else None
+                        if rule is not None and rule["end"] is None:
+                            rule["body"] = ' '.join(''.join(body_parts).split())
+                            rule["end"] = offset + 1
+                prelude = []
+                prelude_start = None
+                continue
+            
+            if kind == "semicolon":
+                if in_declarations or (stack and stack[-1][0] == "frame"):
+                    if ''.join(prelude).strip():
+                        stats["declarations"] += 1
+                    body_parts.append(''.join(prelude) + ';')
+                # Statement at-rules (@import, @charset) end here too
+                statement = ''.join(prelude).strip()
+                if not stack and statement.lower().startswith('@import'):
+                    stats["at_rules"] += 1
+                    target = re.search(r'url\(\s*["\']?([^"\')\s]+)|["\']([^"\']+)["\']', statement)
+                    if target:
+                        stats["imports"].append(target.group(1) or target.group(2))
+                prelude = []
+                prelude_start = None
+                continue
+            
+            if prelude_start is None and text.strip():
+                prelude_start = offset + len(text) - len(text.lstrip())
+            prelude.append(text)
+        
+        for block_kind, context, start in stack:
+            stats["errors"].append(f"line {line_of(start)}: Unclosed block ({block_kind})")
+        
+        return stats
+    
+    @staticmethod
+    def _split_selectors(selector_text: str) -> List[str]:
+        """Split a selector list on top-level commas (ignoring :is(a, b) etc.)."""
+        selectors = []
+        depth = 0
+        current = []
+        for char in selector_text:
+            if char in '([':
+                depth += 1
+            elif char in ')]':
+                depth = max(0, depth - 1)
+            elif char == ',' and depth == 0:
+                selectors.append(''.join(current))
+                current = []
+                continue
+            current.append(char)
+        selectors.append(''.join(current))
+        return selectors
+    
+    @staticmethod
+    def required_names(selector: str) -> Tuple[set, set]:
+        """
+        Get the class and id names an element tree must contain to match a selector.
+        
+        Names inside :not(...) and attribute selectors are ignored, since
+        they describe what must be absent or are matched by value.
+        
+        Args:
+            selector: A single selector
+        
+        Returns:
+            Tuple of (class names, id names)
+        """
+        stripped = re.sub(r':not\([^)]*\)', '', selector)
+        stripped = re.sub(r'\[[^\]]*\]', '', stripped)
+        classes = set(re.findall(r'\.(-?[_a-zA-Z][\w-]*)', stripped))
+        ids = set(re.findall(r'#(-?[_a-zA-Z][\w-]*)', stripped))
+        return classes, ids
+
+
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ TEST RUNNER - Built-in Testing Framework                                                 ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+class TestRunner:
+    """
+    Built-in testing framework for validating changes.
+    
+    Tests Performed:
+    ────────────────
+    1. Internal Link Validation - Check all internal hrefs point to existing files
+    2. HTML Structure Validation - Check for DOCTYPE, title, charset
+    3. Image Reference Check - Verify all referenced images exist
+    4. CSS Validation - Tokenizer-based CSS structure validation
+    5. CSS Usage - Rule/selector statistics, duplicates and unused selectors
+    6. JavaScript Assets - Render-blocking, duplicate and missing script includes
+    7. Render Cost - DOM size/depth, inline bytes and critical request chain
+    
+    Alongside the suites, run_tests() records per-page weight metrics
+    (HTML, CSS, JS and image bytes plus request counts) under "metrics".
+    
+    HTML pages are parsed once into a shared HtmlParseCache and CSS files are
+    tokenized once per change, so suites can cross-reference each other cheaply.
+    
+    Test results are saved to test-results/ directory and included in session data.
+    """
+    
+    # Suite → file extensions it reads (None = any change can affect it,
+    # e.g. deleting any file can break a link)
+    SUITE_INPUTS = [
+        ("_test_internal_links", None),
+        ("_test_html_structure", (".html",)),
+        ("_test_images", (".html", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".avif")),
+        ("_test_css_validity", (".css",)),
+        ("_test_css_usage", (".html", ".css", ".js")),
+        ("_test_javascript", (".html", ".js")),
+        ("_test_render_cost", (".html", ".css", ".js")),  # counts render-blocking script bytes
+    ]
+    
+    def __init__(
+        self,
+        project_path: Path,
+        workflow_dir: Path,
+        logger: Logger,
+        config: Dict,
+        metrics: Optional[Metrics] = None,
+        tracer: Optional[Tracer] = None
+    ):
+        """
+        Initialize TestRunner.
+        
+        Args:
+            project_path: Path to project root
+            workflow_dir: Path to .ai-workflow directory
+            logger: Logger instance
+            config: Configuration dictionary
+            metrics: Optional metrics registry (run and suite durations)
+            tracer: Optional tracer (suites as handoff spans)
+        """
+        self.project_path = project_path
+        self.workflow_dir = workflow_dir
+        self.logger = logger
+        self.config = config
+        self.metrics = metrics or Metrics(enabled=False)
+        self.tracer = tracer or Tracer(enabled=False)
+        self.results_dir = workflow_dir / "test-results"
+        
+        # Image references from the last image audit (reused by the variant pipeline)
+        self.image_references: List[Dict] = []
+        
+        # Shared parse caches (keyed by path, invalidated by size/mtime)
+        self.html_cache = HtmlParseCache()
+        self._css_cache: Dict[Path, Tuple[int, int, Dict]] = {}
+        
+        # Last result of each suite, reused when a phase leaves its inputs untouched
+        self._suite_results: Dict[str, Dict] = {}
+    
+    def run_tests(self, phase_id: str, changed_files: Optional[List[str]] = None) -> Dict:
+        """
+        Run all tests for a phase.
+        
+        With changed_files, suites whose inputs were not touched reuse their
+        previous result (marked "scoped_out") instead of running again.
+        
+        Args:
+            phase_id: Phase identifier
+            changed_files: Optional exact list of paths the phase changed
+            
+        Returns:
+            Test results dictionary with structure:
+            {
+                "phase": "A",
+                "timestamp": "2026-01-21T12:00:00Z",
+                "status": "passed|failed",
+                "tests": [...],
+                "summary": {"total": 7, "passed": 7, "failed": 0, "skipped": 0},
+                "metrics": {"pages": {...}, "totals": {...}}
+            }
+        """
+        self.logger.info(f"Running tests for Phase {phase_id}...")
+        started = time.perf_counter()
+        
+        results = {
+            "phase": phase_id,
+            "timestamp": datetime.now().isoformat(),
+            "status": "pending",
+            "tests": [],
+            "summary": {
+                "total": 0,
+                "passed": 0,
+                "failed": 0,
+                "skipped": 0
+            },
+            "metrics": {}
+        }
+        
+        # Run individual test suites
+        tests = []
+        for method, extensions in self.SUITE_INPUTS:
+            previous = self._suite_results.get(method)
+            if changed_files is not None and previous is not None and not any(
+                extensions is None or path.lower().endswith(extensions) for path in changed_files
+            ):
+                tests.append({**previous, "scoped_out": True})
+                continue
+            
+            with self.metrics.time("orchestrator_test_suite_seconds", suite=method), \
+                    self.tracer.span(f"test {method[len('_test_'):]}", "tests"):
+                test = getattr(self, method)()
+            self._suite_results[method] = test
+            tests.append(test)
+        
+        if changed_files is not None:
+            results["changed_files"] = changed_files
+            scoped_out = sum(1 for t in tests if t.get("scoped_out"))
+            if scoped_out:
+                self.logger.info(f"Reused {scoped_out} suites unaffected by {len(changed_files)} changed files")
+        
+        results["tests"] = tests
+        results["metrics"] = self._collect_page_weights()
+        
+        # Calculate summary
+        results["summary"]["total"] = len(tests)
+        results["summary"]["passed"] = sum(1 for t in tests if t["status"] == "passed")
+        results["summary"]["failed"] = sum(1 for t in tests if t["status"] == "failed")
+        results["summary"]["skipped"] = sum(1 for t in tests if t["status"] == "skipped")
+        
+        # Overall status
+        results["status"] = "passed" if results["summary"]["failed"] == 0 else "failed"
+        self.metrics.observe("orchestrator_test_run_seconds", time.perf_counter() - started)
+        for test in tests:
+            self.metrics.inc("orchestrator_test_results_total", status=test["status"])
+        
+        # Log results
+        passed = results["summary"]["passed"]
+        failed = results["summary"]["failed"]
+        total = results["summary"]["total"]
+        
+        if failed == 0:
+            self.logger.info(f"✅ All tests passed: {passed}/{total}")
+        else:
+            self.logger.warn(f"⚠️ Tests: {passed} passed, {failed} failed of {total}")
+        
+        # Save results to file
+        timestamp = int(time.time())
+        results_file = self.results_dir / f"phase-{phase_id}-{timestamp}.json"
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        with open(results_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        
+        return results
+    
+    def _test_internal_links(self) -> Dict:
+        """Test that internal links point to existing files."""
+        test = {
+            "name": "Internal Links",
+            "status": "passed",
+            "message": "",
+            "details": [],
+            "metrics": {"broken_links": 0}
+        }
+        
+        html_files = list(self.project_path.glob("**/*.html"))
+        broken_links = []
+        
+        for html_file in html_files[:20]:  # Limit to first 20 files for speed
+            try:
+                content = html_file.read_text(encoding='utf-8', errors='ignore')
+                
+                # Find all href attributes
+                hrefs = re.findall(r'href=["\']([^"\']+)["\']', content)
+                
+                for href in hrefs:
+                    # Skip external links, anchors, and special protocols
+                    if href.startswith(('#', 'http', 'https', 'mailto:', 'tel:', 'javascript:')):
+                        continue
+                    
+                    # Remove query strings and anchors
+                    clean_href = href.split('?')[0].split('#')[0]
+                    
+                    # Try relative to HTML file
+                    target = html_file.parent / clean_href
+                    if not target.exists():
+                        # Try relative to project root
+                        target = self.project_path / clean_href.lstrip('/')
+                        if not target.exists():
+                            broken_links.append(f"{html_file.name}: {href}")
+            except Exception:
+                pass
+        
+        test["metrics"]["broken_links"] = len(broken_links)
+        
+        if broken_links:
+            test["status"] = "failed"
+            test["message"] = f"Found {len(broken_links)} broken internal links"
+            test["details"] = broken_links[:10]  # Limit details shown
+        else:
+            test["message"] = "All internal links are valid"
+        
+        return test
+    
+    def _test_html_structure(self) -> Dict:
+        """Test basic HTML structure requirements."""
+        test = {
+            "name": "HTML Structure",
+            "status": "passed",
+            "message": "",
+            "details": []
+        }
+        
+        issues = []
+        html_files = list(self.project_path.glob("*.html"))  # Only root HTML files
+        
+        for html_file in html_files[:10]:
+            try:
+                content = html_file.read_text(encoding='utf-8', errors='ignore')
+                
+                # Check for DOCTYPE declaration
+                if '<!DOCTYPE' not in content.upper():
+                    issues.append(f"{html_file.name}: Missing DOCTYPE declaration")
+                
+                # Check for title tag
+                if '<title>' not in content.lower():
+                    issues.append(f"{html_file.name}: Missing <title> tag")
+                
+                # Check for charset declaration
+                if 'charset' not in content.lower():
+                    issues.append(f"{html_file.name}: Missing charset declaration")
+                
+            except Exception:
+                pass
+        
+        if issues:
+            test["status"] = "failed" if len(issues) > 5 else "passed"
+            test["message"] = f"Found {len(issues)} HTML structure issues"
+            test["details"] = issues[:10]
+        else:
+            test["message"] = "HTML structure is valid"
+        
+        return test
+    
+    def collect_image_references(self) -> List[Dict]:
+        """
+        Collect local image references from root HTML pages.
+        
+        Each reference records the page, the src as written, the resolved
+        file (None if missing) and whether the owning <img> already has a
+        srcset. The image audit and the variant pipeline share this data.
+        
+        Returns:
+            List of reference dictionaries
+        """
+        references = []
+        html_files = list(self.project_path.glob("*.html"))
+        
+        for html_file in html_files[:10]:
+            try:
+                content = html_file.read_text(encoding='utf-8', errors='ignore')
+                
+                # Find all image sources
+                srcs = re.findall(
+                    r'src=["\']([^"\']+\.(png|jpg|jpeg|gif|svg|webp))["\']',
+                    content,
+                    re.IGNORECASE
+                )
+                
+                # Sources of <img> tags that already declare a srcset
+                with_srcset = set()
+                for tag in re.findall(r'<img\b[^>]*>', content, re.IGNORECASE):
+                    if 'srcset=' in tag.lower():
+                        src_match = re.search(r'\bsrc=["\']([^"\']+)["\']', tag)
+                        if src_match:
+                            with_srcset.add(src_match.group(1))
+                
+                for src, ext in srcs:
+                    # Skip external images and data URIs
+                    if src.startswith(('http://', 'https://', 'data:')):
+                        continue
+                    
+                    # Check if image exists
+                    img_path = self.project_path / src.lstrip('/')
+                    if not img_path.exists():
+                        # Try relative to HTML file
+                        img_path = html_file.parent / src
+                    
+                    references.append({
+                        "page": html_file.name,
+                        "src": src,
+                        "path": img_path if img_path.exists() else None,
+                        "has_srcset": src in with_srcset
+                    })
+            except Exception:
+                pass
+        
+        return references
+    
+    def _test_images(self) -> Dict:
+        """Test that image references exist."""
+        test = {
+            "name": "Image References",
+            "status": "passed",
+            "message": "",
+            "details": []
+        }
+        
+        self.image_references = self.collect_image_references()
+        
+        # Remove duplicates
+        missing_images = list(set(
+            ref["src"] for ref in self.image_references if ref["path"] is None
+        ))
+        
+        if missing_images:
+            test["status"] = "failed"
+            test["message"] = f"Found {len(missing_images)} missing images"
+            test["details"] = missing_images[:10]
+        else:
+            test["message"] = "All referenced images exist"
+        
+        return test
+    
+    def _css_files(self) -> List[Path]:
+        """Get project CSS files (excluding the .ai-workflow directory)."""
+        return [
+            f for f in sorted(self.project_path.glob("**/*.css"))
+            if self.workflow_dir not in f.parents
+        ]
+    
+    def _analyze_css(self, css_file: Path) -> Optional[Dict]:
+        """
+        Tokenize and analyze a CSS file, reusing the cached result if unchanged.
+        
+        Args:
+            css_file: CSS file path
+            
+        Returns:
+            CssAnalyzer result plus "bytes" and "parse_ms", or None if unreadable
+        """
+        try:
+            stat = css_file.stat()
+        except OSError:
+            return None
+        
+        cached = self._css_cache.get(css_file)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        
+        started = time.time()
+        try:
+            content = css_file.read_text(encoding='utf-8', errors='ignore')
+        except OSError:
+            return None
+        
+        analysis = CssAnalyzer.analyze(content)
+        analysis["bytes"] = stat.st_size
+        analysis["parse_ms"] = round((time.time() - started) * 1000, 2)
+        
+        self._css_cache[css_file] = (stat.st_size, stat.st_mtime_ns, analysis)
+        return analysis
+    
+    def _test_css_validity(self) -> Dict:
+        """Validate CSS structure using the tokenizer (strings, comments and url() aware)."""
+        test = {
+            "name": "CSS Validation",
+            "status": "passed",
+            "message": "",
+            "details": []
+        }
+        
+        issues = []
+        
+        for css_file in self._css_files():
+            analysis = self._analyze_css(css_file)
+            if analysis is None:
+                continue
+            for error in analysis["errors"]:
+                issues.append(f"{css_file.name}: {error}")
+        
+        if issues:
+            test["status"] = "failed"
+            test["message"] = f"Found {len(issues)} CSS issues"
+            test["details"] = issues[:10]
+        else:
+            test["message"] = "CSS files are valid"
+        
+        return test
+    
+    def _test_css_usage(self) -> Dict:
+        """
+        Report CSS rule statistics, duplicate rules and unused selectors.
+        
+        Selectors are cross-referenced against the classes and ids found in
+        the cached HTML parse. A rule whose selectors are all unused counts
+        towards unused bytes. This suite is informational and never fails.
+        """
+        test = {
+            "name": "CSS Usage",
+            "status": "passed",
+            "message": "",
+            "details": [],
+            "metrics": {"files": {}, "totals": {}}
+        }
+        
+        # Collect every class and id used by the site's pages
+        used_classes: set = set()
+        used_ids: set = set()
+        for page in self._site_pages():
+            used_classes.update(page.classes)
+            used_ids.update(page.ids)
+        
+        ignore_prefixes = tuple(self.config.get("css_unused_ignore", ["w--"]))
+        
+        def is_used(selector: str) -> bool:
+            classes, ids = CssAnalyzer.required_names(selector)
+            for name in classes:
+                if name not in used_classes and not name.startswith(ignore_prefixes):
+                    return False
+            return all(name in used_ids for name in ids)
+        
+        totals = {
+            "files": 0, "bytes": 0, "rules": 0, "selectors": 0, "declarations": 0,
+            "duplicate_rules": 0, "unused_selectors": 0, "unused_bytes": 0, "parse_ms": 0.0
+        }
+        details = []
+        
+        for css_file in self._css_files():
+            analysis = self._analyze_css(css_file)
+            if analysis is None:
+                continue
+            
+            relative = str(css_file.relative_to(self.project_path))
+            seen_rules: Dict[Tuple[str, str, str], int] = {}
+            duplicates = 0
+            unused_selectors = 0
+            unused_bytes = 0
+            
+            for rule in analysis["rule_list"]:
+                # Duplicate: same context, selector list and declarations
+                key = (rule["context"], ', '.join(rule["selectors"]), rule["body"] or "")
+                seen_rules[key] = seen_rules.get(key, 0) + 1
+                if seen_rules[key] == 2:
+                    details.append(f"{css_file.name}: duplicate rule '{key[1][:60]}'")
+                if seen_rules[key] > 1:
+                    duplicates += 1
+                
+                unused = [sel for sel in rule["selectors"] if not is_used(sel)]
+                unused_selectors += len(unused)
+                if unused and len(unused) == len(rule["selectors"]) and rule["end"] is not None:
+                    unused_bytes += rule["end"] - rule["start"]
+            
+            file_metrics = {
+                "bytes": analysis["bytes"],
+                "rules": analysis["rules"],
+                "selectors": analysis["selectors"],
+                "declarations": analysis["declarations"],
+                "at_rules": analysis["at_rules"],
+                "duplicate_rules": duplicates,
+                "unused_selectors": unused_selectors,
+                "unused_bytes": unused_bytes,
+                "parse_ms": analysis["parse_ms"]
+            }
+            test["metrics"]["files"][relative] = file_metrics
+            
+            totals["files"] += 1
+            for key in ("bytes", "rules", "selectors", "declarations",
+                        "duplicate_rules", "unused_selectors", "unused_bytes", "parse_ms"):
+                totals[key] += file_metrics[key]
+        
+        totals["parse_ms"] = round(totals["parse_ms"], 2)
+        test["metrics"]["totals"] = totals
+        
+        unused_kb = totals["unused_bytes"] / 1024
+        test["message"] = (
+            f"{totals['rules']:,} rules, {totals['selectors']:,} selectors, "
+            f"{totals['declarations']:,} declarations in {totals['files']} files; "
+            f"{totals['duplicate_rules']} duplicate rules, "
+            f"{totals['unused_selectors']:,} unused selectors (~{unused_kb:.0f} KB unused)"
+        )
+        test["details"] = details[:10]
+        
+        return test
+    
+    def _site_pages(self) -> List[ParsedPage]:
+        """Get parsed pages for the site (excluding the .ai-workflow directory)."""
+        return self.html_cache.pages(self.project_path, exclude=self.workflow_dir)
+    
+    def _resolve_asset(self, page: ParsedPage, ref: Optional[str]) -> Tuple[bool, Optional[Path]]:
+        """
+        Resolve an asset reference from a page to a local file.
+        
+        Args:
+            page: Page containing the reference
+            ref: href/src value as written
+            
+        Returns:
+            Tuple of (is_local, resolved path or None if missing)
+        """
+        if not ref or ref.startswith(('http://', 'https://', '//', 'data:')):
+            return False, None
+        
+        clean_ref = ref.split('?')[0].split('#')[0]
+        candidate = (self.project_path / page.path).parent / clean_ref
+        if not candidate.is_file():
+            candidate = self.project_path / clean_ref.lstrip('/')
+        return True, (candidate if candidate.is_file() else None)
+    
+    def _test_javascript(self) -> Dict:
+        """Audit script loading: render-blocking, duplicate and missing includes."""
+        test = {
+            "name": "JavaScript Assets",
+            "status": "passed",
+            "message": "",
+            "details": [],
+            "metrics": {"pages": {}, "totals": {}}
+        }
+        
+        allowlist = self.config.get("js_blocking_allowlist", [])
+        blocking = []
+        duplicates = []
+        missing = []
+        totals = {"scripts": 0, "blocking": 0, "js_bytes": 0, "inline_bytes": 0}
+        
+        for page in self._site_pages():
+            seen = set()
+            page_metrics = {"scripts": 0, "external": 0, "blocking": 0, "js_bytes": 0, "inline_bytes": 0}
+            
+            for script in page.scripts:
+                page_metrics["inline_bytes"] += script["inline_bytes"]
+                src = script["src"]
+                if not src:
+                    continue
+                
+                page_metrics["scripts"] += 1
+                # Query strings distinguish external includes (e.g. gtag ?id=...)
+                normalized = src.split('#')[0]
+                if normalized.startswith('./'):
+                    normalized = normalized[2:]
+                if normalized in seen:
+                    duplicates.append(f"{page.path}: {src}")
+                seen.add(normalized)
+                
+                # Module scripts are deferred by default
+                deferred = script["defer"] or script["async"] or script["type"] == "module"
+                if script["in_head"] and not deferred:
+                    page_metrics["blocking"] += 1
+                    if not any(pattern in src for pattern in allowlist):
+                        blocking.append(f"{page.path}: {src}")
+                
+                is_local, resolved = self._resolve_asset(page, src)
+                if not is_local:
+                    page_metrics["external"] += 1
+                elif resolved is None:
+                    missing.append(f"{page.path}: {src}")
+                else:
+                    page_metrics["js_bytes"] += resolved.stat().st_size
+            
+            page_metrics["js_bytes"] += page_metrics["inline_bytes"]
+            test["metrics"]["pages"][page.path] = page_metrics
+            
+            totals["scripts"] += page_metrics["scripts"]
+            totals["blocking"] += page_metrics["blocking"]
+            totals["js_bytes"] += page_metrics["js_bytes"]
+            totals["inline_bytes"] += page_metrics["inline_bytes"]
+        
+        test["metrics"]["totals"] = totals
+        
+        issues = (
+            [f"Render-blocking script in <head>: {d}" for d in blocking]
+            + [f"Duplicate script include: {d}" for d in duplicates]
+            + [f"Missing script: {d}" for d in missing]
+        )
+        
+        if issues:
+            test["status"] = "failed"
+            test["message"] = (
+                f"{len(blocking)} render-blocking, {len(duplicates)} duplicate, "
+                f"{len(missing)} missing script includes"
+            )
+            test["details"] = issues[:10]
+        else:
+            test["message"] = (
+                f"{totals['scripts']} script includes, "
+                f"{totals['js_bytes'] / 1024:,.0f} KB JS across {len(test['metrics']['pages'])} pages"
+            )
+        
+        return test
+    
+    def _test_render_cost(self) -> Dict:
+        """
+        Estimate per-page render cost from the cached HTML parse.
+        
+        Reports DOM size and depth, inline style/script bytes, linked
+        stylesheets, blocking resources in <head>, and an estimated critical
+        request chain (HTML → blocking CSS/JS → CSS @imports). Pages over the
+        Lighthouse DOM guidance are listed in details; the suite only fails
+        when "render_cost_limits" is configured and exceeded.
+        """
+        test = {
+            "name": "Render Cost",
+            "status": "passed",
+            "message": "",
+            "details": [],
+            "metrics": {"pages": {}}
+        }
+        
+        limits = self.config.get("render_cost_limits", {}) or {}
+        focus = self.config.get("render_cost_focus", [])
+        warnings = []
+        failures = []
+        
+        for page in self._site_pages():
+            chain = [{"url": page.path, "type": "document", "depth": 1, "bytes": page.size}]
+            
+            for sheet in page.stylesheets:
+                media = (sheet.get("media") or "all").lower()
+                if not sheet["in_head"] or media == "print":
+                    continue
+                is_local, resolved = self._resolve_asset(page, sheet["href"])
+                chain.append({
+                    "url": sheet["href"],
+                    "type": "stylesheet",
+                    "depth": 2,
+                    "bytes": resolved.stat().st_size if resolved else None
+                })
+                # @import inside a blocking stylesheet adds another round trip
+                analysis = self._analyze_css(resolved) if resolved else None
+                for imported in (analysis or {}).get("imports", []):
+                    imported_path = resolved.parent / imported.split('?')[0]
+                    chain.append({
+                        "url": imported,
+                        "type": "stylesheet-import",
+                        "depth": 3,
+                        "bytes": imported_path.stat().st_size if imported_path.is_file() else None
+                    })
+            
+            for script in page.scripts:
+                deferred = script["defer"] or script["async"] or script["type"] == "module"
+                if not script["src"] or not script["in_head"] or deferred:
+                    continue
+                is_local, resolved = self._resolve_asset(page, script["src"])
+                chain.append({
+                    "url": script["src"],
+                    "type": "script",
+                    "depth": 2,
+                    "bytes": resolved.stat().st_size if resolved else None
+                })
+            
+            metrics = {
+                "dom_nodes": page.node_count,
+                "max_depth": page.max_depth,
+                "inline_style_bytes": page.inline_style_bytes,
+                "inline_script_bytes": sum(s["inline_bytes"] for s in page.scripts),
+                "stylesheets": len(page.stylesheets),
+                "head_blocking": len(chain) - 1,
+                "critical_depth": max(item["depth"] for item in chain),
+                "critical_requests": len(chain),
+                "critical_bytes": sum(item["bytes"] or 0 for item in chain)
+            }
+            if page.path in focus:
+                metrics["critical_chain"] = chain
+            test["metrics"]["pages"][page.path] = metrics
+            
+            if page.node_count > LIGHTHOUSE_MAX_DOM_NODES:
+                warnings.append(f"{page.path}: {page.node_count:,} DOM nodes")
+            if page.max_depth > LIGHTHOUSE_MAX_DOM_DEPTH:
+                warnings.append(f"{page.path}: DOM depth {page.max_depth}")
+            
+            for key, limit in limits.items():
+                if key in metrics and metrics[key] > limit:
+                    failures.append(f"{page.path}: {key} {metrics[key]:,} > {limit:,}")
+        
+        pages = test["metrics"]["pages"]
+        focus_notes = [
+            f"{name}: {pages[name]['dom_nodes']:,} nodes, depth {pages[name]['max_depth']}, "
+            f"{pages[name]['critical_requests']} critical requests "
+            f"({pages[name]['critical_bytes'] / 1024:,.0f} KB)"
+            for name in focus if name in pages
+        ]
+        test["details"] = (failures + focus_notes + warnings)[:10]
+        
+        if failures:
+            test["status"] = "failed"
+            test["message"] = f"{len(failures)} render cost limits exceeded"
+        else:
+            heaviest = max(pages.items(), key=lambda item: item[1]["dom_nodes"], default=None)
+            test["message"] = (
+                f"{len(pages)} pages analyzed"
+                + (f"; largest DOM {heaviest[0]} ({heaviest[1]['dom_nodes']:,} nodes)" if heaviest else "")
+            )
+        
+        return test
+    
+    def _collect_page_weights(self) -> Dict:
+        """
+        Collect per-page weight metrics from the cached HTML parse.
+        
+        Local asset sizes are read from disk; external assets count as
+        requests only. Each distinct asset is counted once per page.
+        
+        Returns:
+            Dictionary with structure:
+            {
+                "pages": {"index.html": {"html_bytes", "css_bytes", "js_bytes",
+                                         "image_bytes", "total_bytes", "requests",
+                                         "external_requests", "blocking_scripts"}},
+                "totals": {...same keys summed...}
+            }
+        """
+        pages = {}
+        sizes: Dict[Path, int] = {}
+        
+        def local_size(page: ParsedPage, ref: Optional[str], counted: set) -> Tuple[int, bool]:
+            is_local, resolved = self._resolve_asset(page, ref)
+            if not is_local:
+                return 0, True
+            if resolved is None or resolved in counted:
+                return 0, False
+            counted.add(resolved)
+            if resolved not in sizes:
+                sizes[resolved] = resolved.stat().st_size
+            return sizes[resolved], False
+        
+        for page in self._site_pages():
+            metrics = {
+                "html_bytes": page.size,
+                "css_bytes": 0,
+                "js_bytes": 0,
+                "image_bytes": 0,
+                "total_bytes": 0,
+                "requests": 1,
+                "external_requests": 0,
+                "blocking_scripts": 0
+            }
+            counted: set = set()
+            
+            assets = (
+                [("css_bytes", sheet["href"]) for sheet in page.stylesheets]
+                + [("js_bytes", script["src"]) for script in page.scripts if script["src"]]
+                + [("image_bytes", src) for src in page.images]
+            )
+            for key, ref in assets:
+                size, external = local_size(page, ref, counted)
+                metrics[key] += size
+                if external:
+                    metrics["external_requests"] += 1
+                if external or size:
+                    metrics["requests"] += 1
+            
+            for script in page.scripts:
+                metrics["js_bytes"] += script["inline_bytes"]
+                deferred = script["defer"] or script["async"] or script["type"] == "module"
+                if script["src"] and script["in_head"] and not deferred:
+                    metrics["blocking_scripts"] += 1
+            
+            metrics["total_bytes"] = (
+                metrics["html_bytes"] + metrics["css_bytes"]
+                + metrics["js_bytes"] + metrics["image_bytes"]
+            )
+            pages[page.path] = metrics
+        
+        totals: Dict[str, int] = {}
+        for metrics in pages.values():
+            for key, value in metrics.items():
+                totals[key] = totals.get(key, 0) + value
+        
+        return {"pages": pages, "totals": totals}
+
+
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ PERFORMANCE BUDGET - Phase Regression Gating                                             ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+class PerformanceBudget:
+    """
+    Evaluates page-weight metrics after each phase against a budget.
+    
+    Checks Performed:
+    ─────────────────
+    1. Limits     - Per-page maximums from config "performance_budget":
+                    page_bytes, requests, image_bytes, css_bytes, js_bytes,
+                    blocking_scripts, plus the site-wide broken_links count
+    2. Regressions - Growth of any metric versus the previous phase's
+                    metrics by more than "budget_regression_threshold"
+                    (a fraction, e.g. 0.10 = 10%)
+    
+    A limit violation only gates the cascade if the metric also got worse
+    than the previous phase (or there is no previous phase), so a site that
+    already exceeds its budget is not blocked forever by old weight.
+    """
+    
+    # Budget key -> page metric key (from TestRunner._collect_page_weights)
+    PAGE_METRICS = {
+        "page_bytes": "total_bytes",
+        "requests": "requests",
+        "image_bytes": "image_bytes",
+        "css_bytes": "css_bytes",
+        "js_bytes": "js_bytes",
+        "blocking_scripts": "blocking_scripts",
+    }
+    
+    def __init__(self, logger: Logger, config: Dict):
+        """
+        Initialize PerformanceBudget.
         
         Args:
-            project_path: Path to project root
-            workflow_dir: Path to .ai-workflow directory
             logger: Logger instance
             config: Configuration dictionary
         """
-        self.project_path = project_path
-        self.workflow_dir = workflow_dir
         self.logger = logger
         self.config = config
-        self.results_dir = workflow_dir / "test-results"
-        self.results_dir.mkdir(parents=True, exist_ok=True)
     
-    def run_tests(self, phase_id: str) -> Dict:
+    @classmethod
+    def extract_metrics(cls, test_results: Optional[Dict]) -> Optional[Dict]:
         """
-        Run all tests for a phase.
+        Extract budget metrics from a phase's test results.
         
         Args:
-            phase_id: Phase identifier
-            
+            test_results: Phase test results (from TestRunner.run_tests)
+        
         Returns:
-            Test results dictionary with structure:
-            {
-                "phase": "A",
-                "timestamp": "2026-01-21T12:00:00Z",
-                "status": "passed|failed",
-                "tests": [...],
-                "summary": {"total": 4, "passed": 4, "failed": 0, "skipped": 0}
-            }
+            {"pages": {page: {budget_key: value}}, "broken_links": int}
+            or None if the results carry no page metrics
         """
-        self.logger.info(f"Running tests for Phase {phase_id}...")
+        if not test_results or not test_results.get("metrics", {}).get("pages"):
+            return None
         
-        results = {
-            "phase": phase_id,
-            "timestamp": datetime.now().isoformat(),
-            "status": "pending",
-            "tests": [],
-            "summary": {
-                "total": 0,
-                "passed": 0,
-                "failed": 0,
-                "skipped": 0
+        pages = {}
+        for page, metrics in test_results["metrics"]["pages"].items():
+            pages[page] = {
+                key: metrics.get(source, 0) for key, source in cls.PAGE_METRICS.items()
             }
-        }
-        
-        # Run individual test suites
-        tests = []
-        tests.append(self._test_internal_links())
-        tests.append(self._test_html_structure())
-        tests.append(self._test_images())
-        tests.append(self._test_css_validity())
         
-        results["tests"] = tests
+        broken_links = 0
+        for test in test_results.get("tests", []):
+            if test.get("name") == "Internal Links":
+                broken_links = test.get("metrics", {}).get("broken_links", 0)
         
-        # Calculate summary
-        results["summary"]["total"] = len(tests)
-        results["summary"]["passed"] = sum(1 for t in tests if t["status"] == "passed")
-        results["summary"]["failed"] = sum(1 for t in tests if t["status"] == "failed")
-        results["summary"]["skipped"] = sum(1 for t in tests if t["status"] == "skipped")
+        return {"pages": pages, "broken_links": broken_links}
+    
+    def evaluate(
+        self,
+        phase_id: str,
+        test_results: Optional[Dict],
+        previous: Optional[Tuple[str, Dict]] = None
+    ) -> Dict:
+        """
+        Evaluate a phase's metrics against the budget and the previous phase.
         
-        # Overall status
-        results["status"] = "passed" if results["summary"]["failed"] == 0 else "failed"
+        Args:
+            phase_id: Phase identifier
+            test_results: Test results of the phase that just completed
+            previous: Optional (phase_id, test_results) of the previous measured phase
         
-        # Log results
-        passed = results["summary"]["passed"]
-        failed = results["summary"]["failed"]
-        total = results["summary"]["total"]
+        Returns:
+            Budget result dictionary with structure:
+            {
+                "status": "passed|failed|skipped",
+                "baseline_phase": "A",
+                "violations": ["index.html: page_bytes 4.1 MB > 3.0 MB"],
+                "regressions": ["index.html: js_bytes +42.0% (+180 KB)"],
+                "diff": {"index.html": {"js_bytes": 184320}, "broken_links": 2}
+            }
+        """
+        result = {
+            "status": "passed",
+            "baseline_phase": None,
+            "violations": [],
+            "regressions": [],
+            "diff": {}
+        }
         
-        if failed == 0:
-            self.logger.info(f"✅ All tests passed: {passed}/{total}")
-        else:
-            self.logger.warn(f"⚠️ Tests: {passed} passed, {failed} failed of {total}")
+        current = self.extract_metrics(test_results)
+        if current is None:
+            result["status"] = "skipped"
+            return result
         
-        # Save results to file
-        timestamp = int(time.time())
-        results_file = self.results_dir / f"phase-{phase_id}-{timestamp}.json"
-        with open(results_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2)
+        baseline = None
+        if previous:
+            baseline = self.extract_metrics(previous[1])
+            if baseline:
+                result["baseline_phase"] = previous[0]
         
-        return results
-    
-    def _test_internal_links(self) -> Dict:
-        """Test that internal links point to existing files."""
-        test = {
-            "name": "Internal Links",
-            "status": "passed",
-            "message": "",
-            "details": []
-        }
+        limits = self.config.get("performance_budget", {}) or {}
+        threshold = self.config.get("budget_regression_threshold", BUDGET_REGRESSION_THRESHOLD)
+        min_delta = self.config.get("budget_min_delta_bytes", BUDGET_MIN_DELTA_BYTES)
         
-        html_files = list(self.project_path.glob("**/*.html"))
-        broken_links = []
+        gating = []
         
-        for html_file in html_files[:20]:  # Limit to first 20 files for speed
-            try:
-                content = html_file.read_text(encoding='utf-8', errors='ignore')
+        for page, metrics in sorted(current["pages"].items()):
+            before = (baseline or {}).get("pages", {}).get(page)
+            page_diff = {}
+            
+            for key, value in metrics.items():
+                old = before.get(key) if before else None
+                worsened = old is None or value > old
                 
-                # Find all href attributes
-                hrefs = re.findall(r'href=["\']([^"\']+)["\']', content)
+                if old is not None and value != old:
+                    page_diff[key] = value - old
                 
-                for href in hrefs:
-                    # Skip external links, anchors, and special protocols
-                    if href.startswith(('#', 'http', 'https', 'mailto:', 'tel:', 'javascript:')):
-                        continue
-                    
-                    # Remove query strings and anchors
-                    clean_href = href.split('?')[0].split('#')[0]
-                    
-                    # Try relative to HTML file
-                    target = html_file.parent / clean_href
-                    if not target.exists():
-                        # Try relative to project root
-                        target = self.project_path / clean_href.lstrip('/')
-                        if not target.exists():
-                            broken_links.append(f"{html_file.name}: {href}")
-            except Exception:
-                pass
+                # Regression versus the previous phase
+                if old is not None and value > old:
+                    delta = value - old
+                    relative = delta / old if old else 1.0
+                    significant = delta >= min_delta if key.endswith("_bytes") else True
+                    if relative > threshold and significant:
+                        message = f"{page}: {key} +{relative:.1%} ({self._format(key, delta)})"
+                        result["regressions"].append(message)
+                        gating.append(message)
+                
+                # Absolute limit
+                limit = limits.get(key)
+                if limit is not None and value > limit:
+                    message = (
+                        f"{page}: {key} {self._format(key, value)} > {self._format(key, limit)}"
+                    )
+                    result["violations"].append(message)
+                    if worsened:
+                        gating.append(message)
+            
+            if page_diff:
+                result["diff"][page] = page_diff
+        
+        # Site-wide broken link count
+        broken = current["broken_links"]
+        broken_before = baseline["broken_links"] if baseline else None
+        if broken_before is not None and broken != broken_before:
+            result["diff"]["broken_links"] = broken - broken_before
+        if broken_before is not None and broken > broken_before:
+            message = f"broken_links {broken_before} → {broken}"
+            result["regressions"].append(message)
+            gating.append(message)
+        limit = limits.get("broken_links")
+        if limit is not None and broken > limit:
+            message = f"broken_links {broken} > {limit}"
+            result["violations"].append(message)
+            if broken_before is None or broken > broken_before:
+                gating.append(message)
+        
+        if gating:
+            result["status"] = "failed"
+            self.logger.warn(
+                f"📉 Phase {phase_id} exceeded performance budget: "
+                f"{len(result['violations'])} violations, {len(result['regressions'])} regressions"
+            )
+            for message in gating[:5]:
+                self.logger.warn(f"  {message}")
+        else:
+            baseline_note = f" vs Phase {result['baseline_phase']}" if result["baseline_phase"] else ""
+            self.logger.info(f"Performance budget passed for Phase {phase_id}{baseline_note}")
         
-        if broken_links:
-            test["status"] = "failed"
-            test["message"] = f"Found {len(broken_links)} broken internal links"
-            test["details"] = broken_links[:10]  # Limit details shown
+        return result
+    
+    @staticmethod
+    def _format(key: str, value: float) -> str:
+        """Format a metric value for log and report messages."""
+        if key.endswith("_bytes"):
+            if abs(value) >= 1024 * 1024:
+                return f"{value / (1024 * 1024):.1f} MB"
+            return f"{value / 1024:.1f} KB"
+        return str(value)
+
+
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ IMAGE VARIANT PIPELINE - Responsive Image Generation                                     ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+def _read_image_size(path: Path) -> Optional[Tuple[int, int]]:
+    """
+    Read pixel dimensions from an image header without decoding it.
+    
+    Supports PNG, GIF, JPEG and WebP (VP8, VP8L, VP8X).
+    
+    Args:
+        path: Image file path
+    
+    Returns:
+        Tuple of (width, height) or None if the format is not recognised
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(32)
+            
+            # PNG: signature followed by the IHDR chunk
+            if head[:8] == b'\x89PNG\r\n\x1a\n' and len(head) >= 24:
+                return struct.unpack('>II', head[16:24])
+            
+            # GIF: logical screen descriptor
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                return struct.unpack('<HH', head[6:10])
+            
+            # WebP: RIFF container with VP8 / VP8L / VP8X chunk
+            if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+                chunk = head[12:16]
+                if chunk == b'VP8 ':
+                    w, h = struct.unpack('<HH', head[26:30])
+                    return w & 0x3FFF, h & 0x3FFF
+                if chunk == b'VP8L':
+                    b = head[21:25]
+                    w = 1 + (((b[1] & 0x3F) << 8) | b[0])
+                    h = 1 + (((b[3] & 0x0F) << 10) | (b[2] << 2) | ((b[1] & 0xC0) >> 6))
+                    return w, h
+                if chunk == b'VP8X':
+                    w = 1 + int.from_bytes(head[24:27], 'little')
+                    h = 1 + int.from_bytes(head[27:30], 'little')
+                    return w, h
+                return None
+            
+            # JPEG: walk segments until a start-of-frame marker
+            if head[:2] == b'\xff\xd8':
+                f.seek(2)
+                while True:
+                    marker = f.read(2)
+                    if len(marker) < 2 or marker[0] != 0xFF:
+                        return None
+                    code = marker[1]
+                    length = struct.unpack('>H', f.read(2))[0]
+                    if code in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                                0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                        h, w = struct.unpack('>xHH', f.read(5))
+                        return w, h
+                    f.seek(length - 2, os.SEEK_CUR)
+    except (IOError, struct.error):
+        pass
+    
+    return None
+
+
+def _encode_image_variant(job: Dict) -> Dict:
+    """
+    Encode a single image variant (runs inside a worker process).
+    
+    The variant is written to a temporary file and renamed into place so a
+    crashed worker never leaves a truncated entry in the cache.
+    
+    Args:
+        job: Job dictionary with source, dest, width, format, quality, encoder
+    
+    Returns:
+        Result dictionary with success flag, output size and timing
+    """
+    started = time.time()
+    source = job["source"]
+    dest = job["dest"]
+    width = job["width"]
+    quality = str(job["quality"])
+    tmp_dest = f"{dest}.tmp-{os.getpid()}{Path(dest).suffix}"
+    result = {"dest": dest, "width": width, "success": False, "bytes": 0, "error": None}
+    
+    try:
+        encoder = job["encoder"]
+        if encoder == "pillow":
+            from PIL import Image
+            with Image.open(source) as img:
+                height = max(1, round(img.height * width / img.width))
+                resized = img.resize((width, height), Image.LANCZOS)
+                if job["format"] in ("jpg", "jpeg") and resized.mode not in ("RGB", "L"):
+                    resized = resized.convert("RGB")
+                resized.save(tmp_dest, quality=int(quality))
         else:
-            test["message"] = "All internal links are valid"
+            commands = {
+                "cwebp": ["cwebp", "-quiet", "-q", quality, "-resize", str(width), "0",
+                          source, "-o", tmp_dest],
+                "magick": ["magick", source, "-resize", f"{width}x", "-quality", quality,
+                           tmp_dest],
+                "convert": ["convert", source, "-resize", f"{width}x", "-quality", quality,
+                            tmp_dest],
+                "sips": ["sips", "--resampleWidth", str(width), source, "--out", tmp_dest],
+            }
+            proc = subprocess.run(commands[encoder], capture_output=True, text=True, timeout=120)
+            if proc.returncode != 0:
+                raise RuntimeError((proc.stderr or proc.stdout).strip() or f"{encoder} failed")
+        
+        os.replace(tmp_dest, dest)
+        result["success"] = True
+        result["bytes"] = os.path.getsize(dest)
+    except Exception as e:
+        result["error"] = str(e)
+        try:
+            os.remove(tmp_dest)
+        except OSError:
+            pass
+    
+    result["elapsed_ms"] = round((time.time() - started) * 1000, 1)
+    return result
+
+
+class ImageVariantPipeline:
+    """
+    Optional post-phase stage that generates responsive image variants.
+    
+    Pipeline:
+    ─────────
+    1. Take the image references collected by TestRunner's image audit
+    2. Hash each source (memoized by size + mtime in the cache manifest)
+    3. Plan downscaled variants for every configured width below the source width
+    4. Encode cache misses in a process pool using the best local encoder
+    5. Report the srcset rewrite that would be applied to each <img>
+    
+    Cache Layout:
+    ─────────────
+    .ai-workflow/image-cache/<sha256[:20]>-<width>w.<ext>
+    
+    Variants are content-addressed by source hash and target width, so a
+    rerun over unchanged images encodes nothing. Vector (SVG) and animated
+    (GIF) images are left alone.
+    """
+    
+    # Encoders in order of preference, with the output formats each can write
+    ENCODERS = [
+        ("pillow", {"webp", "jpg", "jpeg", "png"}),
+        ("cwebp", {"webp"}),
+        ("magick", {"webp", "jpg", "jpeg", "png"}),
+        ("convert", {"webp", "jpg", "jpeg", "png"}),
+        ("sips", {"jpg", "jpeg", "png"}),
+    ]
+    
+    # Source formats that are worth re-encoding
+    RASTER_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+    
+    def __init__(
+        self,
+        project_path: Path,
+        workflow_dir: Path,
+        logger: Logger,
+        config: Dict
+    ):
+        """
+        Initialize ImageVariantPipeline.
         
-        return test
+        Args:
+            project_path: Path to project root
+            workflow_dir: Path to .ai-workflow directory
+            logger: Logger instance
+            config: Configuration dictionary
+        """
+        self.project_path = project_path
+        self.workflow_dir = workflow_dir
+        self.logger = logger
+        self.config = config
+        self.cache_dir = workflow_dir / IMAGE_CACHE_DIR
+        self.results_dir = workflow_dir / "test-results"
     
-    def _test_html_structure(self) -> Dict:
-        """Test basic HTML structure requirements."""
-        test = {
-            "name": "HTML Structure",
-            "status": "passed",
-            "message": "",
-            "details": []
-        }
+    @classmethod
+    def detect_encoder(cls, fmt: str) -> Optional[str]:
+        """
+        Find a local encoder that can write the requested format.
         
-        issues = []
-        html_files = list(self.project_path.glob("*.html"))  # Only root HTML files
+        Args:
+            fmt: Target file extension without the dot (e.g. "webp")
         
-        for html_file in html_files[:10]:
+        Returns:
+            Encoder name or None if nothing suitable is installed
+        """
+        import importlib.util
+        
+        for name, formats in cls.ENCODERS:
+            if fmt not in formats:
+                continue
+            if name == "pillow":
+                if importlib.util.find_spec("PIL") is not None:
+                    return name
+            elif shutil.which(name):
+                return name
+        return None
+    
+    def _load_manifest(self) -> Dict:
+        """Load the source hash manifest from the cache directory."""
+        manifest_file = self.cache_dir / IMAGE_CACHE_MANIFEST
+        if manifest_file.exists():
             try:
-                content = html_file.read_text(encoding='utf-8', errors='ignore')
-                
-                # Check for DOCTYPE declaration
-                if '<!DOCTYPE' not in content.upper():
-                    issues.append(f"{html_file.name}: Missing DOCTYPE declaration")
-                
-                # Check for title tag
-                if '<title>' not in content.lower():
-                    issues.append(f"{html_file.name}: Missing <title> tag")
-                
-                # Check for charset declaration
-                if 'charset' not in content.lower():
-                    issues.append(f"{html_file.name}: Missing charset declaration")
-                
-            except Exception:
+                with open(manifest_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError):
                 pass
+        return {}
+    
+    def _save_manifest(self, manifest: Dict):
+        """Save the source hash manifest to the cache directory."""
+        try:
+            with open(self.cache_dir / IMAGE_CACHE_MANIFEST, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+        except IOError as e:
+            self.logger.warn(f"Failed to save image cache manifest: {e}")
+    
+    def _source_hash(self, path: Path, manifest: Dict) -> str:
+        """
+        Get the SHA-256 of a source image, reusing the manifest when unchanged.
         
-        if issues:
-            test["status"] = "failed" if len(issues) > 5 else "passed"
-            test["message"] = f"Found {len(issues)} HTML structure issues"
-            test["details"] = issues[:10]
-        else:
-            test["message"] = "HTML structure is valid"
+        Args:
+            path: Source image path
+            manifest: Manifest dictionary (updated in place)
         
-        return test
-    
-    def _test_images(self) -> Dict:
-        """Test that image references exist."""
-        test = {
-            "name": "Image References",
-            "status": "passed",
-            "message": "",
-            "details": []
+        Returns:
+            Hex digest of the file contents
+        """
+        stat = path.stat()
+        key = str(path.relative_to(self.project_path))
+        entry = manifest.get(key)
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return entry["sha256"]
+        
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        manifest[key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest
         }
+        return digest
+    
+    def run(self, phase_id: str, references: List[Dict]) -> Dict:
+        """
+        Generate variants for referenced images and report srcset rewrites.
         
-        missing_images = []
-        html_files = list(self.project_path.glob("*.html"))
+        Args:
+            phase_id: Phase identifier
+            references: Image references from TestRunner.collect_image_references()
         
-        for html_file in html_files[:10]:
+        Returns:
+            Summary dictionary with structure:
+            {
+                "status": "completed|skipped|failed",
+                "encoder": "cwebp",
+                "sources": 42,
+                "variants": 120,
+                "cache_hits": 96,
+                "encoded": 24,
+                "failed": 0,
+                "rewrites": 38,
+                "elapsed_ms": 1840.2,
+                "report_file": "test-results/phase-A-image-variants.json"
+            }
+        """
+        started = time.time()
+        fmt = str(self.config.get("image_variant_format", "webp")).lower().lstrip('.')
+        widths = sorted(set(self.config.get("image_variant_widths", IMAGE_VARIANT_WIDTHS)))
+        quality = self.config.get("image_variant_quality", IMAGE_VARIANT_QUALITY)
+        
+        summary = {
+            "status": "completed",
+            "encoder": None,
+            "sources": 0,
+            "variants": 0,
+            "cache_hits": 0,
+            "encoded": 0,
+            "failed": 0,
+            "rewrites": 0,
+            "elapsed_ms": 0.0,
+            "report_file": None
+        }
+        
+        self.logger.info(f"Generating responsive image variants for Phase {phase_id}...")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._load_manifest()
+        
+        # Plan variants per unique source file
+        sources: Dict[Path, Dict] = {}
+        for ref in references:
+            path = ref.get("path")
+            if path is None or path in sources:
+                continue
+            path = Path(path)
+            if path.suffix.lower() not in self.RASTER_EXTENSIONS:
+                continue
+            
+            size = _read_image_size(path)
+            if not size:
+                continue
+            
             try:
-                content = html_file.read_text(encoding='utf-8', errors='ignore')
+                digest = self._source_hash(path, manifest)
+            except (IOError, ValueError):
+                continue
+            
+            out_ext = path.suffix.lower().lstrip('.') if fmt == "source" else fmt
+            sources[path] = {
+                "sha256": digest,
+                "width": size[0],
+                "bytes": path.stat().st_size,
+                "format": out_ext,
+                "variants": [
+                    {
+                        "width": w,
+                        "cache_path": self.cache_dir / f"{digest[:20]}-{w}w.{out_ext}"
+                    }
+                    for w in widths if w < size[0]
+                ]
+            }
+        
+        self._save_manifest(manifest)
+        summary["sources"] = len(sources)
+        
+        # Split the plan into cache hits and encode jobs
+        jobs: List[Dict] = []
+        encoders: Dict[str, Optional[str]] = {}
+        for path, info in sources.items():
+            for variant in info["variants"]:
+                summary["variants"] += 1
+                if variant["cache_path"].exists():
+                    summary["cache_hits"] += 1
+                    continue
                 
-                # Find all image sources
-                srcs = re.findall(
-                    r'src=["\']([^"\']+\.(png|jpg|jpeg|gif|svg|webp))["\']',
-                    content,
-                    re.IGNORECASE
-                )
+                out_fmt = info["format"]
+                if out_fmt not in encoders:
+                    encoders[out_fmt] = self.detect_encoder(out_fmt)
+                if not encoders[out_fmt]:
+                    continue
                 
-                for src, ext in srcs:
-                    # Skip external images and data URIs
-                    if src.startswith(('http://', 'https://', 'data:')):
-                        continue
-                    
-                    # Check if image exists
-                    img_path = self.project_path / src.lstrip('/')
-                    if not img_path.exists():
-                        # Try relative to HTML file
-                        img_path = html_file.parent / src
-                        if not img_path.exists():
-                            missing_images.append(src)
-            except Exception:
-                pass
+                jobs.append({
+                    "source": str(path),
+                    "dest": str(variant["cache_path"]),
+                    "width": variant["width"],
+                    "format": out_fmt,
+                    "quality": quality,
+                    "encoder": encoders[out_fmt]
+                })
+        
+        summary["encoder"] = next((e for e in encoders.values() if e), None)
+        if not summary["encoder"] and fmt != "source":
+            summary["encoder"] = self.detect_encoder(fmt)
+        
+        missing_encoder = summary["variants"] - summary["cache_hits"] - len(jobs)
+        if missing_encoder:
+            self.logger.warn(
+                f"No local encoder for {missing_encoder} image variants "
+                f"(install Pillow, cwebp or ImageMagick)"
+            )
+            if not jobs and not summary["cache_hits"]:
+                summary["status"] = "skipped"
+        
+        # Encode cache misses across a process pool
+        if jobs:
+            workers = self.config.get("image_variant_workers") or os.cpu_count() or 1
+            workers = max(1, min(int(workers), len(jobs)))
+            self.logger.info(f"Encoding {len(jobs)} image variants with {summary['encoder']} ({workers} workers)")
+            
+            from concurrent.futures import ProcessPoolExecutor  # pulls in multiprocessing
+            
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_encode_image_variant, job) for job in jobs]
+                for future in as_completed(futures):
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = {"success": False, "error": str(e), "dest": "?"}
+                    if outcome["success"]:
+                        summary["encoded"] += 1
+                    else:
+                        summary["failed"] += 1
+                        self.logger.warn(f"Variant failed: {Path(outcome['dest']).name}: {outcome['error']}")
+        
+        # Build the srcset rewrite report
+        rewrites = []
+        seen = set()
+        for ref in references:
+            path = ref.get("path")
+            info = sources.get(Path(path)) if path is not None else None
+            if not info or (ref["page"], ref["src"]) in seen:
+                continue
+            seen.add((ref["page"], ref["src"]))
+            
+            ready = [v for v in info["variants"] if v["cache_path"].exists()]
+            if not ready:
+                continue
+            
+            src_path = Path(ref["src"])
+            candidates = []
+            variants = []
+            for v in ready:
+                target = src_path.with_name(f"{src_path.stem}-{v['width']}w.{info['format']}").as_posix()
+                candidates.append(f"{target} {v['width']}w")
+                variants.append({
+                    "width": v["width"],
+                    "cache_path": str(v["cache_path"].relative_to(self.workflow_dir)),
+                    "target_path": target,
+                    "bytes": v["cache_path"].stat().st_size
+                })
+            candidates.append(f"{ref['src']} {info['width']}w")
+            
+            rewrites.append({
+                "page": ref["page"],
+                "src": ref["src"],
+                "has_srcset": ref.get("has_srcset", False),
+                "source_bytes": info["bytes"],
+                "srcset": ", ".join(candidates),
+                "variants": variants
+            })
         
-        # Remove duplicates
-        missing_images = list(set(missing_images))
+        summary["rewrites"] = sum(1 for r in rewrites if not r["has_srcset"])
+        summary["elapsed_ms"] = round((time.time() - started) * 1000, 1)
+        if summary["failed"] and not summary["encoded"] and not summary["cache_hits"]:
+            summary["status"] = "failed"
         
-        if missing_images:
-            test["status"] = "failed"
-            test["message"] = f"Found {len(missing_images)} missing images"
-            test["details"] = missing_images[:10]
-        else:
-            test["message"] = "All referenced images exist"
+        # Save full report next to the test results
+        report_file = self.results_dir / f"phase-{phase_id}-image-variants.json"
+        try:
+            self.results_dir.mkdir(parents=True, exist_ok=True)
+            with open(report_file, 'w', encoding='utf-8') as f:
+                json.dump({"phase": phase_id, "summary": summary, "rewrites": rewrites}, f, indent=2)
+            summary["report_file"] = str(report_file.relative_to(self.workflow_dir))
+        except IOError as e:
+            self.logger.warn(f"Failed to write image variant report: {e}")
+        
+        self.logger.info(
+            f"Image variants: {summary['variants']} planned, {summary['cache_hits']} cached, "
+            f"{summary['encoded']} encoded, {summary['failed']} failed, "
+            f"{summary['rewrites']} srcset rewrites ({summary['elapsed_ms']:.0f}ms)"
+        )
         
-        return test
+        return summary
+
+
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ CONTEXT PACKER - Per-Task Code Snippets                                                  ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+class ContextPacker:
+    """
+    Embed the code a task is about directly in the command file.
     
-    def _test_css_validity(self) -> Dict:
-        """Basic CSS validation."""
-        test = {
-            "name": "CSS Validation",
-            "status": "passed",
-            "message": "",
-            "details": []
-        }
+    Pipeline:
+    ─────────
+    1. Index     every text file in the project (lines plus the class, id
+                 and selector names on each line), cached by size and mtime
+    2. Resolve   references in the task body:
+                   index.html, css/main.css           file references
+                   index.html:120  index.html:120-140 explicit line ranges
+                   `.hero-title`  `#contact-form`     selectors (in backticks)
+    3. Extract   line ranges around each hit; CSS hits expand to the whole
+                 rule; overlapping ranges in a file are merged
+    4. Pack      snippets task by task until "context_snippet_tokens" is
+                 spent; whatever does not fit is listed by location only
+    """
+    
+    INDEX_EXTENSIONS = ('.html', '.htm', '.css', '.js', '.json', '.md', '.py', '.svg')
+    SKIP_DIRS = ('.git', '.ai-workflow', 'node_modules', '__pycache__')
+    MAX_INDEX_BYTES = 2 * 1024 * 1024
+    LANGUAGES = {'.html': 'html', '.htm': 'html', '.css': 'css', '.js': 'javascript',
+                 '.json': 'json', '.md': 'markdown', '.py': 'python', '.svg': 'xml'}
+    
+    FILE_REF = re.compile(
+        r'(?<![\w/.-])((?:[\w.-]+/)*[\w.-]+\.(?:html?|css|js|json|md|py|svg))(?::(\d+)(?:-(\d+))?)?\b'
+    )
+    SELECTOR_REF = re.compile(r'`([.#][A-Za-z_][\w-]*)`')
+    CLASS_ATTR = re.compile(r'\bclass\s*=\s*["\']([^"\']*)["\']', re.IGNORECASE)
+    ID_ATTR = re.compile(r'\bid\s*=\s*["\']([^"\']*)["\']', re.IGNORECASE)
+    CSS_NAME = re.compile(r'([.#])([A-Za-z_][\w-]*)')
+    
+    def __init__(self, project_path: Path, logger: Logger, config: Optional[Dict] = None):
+        """
+        Initialize ContextPacker.
         
-        issues = []
-        css_files = list(self.project_path.glob("**/*.css"))
+        Args:
+            project_path: Path to project root
+            logger: Logger instance
+            config: Optional configuration dictionary
+        """
+        self.project_path = project_path
+        self.logger = logger
+        self.config = config if config is not None else {}
+        # relative path -> (size, mtime_ns, {"lines": [...], "names": {".cls": [line, ...]}})
+        self._index: Dict[str, Tuple[int, int, Dict]] = {}
+        self._lock = threading.Lock()
+        self.last_stats: Dict = {}
+    
+    def _files(self) -> List[str]:
+        """List indexable files as POSIX paths relative to the project."""
+        files = []
+        for root, dirs, names in os.walk(self.project_path):
+            dirs[:] = [d for d in dirs if d not in self.SKIP_DIRS and not d.startswith('.')]
+            for name in names:
+                if name.lower().endswith(self.INDEX_EXTENSIONS):
+                    files.append((Path(root) / name).relative_to(self.project_path).as_posix())
+        return files
+    
+    def _entry(self, rel_path: str) -> Optional[Dict]:
+        """Get the index entry for a file, rebuilding it if the file changed."""
+        path = self.project_path / rel_path
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if stat.st_size > self.MAX_INDEX_BYTES:
+            return None
         
-        for css_file in css_files[:10]:
-            try:
-                content = css_file.read_text(encoding='utf-8', errors='ignore')
-                
-                # Check for unmatched braces
-                open_braces = content.count('{')
-                close_braces = content.count('}')
-                if open_braces != close_braces:
-                    issues.append(
-                        f"{css_file.name}: Mismatched braces "
-                        f"({open_braces} open, {close_braces} close)"
-                    )
-                
-            except Exception:
-                pass
+        with self._lock:
+            cached = self._index.get(rel_path)
+            if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                return cached[2]
         
-        if issues:
-            test["status"] = "failed"
-            test["message"] = f"Found {len(issues)} CSS issues"
-            test["details"] = issues[:10]
-        else:
-            test["message"] = "CSS files are valid"
+        try:
+            lines = path.read_text(encoding='utf-8', errors='ignore').split('\n')
+        except OSError:
+            return None
         
-        return test
+        names: Dict[str, List[int]] = {}
+        is_markup = rel_path.lower().endswith(('.html', '.htm', '.svg'))
+        for number, line in enumerate(lines, 1):
+            found = set()
+            if is_markup:
+                for match in self.CLASS_ATTR.finditer(line):
+                    found.update('.' + name for name in match.group(1).split())
+                for match in self.ID_ATTR.finditer(line):
+                    found.add('#' + match.group(1).strip())
+            else:
+                found.update(kind + name for kind, name in self.CSS_NAME.findall(line))
+            for name in found:
+                names.setdefault(name, []).append(number)
+        
+        entry = {"lines": lines, "names": names}
+        with self._lock:
+            self._index[rel_path] = (stat.st_size, stat.st_mtime_ns, entry)
+        return entry
+    
+    def _resolve_file(self, ref: str, files: List[str]) -> Optional[str]:
+        """Resolve a file reference to an indexed path (exact path, then unique suffix)."""
+        ref = ref.lstrip('./')
+        if ref in files:
+            return ref
+        matches = [f for f in files if f.endswith('/' + ref)]
+        return matches[0] if len(matches) == 1 else None
+    
+    def _expand(self, rel_path: str, lines: List[str], line: int) -> Tuple[int, int]:
+        """Get the line range to show for a hit (1-based, inclusive)."""
+        radius = self.config.get("context_snippet_radius", 3)
+        if rel_path.lower().endswith('.css'):
+            # The whole rule: from the hit to the closing brace
+            end = line
+            while end < len(lines) and end - line < 40 and '}' not in lines[end - 1]:
+                end += 1
+            return line, end
+        return max(1, line - radius), min(len(lines), line + radius)
+    
+    def task_snippets(self, task: Task, files: List[str]) -> List[Dict]:
+        """
+        Resolve one task's references into snippet ranges, most specific first.
+        
+        Args:
+            task: Task to resolve
+            files: Indexed file list
+            
+        Returns:
+            [{"path": "index.html", "start": 118, "end": 124, "reason": ".hero"}, ...]
+        """
+        max_hits = self.config.get("context_snippet_max_hits", 3)
+        explicit, selected = [], []
+        
+        referenced = []
+        for match in self.FILE_REF.finditer(task.content):
+            rel_path = self._resolve_file(match.group(1), files)
+            if not rel_path:
+                continue
+            if rel_path not in referenced:
+                referenced.append(rel_path)
+            if match.group(2):
+                start = int(match.group(2))
+                end = int(match.group(3) or start)
+                explicit.append({"path": rel_path, "start": start, "end": end, "reason": "referenced"})
+        
+        # Referenced files first, then stylesheets (where selectors are defined), then the rest
+        others = sorted((f for f in files if f not in referenced), key=lambda f: (not f.endswith('.css'), f))
+        search_order = referenced + others
+        
+        selectors = list(dict.fromkeys(self.SELECTOR_REF.findall(task.content)))
+        for selector in selectors:
+            hits = 0
+            for rel_path in search_order:
+                entry = self._entry(rel_path)
+                if not entry:
+                    continue
+                for line in entry["names"].get(selector, []):
+                    start, end = self._expand(rel_path, entry["lines"], line)
+                    selected.append({"path": rel_path, "start": start, "end": end, "reason": selector})
+                    hits += 1
+                    if hits >= max_hits:
+                        break
+                if hits >= max_hits:
+                    break
+        
+        return self._merge(explicit + selected)
+    
+    @staticmethod
+    def _merge(snippets: List[Dict]) -> List[Dict]:
+        """Merge overlapping or adjacent ranges in the same file, keeping first-seen order."""
+        merged: List[Dict] = []
+        for snippet in snippets:
+            for existing in merged:
+                if (existing["path"] == snippet["path"]
+                        and snippet["start"] <= existing["end"] + 1
+                        and existing["start"] <= snippet["end"] + 1):
+                    existing["start"] = min(existing["start"], snippet["start"])
+                    existing["end"] = max(existing["end"], snippet["end"])
+                    if snippet["reason"] not in existing["reason"].split(', '):
+                        existing["reason"] += ", " + snippet["reason"]
+                    break
+            else:
+                merged.append(dict(snippet))
+        return merged
+    
+    def pack(self, tasks: List[Task]) -> Dict[str, List[str]]:
+        """
+        Build markdown context lines for each task within the token budget.
+        
+        Args:
+            tasks: Tasks of one phase
+            
+        Returns:
+            {task_id: [markdown lines]} (tasks without references are omitted)
+        """
+        started = time.time()
+        budget = self.config.get("context_snippet_tokens", CONTEXT_SNIPPET_TOKENS)
+        files = self._files()
+        spent, packed, omitted = 0, 0, 0
+        result: Dict[str, List[str]] = {}
+        seen: set = set()  # identical markup repeated across pages is shown once
+        
+        for task in tasks:
+            lines: List[str] = []
+            skipped: List[str] = []
+            for snippet in self.task_snippets(task, files):
+                entry = self._entry(snippet["path"])
+                if not entry:
+                    continue
+                end = min(snippet["end"], len(entry["lines"]))
+                body = entry["lines"][snippet["start"] - 1:end]
+                if snippet["start"] > end or '\n'.join(body) in seen:
+                    continue
+                seen.add('\n'.join(body))
+                location = f"{snippet['path']}:{snippet['start']}-{end}"
+                language = self.LANGUAGES.get(Path(snippet["path"]).suffix.lower(), "")
+                block = [
+                    f"`{location}` ({snippet['reason']})",
+                    f"```{language}",
+                    *body,
+                    "```",
+                    ""
+                ]
+                cost = CommandBuilder.count_tokens('\n'.join(block))
+                if spent + cost > budget:
+                    skipped.append(location)
+                    continue
+                spent += cost
+                packed += 1
+                lines.extend(block)
+            
+            if skipped:
+                omitted += len(skipped)
+                lines.append(f"_Not included (context budget): {', '.join(skipped)}_")
+                lines.append("")
+            if lines:
+                result[task.id] = ["**Context:**", "", *lines]
+        
+        self.last_stats = {
+            "snippets": packed,
+            "omitted": omitted,
+            "tokens": spent,
+            "budget": budget,
+            "indexed_files": len(self._index),
+            "elapsed_ms": round((time.time() - started) * 1000, 1)
+        }
+        return result
 
 
 # ╔══════════════════════════════════════════════════════════════════════════════════════════╗
 # ║ CLAUDE CODE MANAGER - Command File Generation                                            ║
 # ╚══════════════════════════════════════════════════════════════════════════════════════════╝
 
+class CommandBuilder:
+    """
+    Compact task rendering for command files.
+    
+    Task bodies are split into blocks (paragraphs, lists and fenced code
+    blocks). A block that appears verbatim (ignoring whitespace) in two or
+    more tasks of the same phase is emitted once in a shared context section
+    and replaced in each task by a one-line reference:
+    
+        ### 1. Task A1: ...                ## 📎 Shared Context
+        **Files:** a.html, b.html   ──►    ### S1
+        ...                                **Files:** a.html, b.html
+        ### 2. Task A2: ...                ...
+        **Files:** a.html, b.html          ### 1. Task A1: ...
+                                           ↪ Shared context S1 applies.
+    
+    Token counts are estimates: the rendered text's length divided by the
+    same CHARS_PER_TOKEN ratio the TaskParser uses for phase splitting, not
+    a tokenizer count. The budget they are compared against is advisory.
+    """
+    
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        """Estimate the token count of rendered text (characters / CHARS_PER_TOKEN)."""
+        return -(-len(text) // CHARS_PER_TOKEN)
+    
+    @staticmethod
+    def task_lines(task: Task) -> List[str]:
+        """Get a task's content lines without its ### Task header."""
+        return [line for line in task.content.split('\n') if not line.strip().startswith('### Task')]
+    
+    @staticmethod
+    def split_blocks(lines: List[str]) -> List[List[str]]:
+        """
+        Split lines into blank-line separated blocks.
+        
+        Fenced code blocks are never split, even if they contain blank lines.
+        
+        Args:
+            lines: Content lines
+            
+        Returns:
+            List of blocks (each a list of lines, no blank edges)
+        """
+        blocks, current, in_fence = [], [], False
+        for line in lines:
+            if line.strip().startswith("```"):
+                in_fence = not in_fence
+            if not line.strip() and not in_fence:
+                if current:
+                    blocks.append(current)
+                    current = []
+                continue
+            current.append(line)
+        if current:
+            blocks.append(current)
+        return blocks
+    
+    @classmethod
+    def dedupe(
+        cls,
+        tasks: List[Task],
+        min_chars: int = SHARED_BLOCK_MIN_CHARS
+    ) -> Tuple[List[List[str]], List[List[str]]]:
+        """
+        Hoist blocks repeated across tasks into shared context blocks.
+        
+        Args:
+            tasks: Tasks of one phase
+            min_chars: Smallest block worth sharing (a reference costs tokens too)
+            
+        Returns:
+            Tuple of (shared blocks, per-task lines with references)
+        """
+        task_blocks = [cls.split_blocks(cls.task_lines(task)) for task in tasks]
+        
+        def key(block: List[str]) -> str:
+            return ' '.join(' '.join(block).split())
+        
+        # Count each block once per task that contains it
+        owners: Dict[str, int] = {}
+        for blocks in task_blocks:
+            for k in {key(block) for block in blocks}:
+                owners[k] = owners.get(k, 0) + 1
+        
+        shared: List[List[str]] = []
+        shared_ids: Dict[str, str] = {}
+        rendered: List[List[str]] = []
+        for blocks in task_blocks:
+            lines: List[str] = []
+            for block in blocks:
+                if lines:
+                    lines.append("")
+                k = key(block)
+                if owners[k] > 1 and len(k) >= min_chars:
+                    if k not in shared_ids:
+                        shared.append(block)
+                        shared_ids[k] = f"S{len(shared)}"
+                    lines.append(f"↪ Shared context **{shared_ids[k]}** applies.")
+                else:
+                    lines.extend(block)
+            rendered.append(lines)
+        
+        return shared, rendered
+
+
 class ClaudeCodeManager:
     """
     Manages communication with Claude Code.
@@ -1251,9 +5851,22 @@ class ClaudeCodeManager:
     - Format tasks in a clear, executable format
     - Include completion instructions (status.json update)
     - Provide context and guidance for Claude Code
+    - Keep command files within the phase token budget ("compact_commands"):
+      repeated task context is shared once, the footer does not repeat the
+      status template, and a size report is written next to the command file
+    - Embed the code each task refers to ("context_snippets", see ContextPacker)
+    - Render phase files (phases/phase-<id>.md) on demand, cached by a hash
+      of the phase's tasks, the builder version, the layout options and the
+      code snippets embedded from project files
     """
     
-    def __init__(self, project_path: Path, workflow_dir: Path, logger: Logger):
+    def __init__(
+        self,
+        project_path: Path,
+        workflow_dir: Path,
+        logger: Logger,
+        config: Optional[Dict] = None
+    ):
         """
         Initialize ClaudeCodeManager.
         
@@ -1261,12 +5874,19 @@ class ClaudeCodeManager:
             project_path: Path to project root
             workflow_dir: Path to .ai-workflow directory
             logger: Logger instance
+            config: Optional configuration dictionary
         """
         self.project_path = project_path
         self.workflow_dir = workflow_dir
         self.logger = logger
+        self.config = config if config is not None else {}
+        self.context = ContextPacker(project_path, logger, self.config)
+        self.last_report: Optional[Dict] = None
+        self.phases_dir = workflow_dir / "phases"
+        self._renders: Dict[str, Tuple[str, str]] = {}  # phase_id -> (key, content)
+        self._render_lock = threading.Lock()
     
-    def write_command_file(self, phase: Phase) -> bool:
+    def write_command_file(self, phase: Phase, working_dir: Optional[Path] = None) -> bool:
         """
         Write the command file for a phase.
         
@@ -1278,38 +5898,294 @@ class ClaudeCodeManager:
         
         Args:
             phase: Phase to write commands for
+            working_dir: Phase worktree to work in (None = project root)
             
         Returns:
             True if successful
         """
         try:
-            content = self._build_command_content(phase)
+            content, report = self.build_command(phase, working_dir)
             command_file = self.workflow_dir / CURRENT_COMMAND_FILE
             
             with open(command_file, 'w', encoding='utf-8') as f:
-                f.write(content)
+                f.write(self._stamp(content))
+            with open(self.workflow_dir / COMMAND_REPORT_FILE, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.last_report = report
             
-            self.logger.info(f"Wrote command file for Phase {phase.id}")
+            self.logger.info(
+                f"Wrote command file for Phase {phase.id}: ~{report['tokens']:,} tokens estimated "
+                f"(budget {report['budget']:,}, {report['shared_blocks']} shared blocks)"
+            )
+            if report["saved_tokens"] is not None:
+                self.logger.debug(
+                    f"Phase {phase.id} command: ~{report['saved_tokens']:,} tokens saved "
+                    f"vs ~{report['legacy_tokens']:,} uncompacted"
+                )
+            if report["over_budget"]:
+                self.logger.warn(
+                    f"Phase {phase.id} command is estimated over the token budget "
+                    f"({report['tokens']:,} > {report['budget']:,}); consider smaller phases"
+                )
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to write command file: {e}")
             return False
     
-    def _build_command_content(self, phase: Phase) -> str:
+    @staticmethod
+    def _stamp(content: str) -> str:
+        """Add the generated timestamp below the title (kept out of cached bodies)."""
+        title, _, rest = content.partition('\n')
+        return f"{title}\n\n**Generated:** {datetime.now().isoformat()}{rest}"
+    
+    def _snippets(self, phase: Phase) -> Dict[str, List[str]]:
+        """Pack the context snippets of a phase (empty when "context_snippets" is off)."""
+        return self.context.pack(phase.tasks) if self.config.get("context_snippets", True) else {}
+    
+    def phase_key(self, phase: Phase, snippets: Optional[Dict[str, List[str]]] = None) -> str:
+        """
+        Get the render cache key of a phase file.
+        
+        The packed snippets are part of the key, so editing a file a task
+        refers to invalidates the phase file.
+        
+        Args:
+            phase: Phase to key
+            snippets: Packed context snippets (default: packed here)
+            
+        Returns:
+            SHA-256 hex digest of the builder version, layout options, tasks
+            and snippets
+        """
+        if snippets is None:
+            snippets = self._snippets(phase)
+        digest = hashlib.sha256()
+        options = {
+            key: self.config.get(key)
+            for key in ("compact_commands", "context_snippets", "context_snippet_tokens",
+                        "context_snippet_radius", "context_snippet_max_hits")
+        }
+        digest.update(json.dumps([COMMAND_BUILDER_VERSION, options, phase.id, phase.name]).encode('utf-8'))
+        for task in phase.tasks:
+            digest.update(json.dumps([task.id, task.title, task.content]).encode('utf-8'))
+        digest.update(json.dumps(snippets, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _read_manifest(self) -> Dict[str, Dict]:
+        """Read the phase file manifest ({phase_id: {"key", "file"}})."""
+        try:
+            with open(self.phases_dir / PHASE_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+    
+    def _write_manifest(self, manifest: Dict[str, Dict]):
+        """Write the phase file manifest."""
+        with open(self.phases_dir / PHASE_MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+    
+    def render_phase(self, phase: Phase) -> str:
+        """
+        Get the phase file for a phase, rendering it only if its key changed.
+        
+        Args:
+            phase: Phase to render
+            
+        Returns:
+            Markdown content of phases/phase-<id>.md
+        """
+        snippets = self._snippets(phase)
+        key = self.phase_key(phase, snippets)
+        with self._render_lock:
+            cached = self._renders.get(phase.id)
+            if cached and cached[0] == key:
+                return cached[1]
+            
+            phase_file = self.phases_dir / f"phase-{phase.id}.md"
+            manifest = self._read_manifest()
+            if manifest.get(phase.id, {}).get("key") == key and phase_file.exists():
+                content = phase_file.read_text(encoding='utf-8')
+            else:
+                content = self._stamp(self._build_command_content(phase, snippets=snippets))
+                with open(phase_file, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                manifest[phase.id] = {"key": key, "file": phase_file.name}
+                self._write_manifest(manifest)
+                self.logger.debug(f"Rendered phase file for Phase {phase.id}")
+            
+            self._renders[phase.id] = (key, content)
+            return content
+    
+    def sync_phase_files(self, phases: List[Phase]) -> Dict[str, int]:
+        """
+        Drop phase files that no longer match their phase; keep the rest.
+        
+        Nothing is rendered here; render_phase() does that on demand.
+        
+        Args:
+            phases: Phases of the current session
+            
+        Returns:
+            {"kept": 3, "removed": 1}
+        """
+        keys = {phase.id: self.phase_key(phase) for phase in phases}
+        with self._render_lock:
+            manifest = self._read_manifest()
+            kept = {
+                phase_id: entry for phase_id, entry in manifest.items()
+                if keys.get(phase_id) == entry.get("key")
+                and (self.phases_dir / entry.get("file", "")).is_file()
+            }
+            
+            removed = 0
+            for f in self.phases_dir.glob("phase-*.md"):
+                if f.name not in {entry["file"] for entry in kept.values()}:
+                    f.unlink()
+                    removed += 1
+            
+            self._renders = {
+                phase_id: render for phase_id, render in self._renders.items() if phase_id in kept
+            }
+            self._write_manifest(kept)
+        
+        return {"kept": len(kept), "removed": removed}
+    
+    def clear_phase_files(self):
+        """Remove all phase files and the manifest."""
+        with self._render_lock:
+            for f in self.phases_dir.glob("phase-*.md"):
+                f.unlink()
+            manifest = self.phases_dir / PHASE_MANIFEST_FILE
+            if manifest.exists():
+                manifest.unlink()
+            self._renders = {}
+    
+    def build_command(self, phase: Phase, working_dir: Optional[Path] = None) -> Tuple[str, Dict]:
+        """
+        Build the command file content and its size report.
+        
+        Args:
+            phase: Phase to build content for
+            working_dir: Phase worktree to work in (None = project root)
+            
+        Returns:
+            Tuple of (markdown content, report) where report is
+            {"phase": "A", "tokens": 3120, "budget": 90000, "over_budget": False,
+             "legacy_tokens": 3980, "saved_tokens": 860, "shared_blocks": 2,
+             "sections": {"instructions": 410, "shared": 120, "tasks": 2500, "footer": 90},
+             "context": {"snippets": 6, "omitted": 0, "tokens": 1400, ...} or None}
+            All token counts are CommandBuilder.count_tokens estimates.
+            legacy_tokens/saved_tokens compare against the uncompacted layout,
+            which is only rendered at log_level DEBUG; otherwise they are None.
+        """
+        snippets = self._snippets(phase)
+        if not self.config.get("compact_commands", True):
+            content = self._build_command_content(phase, working_dir, compact=False, snippets=snippets)
+            sections, shared_blocks = {}, 0
+            legacy_tokens = CommandBuilder.count_tokens(content)
+        else:
+            content, sections, shared_blocks = self._build_sections(phase, working_dir, snippets)
+            legacy_tokens = None
+            if self.config.get("log_level") == "DEBUG":
+                legacy = self._build_command_content(phase, working_dir, compact=False, snippets=snippets)
+                legacy_tokens = CommandBuilder.count_tokens(legacy)
+        
+        tokens = CommandBuilder.count_tokens(content)
+        budget = self.config.get("target_tokens_per_phase", TARGET_TOKENS_PER_PHASE)
+        report = {
+            "phase": phase.id,
+            "tokens": tokens,
+            "budget": budget,
+            "over_budget": tokens > budget,
+            "legacy_tokens": legacy_tokens,
+            "saved_tokens": legacy_tokens - tokens if legacy_tokens is not None else None,
+            "shared_blocks": shared_blocks,
+            "sections": sections,
+            "context": self.context.last_stats if snippets else None
+        }
+        return content, report
+    
+    def _build_sections(
+        self,
+        phase: Phase,
+        working_dir: Optional[Path],
+        snippets: Dict[str, List[str]]
+    ) -> Tuple[str, Dict, int]:
+        """Build compact content; returns (content, tokens per section, shared block count)."""
+        content = self._build_command_content(phase, working_dir, compact=True, snippets=snippets)
+        
+        # Measure sections by their headings
+        sections = {}
+        markers = [("instructions", "## 📋 Instructions"), ("shared", "## 📎 Shared Context"),
+                   ("tasks", "## 🎯 Tasks"), ("footer", "## ✅ Completion")]
+        found = [(name, content.find(marker)) for name, marker in markers if marker in content]
+        for i, (name, start) in enumerate(found):
+            end = found[i + 1][1] if i + 1 < len(found) else len(content)
+            sections[name] = CommandBuilder.count_tokens(content[start:end])
+        
+        return content, sections, len(re.findall(r'^### S\d+$', content, re.MULTILINE))
+    
+    def _build_command_content(
+        self,
+        phase: Phase,
+        working_dir: Optional[Path] = None,
+        compact: Optional[bool] = None,
+        snippets: Optional[Dict[str, List[str]]] = None
+    ) -> str:
         """
         Build the content of the command file.
         
         Args:
             phase: Phase to build content for
+            working_dir: Phase worktree to work in (None = project root)
+            compact: Share repeated task context and shorten the footer
+                (default: "compact_commands" config)
+            snippets: Context lines per task id (default: packed on demand
+                when "context_snippets" is enabled)
             
         Returns:
             Formatted markdown content
         """
+        if compact is None:
+            compact = self.config.get("compact_commands", True)
+        if snippets is None:
+            snippets = self._snippets(phase)
+        
+        status_path = ".ai-workflow/status.json"
+        events_path = f".ai-workflow/{STATUS_EVENTS_FILE}"
+        if working_dir:
+            # The worktree has no status file of its own; point at the project's
+            status_path = str(self.workflow_dir / STATUS_FILE)
+            events_path = str(self.workflow_dir / STATUS_EVENTS_FILE)
+            git_steps = [
+                f"1. **Work only inside the phase worktree** `{working_dir}`",
+                "   (branch will be merged back by the orchestrator):",
+                "   ```bash",
+                f'   cd "{working_dir}"',
+                "   ```",
+                "",
+                "2. **Stage and commit changes (do not push):**",
+                "   ```bash",
+                f'   git add -A && git commit -m "fix: Phase {phase.id} - [brief description]"',
+                "   ```",
+            ]
+        else:
+            git_steps = [
+                "1. **Stage and commit changes:**",
+                "   ```bash",
+                f'   git add -A && git commit -m "fix: Phase {phase.id} - [brief description]"',
+                "   ```",
+                "",
+                "2. **Push to remote:**",
+                "   ```bash",
+                "   git push",
+                "   ```",
+            ]
+        
         lines = [
             f"# Phase {phase.id} Implementation",
             "",
-            f"**Generated:** {datetime.now().isoformat()}",
             f"**Phase:** {phase.id} ({phase.name})",
             f"**Tasks:** {phase.task_count}",
             f"**Estimated tokens:** ~{phase.token_estimate:,}",
@@ -1320,19 +6196,11 @@ class ClaudeCodeManager:
             "",
             "Execute the following tasks in order. After completing ALL tasks:",
             "",
-            "1. **Stage and commit changes:**",
-            "   ```bash",
-            f'   git add -A && git commit -m "fix: Phase {phase.id} - [brief description]"',
-            "   ```",
-            "",
-            "2. **Push to remote:**",
-            "   ```bash",
-            "   git push",
-            "   ```",
+            *git_steps,
             "",
             "3. **🚨 CRITICAL: Update status.json to signal completion:**",
             "   ```bash",
-            "   cat > .ai-workflow/status.json << 'EOF'",
+            f"   cat > {status_path} << 'EOF'",
             "   {",
             '     "state": "completed",',
             f'     "current_phase": "{phase.id}",',
@@ -1345,25 +6213,65 @@ class ClaudeCodeManager:
             "",
             "---",
             "",
-            "## 🎯 Tasks",
+            "## 📡 Progress Events",
+            "",
+            f"Append one JSON line to `{events_path}` when you start and finish each task",
+            "(and a heartbeat during long steps):",
+            "",
+            "```bash",
+            f"""echo '{{"type": "task_started", "phase": "{phase.id}", "task": "{phase.tasks[0].id if phase.tasks else phase.id}"}}' >> {events_path}""",
+            "```",
+            "",
+            "Types: `task_started`, `task_progress` (+ `percent`, `message`), `task_completed`, "
+            "`heartbeat`. A silent agent is treated as stalled and the phase is retried.",
+            "",
+            "When the phase is done, a `phase_completed` event (+ `files_modified`) completes it",
+            "like the status.json above; an `error` event (+ `message`) reports a failure:",
+            "",
+            "```bash",
+            f"""echo '{{"type": "phase_completed", "phase": "{phase.id}", "files_modified": ["index.html"]}}' >> {events_path}""",
+            "```",
+            "",
+            "---",
             ""
         ]
         
+        if compact:
+            shared, task_lines = CommandBuilder.dedupe(phase.tasks)
+        else:
+            shared, task_lines = [], [CommandBuilder.task_lines(task) for task in phase.tasks]
+        
+        # Context repeated across tasks, written once
+        if shared:
+            lines.extend(["## 📎 Shared Context", ""])
+            for i, block in enumerate(shared, 1):
+                lines.extend([f"### S{i}", "", *block, ""])
+            lines.extend(["---", ""])
+        
+        lines.extend(["## 🎯 Tasks", ""])
+        
         # Add each task
         for i, task in enumerate(phase.tasks, 1):
             lines.append(f"### {i}. Task {task.id}: {task.title}")
             lines.append("")
-            
-            # Add task content (skip the header line from the original content)
-            content_lines = task.content.split('\n')
-            for line in content_lines:
-                if not line.strip().startswith('### Task'):
-                    lines.append(line)
-            
+            lines.extend(task_lines[i - 1])
             lines.append("")
+            if task.id in snippets:
+                lines.extend(snippets[task.id])
             lines.append("---")
             lines.append("")
         
+        if compact:
+            # The status template is already in the instructions
+            lines.extend([
+                "## ✅ Completion",
+                "",
+                "When ALL tasks are done and committed, update "
+                f"`{status_path}` as shown in step 3 (or append the `phase_completed` event) "
+                "— the orchestrator waits for it."
+            ])
+            return '\n'.join(lines)
+        
         # Completion section
         lines.extend([
             "## ✅ Completion Checklist",
@@ -1451,6 +6359,65 @@ class SoundManager:
 # ║ HTTP SERVER - Dashboard and API                                                          ║
 # ╚══════════════════════════════════════════════════════════════════════════════════════════╝
 
+@dataclass
+class Asset:
+    """A dashboard file held in memory by AssetCache."""
+    content: bytes                   # File content
+    gzipped: bytes                   # Compressed once, when (re)loaded
+    etag: str                        # Quoted content hash
+    mtime: float                     # Modification time (Last-Modified)
+    stamp: Tuple[int, int]           # (mtime_ns, size) the cache entry was read at
+
+
+class AssetCache:
+    """
+    Dashboard pages kept in memory, reloaded when the file changes.
+    
+    A request costs one stat() instead of a read; the content hash (ETag)
+    and the gzip body are computed once per change. Shared by every
+    handler thread.
+    """
+    
+    def __init__(self):
+        """Initialize AssetCache."""
+        self._assets: Dict[Path, Asset] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, path: Path) -> Optional[Asset]:
+        """
+        Get a file, re-reading it if its mtime or size changed.
+        
+        Args:
+            path: File path
+            
+        Returns:
+            Asset, or None if the file does not exist
+        """
+        try:
+            stat = path.stat()
+        except OSError:
+            with self._lock:
+                self._assets.pop(path, None)
+            return None
+        
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        asset = self._assets.get(path)
+        if asset is not None and asset.stamp == stamp:
+            return asset
+        
+        content = path.read_bytes()
+        asset = Asset(
+            content=content,
+            gzipped=gzip.compress(content, GZIP_LEVEL),
+            etag=f'"{hashlib.md5(content).hexdigest()}"',
+            mtime=stat.st_mtime,
+            stamp=stamp
+        )
+        with self._lock:
+            self._assets[path] = asset
+        return asset
+
+
 class DashboardHandler(SimpleHTTPRequestHandler):
     """
     HTTP request handler for the dashboard and API endpoints.
@@ -1460,9 +6427,16 @@ class DashboardHandler(SimpleHTTPRequestHandler):
     ──────────────
     GET  /              - Dashboard HTML page
     GET  /api/state     - Current workflow state (JSON)
-    GET  /api/logs      - Recent log entries (JSON)
+    GET  /api/logs      - Log entries, paginated and filtered (see _serve_logs)
     GET  /api/config    - Current configuration (JSON)
+    GET  /api/config/layers - Where each setting comes from
     GET  /api/health    - Health check endpoint
+    GET  /metrics       - Metrics in Prometheus text format
+    GET  /api/phase/<id>/command - Phase command file (Markdown, cached render)
+    GET  /api/trace/<id> - Phase handoff spans (Chrome trace-event JSON)
+    GET  /api/debug/threads - Stack of every thread          ┐ off by default, need
+    GET  /api/debug/profile?seconds=5 - cProfile capture     │ the debug_token
+    GET  /api/debug/memory?limit=20 - tracemalloc top sites  ┘ (see Diagnostics)
     POST /api/analyze   - Analyze planning.md
     POST /api/start     - Start workflow
     POST /api/pause     - Pause workflow
@@ -1471,19 +6445,73 @@ class DashboardHandler(SimpleHTTPRequestHandler):
     POST /api/start-phase - Start specific phase
     POST /api/skip      - Skip a phase
     POST /api/retry     - Retry a phase
+    POST /api/config    - Change settings until restart
+    
+    Host mode (OrchestratorHost):
+    ─────────────────────────────
+    GET  /                       - Combined dashboard for all projects
+    GET  /api/projects           - Project summaries and host statistics
+    GET  /metrics                - Metrics of every project (label project="<id>")
+    GET  /projects/<id>/         - Dashboard of one project
+    *    /api/projects/<id>/...  - Any endpoint above, for one project
+    
+    Responses:
+    ──────────
+    Every body carries an ETag (Last-Modified for files too); a matching
+    If-None-Match / If-Modified-Since gets 304 without a body. Bodies of
+    GZIP_MIN_BYTES or more are gzipped for clients that accept it.
+    Dashboard pages come from the in-memory AssetCache.
     
     NOTE: This uses HTTP polling instead of WebSocket for reliability.
     The dashboard polls /api/state every 2 seconds.
     """
     
-    def __init__(self, *args, orchestrator=None, **kwargs):
+    assets = AssetCache()  # shared by all handler instances
+    
+    def __init__(self, *args, orchestrator=None, host=None, **kwargs):
         self.orchestrator = orchestrator
+        self.host = host
         super().__init__(*args, **kwargs)
     
     def log_message(self, format, *args):
         """Suppress default HTTP logging to reduce noise."""
         pass
     
+    def handle_one_request(self):
+        """Handle a request and record its duration and status."""
+        self._status = None
+        self._route = None
+        self._capture = None
+        self._profile = None
+        started = time.perf_counter()
+        try:
+            super().handle_one_request()
+        finally:
+            if self._capture is not None:
+                self._capture.stop(self._profile)
+        if self._status is None:
+            return  # Connection closed without a request
+        
+        metrics = self.orchestrator.metrics if self.orchestrator else getattr(self.host, "metrics", None)
+        if metrics is None or not metrics.enabled:
+            return
+        # Unknown paths share one label so scanners cannot blow up the series count
+        route = self._route if self._route and self._status != 404 else "other"
+        metrics.observe("orchestrator_http_request_seconds", time.perf_counter() - started, route=route)
+        metrics.inc("orchestrator_http_requests_total", route=route, method=self.command, status=self._status)
+    
+    def send_response(self, code, message=None):
+        """Send the status line, remembering the code for metrics."""
+        self._status = code
+        super().send_response(code, message)
+    
+    def _start_profile(self, path: str):
+        """Profile this request while a debug capture is open (debug requests excluded)."""
+        capture = self.orchestrator.diagnostics.capture if self.orchestrator else None
+        if capture is not None and not path.startswith('/api/debug/'):
+            self._capture = capture
+            self._profile = capture.start()
+    
     def send_cors_headers(self):
         """Send CORS headers for API responses."""
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -1499,23 +6527,58 @@ class DashboardHandler(SimpleHTTPRequestHandler):
     def do_GET(self):
         """Handle GET requests."""
         path = urlparse(self.path).path
+        if self.host:
+            path = self._route_host(path)
+            if path is None:
+                return
+        route = re.sub(r'^/api/phase/[^/]+/', '/api/phase/{id}/', path)
+        self._route = re.sub(r'^/api/trace/.+', '/api/trace/{id}', route)
+        self._start_profile(path)
         
         if path == '/' or path == '/index.html':
             self._serve_dashboard()
         elif path == '/api/state':
             self._serve_json(self.orchestrator.get_state())
         elif path == '/api/logs':
-            self._serve_json(self.orchestrator.get_logs())
+            self._serve_logs()
         elif path == '/api/config':
-            self._serve_json(self.orchestrator.config)
+            self._serve_json(self.orchestrator.get_config())
+        elif path == '/api/config/layers':
+            self._serve_json(self.orchestrator.config.describe())
         elif path == '/api/health':
             self._serve_json({"status": "ok", "version": VERSION})
+        elif path == '/metrics':
+            self._serve_metrics(self.orchestrator.metrics)
+        elif path.startswith('/api/phase/') and path.endswith('/command'):
+            phase_id = path[len('/api/phase/'):-len('/command')]
+            content = self.orchestrator.call(self.orchestrator.get_phase_command, phase_id)
+            if content is None:
+                self._serve_json({"error": f"Phase {phase_id} not found"}, 404)
+            elif isinstance(content, dict):
+                self._serve_json(content, 503)
+            else:
+                self._serve_text(content, 'text/markdown; charset=utf-8')
+        elif path.startswith('/api/trace/'):
+            phase_id = path[len('/api/trace/'):]
+            trace = self.orchestrator.get_phase_trace(phase_id)
+            if trace is None:
+                self._serve_json({"error": f"Phase {phase_id} not found"}, 404)
+            else:
+                self._serve_json(trace)
+        elif path.startswith('/api/debug/'):
+            self._serve_debug(path[len('/api/debug/'):])
         else:
             self.send_error(404, "Not Found")
     
     def do_POST(self):
         """Handle POST requests."""
         path = urlparse(self.path).path
+        if self.host:
+            path = self._route_host(path)
+            if path is None:
+                return
+        self._route = path
+        self._start_profile(path)
         
         # Read request body
         content_length = int(self.headers.get('Content-Length', 0))
@@ -1526,62 +6589,266 @@ class DashboardHandler(SimpleHTTPRequestHandler):
         except json.JSONDecodeError:
             data = {}
         
-        # Route to appropriate handler
+        # Route to appropriate handler (commands are queued on the orchestrator loop)
+        orchestrator = self.orchestrator
         if path == '/api/analyze':
-            result = self.orchestrator.analyze_plan()
+            result = orchestrator.call(orchestrator.analyze_plan)
         elif path == '/api/start':
-            result = self.orchestrator.start_workflow()
+            result = orchestrator.call(orchestrator.start_workflow)
         elif path == '/api/pause':
-            result = self.orchestrator.pause_workflow()
+            result = orchestrator.call(orchestrator.pause_workflow)
         elif path == '/api/resume':
-            result = self.orchestrator.resume_workflow()
+            result = orchestrator.call(orchestrator.resume_workflow)
         elif path == '/api/reset':
-            result = self.orchestrator.reset_workflow()
+            result = orchestrator.call(orchestrator.reset_workflow)
         elif path == '/api/skip':
             phase_id = data.get('phase_id')
-            result = self.orchestrator.skip_phase(phase_id)
+            result = orchestrator.call(orchestrator.skip_phase, phase_id)
         elif path == '/api/retry':
             phase_id = data.get('phase_id')
-            result = self.orchestrator.retry_phase(phase_id)
+            result = orchestrator.call(orchestrator.retry_phase, phase_id)
         elif path == '/api/start-phase':
             phase_id = data.get('phase_id')
-            result = self.orchestrator.start_specific_phase(phase_id)
+            result = orchestrator.call(orchestrator.start_specific_phase, phase_id)
+        elif path == '/api/config':
+            result = orchestrator.call(orchestrator.update_config, data)
         else:
-            result = {"error": "Unknown endpoint", "path": path}
+            # 404 also files the request under the shared "other" route label
+            self._serve_json({"error": "Unknown endpoint", "path": path}, 404)
+            return
         
         self._serve_json(result)
     
-    def _serve_dashboard(self):
-        """Serve the dashboard HTML file."""
-        dashboard_path = Path(self.orchestrator.workflow_dir) / "dashboard.html"
+    def _serve_debug(self, name: str):
+        """Serve a diagnostics endpoint after checking the debug token."""
+        diagnostics = self.orchestrator.diagnostics
+        status, error = diagnostics.authorize(self.headers)
+        if status:
+            self._serve_json({"error": error}, status)
+            return
         
-        if dashboard_path.exists():
+        query = parse_qs(urlparse(self.path).query)
+        
+        def number(key: str, default: float) -> float:
             try:
-                content = dashboard_path.read_text(encoding='utf-8')
-                self.send_response(200)
-                self.send_header('Content-Type', 'text/html; charset=utf-8')
-                self.send_header('Content-Length', len(content.encode('utf-8')))
-                self.send_header('Cache-Control', 'no-cache')
-                self.end_headers()
-                self.wfile.write(content.encode('utf-8'))
-            except Exception as e:
-                self._serve_json({"error": f"Failed to read dashboard: {e}"}, 500)
+                return float(query[key][0])
+            except (KeyError, ValueError):
+                return default
+        
+        if name == 'threads':
+            self._serve_json(diagnostics.thread_stacks())
+        elif name == 'profile':
+            status, result = diagnostics.profile(
+                number('seconds', 5), query.get('sort', ['cumulative'])[0], int(number('limit', 30))
+            )
+            self._serve_json(result, status)
+        elif name == 'memory':
+            status, result = diagnostics.memory(
+                int(number('limit', 20)), query.get('group', ['lineno'])[0], query.get('stop', ['0'])[0] == '1'
+            )
+            self._serve_json(result, status)
         else:
+            self._serve_json({"error": f"Unknown debug endpoint: {name}"}, 404)
+    
+    def _serve_logs(self):
+        """
+        Serve a page of the log store.
+        
+        Query parameters (all optional):
+            limit=100                 entries per page (max LOG_QUERY_MAX_LIMIT)
+            before=<seq>              older page: pass "next" of the previous response
+            after=<seq>               entries newer than seq, oldest first (tailing)
+            level=WARN                minimum level
+            phase=B                   entries logged while phase B was current
+            since=/until=<ISO time>   time range, e.g. 2026-01-21T10:00:00
+            q=<text>                  case-insensitive message search
+        """
+        query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        filters: Dict[str, Any] = {}
+        try:
+            filters["limit"] = max(1, min(int(query.get("limit", 100)), LOG_QUERY_MAX_LIMIT))
+            for key in ("before", "after"):
+                if key in query:
+                    filters[key] = int(query[key])
+            for key in ("since", "until"):
+                if key in query:
+                    filters[key] = datetime.fromisoformat(query[key]).timestamp()
+        except ValueError as e:
+            self._serve_json({"error": f"Invalid query parameter: {e}"}, 400)
+            return
+        
+        level = query.get("level", "").upper()
+        if level:
+            if level not in LogStore.LEVEL_RANK:
+                self._serve_json({"error": f"level must be one of {', '.join(LogStore.LEVEL_RANK)}"}, 400)
+                return
+            filters["level"] = level
+        if query.get("phase"):
+            filters["phase"] = query["phase"]
+        if query.get("q"):
+            filters["text"] = query["q"]
+        
+        self._serve_json(self.orchestrator.get_logs(**filters))
+    
+    def _route_host(self, path: str) -> Optional[str]:
+        """
+        Resolve a host-mode path.
+        
+        Host pages are served here. Project paths select the project's
+        orchestrator and are rewritten to the single-project form
+        (/api/projects/site/state → /api/state).
+        
+        Args:
+            path: Request path
+        
+        Returns:
+            Path for the regular routing, or None if a response was sent
+        """
+        self._route = path
+        if path == '/' or path == '/index.html':
+            self._serve_file(Path(__file__).resolve().parent / HOST_DASHBOARD_FILE)
+            return None
+        if path == '/api/projects':
+            self._serve_json(self.host.get_state())
+            return None
+        if path == '/metrics':
+            self._serve_metrics(self.host.metrics, self.host.render_metrics)
+            return None
+        if path == '/api/health':
+            return path
+        
+        match = re.match(r'^/(api/)?projects/([^/]+)(/.*)?$', path)
+        if not match:
+            self._serve_json({"error": "Not found; project endpoints live under /api/projects/<id>/"}, 404)
+            return None
+        
+        self.orchestrator = self.host.get(match.group(2))
+        if self.orchestrator is None:
+            self._serve_json({"error": f"Unknown project: {match.group(2)}"}, 404)
+            return None
+        
+        rest = match.group(3) or '/'
+        if match.group(1):
+            return '/api' + rest
+        if rest != '/':
+            self.send_error(404, "Not Found")
+            return None
+        return '/'
+    
+    def _serve_dashboard(self):
+        """Serve the project's dashboard (the host's copy if it has none)."""
+        dashboard_path = Path(self.orchestrator.workflow_dir) / "dashboard.html"
+        if not dashboard_path.exists():
+            dashboard_path = Path(__file__).resolve().parent / "dashboard.html"
+        self._serve_file(dashboard_path)
+    
+    def _serve_file(self, dashboard_path: Path):
+        """Serve a dashboard page (cached in memory until the file changes)."""
+        try:
+            asset = self.assets.get(dashboard_path)
+        except Exception as e:
+            self._serve_json({"error": f"Failed to read dashboard: {e}"}, 500)
+            return
+        if asset is None:
             self._serve_json({"error": "Dashboard not found"}, 404)
+            return
+        self._send_body(
+            asset.content, 'text/html; charset=utf-8',
+            etag=asset.etag, last_modified=asset.mtime, gzipped=asset.gzipped, cors=False
+        )
+    
+    def _serve_metrics(self, metrics: Metrics, render: Optional[Callable[[], str]] = None):
+        """Serve metrics in Prometheus text format (404 when disabled)."""
+        if not metrics.enabled:
+            self._serve_json({"error": "Metrics are disabled (config: metrics)"}, 404)
+            return
+        self._serve_text((render or metrics.render)(), 'text/plain; version=0.0.4; charset=utf-8')
+    
+    def _serve_text(self, content: str, content_type: str, status: int = 200):
+        """Serve a text response."""
+        self._send_body(content.encode('utf-8'), content_type, status)
+    
+    def _accepts_gzip(self) -> bool:
+        """Check Accept-Encoding for gzip (a q=0 entry refuses it)."""
+        for entry in self.headers.get('Accept-Encoding', '').split(','):
+            name, _, params = entry.strip().partition(';')
+            if name.strip().lower() not in ('gzip', '*'):
+                continue
+            match = re.search(r'q\s*=\s*([0-9.]+)', params)
+            try:
+                return not match or float(match.group(1)) > 0
+            except ValueError:
+                return False
+        return False
+    
+    def _not_modified(self, etag: str, last_modified: Optional[float]) -> bool:
+        """Check the request's validators (If-None-Match wins over If-Modified-Since)."""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+        
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since and last_modified is not None:
+            try:
+                return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+    
+    def _send_body(
+        self,
+        content: bytes,
+        content_type: str,
+        status: int = 200,
+        etag: Optional[str] = None,
+        last_modified: Optional[float] = None,
+        gzipped: Optional[bytes] = None,
+        cors: bool = True
+    ):
+        """
+        Send a response body with validators and optional gzip.
+        
+        Args:
+            content: Uncompressed body
+            content_type: Content-Type header
+            status: HTTP status (only 200 responses can become 304)
+            etag: Quoted ETag (default: hash of the content)
+            last_modified: Modification time for Last-Modified (files)
+            gzipped: Pre-compressed body (default: compressed here if needed)
+            cors: Send CORS headers
+        """
+        etag = etag or f'"{hashlib.md5(content).hexdigest()}"'
+        not_modified = status == 200 and self._not_modified(etag, last_modified)
+        compressible = len(content) >= GZIP_MIN_BYTES
+        
+        body = content
+        if not not_modified and compressible and self._accepts_gzip():
+            body = gzipped if gzipped is not None else gzip.compress(content, GZIP_LEVEL)
+        
+        self.send_response(304 if not_modified else status)
+        if not not_modified:
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', len(body))
+            if body is not content:
+                self.send_header('Content-Encoding', 'gzip')
+        if compressible:
+            self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('ETag', etag)
+        if last_modified is not None:
+            self.send_header('Last-Modified', formatdate(last_modified, usegmt=True))
+        self.send_header('Cache-Control', 'no-cache')
+        if cors:
+            self.send_cors_headers()
+        self.end_headers()
+        if not not_modified:
+            self.wfile.write(body)
     
     def _serve_json(self, data: Any, status: int = 200):
         """Serve a JSON response."""
         try:
             content = json.dumps(data, default=str, ensure_ascii=False)
-            content_bytes = content.encode('utf-8')
-            
-            self.send_response(status)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Content-Length', len(content_bytes))
-            self.send_header('Cache-Control', 'no-cache')
-            self.send_cors_headers()
-            self.end_headers()
-            self.wfile.write(content_bytes)
+            self._send_body(content.encode('utf-8'), 'application/json; charset=utf-8', status)
         except Exception as e:
             error_content = json.dumps({"error": str(e)})
             self.send_response(500)
@@ -1590,25 +6857,439 @@ class DashboardHandler(SimpleHTTPRequestHandler):
             self.wfile.write(error_content.encode('utf-8'))
 
 
-class ThreadedHTTPServer(HTTPServer):
-    """HTTP Server that passes orchestrator reference to handler."""
+class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
+    """
+    HTTP Server that passes orchestrator (or host) reference to handler.
+    
+    Each request gets its own thread, so state reads are served from the
+    published snapshot while a command is still waiting on the loop.
+    """
     
-    def __init__(self, *args, orchestrator=None, **kwargs):
+    daemon_threads = True
+    
+    def __init__(self, *args, orchestrator=None, host=None, **kwargs):
         self.orchestrator = orchestrator
+        self.host = host
         super().__init__(*args, **kwargs)
     
     def finish_request(self, request, client_address):
         """Create handler with orchestrator reference."""
         self.RequestHandlerClass(
             request, client_address, self,
-            orchestrator=self.orchestrator
+            orchestrator=self.orchestrator,
+            host=self.host
         )
 
 
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ SCHEDULER - Delayed and Cancellable Actions                                              ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+class Scheduler:
+    """
+    Heap-based timer queue run by a small pool of loop threads.
+    
+    Everything an orchestrator does is a job: API commands, the status poll
+    (which re-arms itself every status_check_interval), and the cascade,
+    retries, stall checks and completion stages. Nothing sleeps through a
+    delay, so a pending job can be cancelled at any moment.
+    
+    Jobs:
+    ─────
+    - schedule(delay, callback, name, tag, owner) → job id
+    - Tags group jobs so they can be cancelled together
+      (e.g. cancel_tag("cascade") when the workflow is paused)
+    - Due jobs run in due-time order (FIFO for equal times)
+    - A failing job is logged and does not stop the loop
+    
+    Owners:
+    ───────
+    Every job belongs to an owner (one per Orchestrator, see view()). Jobs
+    of the same owner never run concurrently, so each orchestrator still
+    sees a single loop, while in host mode many orchestrators share one
+    scheduler and a fixed number of worker threads. Time spent per owner
+    is tracked, and jobs over the owner's slow_job_seconds are logged. While
+    an owner has a profiler (set_profiler()), its jobs run under it.
+    """
+    
+    def __init__(self, logger: Optional[Logger] = None, workers: int = 1):
+        """
+        Initialize Scheduler.
+        
+        Args:
+            logger: Logger for jobs without an owner
+            workers: Number of loop threads (started by start())
+        """
+        self.logger = logger
+        self.workers = max(1, workers)
+        self._heap: List[Tuple[float, int]] = []
+        self._jobs: Dict[int, Dict] = {}
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopped = False
+        self._busy: set = set()                  # owners with a job running
+        self._owners: Dict[str, Dict] = {}       # owner → logger, limits, usage
+        self._local = threading.local()
+    
+    def view(self, owner: str, logger: Optional[Logger] = None, slow_job_seconds: float = 0) -> "ScheduleView":
+        """
+        Register an owner and get a scheduler facade bound to it.
+        
+        Args:
+            owner: Owner key (e.g. the project path)
+            logger: Logger for the owner's job failures and slow jobs
+            slow_job_seconds: Log jobs that run longer (0 = off)
+        
+        Returns:
+            ScheduleView for the owner
+        """
+        with self._cond:
+            self._owners[owner] = {
+                "logger": logger or self.logger,
+                "slow_job_seconds": slow_job_seconds,
+                "usage": {"jobs": 0, "busy_s": 0.0, "slow_jobs": 0, "longest_s": 0.0}
+            }
+        return ScheduleView(self, owner)
+    
+    def start(self):
+        """Start the loop threads (no-op for threads already running)."""
+        with self._cond:
+            self._stopped = False
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._run, name=f"orchestrator-loop-{len(self._threads) + 1}", daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+    
+    def stop(self):
+        """Stop the loop threads once their current jobs finish."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+    
+    def schedule(
+        self,
+        delay: float,
+        callback: Callable,
+        name: str,
+        tag: Optional[str] = None,
+        args: Tuple = (),
+        owner: Optional[str] = None
+    ) -> int:
+        """
+        Schedule a callback.
+        
+        Args:
+            delay: Seconds from now (0 = as soon as a loop thread is free)
+            callback: Function to call
+            name: Job name (logs and get_stats())
+            tag: Optional group used by cancel_tag()
+            args: Positional arguments for the callback
+            owner: Owner whose jobs this one is serialized with
+        
+        Returns:
+            Job id
+        """
+        due = time.monotonic() + max(0.0, delay)
+        with self._cond:
+            job_id = next(self._ids)
+            self._jobs[job_id] = {
+                "name": name,
+                "tag": tag,
+                "owner": owner,
+                "due": due,
+                "callback": callback,
+                "args": args
+            }
+            heapq.heappush(self._heap, (due, job_id))
+            self._cond.notify_all()
+        return job_id
+    
+    def set_slow_job_seconds(self, owner: str, seconds: float):
+        """Change an owner's slow job threshold (0 = off)."""
+        with self._cond:
+            if owner in self._owners:
+                self._owners[owner]["slow_job_seconds"] = seconds
+    
+    def set_profiler(self, owner: str, profiler: Optional[ProfileCapture]):
+        """Run an owner's jobs under a profile capture (None stops)."""
+        with self._cond:
+            if owner in self._owners:
+                self._owners[owner]["profiler"] = profiler
+    
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancel a pending job.
+        
+        Returns:
+            True if the job was still pending
+        """
+        with self._cond:
+            # The heap entry is skipped lazily once the job is gone
+            return self._jobs.pop(job_id, None) is not None
+    
+    def cancel_tag(self, *tags: Optional[str], owner: Optional[str] = None) -> List[str]:
+        """
+        Cancel an owner's pending jobs with one of the given tags.
+        
+        Returns:
+            Names of the cancelled jobs
+        """
+        with self._cond:
+            cancelled = [
+                job_id for job_id, job in self._jobs.items()
+                if job["owner"] == owner and job["tag"] in tags
+            ]
+            return [self._jobs.pop(job_id)["name"] for job_id in cancelled]
+    
+    def cancel_owner(self, owner: str) -> int:
+        """Cancel all of an owner's pending jobs and forget the owner."""
+        with self._cond:
+            cancelled = [job_id for job_id, job in self._jobs.items() if job["owner"] == owner]
+            for job_id in cancelled:
+                del self._jobs[job_id]
+            self._owners.pop(owner, None)
+            return len(cancelled)
+    
+    def pending_count(self, tag: str, owner: Optional[str] = None) -> int:
+        """Count an owner's pending jobs with this tag."""
+        with self._cond:
+            return sum(1 for job in self._jobs.values() if job["owner"] == owner and job["tag"] == tag)
+    
+    def current_owner(self) -> Optional[str]:
+        """Get the owner of the job running on this thread (None outside jobs)."""
+        return getattr(self._local, "owner", None)
+    
+    def wake(self):
+        """Wake the loop threads so they re-check for due jobs."""
+        with self._cond:
+            self._cond.notify_all()
+    
+    def _next_due(self) -> Optional[Dict]:
+        """
+        Pop the next due job whose owner is idle, or wait for one.
+        
+        Must be called with the lock held. Waits at most one second so
+        stop() is noticed regularly.
+        
+        Returns:
+            Job dictionary or None if nothing can run yet
+        """
+        now = time.monotonic()
+        deferred = []
+        job = None
+        next_due = None
+        
+        while self._heap:
+            due, job_id = self._heap[0]
+            if job_id not in self._jobs:
+                heapq.heappop(self._heap)
+                continue
+            if due > now:
+                next_due = due
+                break
+            heapq.heappop(self._heap)
+            if self._jobs[job_id]["owner"] in self._busy:
+                deferred.append((due, job_id))  # Runs when the owner's current job ends
+                continue
+            job = self._jobs.pop(job_id)
+            break
+        
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+        
+        if job is not None:
+            self._busy.add(job["owner"])
+            return job
+        
+        self._cond.wait(min(1.0, next_due - now) if next_due is not None else 1.0)
+        return None
+    
+    def _run(self):
+        """Loop thread: run due jobs until stop()."""
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                job = self._next_due()
+            if job is None:
+                continue
+            
+            owner = self._owners.get(job["owner"], {})
+            logger = owner.get("logger") or self.logger
+            self._local.owner = job["owner"]
+            started = time.perf_counter()
+            profiler = owner.get("profiler")
+            try:
+                if profiler is not None:
+                    profiler.call(job["callback"], *job["args"])
+                else:
+                    job["callback"](*job["args"])
+            except Exception as e:
+                if logger:
+                    logger.error(f"Scheduled job '{job['name']}' failed: {e}")
+                    logger.debug(traceback.format_exc())
+            finally:
+                self._local.owner = None
+                elapsed = time.perf_counter() - started
+                limit = owner.get("slow_job_seconds")
+                slow = bool(limit) and elapsed > limit
+                with self._cond:
+                    self._busy.discard(job["owner"])
+                    self._cond.notify_all()
+                    usage = owner.get("usage")
+                    if usage is not None:
+                        usage["jobs"] += 1
+                        usage["busy_s"] += elapsed
+                        usage["longest_s"] = max(usage["longest_s"], elapsed)
+                        usage["slow_jobs"] += slow
+            
+            if slow and logger:
+                logger.warn(f"Job '{job['name']}' took {elapsed:.1f}s (limit {limit}s)")
+    
+    def get_stats(self, owner: Optional[str] = None) -> List[Dict]:
+        """
+        Get an owner's pending jobs, soonest first.
+        
+        Returns:
+            [{"name": "cascade", "tag": "cascade", "due_in": 4.2}, ...]
+        """
+        now = time.monotonic()
+        with self._cond:
+            jobs = sorted(
+                (job for job in self._jobs.values() if job["owner"] == owner),
+                key=lambda job: job["due"]
+            )
+            return [
+                {"name": job["name"], "tag": job["tag"], "due_in": round(max(0.0, job["due"] - now), 2)}
+                for job in jobs
+            ]
+    
+    def get_usage(self, owner: str) -> Dict:
+        """
+        Get an owner's accumulated job statistics.
+        
+        Returns:
+            {"jobs": 120, "busy_s": 3.4, "slow_jobs": 0, "longest_s": 1.2}
+        """
+        with self._cond:
+            usage = dict(self._owners.get(owner, {}).get("usage", {}))
+        for key in ("busy_s", "longest_s"):
+            if key in usage:
+                usage[key] = round(usage[key], 3)
+        return usage
+
+
+class ScheduleView:
+    """Scheduler facade bound to one owner (see Scheduler.view())."""
+    
+    def __init__(self, scheduler: Scheduler, owner: str):
+        """
+        Initialize ScheduleView.
+        
+        Args:
+            scheduler: Shared scheduler
+            owner: Owner key used for every call
+        """
+        self.scheduler = scheduler
+        self.owner = owner
+    
+    def schedule(self, delay: float, callback: Callable, name: str,
+                 tag: Optional[str] = None, args: Tuple = ()) -> int:
+        """Schedule a job for this owner (see Scheduler.schedule())."""
+        return self.scheduler.schedule(delay, callback, name, tag, args, owner=self.owner)
+    
+    def cancel_tag(self, *tags: str) -> List[str]:
+        """Cancel this owner's pending jobs with one of the given tags."""
+        return self.scheduler.cancel_tag(*tags, owner=self.owner)
+    
+    def set_slow_job_seconds(self, seconds: float):
+        """Change this owner's slow job threshold."""
+        self.scheduler.set_slow_job_seconds(self.owner, seconds)
+    
+    def set_profiler(self, profiler: Optional[ProfileCapture]):
+        """Run this owner's jobs under a profile capture (None stops)."""
+        self.scheduler.set_profiler(self.owner, profiler)
+    
+    def cancel_all(self) -> int:
+        """Cancel every pending job of this owner."""
+        return self.scheduler.cancel_owner(self.owner)
+    
+    def pending_count(self, tag: str) -> int:
+        """Count this owner's pending jobs with a tag."""
+        return self.scheduler.pending_count(tag, owner=self.owner)
+    
+    def in_job(self) -> bool:
+        """True when called from one of this owner's jobs."""
+        return self.scheduler.current_owner() == self.owner
+    
+    def start(self):
+        """Make sure the shared loop threads are running."""
+        self.scheduler.start()
+    
+    def wake(self):
+        """Wake the shared loop threads."""
+        self.scheduler.wake()
+    
+    def get_stats(self) -> List[Dict]:
+        """Get this owner's pending jobs."""
+        return self.scheduler.get_stats(owner=self.owner)
+    
+    def get_usage(self) -> Dict:
+        """Get this owner's job statistics."""
+        return self.scheduler.get_usage(self.owner)
+
+
 # ╔══════════════════════════════════════════════════════════════════════════════════════════╗
 # ║ MAIN ORCHESTRATOR - Core Engine                                                          ║
 # ╚══════════════════════════════════════════════════════════════════════════════════════════╝
 
+class StartupProfile:
+    """
+    Wall time of each startup step (--profile-startup).
+    
+    mark() closes the step that started at the previous mark. Work moved
+    out of startup (session parsing, lazy components) is recorded with
+    deferred(), so the report shows what startup no longer pays for.
+    """
+    
+    def __init__(self):
+        """Initialize StartupProfile, starting the clock."""
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.steps: List[Tuple[str, float]] = []
+        self.deferred_steps: List[Tuple[str, float]] = []
+    
+    def mark(self, step: str):
+        """Record the time since the previous mark as one step."""
+        now = time.perf_counter()
+        self.steps.append((step, now - self._last))
+        self._last = now
+    
+    def deferred(self, step: str, seconds: float):
+        """Record work that ran on first use instead of at startup."""
+        self.deferred_steps.append((step, seconds))
+    
+    def report(self) -> Dict:
+        """
+        Get the profile in milliseconds.
+        
+        Returns:
+            {"total_ms": 4.1, "steps": [{"step": "config", "ms": 0.6}, ...],
+             "deferred": [{"step": "session", "ms": 12.3}]}
+        """
+        return {
+            "total_ms": round((self._last - self.started) * 1000, 2),
+            "steps": [{"step": step, "ms": round(seconds * 1000, 2)} for step, seconds in self.steps],
+            "deferred": [
+                {"step": step, "ms": round(seconds * 1000, 2)} for step, seconds in self.deferred_steps
+            ]
+        }
+
+
 class Orchestrator:
     """
     Main orchestrator engine that coordinates the entire workflow.
@@ -1645,41 +7326,75 @@ class Orchestrator:
     └─────────────────────────────────────────────────────────────────────────────┘
     """
     
-    def __init__(self, project_path: str, config_overrides: Dict = None):
+    def __init__(
+        self,
+        project_path: str,
+        config_overrides: Dict = None,
+        scheduler: Optional[Scheduler] = None,
+        limits: Optional[Dict] = None
+    ):
         """
         Initialize the orchestrator.
         
         Args:
             project_path: Path to the project directory
             config_overrides: Optional config values to override defaults
+            scheduler: Shared scheduler (host mode); a private one by default
+            limits: Caps applied over the project's own config (host mode),
+                e.g. {"max_log_entries": 200}
         """
+        self.startup = StartupProfile()
+        
         # Resolve project path to absolute
         self.project_path = Path(project_path).resolve()
         self.workflow_dir = self.project_path / ".ai-workflow"
         
         # Initialize directories
         self._init_directories()
+        self.startup.mark("directories")
         
         # Initialize logger first (needed by other components)
         self.logger = Logger(self.workflow_dir / "logs")
         self.logger.info(f"AI Workflow Orchestrator v{VERSION} ({CODENAME})")
         self.logger.info(f"Project: {self.project_path}")
+        self.startup.mark("logger")
         
         # Load configuration
-        self.config = self._load_config(config_overrides)
+        self.config = self._load_config(config_overrides, limits)
+        self.logger.set_buffer_size(self.config.get("max_log_entries", 1000))
+        self.startup.mark("config")
+        
+        # Metrics (no-op when disabled)
+        self.metrics = Metrics(enabled=self.config.get("metrics", True))
+        self.metrics.add_collector(self._collect_metrics)
+        self.logger.add_listener(
+            lambda entry: self.metrics.inc("orchestrator_log_entries_total", level=entry["level"])
+        )
         
-        # Initialize components
-        self.git = GitManager(self.project_path, self.logger)
-        self.test_runner = TestRunner(
+        # Handoff spans per phase (/api/trace/<phase>)
+        self.tracer = Tracer(enabled=self.config.get("tracing", True))
+        
+        # Initialize components (test_runner and image_pipeline are built on first use)
+        self.git = GitManager(self.project_path, self.logger, self.config, self.metrics, self.tracer)
+        self.worktrees = WorktreeManager(self.git, self.logger, self.config)
+        self.claude = ClaudeCodeManager(
             self.project_path, self.workflow_dir, self.logger, self.config
         )
-        self.claude = ClaudeCodeManager(
-            self.project_path, self.workflow_dir, self.logger
+        self.budget = PerformanceBudget(self.logger, self.config)
+        self.progress = ProgressTracker(self.workflow_dir, self.logger)
+        self.owns_scheduler = scheduler is None
+        self.scheduler = (scheduler or Scheduler(self.logger)).view(
+            str(self.project_path), self.logger, self.config.get("slow_job_seconds", 0)
         )
+        self.diagnostics = Diagnostics(self.config, self.logger, self.scheduler)
+        self.config.subscribe(self._on_config_change)
+        self.scheduler.schedule(CONFIG_WATCH_INTERVAL, self._watch_config, "config-watch", "config")
+        self.startup.mark("components")
         
-        # Load or create session
-        self.session: Optional[Session] = None
-        self._load_session()
+        # Session dataclasses are built on first access (see the session property)
+        self._session: Optional[Session] = None
+        self._session_loaded = False
+        self._session_lock = threading.RLock()
         
         # Server instance
         self.http_server: Optional[ThreadedHTTPServer] = None
@@ -1687,7 +7402,46 @@ class Orchestrator:
         # Monitoring state
         self.status_hash = ""
         self.running = False
-        self.monitor_thread: Optional[threading.Thread] = None
+        self._completion_started: Optional[float] = None  # perf_counter when completion was seen
+        
+        # Read-only views for API threads (replaced, never mutated)
+        self._session_snapshot: Dict = {}
+        self._render_cost_snapshot: Dict = {}
+        self._config_snapshot: Dict = self.config.public()
+        self._snapshot: Dict = {}
+        self._load_snapshot()
+        self.startup.mark("snapshot")
+    
+    @cached_property
+    def test_runner(self) -> TestRunner:
+        """Test runner, built when the first phase is tested."""
+        return TestRunner(
+            self.project_path, self.workflow_dir, self.logger, self.config, self.metrics, self.tracer
+        )
+    
+    @cached_property
+    def image_pipeline(self) -> ImageVariantPipeline:
+        """Image variant pipeline, built when variants are first generated."""
+        return ImageVariantPipeline(self.project_path, self.workflow_dir, self.logger, self.config)
+    
+    @property
+    def session(self) -> Optional[Session]:
+        """
+        The live session, parsed from session.json on first access.
+        
+        Startup only publishes the saved JSON for the API (_load_snapshot());
+        the dataclasses are built when the loop first needs them.
+        """
+        if not self._session_loaded:
+            with self._session_lock:
+                if not self._session_loaded:
+                    self._load_session()
+        return self._session
+    
+    @session.setter
+    def session(self, session: Optional[Session]):
+        self._session = session
+        self._session_loaded = True
     
     def _init_directories(self):
         """Create necessary directories."""
@@ -1701,15 +7455,16 @@ class Orchestrator:
         for d in dirs:
             d.mkdir(parents=True, exist_ok=True)
     
-    def _load_config(self, overrides: Dict = None) -> Dict:
+    def _load_config(self, overrides: Dict = None, caps: Optional[Dict] = None) -> LayeredConfig:
         """
-        Load configuration from file or create defaults.
+        Load configuration: defaults, config.json, environment, overrides.
         
         Args:
-            overrides: Optional values to override defaults
+            overrides: Optional values to override defaults (command line)
+            caps: Optional upper limits (host mode)
             
         Returns:
-            Configuration dictionary
+            Merged configuration (see LayeredConfig)
         """
         default_config = {
             # Server ports
@@ -1719,9 +7474,21 @@ class Orchestrator:
             # Automation settings
             "auto_cascade": True,              # Automatically start next phase
             "auto_cascade_delay": AUTO_CASCADE_DELAY,  # Delay between phases
+            "status_check_interval": STATUS_CHECK_INTERVAL,  # Seconds between status polls
+            "command_timeout": COMMAND_TIMEOUT,  # Seconds an API call waits for its command
+            "max_queued_commands": MAX_QUEUED_COMMANDS,  # Further API calls are rejected
+            "slow_job_seconds": 0,              # Log loop jobs that run longer (0 = off)
             "auto_trigger_claude": True,       # Auto-write command file
             "auto_commit": True,               # Auto-commit after phase
             "auto_push": True,                 # Auto-push after commit
+            "git_backend": "plumbing",         # plumbing (index only) | porcelain (git add/commit)
+            "async_push": True,                # Push from a background queue
+            "push_coalesce_window": PUSH_COALESCE_WINDOW,
+            "push_backoff_base": PUSH_BACKOFF_BASE,
+            "push_backoff_max": PUSH_BACKOFF_MAX,
+            "push_max_attempts": PUSH_MAX_ATTEMPTS,
+            "phase_worktrees": False,          # Run each phase in its own git worktree
+            "worktree_branch_prefix": WORKTREE_BRANCH_PREFIX,
             
             # Notifications
             "sound_notifications": True,        # Play sounds on events
@@ -1729,38 +7496,89 @@ class Orchestrator:
             # Error handling
             "max_retries": MAX_RETRIES,         # Max retry attempts
             "retry_delay": RETRY_DELAY,         # Delay before retry
+            "stall_timeout": STALL_TIMEOUT,     # Retry a v2 agent silent this long (0 = off)
             
             # Testing
             "run_tests": True,                  # Run tests after phases
+            "css_unused_ignore": ["w--"],       # Class prefixes added at runtime by JS
+            "js_blocking_allowlist": [],        # Script srcs allowed to block in <head>
+            "render_cost_limits": {},           # e.g. {"dom_nodes": 1500, "max_depth": 32}
+            "render_cost_focus": ["index.html", "recovery-questionnaire.html"],
+            
+            # Performance budget (per-page limits; omit a key to disable it)
+            "performance_budget": {},           # page_bytes, requests, image_bytes, css_bytes, js_bytes, blocking_scripts, broken_links
+            "budget_regression_threshold": BUDGET_REGRESSION_THRESHOLD,
+            "budget_min_delta_bytes": BUDGET_MIN_DELTA_BYTES,
+            "budget_action": "pause",           # On failure: pause | retry | warn
+            
+            # Responsive image variants
+            "image_variants": False,            # Generate variants after phases
+            "image_variant_widths": IMAGE_VARIANT_WIDTHS,
+            "image_variant_format": "webp",     # Output format ("source" keeps the original)
+            "image_variant_quality": IMAGE_VARIANT_QUALITY,
+            "image_variant_workers": 0,         # Process pool size (0 = CPU count)
             
             # Phase splitting
             "max_tasks_per_phase": MAX_TASKS_PER_PHASE,
             "target_tokens_per_phase": TARGET_TOKENS_PER_PHASE,
+            "compact_commands": True,           # Share repeated task context, short footer
+            "context_snippets": True,           # Embed code referenced by each task
+            "context_snippet_tokens": CONTEXT_SNIPPET_TOKENS,
+            "context_snippet_radius": 3,        # Lines shown around an HTML/JS hit
+            "context_snippet_max_hits": 3,      # Locations shown per selector
             
             # Logging
             "log_level": "INFO",
-            "max_log_entries": 1000
+            "max_log_entries": 1000,
+            
+            # Observability
+            "metrics": True,                    # Record metrics and serve /metrics
+            "tracing": True,                    # Record handoff spans per phase (/api/trace/<phase>)
+            "debug_endpoints": False,           # Serve /api/debug/* (threads, profile, memory)
+            "debug_token": ""                   # Required by /api/debug/* (X-Debug-Token header)
         }
         
-        # Load from file if exists
-        config_file = self.workflow_dir / CONFIG_FILE
-        if config_file.exists():
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    saved_config = json.load(f)
-                    default_config.update(saved_config)
-            except Exception:
-                pass
-        
-        # Apply command-line overrides
-        if overrides:
-            default_config.update(overrides)
+        return LayeredConfig(
+            default_config, self.workflow_dir / CONFIG_FILE, self.logger, overrides, caps
+        )
+    
+    def _watch_config(self):
+        """Reload config.json if it was edited, then check again later."""
+        self.config.reload()
+        self.scheduler.schedule(CONFIG_WATCH_INTERVAL, self._watch_config, "config-watch", "config")
+    
+    def _on_config_change(self, changes: Dict[str, Tuple[Any, Any]], source: str):
+        """
+        Apply changed settings that components cached.
         
-        # Save config
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(default_config, f, indent=2)
+        Everything else is read at use time and needs nothing here. Pending
+        jobs keep the delay they were scheduled with (a changed
+        auto_cascade_delay applies to the next cascade).
         
-        return default_config
+        Args:
+            changes: {key: (old, new)}
+            source: Layer that changed
+        """
+        if "max_log_entries" in changes:
+            self.logger.set_buffer_size(self.config["max_log_entries"])
+        if "slow_job_seconds" in changes:
+            self.scheduler.set_slow_job_seconds(self.config["slow_job_seconds"])
+        if "metrics" in changes:
+            self.metrics.enabled = self.config["metrics"]
+        if "tracing" in changes:
+            self.tracer.enabled = self.config["tracing"]
+        
+        # Re-arm the stall check of the running phase with the new timeout
+        if "stall_timeout" in changes:
+            self.scheduler.cancel_tag("stall")
+            if self.session.state == WorkflowState.WAITING_FOR_CLAUDE and self.progress.phase_id:
+                phase = next((p for p in self.session.phases if p.id == self.progress.phase_id), None)
+                if phase and self.config["stall_timeout"]:
+                    self._schedule_stall_check(phase, 0)
+        
+        # API threads read a copy; the live dict is changed in place
+        self._config_snapshot = self.config.public()
+        self._publish_snapshot()
     
     def _load_session(self):
         """Load existing session or create new one."""
@@ -1772,7 +7590,7 @@ class Orchestrator:
                     data = json.load(f)
                 
                 # Reconstruct session from saved data
-                self.session = Session(
+                session = Session(
                     id=data["id"],
                     created_at=data["created_at"],
                     project_path=data["project_path"],
@@ -1800,11 +7618,15 @@ class Orchestrator:
                         error=phase_data.get("error"),
                         test_results=phase_data.get("test_results"),
                         files_modified=phase_data.get("files_modified", []),
-                        retry_count=phase_data.get("retry_count", 0)
+                        diffstat=phase_data.get("diffstat"),
+                        baseline=phase_data.get("baseline"),
+                        retry_count=phase_data.get("retry_count", 0),
+                        trace=phase_data.get("trace", [])
                     )
-                    self.session.phases.append(phase)
+                    session.phases.append(phase)
                 
-                self.logger.info(f"Loaded session: {self.session.id}")
+                self.session = session
+                self.logger.info(f"Loaded session: {session.id}")
                 return
                 
             except Exception as e:
@@ -1824,13 +7646,82 @@ class Orchestrator:
         if not self.session:
             return
         
-        session_file = self.workflow_dir / SESSION_FILE
+        session_file = self.workflow_dir / SESSION_FILE
+        with self.metrics.time("orchestrator_session_save_seconds"), self.tracer.span("session save", "session"):
+            content = json.dumps(self.session.to_dict(), indent=2)
+            
+            try:
+                with open(session_file, 'w', encoding='utf-8') as f:
+                    f.write(content)
+            except Exception as e:
+                self.logger.error(f"Failed to save session: {e}")
+        self.metrics.set("orchestrator_session_bytes", len(content))
+        
+        self._capture_session(content)
+    
+    def _load_snapshot(self):
+        """
+        Publish the saved session without building the live one.
+        
+        API threads only need its JSON; the Session dataclasses wait until
+        the loop first touches self.session.
+        """
+        try:
+            content = (self.workflow_dir / SESSION_FILE).read_text(encoding='utf-8')
+            self._capture_session(content)
+            return
+        except (OSError, ValueError):
+            pass
+        
+        # New or unreadable session: create it now (saving publishes it)
+        with self._session_lock:
+            self._load_session()
+    
+    def _capture_session(self, content: str):
+        """
+        Publish a snapshot of the session just saved.
+        
+        The snapshot is parsed from the serialized session, so it shares no
+        objects with the live Session and API threads can read it without
+        a lock while the loop keeps mutating.
         
-        try:
-            with open(session_file, 'w', encoding='utf-8') as f:
-                json.dump(self.session.to_dict(), f, indent=2)
-        except Exception as e:
-            self.logger.error(f"Failed to save session: {e}")
+        Args:
+            content: Session JSON
+        """
+        self._session_snapshot = json.loads(content)
+        self._render_cost_snapshot = self._render_cost_summary()
+        self._publish_snapshot()
+    
+    def _publish_snapshot(self):
+        """Publish the read-only state served by get_state()."""
+        self._snapshot = {
+            "session": self._session_snapshot,
+            "render_cost": self._render_cost_snapshot,
+            "config": self._config_snapshot,
+            "progress": self.progress.snapshot(self.config.get("stall_timeout", STALL_TIMEOUT)),
+            "command": self.claude.last_report
+        }
+    
+    def _collect_metrics(self) -> List[Tuple[str, Dict, float]]:
+        """Gauges computed when /metrics is scraped (from the published snapshot)."""
+        session = self._snapshot.get("session") or {}
+        phases = session.get("phases", [])
+        samples = [
+            ("orchestrator_info", {"version": VERSION}, 1),
+            ("orchestrator_tasks", {"state": "total"}, session.get("total_tasks", 0)),
+            ("orchestrator_tasks", {"state": "completed"}, session.get("completed_tasks", 0)),
+            ("orchestrator_queued_commands", {}, self.scheduler.pending_count("command")),
+            ("orchestrator_push_queue_depth", {}, self.git.push_queue.get_stats()["depth"])
+        ]
+        for state in PhaseState:
+            count = sum(1 for phase in phases if phase.get("state") == state.value)
+            samples.append(("orchestrator_phases", {"state": state.value}, count))
+        
+        jobs: Dict[str, int] = {}
+        for job in self.scheduler.get_stats():
+            jobs[job["tag"] or "none"] = jobs.get(job["tag"] or "none", 0) + 1
+        samples.extend(("orchestrator_scheduled_jobs", {"tag": tag}, count) for tag, count in jobs.items())
+        return samples
     
     def _generate_session_id(self) -> str:
         """Generate a unique session ID."""
@@ -1846,21 +7737,109 @@ class Orchestrator:
         """
         Get current workflow state for API.
         
+        Safe to call from any thread: session and config data come from the
+        snapshot published by the loop, so reads never wait for a running
+        command or see a half-applied config change.
+        
         Returns:
             State dictionary with session and config
         """
-        if not self.session:
+        snapshot = self._snapshot
+        if not snapshot.get("session"):
             return {"error": "No session"}
         
         return {
             "version": VERSION,
-            "session": self.session.to_dict(),
-            "config": self.config
+            "session": snapshot["session"],
+            "config": snapshot["config"],
+            "git": {
+                "timings": self.git.get_timing_stats(),
+                "push_queue": self.git.push_queue.get_stats(),
+                "worktrees": self.worktrees.get_stats()
+            },
+            # Housekeeping jobs are left out; their countdown would change every response's ETag
+            "scheduled": [job for job in self.scheduler.get_stats() if job["tag"] not in ("poll", "command", "config")],
+            "render_cost": snapshot["render_cost"],
+            "progress": snapshot["progress"],
+            "command": snapshot["command"]
+        }
+    
+    def _render_cost_summary(self) -> Dict:
+        """
+        Compare render cost metrics between the two most recent measured phases.
+        
+        Reads the published session snapshot, not the live session.
+        
+        Returns:
+            {"phase": "C", "baseline_phase": "B",
+             "pages": {page: {"dom_nodes": 1520, ..., "delta": {"dom_nodes": 40}}}}
+        """
+        measured = []
+        for phase in self._session_snapshot.get("phases", []):
+            for test in (phase.get("test_results") or {}).get("tests", []):
+                if test.get("name") == "Render Cost" and test.get("metrics"):
+                    measured.append((phase["id"], test["metrics"]["pages"]))
+        
+        if not measured:
+            return {}
+        
+        phase_id, latest = measured[-1]
+        baseline_id, baseline = measured[-2] if len(measured) > 1 else (None, {})
+        
+        pages = {}
+        for page, metrics in latest.items():
+            summary = {k: v for k, v in metrics.items() if k != "critical_chain"}
+            before = baseline.get(page)
+            if before:
+                summary["delta"] = {
+                    k: v - before[k] for k, v in summary.items()
+                    if k in before and isinstance(v, (int, float)) and v != before[k]
+                }
+            pages[page] = summary
+        
+        return {"phase": phase_id, "baseline_phase": baseline_id, "pages": pages}
+    
+    def get_config(self) -> Dict:
+        """Get the settings for the API (the published copy, secrets masked)."""
+        return self._config_snapshot
+    
+    def update_config(self, values: Dict) -> Dict:
+        """
+        Change settings at runtime (POST /api/config).
+        
+        Runtime values override every other layer until the orchestrator
+        restarts. A null value drops the runtime override for that key.
+        
+        Args:
+            values: {"auto_cascade_delay": 2, "max_tasks_per_phase": null}
+            
+        Returns:
+            {"success": True, "changed": {...}, "errors": [...], "pending_restart": {...}}
+        """
+        if not isinstance(values, dict) or not values:
+            return {"success": False, "error": "Expected a JSON object of settings"}
+        
+        changes, errors = self.config.set_runtime(values)
+        return {
+            "success": not errors,
+            "changed": self.config.public({key: new for key, (old, new) in changes.items()}),
+            "errors": errors,
+            "pending_restart": dict(self.config.pending_restart)
         }
     
-    def get_logs(self, count: int = 100) -> List[Dict]:
-        """Get recent log entries."""
-        return self.logger.get_recent(count)
+    def get_logs(self, **filters) -> Dict:
+        """
+        Query the log store (GET /api/logs).
+        
+        Runs on the calling API thread without the loop or the logger lock.
+        
+        Args:
+            **filters: LogStore.query() arguments
+            
+        Returns:
+            Page of entries with the cursor for the next one
+        """
+        return self.logger.store.query(**filters)
     
     def analyze_plan(self) -> Dict:
         """
@@ -1923,8 +7902,9 @@ class Orchestrator:
             self.session.state = WorkflowState.READY
             self._save_session()
             
-            # Write individual phase files (for reference)
-            self._write_phase_files(phases)
+            # Drop stale phase files; the rest are rendered on demand
+            files = self.claude.sync_phase_files(phases)
+            self.logger.debug(f"Phase files: {files['kept']} unchanged, {files['removed']} removed")
             
             # Initialize status file
             StatusProtocol.create_initial_status(self.workflow_dir)
@@ -1949,20 +7929,37 @@ class Orchestrator:
                 "error": str(e)
             }
     
-    def _write_phase_files(self, phases: List[Phase]):
-        """Write individual phase files to phases directory."""
-        phases_dir = self.workflow_dir / "phases"
+    def get_phase_command(self, phase_id: str) -> Optional[str]:
+        """
+        Get the (cached) phase file for a phase.
+        
+        Args:
+            phase_id: Phase identifier
+            
+        Returns:
+            Markdown content, or None if the phase does not exist
+        """
+        for phase in self.session.phases:
+            if phase.id == phase_id:
+                return self.claude.render_phase(phase)
+        return None
+    
+    def get_phase_trace(self, phase_id: str) -> Optional[Dict]:
+        """
+        Export a phase's handoff spans as Chrome trace-event JSON.
         
-        # Clear existing phase files
-        for f in phases_dir.glob("phase-*.md"):
-            f.unlink()
+        Reads the published session snapshot, so it never waits for the loop.
         
-        # Write new phase files
-        for phase in phases:
-            phase_file = phases_dir / f"phase-{phase.id}.md"
-            content = self.claude._build_command_content(phase)
-            with open(phase_file, 'w', encoding='utf-8') as f:
-                f.write(content)
+        Args:
+            phase_id: Phase identifier
+            
+        Returns:
+            Trace (see chrome_trace()), or None if the phase does not exist
+        """
+        for phase in (self._snapshot.get("session") or {}).get("phases", []):
+            if phase["id"] == phase_id:
+                return chrome_trace(phase)
+        return None
     
     def start_workflow(self) -> Dict:
         """
@@ -1977,6 +7974,13 @@ class Orchestrator:
                 "error": "No phases to execute. Run analyze first."
             }
         
+        active = (WorkflowState.RUNNING, WorkflowState.WAITING_FOR_CLAUDE, WorkflowState.TESTING)
+        if self.running and self.session.state in active:
+            return {
+                "success": False,
+                "error": "Workflow is already running"
+            }
+        
         self.logger.info("Starting workflow...")
         self.session.state = WorkflowState.RUNNING
         self.session.started_at = datetime.now().isoformat()
@@ -2020,6 +8024,7 @@ class Orchestrator:
         Returns:
             Result dictionary
         """
+        self.logger.phase = phase.id
         self.logger.info(f"Starting Phase {phase.id}: {phase.task_count} tasks")
         
         # Update phase state
@@ -2030,8 +8035,37 @@ class Orchestrator:
         self.session.state = WorkflowState.WAITING_FOR_CLAUDE
         self._save_session()
         
+        # Check out an isolated worktree for the phase (reused on retry)
+        working_dir = None
+        if self.config.get("phase_worktrees"):
+            working_dir = self.worktrees.acquire(phase.id)
+            if working_dir is None:
+                phase.state = PhaseState.ERROR
+                phase.error = "Failed to create phase worktree"
+                self._save_session()
+                return {
+                    "success": False,
+                    "error": phase.error
+                }
+        
+        # Baseline for attributing changes to this phase (worktrees are already
+        # isolated); retries keep the first baseline so earlier attempts count.
+        # Taken before the agent is signalled so none of its edits predate it.
+        if not self.config.get("phase_worktrees") and (phase.baseline is None or phase.retry_count == 0):
+            phase.baseline = self.git.baseline_snapshot(exclude=(self._workflow_prefix(),))
+            self._save_session()
+        
+        # Follow v2 progress events from here on (before the agent can send any)
+        self.progress.start(phase)
+        self.scheduler.cancel_tag("stall")
+        stall_timeout = self.config.get("stall_timeout", STALL_TIMEOUT)
+        if stall_timeout:
+            self._schedule_stall_check(phase, stall_timeout)
+        
         # Write command file for Claude Code
-        if not self.claude.write_command_file(phase):
+        with self.tracer.span("command write", "command", next_phase=phase.id):
+            written = self.claude.write_command_file(phase, working_dir)
+        if not written:
             phase.state = PhaseState.ERROR
             phase.error = "Failed to write command file"
             self._save_session()
@@ -2040,17 +8074,15 @@ class Orchestrator:
                 "error": phase.error
             }
         
-        # Update status file (signals to dashboard and Claude Code)
-        StatusProtocol.update_status(self.workflow_dir, {
+        # Update status file (signals to dashboard and Claude Code) and keep
+        # the hash of what we wrote - re-reading could already see the agent's reply
+        self.status_hash = StatusProtocol.update_status(self.workflow_dir, {
             "state": "running",
             "current_phase": phase.id,
             "files_modified": [],
             "errors": []
         })
         
-        # Store current hash for change detection
-        self.status_hash = StatusProtocol.get_file_hash(self.workflow_dir)
-        
         # Play sound
         if self.config.get("sound_notifications"):
             SoundManager.play("start")
@@ -2064,6 +8096,9 @@ class Orchestrator:
         """Start a specific phase by ID."""
         for i, phase in enumerate(self.session.phases):
             if phase.id == phase_id:
+                # A completion still in flight would cascade into a second phase
+                self.scheduler.cancel_tag("completion", "cascade", "retry")
+                self._end_handoff()
                 self.session.current_phase_index = i
                 self._start_monitoring()
                 return self._start_phase(phase)
@@ -2079,10 +8114,23 @@ class Orchestrator:
         self.session.state = WorkflowState.PAUSED
         self._save_session()
         
+        # Pending cascade or retry is dropped now rather than after its delay
+        cancelled = self.scheduler.cancel_tag("cascade", "retry")
+        if cancelled:
+            self.logger.info(f"Cancelled pending {', '.join(cancelled)}")
+        if "cascade" in cancelled:
+            self._end_handoff()
+        
         return {"success": True}
     
     def resume_workflow(self) -> Dict:
         """Resume a paused workflow."""
+        if self.session.state != WorkflowState.PAUSED:
+            return {
+                "success": False,
+                "error": "Workflow is not paused"
+            }
+        
         self.logger.info("Resuming workflow...")
         self.session.state = WorkflowState.RUNNING
         self._save_session()
@@ -2095,6 +8143,10 @@ class Orchestrator:
         """Reset the workflow and archive current session."""
         self.logger.info("Resetting workflow...")
         
+        # Drop everything still scheduled for the old session
+        self.scheduler.cancel_tag("completion", "cascade", "retry", "stall")
+        self._end_handoff()
+        
         # Archive current session if it has data
         if self.session and self.session.phases:
             self._archive_session()
@@ -2107,13 +8159,17 @@ class Orchestrator:
             planning_file=""
         )
         self._save_session()
+        self.logger.phase = None
         
         # Reset status file
         StatusProtocol.create_initial_status(self.workflow_dir)
+        self.progress.stop()
+        
+        # Remove phase worktrees and branches
+        self.worktrees.cleanup()
         
         # Clear phase files
-        for f in (self.workflow_dir / "phases").glob("phase-*.md"):
-            f.unlink()
+        self.claude.clear_phase_files()
         
         # Clear command file
         command_file = self.workflow_dir / CURRENT_COMMAND_FILE
@@ -2126,6 +8182,9 @@ class Orchestrator:
         """Skip a phase."""
         for phase in self.session.phases:
             if phase.id == phase_id:
+                # A pending completion, cascade or retry would start a second phase
+                self.scheduler.cancel_tag("completion", "cascade", "retry")
+                self._end_handoff()
                 phase.state = PhaseState.SKIPPED
                 self.logger.info(f"Skipped Phase {phase_id}")
                 self._save_session()
@@ -2151,6 +8210,9 @@ class Orchestrator:
                         "error": f"Maximum retries ({MAX_RETRIES}) exceeded"
                     }
                 
+                # Manual retries replace a pending automatic one (and any cascade)
+                self.scheduler.cancel_tag("completion", "cascade", "retry")
+                self._end_handoff()
                 phase.state = PhaseState.PENDING
                 phase.error = None
                 phase.retry_count += 1
@@ -2176,49 +8238,158 @@ class Orchestrator:
         try:
             with open(archive_file, 'w', encoding='utf-8') as f:
                 json.dump(self.session.to_dict(), f, indent=2)
+            
+            # The event log starts over with the next session
+            events_file = self.workflow_dir / STATUS_EVENTS_FILE
+            if events_file.exists():
+                events_file.replace(history_dir / f"{self.session.id}-events.jsonl")
             self.logger.info(f"Archived session: {self.session.id}")
         except Exception as e:
             self.logger.error(f"Failed to archive session: {e}")
     
     # ════════════════════════════════════════════════════════════════════════════════════════
-    # Status Monitoring - Background thread that watches status.json
+    # Command Queue - Every state change runs on the orchestrator loop
+    # ════════════════════════════════════════════════════════════════════════════════════════
+    
+    def submit(self, method: Callable, *args) -> Future:
+        """
+        Queue a command for the orchestrator loop.
+        
+        Commands run one at a time, in order, as jobs of this orchestrator -
+        the only code that mutates the session - so concurrent API calls
+        cannot interleave (e.g. two clicks starting the same phase twice).
+        Beyond max_queued_commands waiting commands, new ones are rejected.
+        
+        Args:
+            method: Orchestrator method to run
+            *args: Arguments for the method
+        
+        Returns:
+            Future resolving to the method's result
+        """
+        future: Future = Future()
+        
+        limit = self.config.get("max_queued_commands", MAX_QUEUED_COMMANDS)
+        if limit and self.scheduler.pending_count("command") >= limit:
+            future.set_result({
+                "success": False,
+                "error": f"Too many queued commands ({limit}); try again shortly"
+            })
+            return future
+        
+        def command():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(method(*args))
+            except Exception as e:
+                future.set_exception(e)
+        
+        self.scheduler.start()
+        self.scheduler.schedule(0, command, method.__name__, "command")
+        return future
+    
+    def call(self, method: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """
+        Run a command on the orchestrator loop and wait for its result.
+        
+        Args:
+            method: Orchestrator method to run
+            *args: Arguments for the method
+            timeout: Seconds to wait (default: command_timeout)
+        
+        Returns:
+            The method's result, or an error dictionary if it raised or
+            did not finish in time (the command then stays queued)
+        """
+        if self.scheduler.in_job():
+            return method(*args)
+        
+        future = self.submit(method, *args)
+        try:
+            return future.result(self.config.get("command_timeout", COMMAND_TIMEOUT) if timeout is None else timeout)
+        except FutureTimeoutError:
+            self.logger.warn(f"Command {method.__name__} still queued behind a running job")
+            return {
+                "success": False,
+                "queued": True,
+                "error": f"Orchestrator busy; {method.__name__} will run when the current job finishes"
+            }
+        except Exception as e:
+            self.logger.error(f"Command {method.__name__} failed: {e}")
+            self.logger.debug(traceback.format_exc())
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    # ════════════════════════════════════════════════════════════════════════════════════════
+    # Status Monitoring - Poll job on the orchestrator loop that watches status.json
     # ════════════════════════════════════════════════════════════════════════════════════════
     
     def _start_monitoring(self):
-        """Start the status monitoring thread."""
-        if self.monitor_thread and self.monitor_thread.is_alive():
+        """
+        Start polling status.json.
+        
+        This is how the orchestrator detects when Claude Code has
+        completed a phase - by watching for changes to status.json.
+        The poll is a self-rescheduling job, so delayed actions (cascade,
+        retry, stall checks) and API commands run between polls.
+        """
+        self.scheduler.start()
+        if self.running:
             return
         
         self.running = True
-        self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self.monitor_thread.start()
+        self.scheduler.schedule(0, self._poll_status, "poll", "poll")
         self.logger.debug("Status monitoring started")
     
     def _stop_monitoring(self):
-        """Stop the status monitoring thread."""
+        """Stop polling status.json."""
         self.running = False
+        self.scheduler.cancel_tag("poll")
     
-    def _monitor_loop(self):
-        """
-        Background loop that monitors status.json for changes.
+    def _poll_status(self):
+        """Check the status once and schedule the next poll."""
+        if not self.running:
+            return
         
-        This is how the orchestrator detects when Claude Code has
-        completed a phase - by watching for changes to status.json.
-        """
-        while self.running:
-            try:
+        interval = self.config.get("status_check_interval", STATUS_CHECK_INTERVAL)
+        try:
+            with self.metrics.time("orchestrator_status_check_seconds"):
                 self._check_status()
-                time.sleep(STATUS_CHECK_INTERVAL)
-            except Exception as e:
-                self.logger.error(f"Monitor error: {e}")
-                time.sleep(5)
+        except Exception as e:
+            self.logger.error(f"Monitor error: {e}")
+            interval = 5
+        
+        # Progress changes with every poll, not only on saves
+        self._publish_snapshot()
+        self.scheduler.schedule(interval, self._poll_status, "poll", "poll")
     
     def _check_status(self):
-        """Check status.json for changes indicating completion."""
+        """Check v2 events and status.json for progress, completion or an error."""
         # Only check when waiting for Claude
         if self.session.state != WorkflowState.WAITING_FOR_CLAUDE:
             return
         
+        # Protocol v2 events (completion and errors mirror status.json)
+        for event in self.progress.poll():
+            if event["type"] == "phase_completed":
+                self.progress.stop()
+                try:
+                    written_at = datetime.fromisoformat(event["ts"]).timestamp()
+                except (KeyError, TypeError, ValueError):
+                    written_at = None
+                self._handle_phase_completion({
+                    "state": "completed",
+                    "files_modified": event.get("files_modified", [])
+                }, written_at, "events")
+                return
+            if event["type"] == "error":
+                self.progress.stop()
+                self._handle_phase_error({"errors": [event.get("message", "Unknown error")]})
+                return
+        
         # Check if status file has changed
         current_hash = StatusProtocol.get_file_hash(self.workflow_dir)
         if current_hash == self.status_hash:
@@ -2228,74 +8399,424 @@ class Orchestrator:
         self.status_hash = current_hash
         status = StatusProtocol.read_status(self.workflow_dir)
         
-        if not status:
-            return
+        if not status:
+            return
+        
+        # Handle different states
+        if status.get("state") == "completed":
+            self.progress.stop()
+            try:
+                written_at = (self.workflow_dir / STATUS_FILE).stat().st_mtime
+            except OSError:
+                written_at = None
+            self._handle_phase_completion(status, written_at, "status.json")
+        elif status.get("state") == "error":
+            self.progress.stop()
+            self._handle_phase_error(status)
+    
+    def _handle_phase_completion(
+        self,
+        status: Dict,
+        written_at: Optional[float] = None,
+        source: str = "status.json"
+    ):
+        """
+        Handle phase completion detected from status.json.
+        
+        Completion runs as a pipeline of scheduled stages on the monitor
+        thread: commit → verify → gate → cascade. Each stage schedules the
+        next, so polls and cancellations (pause, reset, skip) interleave
+        between them and a pause during the cascade delay applies at once.
+        The handoff trace (see Tracer) runs from here to the next command file.
+        
+        Args:
+            status: Status dictionary from status.json
+            written_at: When the agent reported completion (time.time()), if known
+            source: Where completion was reported (status.json or events)
+        """
+        current_phase = self.session.phases[self.session.current_phase_index]
+        
+        self.logger.info(f"✅ Phase {current_phase.id} completed!")
+        self.metrics.inc("orchestrator_phase_completions_total")
+        self._completion_started = time.perf_counter()
+        self.tracer.begin(current_phase)
+        if written_at is not None:
+            # Clock skew or a coarse mtime must not produce a negative span
+            detected = time.time()
+            written_at = min(written_at, detected)
+            self.tracer.record("detect", written_at, detected - written_at, "status", source=source)
+        
+        # Update phase state
+        current_phase.state = PhaseState.COMPLETED
+        current_phase.completed_at = datetime.now().isoformat()
+        current_phase.files_modified = status.get("files_modified", [])
+        
+        # No longer waiting for Claude (keeps the poll from re-detecting)
+        if self.session.state != WorkflowState.PAUSED:
+            self.session.state = WorkflowState.RUNNING
+        self._save_session()
+        
+        self.scheduler.cancel_tag("stall")
+        self.scheduler.schedule(0, self._complete_commit, "commit", "completion", (current_phase,))
+    
+    def _complete_commit(self, phase: Phase):
+        """
+        Completion stage 1: commit (or merge) the phase's changes.
+        
+        With budget_action "retry" the commit is held back: not pushed (and
+        the worktree kept) until the budget gate passes, so a phase sent
+        back for a retry can still be rewound (see _withdraw_phase_commit).
+        
+        Args:
+            phase: Completed phase
+        """
+        # Exact changes since the phase started (orchestrator state excluded)
+        delta = None
+        if phase.baseline:
+            delta = self.git.phase_delta(phase.baseline, exclude=(self._workflow_prefix(),))
+        
+        hold = self.config.get("run_tests") and self.config.get("budget_action", "pause") == "retry"
+        held = None
+        
+        # Merge the phase worktree back, or commit in place if auto-commit enabled
+        if self.config.get("phase_worktrees"):
+            merge = self._merge_phase_worktree(phase, publish=not hold)
+            if merge is None:
+                self._end_handoff()
+                return
+            if hold and merge["status"] != "up-to-date":
+                held = {"commit": merge["commit"], "previous": merge["previous"], "worktree": True}
+        elif self.config.get("auto_commit"):
+            commit_hash = self.git.commit_and_push(
+                phase.id,
+                f"Completed {phase.task_count} tasks",
+                paths=delta,
+                push=not hold
+            )
+            if commit_hash and hold:
+                held = {"commit": commit_hash, "previous": None, "worktree": False}
+            if commit_hash:
+                self.session.git_commits.append(commit_hash)
+                # The commit is authoritative over the agent's own file list
+                phase.diffstat = self.git.diffstat(commit_hash)
+                if phase.diffstat:
+                    phase.files_modified = [f["path"] for f in phase.diffstat["files"]]
+        
+        if delta is not None:
+            phase.files_modified = delta
+        elif not phase.files_modified:
+            phase.files_modified = self.git.get_modified_files()
+        
+        # Update session task count
+        self.session.completed_tasks += phase.task_count
+        self._save_session()
+        
+        self.scheduler.schedule(0, self._complete_verify, "verify", "completion", (phase, delta, held))
+    
+    def _complete_verify(self, phase: Phase, delta: Optional[List[str]], held: Optional[Dict] = None):
+        """
+        Completion stage 2: tests and image variants (both optional).
+        
+        Args:
+            phase: Completed phase
+            delta: Paths changed by the phase (None if unknown)
+            held: Commit held back for the budget gate (see _complete_commit)
+        """
+        # Run tests if enabled
+        if self.config.get("run_tests"):
+            if self.session.state != WorkflowState.PAUSED:
+                self.session.state = WorkflowState.TESTING
+            phase.state = PhaseState.TESTING
+            self._save_session()
+            
+            scope = phase.files_modified if self.config.get("phase_worktrees") else delta
+            with self.tracer.span("tests", "tests"):
+                test_results = self.test_runner.run_tests(phase.id, scope)
+            test_results["budget"] = self.budget.evaluate(
+                phase.id, test_results, self._previous_phase_results(phase)
+            )
+            phase.test_results = test_results
+            phase.state = PhaseState.COMPLETED
+        
+        # Generate responsive image variants if enabled
+        if self.config.get("image_variants"):
+            references = self.test_runner.image_references
+            if not self.config.get("run_tests"):
+                references = self.test_runner.collect_image_references()
+            try:
+                with self.tracer.span("image variants", "images"):
+                    variants = self.image_pipeline.run(phase.id, references)
+                if phase.test_results is None:
+                    phase.test_results = {}
+                phase.test_results["image_variants"] = variants
+            except Exception as e:
+                self.logger.error(f"Image variant pipeline failed: {e}")
+        
+        self._save_session()
+        
+        self.scheduler.schedule(0, self._complete_gate, "gate", "completion", (phase, held))
+    
+    def _complete_gate(self, phase: Phase, held: Optional[Dict] = None):
+        """
+        Completion stage 3: budget gate, then schedule the cascade.
+        
+        Args:
+            phase: Completed phase
+            held: Commit held back for the budget gate (see _complete_commit)
+        """
+        if self._completion_started is not None:
+            self.metrics.observe("orchestrator_completion_seconds", time.perf_counter() - self._completion_started)
+        
+        # Gate the cascade on the performance budget
+        budget = (phase.test_results or {}).get("budget")
+        if budget and budget["status"] == "failed" and self._handle_budget_failure(phase, budget, held):
+            self._end_handoff()
+            return
+        if held:
+            self._publish_phase_commit(phase, held)
+        
+        # Play completion sound
+        if self.config.get("sound_notifications"):
+            SoundManager.play("complete")
+        
+        if self.session.state == WorkflowState.PAUSED:
+            self.logger.info(f"Workflow paused; not cascading after Phase {phase.id}")
+            self._end_handoff()
+            return
+        
+        # Auto-cascade to next phase
+        if self.config.get("auto_cascade"):
+            delay = self.config.get("auto_cascade_delay", AUTO_CASCADE_DELAY)
+            self.logger.info(f"Auto-cascading to next phase in {delay}s...")
+            self.scheduler.schedule(delay, self._cascade, "cascade", "cascade", (time.time(),))
+        else:
+            self._end_handoff()
+    
+    def _cascade(self, scheduled_at: Optional[float] = None):
+        """
+        Completion stage 4: start the next pending phase.
+        
+        Args:
+            scheduled_at: When the cascade was scheduled (time.time()), for the trace
+        """
+        if scheduled_at is not None:
+            self.tracer.record("cascade wait", scheduled_at, time.time() - scheduled_at, "scheduler")
+        if self.session.state == WorkflowState.PAUSED:
+            self._end_handoff()
+            return
+        
+        # Reset status for next phase
+        StatusProtocol.update_status(self.workflow_dir, {
+            "state": "idle",
+            "current_phase": None,
+            "files_modified": [],
+            "errors": []
+        })
+        
+        self._start_next_phase()
+        
+        if self._completion_started is not None:
+            self.metrics.observe("orchestrator_handoff_seconds", time.perf_counter() - self._completion_started)
+        self._end_handoff()
+    
+    def _end_handoff(self):
+        """
+        Close the handoff trace and stop timing the handoff.
+        
+        Called when the next phase has started, when the workflow stops
+        cascading, and when a pending cascade is cancelled (pause, reset,
+        manual phase changes) so later work is not attributed to the
+        finished phase.
+        """
+        self.tracer.end()
+        self._completion_started = None
+    
+    def _schedule_retry(self, phase: Phase, reason: str):
+        """
+        Retry a failed phase after retry_delay (cancellable via the "retry" tag).
+        
+        Args:
+            phase: Phase to retry
+            reason: Short reason for the log
+        """
+        delay = self.config.get("retry_delay", RETRY_DELAY)
+        self.logger.info(f"Auto-retrying Phase {phase.id} in {delay}s ({reason})...")
+        self.scheduler.schedule(delay, self.retry_phase, "retry", "retry", (phase.id,))
+    
+    def _schedule_stall_check(self, phase: Phase, delay: float):
+        """
+        Check the current phase for a stall after a delay.
+        
+        The check re-arms itself for the remaining quiet time, so it only
+        fires once a v2 agent has been silent for stall_timeout seconds.
+        
+        Args:
+            phase: Running phase
+            delay: Seconds until the check
+        """
+        self.scheduler.schedule(delay, self._check_stall, "stall-check", "stall", (phase,))
+    
+    def _check_stall(self, phase: Phase):
+        """Treat a silent v2 agent as a phase error (see _schedule_stall_check)."""
+        stall_timeout = self.config.get("stall_timeout", STALL_TIMEOUT)
+        if (not stall_timeout or self.session.state != WorkflowState.WAITING_FOR_CLAUDE
+                or self.progress.phase_id != phase.id):
+            return
+        
+        # Only for agents that have shown they send events
+        silence = self.progress.silence()
+        if not self.progress.speaks_v2 or silence <= stall_timeout:
+            remaining = stall_timeout - silence if self.progress.speaks_v2 else stall_timeout
+            self._schedule_stall_check(phase, max(0.1, remaining))
+            return
+        
+        self.logger.warn(f"Phase {phase.id} stalled: no events for {int(silence)}s")
+        self.progress.stop()
+        self._handle_phase_error({"errors": [f"Stalled: no progress events for {int(silence)}s"]})
+    
+    def _workflow_prefix(self) -> str:
+        """Get the workflow directory as a git path prefix (".ai-workflow/")."""
+        return self.workflow_dir.relative_to(self.project_path).as_posix() + "/"
+    
+    def _merge_phase_worktree(self, phase: Phase, publish: bool = True) -> Optional[Dict]:
+        """
+        Commit leftovers in a phase worktree and merge its branch back.
+        
+        Args:
+            phase: Completed phase
+            publish: Push and release the worktree after merging; False
+                leaves both to _publish_phase_commit
+            
+        Returns:
+            WorktreeManager.merge() result; None if the phase was marked as errored
+        """
+        self.worktrees.commit(phase.id, f"Completed {phase.task_count} tasks")
+        merge = self.worktrees.merge(phase.id)
+        
+        if merge["status"] in ("conflict", "failed"):
+            if merge["status"] == "conflict":
+                error = f"Merge conflict in {', '.join(merge['conflicts']) or 'the phase branch'}"
+                # The same branch would conflict again: retry from the current base
+                saved = self.worktrees.discard(phase.id)
+                if saved:
+                    self.logger.warn(f"Discarded the worktree of Phase {phase.id}; its work is kept at {saved}")
+            else:
+                error = f"Merge failed: {merge['error']}"
+            self._record_phase_error(phase, error)
+            return None
+        
+        if merge["status"] != "up-to-date":
+            self.session.git_commits.append(merge["commit"])
+            phase.files_modified = merge["files"]
+            if publish and self.config.get("auto_push"):
+                self.git.push()
         
-        # Handle different states
-        if status.get("state") == "completed":
-            self._handle_phase_completion(status)
-        elif status.get("state") == "error":
-            self._handle_phase_error(status)
+        if publish or merge["status"] == "up-to-date":
+            self.worktrees.release(phase.id)
+        return merge
     
-    def _handle_phase_completion(self, status: Dict):
+    def _publish_phase_commit(self, phase: Phase, held: Dict):
         """
-        Handle phase completion detected from status.json.
+        Push a phase commit held back for the budget gate.
         
         Args:
-            status: Status dictionary from status.json
+            phase: Completed phase
+            held: {"commit", "previous", "worktree"} from _complete_commit
         """
-        current_phase = self.session.phases[self.session.current_phase_index]
+        if held["worktree"]:
+            if self.config.get("auto_push"):
+                self.git.push()
+            self.worktrees.release(phase.id)
+        else:
+            self.git.push_commit(held["commit"], phase.id)
+    
+    def _withdraw_phase_commit(self, phase: Phase, held: Dict):
+        """
+        Rewind a held phase commit before the phase is retried.
         
-        self.logger.info(f"✅ Phase {current_phase.id} completed!")
+        In place, the commit is undone but its changes stay in the working
+        tree, where the retry (which keeps the first baseline) counts them
+        again. A merged worktree branch is undone in the main tree and stays
+        on the kept phase branch, which the retry reuses.
         
-        # Update phase state
-        current_phase.state = PhaseState.COMPLETED
-        current_phase.completed_at = datetime.now().isoformat()
-        current_phase.files_modified = status.get("files_modified", [])
+        Args:
+            phase: Phase about to be retried
+            held: {"commit", "previous", "worktree"} from _complete_commit
+        """
+        if self.git.rewind(held["commit"], held["previous"], keep_worktree=not held["worktree"]):
+            if held["commit"] in self.session.git_commits:
+                self.session.git_commits.remove(held["commit"])
+        else:
+            self.logger.warn(f"Phase {phase.id} keeps its unpushed commit {held['commit'][:8]} for the retry")
+    
+    def _previous_phase_results(self, phase: Phase) -> Optional[Tuple[str, Dict]]:
+        """
+        Find the most recent earlier phase with page metrics in its test results.
         
-        # Update session task count
-        self.session.completed_tasks += current_phase.task_count
+        Args:
+            phase: Phase being evaluated
+            
+        Returns:
+            Tuple of (phase_id, test_results) or None
+        """
+        index = self.session.phases.index(phase)
+        for earlier in reversed(self.session.phases[:index]):
+            if earlier.test_results and earlier.test_results.get("metrics", {}).get("pages"):
+                return earlier.id, earlier.test_results
+        return None
+    
+    def _handle_budget_failure(self, phase: Phase, budget: Dict, held: Optional[Dict] = None) -> bool:
+        """
+        Apply the configured budget action to a phase that exceeded its budget.
         
-        # Git commit if auto-commit enabled
-        if self.config.get("auto_commit"):
-            commit_hash = self.git.commit_and_push(
-                current_phase.id,
-                f"Completed {current_phase.task_count} tasks"
-            )
-            if commit_hash:
-                self.session.git_commits.append(commit_hash)
+        Actions:
+        - pause: keep the phase completed but pause the workflow before cascading
+        - retry: mark the phase failed and auto-retry it (pauses once retries run out);
+                 its commit was held back and is rewound before the retry
+        - warn:  log only and let the cascade continue
         
-        # Run tests if enabled
-        if self.config.get("run_tests"):
-            self.session.state = WorkflowState.TESTING
-            current_phase.state = PhaseState.TESTING
-            self._save_session()
+        Args:
+            phase: Phase that exceeded its budget
+            budget: Result from PerformanceBudget.evaluate()
+            held: Commit held back for the gate (pushed unless the phase is retried)
             
-            test_results = self.test_runner.run_tests(current_phase.id)
-            current_phase.test_results = test_results
-            current_phase.state = PhaseState.COMPLETED
+        Returns:
+            True if the cascade was stopped
+        """
+        action = self.config.get("budget_action", "pause")
+        if action == "warn":
+            return False
         
-        self._save_session()
+        reasons = (budget["regressions"] + budget["violations"])[:3]
+        error_msg = "Performance budget exceeded: " + "; ".join(reasons)
+        
+        self.session.errors.append({
+            "phase": phase.id,
+            "error": error_msg,
+            "timestamp": datetime.now().isoformat()
+        })
         
-        # Play completion sound
         if self.config.get("sound_notifications"):
-            SoundManager.play("complete")
+            SoundManager.play("warning")
         
-        # Auto-cascade to next phase
-        if self.config.get("auto_cascade"):
-            delay = self.config.get("auto_cascade_delay", AUTO_CASCADE_DELAY)
-            self.logger.info(f"Auto-cascading to next phase in {delay}s...")
-            time.sleep(delay)
-            
-            # Reset status for next phase
-            StatusProtocol.update_status(self.workflow_dir, {
-                "state": "idle",
-                "current_phase": None,
-                "files_modified": [],
-                "errors": []
-            })
+        if action == "retry" and phase.retry_count < self.config.get("max_retries", MAX_RETRIES):
+            if held:
+                self._withdraw_phase_commit(phase, held)
+            phase.state = PhaseState.ERROR
+            phase.error = error_msg
+            self.session.completed_tasks -= phase.task_count
+            self.session.state = WorkflowState.ERROR
+            self._save_session()
             
-            self._start_next_phase()
+            self._schedule_retry(phase, "performance budget")
+            return True
+        
+        if held:
+            self._publish_phase_commit(phase, held)
+        self.logger.warn(f"⏸️ Pausing workflow after Phase {phase.id}: {error_msg}")
+        self.session.state = WorkflowState.PAUSED
+        self._save_session()
+        return True
     
     def _handle_phase_error(self, status: Dict):
         """
@@ -2309,16 +8830,27 @@ class Orchestrator:
         errors = status.get("errors", [])
         error_msg = errors[0] if errors else "Unknown error"
         
-        self.logger.error(f"❌ Phase {current_phase.id} error: {error_msg}")
+        self._record_phase_error(current_phase, error_msg)
+    
+    def _record_phase_error(self, phase: Phase, error_msg: str):
+        """
+        Mark a phase as errored, record the error and schedule a retry.
+        
+        Args:
+            phase: Failed phase
+            error_msg: What went wrong
+        """
+        self.logger.error(f"❌ Phase {phase.id} error: {error_msg}")
+        self.metrics.inc("orchestrator_phase_errors_total")
         
         # Update phase state
-        current_phase.state = PhaseState.ERROR
-        current_phase.error = error_msg
+        phase.state = PhaseState.ERROR
+        phase.error = error_msg
         
         # Update session
         self.session.state = WorkflowState.ERROR
         self.session.errors.append({
-            "phase": current_phase.id,
+            "phase": phase.id,
             "error": error_msg,
             "timestamp": datetime.now().isoformat()
         })
@@ -2330,26 +8862,31 @@ class Orchestrator:
             SoundManager.play("error")
         
         # Auto-retry if within limits
-        if current_phase.retry_count < self.config.get("max_retries", MAX_RETRIES):
-            delay = self.config.get("retry_delay", RETRY_DELAY)
-            self.logger.info(f"Auto-retrying in {delay}s...")
-            time.sleep(delay)
-            self.retry_phase(current_phase.id)
+        self.scheduler.cancel_tag("stall")
+        if phase.retry_count < self.config.get("max_retries", MAX_RETRIES):
+            self._schedule_retry(phase, "phase error")
     
     # ════════════════════════════════════════════════════════════════════════════════════════
     # Server Management
     # ════════════════════════════════════════════════════════════════════════════════════════
     
-    def start_servers(self):
-        """Start the HTTP server for dashboard and API."""
+    def start_servers(self, http_server: Optional[ThreadedHTTPServer] = None):
+        """
+        Start the HTTP server for dashboard and API.
+        
+        Args:
+            http_server: Server already bound by the caller (main() binds
+                before building the orchestrator); created here if None
+        """
         dashboard_port = self.config.get("dashboard_port", DEFAULT_DASHBOARD_PORT)
         
         # Create HTTP server
-        self.http_server = ThreadedHTTPServer(
+        self.http_server = http_server or ThreadedHTTPServer(
             ("0.0.0.0", dashboard_port),
-            DashboardHandler,
-            orchestrator=self
+            DashboardHandler
         )
+        self.http_server.orchestrator = self
+        self.scheduler.start()  # Config watch runs while idle too
         
         self.logger.info(f"Dashboard: http://localhost:{dashboard_port}")
         
@@ -2362,8 +8899,16 @@ class Orchestrator:
         """Gracefully shutdown the orchestrator."""
         self.logger.info("Shutting down...")
         
-        self.running = False
-        self._save_session()
+        self._stop_monitoring()
+        self.call(self._save_session, timeout=5)
+        self.scheduler.cancel_all()
+        
+        # A shared (host) scheduler keeps running for the other projects
+        if self.owns_scheduler:
+            self.scheduler.scheduler.stop()
+        
+        # Give queued pushes a chance to reach the remote
+        self.git.push_queue.stop()
         
         if self.http_server:
             self.http_server.shutdown()
@@ -2371,10 +8916,511 @@ class Orchestrator:
         self.logger.info("Goodbye!")
 
 
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ ORCHESTRATOR HOST - Many Projects, One Process                                           ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+class OrchestratorHost:
+    """
+    Runs many projects from one process.
+    
+    Shared:
+    ───────
+    - One Scheduler with a fixed pool of loop threads (workers). Each
+      project's jobs stay serialized, so a project never holds more than
+      one thread and a slow test run only delays its own project
+    - One HTTP server: /api/projects, /api/projects/<id>/<endpoint>, the
+      combined dashboard at / and project dashboards at /projects/<id>/
+    
+    Per-project limits (HOST_PROJECT_LIMITS) cap each project's config:
+    - max_queued_commands: API commands waiting on the project's loop
+    - max_log_entries: in-memory log buffer
+    - slow_job_seconds: jobs holding a loop thread longer are logged
+    
+    Threads stay at workers + HTTP requests in flight + push workers that
+    are actually pushing (idle ones exit), whatever the project count.
+    """
+    
+    def __init__(
+        self,
+        project_paths: List[str],
+        config_overrides: Optional[Dict] = None,
+        workers: int = HOST_WORKERS,
+        limits: Optional[Dict] = None
+    ):
+        """
+        Initialize OrchestratorHost.
+        
+        Args:
+            project_paths: Project directories to host
+            config_overrides: Config values applied to every project
+            workers: Shared loop threads
+            limits: Per-project caps (default: HOST_PROJECT_LIMITS)
+        """
+        self.config_overrides = config_overrides or {}
+        self.limits = {**HOST_PROJECT_LIMITS, **(limits or {})}
+        self.scheduler = Scheduler(workers=workers)
+        self.metrics = Metrics(enabled=self.config_overrides.get("metrics", True))  # Host-level requests
+        self.projects: Dict[str, Orchestrator] = {}
+        self.http_server: Optional[ThreadedHTTPServer] = None
+        
+        for path in project_paths:
+            self.add_project(path)
+    
+    def _project_id(self, project_path: Path) -> str:
+        """Derive a URL-safe, unique project id from the directory name."""
+        base = re.sub(r'[^a-z0-9._-]+', '-', project_path.name.lower()).strip('-') or "project"
+        project_id = base
+        suffix = 2
+        while project_id in self.projects:
+            project_id = f"{base}-{suffix}"
+            suffix += 1
+        return project_id
+    
+    def add_project(self, project_path: str) -> str:
+        """
+        Register a project.
+        
+        Args:
+            project_path: Project directory
+        
+        Returns:
+            Project id used in URLs
+        """
+        path = Path(project_path).resolve()
+        for project_id, orchestrator in self.projects.items():
+            if orchestrator.project_path == path:
+                return project_id
+        
+        project_id = self._project_id(path)
+        orchestrator = Orchestrator(
+            str(path), dict(self.config_overrides), scheduler=self.scheduler, limits=self.limits
+        )
+        orchestrator.logger.prefix = f"[{project_id}] "
+        self.projects[project_id] = orchestrator
+        return project_id
+    
+    def remove_project(self, project_id: str) -> bool:
+        """
+        Shut a project down and drop it from the registry.
+        
+        Returns:
+            True if the project existed
+        """
+        orchestrator = self.projects.pop(project_id, None)
+        if orchestrator is None:
+            return False
+        orchestrator.shutdown()
+        return True
+    
+    def get(self, project_id: str) -> Optional[Orchestrator]:
+        """Get a project's orchestrator by id."""
+        return self.projects.get(project_id)
+    
+    def get_state(self) -> Dict:
+        """
+        Get project summaries for the combined dashboard.
+        
+        Built from each project's published snapshot, so it never waits
+        for a project's loop.
+        
+        Returns:
+            {"version": "4.1.0", "host": {"projects": 12, "workers": 4, "threads": 9},
+             "projects": [{"id": "site", "state": "waiting_for_claude", ...}, ...]}
+        """
+        projects = []
+        for project_id, orchestrator in list(self.projects.items()):
+            session = orchestrator.get_state().get("session") or {}
+            phases = session.get("phases", [])
+            current = None
+            if phases and 0 <= session.get("current_phase_index", 0) < len(phases):
+                current = phases[session["current_phase_index"]]["id"]
+            projects.append({
+                "id": project_id,
+                "path": str(orchestrator.project_path),
+                "state": session.get("state", "idle"),
+                "current_phase": current,
+                "phases": len(phases),
+                "completed_phases": sum(1 for phase in phases if phase["state"] == "completed"),
+                "total_tasks": session.get("total_tasks", 0),
+                "completed_tasks": session.get("completed_tasks", 0),
+                "errors": len(session.get("errors", [])),
+                "last_error": session["errors"][-1]["error"] if session.get("errors") else None,
+                "queued_commands": orchestrator.scheduler.pending_count("command"),
+                "usage": orchestrator.scheduler.get_usage()
+            })
+        
+        return {
+            "version": VERSION,
+            "host": {
+                "projects": len(projects),
+                "workers": self.scheduler.workers,
+                "threads": threading.active_count(),
+                "limits": self.limits
+            },
+            "projects": projects
+        }
+    
+    def render_metrics(self) -> str:
+        """Render host metrics and every project's, labelled with the project id."""
+        registries = [(self.metrics, {})]
+        for project_id, orchestrator in list(self.projects.items()):
+            if orchestrator.metrics.enabled:
+                registries.append((orchestrator.metrics, {"project": project_id}))
+        return render_metrics(registries)
+    
+    def serve(self, port: int = DEFAULT_DASHBOARD_PORT, http_server: Optional[ThreadedHTTPServer] = None):
+        """
+        Serve the combined dashboard and API (blocking).
+        
+        Args:
+            port: Dashboard port
+            http_server: Server already bound by the caller (used instead of port)
+        """
+        self.scheduler.start()
+        self.http_server = http_server or ThreadedHTTPServer(("0.0.0.0", port), DashboardHandler)
+        self.http_server.host = self
+        try:
+            self.http_server.serve_forever()
+        except KeyboardInterrupt:
+            self.shutdown()
+    
+    def shutdown(self):
+        """Shut every project down, then the shared scheduler and server."""
+        for project_id in list(self.projects):
+            self.remove_project(project_id)
+        self.scheduler.stop()
+        if self.http_server:
+            self.http_server.shutdown()
+
+
+# ╔══════════════════════════════════════════════════════════════════════════════════════════╗
+# ║ AGENT SIMULATOR - Loopback Agent and Throughput Benchmark                                ║
+# ╚══════════════════════════════════════════════════════════════════════════════════════════╝
+
+class SimulatedAgent:
+    """
+    Stand-in for Claude Code that speaks the status protocol locally.
+    
+    Loop:
+    ─────
+    1. Wait for a new current-command.md while status.json says "running"
+    2. Sleep the configured latency (± jitter)
+    3. Optionally write one file per task (left for the orchestrator's
+       auto-commit, like a real agent's edits)
+    4. Send v2 task events, then write status.json "completed" - or
+       "error" with probability failure_rate
+    
+    Each handoff is timed from the moment status.json is written until the
+    next command file appears, which is the orchestrator's own overhead
+    (watcher, completion handling, git, tests and cascade).
+    """
+    
+    PHASE_HEADER = re.compile(r'^# Phase (\S+) Implementation', re.MULTILINE)
+    TASK_HEADER = re.compile(r'^### \d+\. Task (\S+):', re.MULTILINE)
+    
+    def __init__(
+        self,
+        project_path: Path,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        touch_files: bool = True,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize SimulatedAgent.
+        
+        Args:
+            project_path: Path to the project the orchestrator drives
+            latency: Seconds of simulated work per phase
+            jitter: Maximum random deviation from latency (seconds)
+            failure_rate: Probability (0-1) of reporting an error instead of completing
+            touch_files: Write one file per task so there is something to commit
+            seed: Random seed for reproducible runs
+        """
+        import random
+        
+        self.project_path = project_path
+        self.workflow_dir = project_path / ".ai-workflow"
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.touch_files = touch_files
+        self.random = random.Random(seed)
+        self.handoffs: List[float] = []       # seconds, status written → next command
+        self.phases_done = 0
+        self.failures = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start the agent thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="simulated-agent", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the agent thread."""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+    
+    def _command_stamp(self) -> Optional[int]:
+        """Get the mtime of current-command.md (None if missing)."""
+        try:
+            return (self.workflow_dir / CURRENT_COMMAND_FILE).stat().st_mtime_ns
+        except OSError:
+            return None
+    
+    def _loop(self):
+        """Poll for commands and answer them."""
+        handled = None
+        done_at: Optional[float] = None
+        while self._running:
+            stamp = self._command_stamp()
+            status = StatusProtocol.read_status(self.workflow_dir) or {}
+            if stamp is None or stamp == handled or status.get("state") != "running":
+                time.sleep(0.002)
+                continue
+            
+            if done_at is not None:
+                self.handoffs.append(time.perf_counter() - done_at)
+            handled = stamp
+            done_at = self._run_phase()
+    
+    def _run_phase(self) -> float:
+        """
+        Execute one command file.
+        
+        Returns:
+            perf_counter() time at which the status file was written
+        """
+        content = (self.workflow_dir / CURRENT_COMMAND_FILE).read_text(encoding='utf-8')
+        match = self.PHASE_HEADER.search(content)
+        phase_id = match.group(1) if match else "?"
+        task_ids = self.TASK_HEADER.findall(content)
+        
+        for task_id in task_ids:
+            StatusProtocol.append_event(self.workflow_dir, {
+                "type": "task_started", "phase": phase_id, "task": task_id
+            })
+        
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        if delay:
+            time.sleep(delay)
+        
+        files = []
+        if self.touch_files:
+            sim_dir = self.project_path / "sim"
+            sim_dir.mkdir(exist_ok=True)
+            for task_id in task_ids:
+                path = sim_dir / f"task-{task_id}.html"
+                path.write_text(
+                    f"<!DOCTYPE html>\n<html><head><title>{task_id}</title></head>"
+                    f"<body><p>{time.time()}</p></body></html>\n",
+                    encoding='utf-8'
+                )
+                files.append(path.relative_to(self.project_path).as_posix())
+        
+        for task_id in task_ids:
+            StatusProtocol.append_event(self.workflow_dir, {
+                "type": "task_completed", "phase": phase_id, "task": task_id
+            })
+        
+        if self.random.random() < self.failure_rate:
+            self.failures += 1
+            StatusProtocol.update_status(self.workflow_dir, {
+                "state": "error",
+                "current_phase": phase_id,
+                "errors": ["Simulated failure"]
+            })
+        else:
+            self.phases_done += 1
+            StatusProtocol.update_status(self.workflow_dir, {
+                "state": "completed",
+                "current_phase": phase_id,
+                "phases_completed": [phase_id],
+                "files_modified": files,
+                "errors": []
+            })
+        return time.perf_counter()
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = int(-(-percent * len(ordered) // 100))  # ceil(P/100 * N), the 1-based rank
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def run_benchmark(
+    phases: int = 10,
+    tasks_per_phase: int = 2,
+    latency: float = 0.0,
+    failure_rate: float = 0.0,
+    run_tests: bool = True,
+    timeout: float = 600.0,
+    keep: bool = False
+) -> Dict:
+    """
+    Drive synthetic phases through a full orchestrator, entirely offline.
+    
+    A temporary git repository with a local bare remote is created, so
+    commits and pushes take their normal path without network access.
+    
+    Args:
+        phases: Number of phases to run (1-26, phase ids are letters)
+        tasks_per_phase: Tasks in each phase
+        latency: Simulated agent work per phase (seconds)
+        failure_rate: Probability of a simulated phase error (retried as usual)
+        run_tests: Run the test suites after each phase
+        timeout: Give up after this many seconds
+        keep: Keep the temporary directory for inspection
+    
+    Returns:
+        {"phases": 10, "completed": 10, "failures": 0, "handoffs": 9,
+         "overhead_ms": {"p50": 85.1, "p95": 140.3, "max": 151.0, "mean": 90.2},
+         "wall_s": 4.1, "phases_per_min": 146.3, "cpu_s": 2.2, "peak_rss_mb": 48.1,
+         "commits_pushed": 10, "workdir": "/tmp/..." or None}
+    """
+    import io
+    import tempfile
+    
+    phases = max(1, min(26, phases))
+    workdir = Path(tempfile.mkdtemp(prefix="ai-workflow-bench-"))
+    project = workdir / "project"
+    remote = workdir / "remote.git"
+    
+    def git(*args, cwd=project):
+        subprocess.run(["git"] + list(args), cwd=cwd, check=True, capture_output=True)
+    
+    # Site and repository
+    project.mkdir()
+    (project / "css").mkdir()
+    (project / "index.html").write_text(
+        '<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8"><title>Bench</title>'
+        '<link rel="stylesheet" href="css/style.css"></head>'
+        '<body><main class="page"><h1 class="title">Benchmark</h1></main></body></html>\n',
+        encoding='utf-8'
+    )
+    (project / "css" / "style.css").write_text(".page { margin: 0; }\n.title { color: #222; }\n", encoding='utf-8')
+    subprocess.run(["git", "init", "-q", "--bare", str(remote)], check=True, capture_output=True)
+    git("init", "-q", "-b", "main")
+    git("config", "user.email", "bench@localhost")
+    git("config", "user.name", "Benchmark")
+    git("add", "-A")
+    git("commit", "-q", "-m", "Initial site")
+    git("remote", "add", "origin", str(remote))
+    git("push", "-q", "-u", "origin", "main")
+    
+    # Plan: one task id letter per phase keeps the split predictable
+    workflow_dir = project / ".ai-workflow"
+    workflow_dir.mkdir()
+    plan = ["# Benchmark plan", ""]
+    for p in range(phases):
+        for t in range(1, tasks_per_phase + 1):
+            plan += [f"### Task {chr(ord('A') + p)}{t}: Synthetic task", "", "Touch a page.", ""]
+    (workflow_dir / PLANNING_FILE).write_text('\n'.join(plan), encoding='utf-8')
+    
+    # The logger echoes to stdout until it can be silenced
+    with contextlib.redirect_stdout(io.StringIO()):
+        orchestrator = Orchestrator(str(project), {
+            "sound_notifications": False,
+            "auto_cascade": True,
+            "auto_cascade_delay": 0,
+            "status_check_interval": 0.05,
+            "auto_commit": True,
+            "auto_push": True,
+            "run_tests": run_tests,
+            "retry_delay": 0,
+            "max_retries": 10,
+            "stall_timeout": 0,
+            "max_tasks_per_phase": tasks_per_phase
+        })
+    orchestrator.logger.console = False
+    
+    agent = SimulatedAgent(project, latency=latency, failure_rate=failure_rate, seed=1)
+    
+    try:
+        import resource
+    except ImportError:
+        resource = None  # Not available on Windows
+    cpu_start = time.process_time()
+    started = time.perf_counter()
+    
+    agent.start()
+    orchestrator.call(orchestrator.analyze_plan)
+    orchestrator.call(orchestrator.start_workflow)
+    
+    deadline = time.time() + timeout
+    while time.time() < deadline and orchestrator.session.state not in (
+        WorkflowState.COMPLETED, WorkflowState.PAUSED
+    ):
+        time.sleep(0.01)
+    wall = time.perf_counter() - started
+    
+    agent.stop()
+    orchestrator.shutdown()
+    cpu = time.process_time() - cpu_start
+    
+    peak_rss_mb = None
+    if resource:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_mb = round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    
+    pushed = subprocess.run(
+        ["git", "rev-list", "--count", "main"], cwd=remote, capture_output=True, text=True
+    ).stdout.strip()
+    
+    overhead = [h * 1000 for h in agent.handoffs]
+    completed = sum(1 for p in orchestrator.session.phases if p.state == PhaseState.COMPLETED)
+    report = {
+        "phases": phases,
+        "completed": completed,
+        "failures": agent.failures,
+        "handoffs": len(overhead),
+        "overhead_ms": {
+            "p50": round(_percentile(overhead, 50), 1),
+            "p95": round(_percentile(overhead, 95), 1),
+            "max": round(max(overhead), 1) if overhead else 0.0,
+            "mean": round(sum(overhead) / len(overhead), 1) if overhead else 0.0
+        },
+        "wall_s": round(wall, 2),
+        "phases_per_min": round(completed / wall * 60, 1) if wall else 0.0,
+        "cpu_s": round(cpu, 2),
+        "peak_rss_mb": peak_rss_mb,
+        "commits_pushed": int(pushed) - 1 if pushed.isdigit() else None,
+        "timed_out": orchestrator.session.state != WorkflowState.COMPLETED,
+        "workdir": str(workdir) if keep else None
+    }
+    
+    if not keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
 # ╔══════════════════════════════════════════════════════════════════════════════════════════╗
 # ║ MAIN ENTRY POINT                                                                         ║
 # ╚══════════════════════════════════════════════════════════════════════════════════════════╝
 
+def _profile_report(orchestrator: Orchestrator) -> Dict:
+    """
+    Get an orchestrator's startup profile, including the work it deferred.
+    
+    The deferred steps are forced here so their cost shows up next to the
+    startup steps they were moved out of.
+    """
+    for step in ("session", "test_runner", "image_pipeline"):
+        started = time.perf_counter()
+        getattr(orchestrator, step)
+        orchestrator.startup.deferred(step, time.perf_counter() - started)
+    return orchestrator.startup.report()
+
+
 def main():
     """Main entry point for the orchestrator."""
     import argparse
@@ -2389,6 +9435,9 @@ Examples:
   python3 orchestrator.py . --port 8080        # Custom dashboard port
   python3 orchestrator.py . --no-sound         # Disable sound notifications
   python3 orchestrator.py . --no-auto-cascade  # Disable automatic phase cascade
+  python3 orchestrator.py --benchmark 20       # Offline throughput benchmark
+  python3 orchestrator.py --host ~/a ~/b       # Several projects, one dashboard
+  python3 orchestrator.py . --profile-startup  # Time each startup step
         """
     )
     
@@ -2424,6 +9473,53 @@ Examples:
         help="Disable automatic testing after phases"
     )
     
+    parser.add_argument(
+        "--host",
+        nargs="+",
+        metavar="PROJECT",
+        help="Host mode: run several projects from one process and one dashboard"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=HOST_WORKERS,
+        help=f"Host mode: shared loop threads (default: {HOST_WORKERS})"
+    )
+    
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report the time spent in each startup step and exit"
+    )
+    
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="N",
+        help="Run N synthetic phases against a simulated agent and report overhead"
+    )
+    
+    parser.add_argument(
+        "--bench-latency",
+        type=float,
+        default=0.0,
+        help="Simulated agent work per phase in seconds (default: 0)"
+    )
+    
+    parser.add_argument(
+        "--bench-failure-rate",
+        type=float,
+        default=0.0,
+        help="Probability of a simulated phase error (default: 0)"
+    )
+    
+    parser.add_argument(
+        "--bench-keep",
+        action="store_true",
+        help="Keep the benchmark's temporary repository"
+    )
+    
     parser.add_argument(
         "--version", "-v",
         action="version",
@@ -2449,9 +9545,47 @@ Examples:
     # Handle Ctrl+C gracefully
     signal.signal(signal.SIGINT, lambda s, f: sys.exit(0))
     
+    if args.benchmark:
+        report = run_benchmark(
+            phases=args.benchmark,
+            latency=args.bench_latency,
+            failure_rate=args.bench_failure_rate,
+            run_tests=not args.no_tests,
+            keep=args.bench_keep
+        )
+        print(json.dumps(report, indent=2))
+        sys.exit(1 if report["timed_out"] else 0)
+    
+    # Bind the dashboard port before building orchestrators: a busy port fails
+    # fast, and early requests wait in the listen queue instead of being refused
+    bind_started = time.perf_counter()
+    http_server = ThreadedHTTPServer(("0.0.0.0", args.port), DashboardHandler)
+    bind_ms = round((time.perf_counter() - bind_started) * 1000, 2)
+    
+    if args.host:
+        host = OrchestratorHost(args.host, config, workers=args.workers)
+        if args.profile_startup:
+            http_server.server_close()
+            print(json.dumps({"bind_ms": bind_ms, "projects": {
+                project_id: _profile_report(orchestrator)
+                for project_id, orchestrator in host.projects.items()
+            }}, indent=2))
+            return
+        print(f"AI Workflow Orchestrator v{VERSION} - hosting {len(host.projects)} projects")
+        for project_id, orchestrator in host.projects.items():
+            print(f"  {project_id:<24} {orchestrator.project_path}")
+        print(f"Dashboard: http://localhost:{args.port}")
+        host.serve(http_server=http_server)
+        return
+    
     # Create orchestrator instance
     orchestrator = Orchestrator(args.project_path, config)
     
+    if args.profile_startup:
+        http_server.server_close()
+        print(json.dumps({"bind_ms": bind_ms, **_profile_report(orchestrator)}, indent=2))
+        return
+    
     # Print startup banner
     print(f"""
 ╔══════════════════════════════════════════════════════════════════════════════════════════╗
@@ -2468,7 +9602,7 @@ Examples:
 """)
     
     # Start servers (blocking)
-    orchestrator.start_servers()
+    orchestrator.start_servers(http_server)
 
 
 if __name__ == "__main__":
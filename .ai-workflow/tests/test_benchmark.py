@@ -0,0 +1,103 @@
+"""
+SimulatedAgent and run_benchmark: the loopback agent's protocol traffic
+and an offline benchmark run end to end.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+COMMAND = """# Phase B Implementation
+
+## Tasks
+
+### 1. Task B1: Header
+
+Do it.
+
+### 2. Task B2: Footer
+
+Do it too.
+"""
+
+
+class SimulatedAgentTest(unittest.TestCase):
+    """One command file answered by the agent directly (no thread)."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.workflow_dir = self.root / ".ai-workflow"
+        self.workflow_dir.mkdir()
+        (self.workflow_dir / orchestrator.CURRENT_COMMAND_FILE).write_text(COMMAND)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def events(self) -> list:
+        events, _ = orchestrator.StatusProtocol.read_events(self.workflow_dir)
+        return [(event["type"], event["task"]) for event in events]
+
+    def test_completes_the_phase(self):
+        agent = orchestrator.SimulatedAgent(self.root, seed=1)
+        agent._run_phase()
+
+        status = orchestrator.StatusProtocol.read_status(self.workflow_dir)
+        self.assertEqual(status["state"], "completed")
+        self.assertEqual(status["current_phase"], "B")
+        self.assertEqual(status["files_modified"], ["sim/task-B1.html", "sim/task-B2.html"])
+        self.assertTrue((self.root / "sim/task-B2.html").is_file())
+        self.assertEqual(self.events(), [
+            ("task_started", "B1"), ("task_started", "B2"), ("task_completed", "B1"), ("task_completed", "B2")
+        ])
+        self.assertEqual((agent.phases_done, agent.failures), (1, 0))
+
+    def test_failure_rate_and_no_files(self):
+        agent = orchestrator.SimulatedAgent(self.root, failure_rate=1.0, touch_files=False, seed=1)
+        agent._run_phase()
+
+        status = orchestrator.StatusProtocol.read_status(self.workflow_dir)
+        self.assertEqual(status["state"], "error")
+        self.assertEqual(status["errors"], ["Simulated failure"])
+        self.assertFalse((self.root / "sim").exists())
+        self.assertEqual((agent.phases_done, agent.failures), (0, 1))
+
+    def test_percentile(self):
+        self.assertEqual(orchestrator._percentile([], 50), 0.0)
+        self.assertEqual(orchestrator._percentile([3.0, 1.0, 2.0], 50), 2.0)
+        self.assertEqual(orchestrator._percentile([2.0, 1.0], 50), 1.0)
+        self.assertEqual(orchestrator._percentile([float(i) for i in range(1, 101)], 95), 95.0)
+        self.assertEqual(orchestrator._percentile([5.0], 99), 5.0)
+
+
+class BenchmarkTest(unittest.TestCase):
+    """Short offline benchmark runs against a local bare remote."""
+
+    def test_every_phase_is_committed_and_pushed(self):
+        report = orchestrator.run_benchmark(phases=3, run_tests=False, timeout=60)
+        self.assertFalse(report["timed_out"])
+        self.assertEqual((report["phases"], report["completed"], report["failures"]), (3, 3, 0))
+        self.assertEqual(report["handoffs"], 2)
+        self.assertEqual(report["commits_pushed"], 3)
+        self.assertGreater(report["overhead_ms"]["p50"], 0)
+        self.assertLessEqual(report["overhead_ms"]["p50"], report["overhead_ms"]["max"])
+        self.assertIsNone(report["workdir"])
+
+    def test_failures_are_retried(self):
+        report = orchestrator.run_benchmark(phases=2, failure_rate=0.5, run_tests=False, timeout=60)
+        self.assertFalse(report["timed_out"])
+        self.assertEqual(report["completed"], 2)
+        self.assertEqual(report["handoffs"], 1 + report["failures"])
+        self.assertEqual(report["commits_pushed"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
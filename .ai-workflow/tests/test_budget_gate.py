@@ -0,0 +1,147 @@
+"""
+Budget gate with budget_action "retry": a failing phase is never pushed.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+PASSED = {"status": "passed", "regressions": [], "violations": []}
+FAILED = {"status": "failed", "regressions": ["index.html total_bytes +80%"], "violations": []}
+
+
+def git(cwd: Path, *args: str) -> str:
+    """Run git and return its stripped output."""
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+class BudgetGateTest(unittest.TestCase):
+    """Complete Phase A against a budget verdict and look at HEAD and the remote."""
+
+    worktrees = False
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.remote = self.root / "remote.git"
+        self.project = self.root / "project"
+        git(self.root, "init", "-q", "--bare", str(self.remote))
+        self.project.mkdir()
+        git(self.project, "init", "-q", "-b", "main")
+        git(self.project, "config", "user.email", "test@example.com")
+        git(self.project, "config", "user.name", "Test")
+        git(self.project, "remote", "add", "origin", str(self.remote))
+        (self.project / ".gitignore").write_text(".ai-workflow/\n")
+        (self.project / "index.html").write_text("<p>before</p>\n")
+        git(self.project, "add", "-A")
+        git(self.project, "commit", "-q", "-m", "initial")
+        git(self.project, "push", "-q", "-u", "origin", "main")
+        self.initial = git(self.project, "rev-parse", "HEAD")
+
+        workflow_dir = self.project / ".ai-workflow"
+        workflow_dir.mkdir()
+        (workflow_dir / "planning.md").write_text("### Task A1: Edit\n\nChange the page.\n\n### Task B1: Next\n\nMore.\n")
+        self.orc = orchestrator.Orchestrator(str(self.project), {
+            "sound_notifications": False,
+            "status_check_interval": 0.05,
+            "max_tasks_per_phase": 1,
+            "auto_commit": True,
+            "auto_push": True,
+            "async_push": False,
+            "auto_cascade": False,
+            "run_tests": True,
+            "budget_action": "retry",
+            "retry_delay": 60,
+            "phase_worktrees": self.worktrees
+        })
+        self.orc.logger.console = False
+        self.orc.call(self.orc.analyze_plan)
+        self.orc.call(self.orc.start_workflow)
+        self.phase = self.orc.session.phases[0]
+
+    def tearDown(self):
+        self.orc._stop_monitoring()
+        self.orc.git.push_queue.stop(flush_timeout=0)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def complete(self, budget: dict):
+        """Report Phase A complete and wait until the gate has run."""
+        with mock.patch.object(self.orc.test_runner, "run_tests", return_value={"tests": []}), \
+                mock.patch.object(self.orc.budget, "evaluate", return_value=budget):
+            self.orc.call(self.orc._handle_phase_completion, {"state": "completed", "files_modified": []})
+            deadline = time.time() + 10
+            while time.time() < deadline and self.scheduled("completion"):
+                time.sleep(0.05)
+
+    def edit(self) -> Path:
+        """Edit the page where Phase A works."""
+        root = self.orc.worktrees.path_for("A") if self.worktrees else self.project
+        (root / "index.html").write_text("<p>after</p>\n")
+        return root
+
+    def scheduled(self, tag: str) -> bool:
+        """Whether a job with the tag is pending (asked on the loop, between jobs)."""
+        return self.orc.call(self.orc.scheduler.pending_count, tag) > 0
+
+    def test_failed_budget_rewinds_the_unpushed_commit(self):
+        self.edit()
+        self.complete(FAILED)
+
+        self.assertEqual(self.phase.state, orchestrator.PhaseState.ERROR)
+        self.assertTrue(self.scheduled("retry"))
+        self.assertEqual(git(self.project, "rev-parse", "HEAD"), self.initial)
+        self.assertEqual(git(self.remote, "rev-parse", "main"), self.initial)
+        self.assertEqual(self.orc.session.git_commits, [])
+
+    def test_passed_budget_pushes_the_commit(self):
+        self.edit()
+        self.complete(PASSED)
+
+        head = git(self.project, "rev-parse", "HEAD")
+        self.assertNotEqual(head, self.initial)
+        self.assertEqual(git(self.remote, "rev-parse", "main"), head)
+        self.assertEqual((self.project / "index.html").read_text(), "<p>after</p>\n")
+        self.assertFalse(self.scheduled("retry"))
+
+    def test_retry_keeps_the_changes(self):
+        self.edit()
+        self.complete(FAILED)
+        self.assertEqual((self.project / "index.html").read_text(), "<p>after</p>\n")
+
+        # The retry keeps its baseline, so the rewound change is committed next time
+        self.complete(PASSED)
+        self.assertEqual(git(self.remote, "show", "main:index.html"), "<p>after</p>")
+
+
+class WorktreeBudgetGateTest(BudgetGateTest):
+    """The same gate when phases merge back from their own worktrees."""
+
+    worktrees = True
+
+    def test_retry_keeps_the_changes(self):
+        worktree = self.edit()
+        self.complete(FAILED)
+        self.assertEqual((self.project / "index.html").read_text(), "<p>before</p>\n")
+        self.assertEqual((worktree / "index.html").read_text(), "<p>after</p>\n")
+
+        self.orc.call(self.orc.retry_phase, "A")
+        self.assertEqual(self.orc.worktrees.path_for("A"), worktree)
+        self.complete(PASSED)
+        self.assertEqual(git(self.remote, "show", "main:index.html"), "<p>after</p>")
+        self.assertFalse(worktree.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Command report: estimated token counts and the debug-only legacy comparison.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+SHARED = (
+    "**Files:** index.html, css/main.css\n"
+    "Keep the header markup unchanged and reuse the existing spacing variables; "
+    "do not add new colours outside the palette."
+)
+
+
+def task(task_id: str, body: str) -> orchestrator.Task:
+    return orchestrator.Task(task_id, f"Task {task_id}", f"### Task {task_id}: Title\n\n{body}", "A", 1, 5)
+
+
+class CommandReportTest(unittest.TestCase):
+    """Build the command of a three-task phase that shares one context block."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        workflow_dir = self.root / ".ai-workflow"
+        workflow_dir.mkdir()
+        self.logger = orchestrator.Logger(workflow_dir / "logs")
+        self.logger.console = False
+        self.config = {"context_snippets": False}
+        self.claude = orchestrator.ClaudeCodeManager(self.root, workflow_dir, self.logger, self.config)
+        self.phase = orchestrator.Phase("A", "Phase A", [
+            task(f"A{i}", f"{SHARED}\n\nStep {i}: change item {i}.") for i in range(1, 4)
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_counts_are_character_estimates(self):
+        self.assertEqual(orchestrator.CommandBuilder.count_tokens(""), 0)
+        self.assertEqual(orchestrator.CommandBuilder.count_tokens("abcd"), 1)
+        self.assertEqual(orchestrator.CommandBuilder.count_tokens("abcde"), 2)
+
+        content, report = self.claude.build_command(self.phase)
+        self.assertEqual(report["tokens"], orchestrator.CommandBuilder.count_tokens(content))
+
+    def test_legacy_layout_is_only_rendered_at_debug(self):
+        _, report = self.claude.build_command(self.phase)
+        self.assertIsNone(report["legacy_tokens"])
+        self.assertIsNone(report["saved_tokens"])
+        self.assertEqual(report["shared_blocks"], 1)
+
+        self.config["log_level"] = "DEBUG"
+        _, report = self.claude.build_command(self.phase)
+        self.assertGreater(report["saved_tokens"], 0)
+        self.assertEqual(report["legacy_tokens"] - report["tokens"], report["saved_tokens"])
+
+    def test_uncompacted_command_is_its_own_legacy(self):
+        self.config["compact_commands"] = False
+        content, report = self.claude.build_command(self.phase)
+        self.assertEqual(report["legacy_tokens"], report["tokens"])
+        self.assertEqual(report["saved_tokens"], 0)
+        self.assertEqual(report["shared_blocks"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Orchestrator commands: submit()/call() run on the orchestrator loop one at
+a time, and get_state() reads the published snapshot without waiting.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+
+class CommandTest(unittest.TestCase):
+    """Commands against an orchestrator with an analyzed two-phase plan."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        workflow_dir = self.root / ".ai-workflow"
+        workflow_dir.mkdir()
+        (workflow_dir / "planning.md").write_text("### Task A1: One\n\nx\n\n### Task B1: Two\n\ny\n")
+        self.orc = orchestrator.Orchestrator(str(self.root), {
+            "sound_notifications": False,
+            "max_tasks_per_phase": 1,
+            "max_queued_commands": 50
+        })
+        self.orc.logger.console = False
+        self.orc.call(self.orc.analyze_plan)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.orc._stop_monitoring()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def blocking(self) -> str:
+        """A command that holds the loop until the test releases it."""
+        self.release.wait(10)
+        return "released"
+
+    def test_commands_from_many_threads_run_one_at_a_time_in_order(self):
+        ran, active, overlaps = [], [0], []
+
+        def command(thread: int, i: int):
+            active[0] += 1
+            overlaps.append(active[0])
+            time.sleep(0.001)
+            ran.append((thread, i))
+            active[0] -= 1
+
+        def client(thread: int):
+            futures = [self.orc.submit(command, thread, i) for i in range(10)]
+            for future in futures:
+                future.result(10)
+
+        threads = [threading.Thread(target=client, args=(t,)) for t in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(max(overlaps), 1)
+        self.assertEqual(len(ran), 40)
+        for t in range(4):
+            self.assertEqual([i for thread, i in ran if thread == t], list(range(10)))
+
+    def test_timeout_leaves_the_command_queued(self):
+        ran = threading.Event()
+        self.orc.submit(self.blocking)
+
+        def later():
+            ran.set()
+            return {"success": True}
+
+        started = time.time()
+        result = self.orc.call(later, timeout=0.2)
+        self.assertLess(time.time() - started, 2)
+        self.assertEqual(result["queued"], True)
+        self.assertFalse(result["success"])
+        self.assertFalse(ran.is_set())
+
+        self.assertTrue(self.orc.call(later, timeout=0)["queued"])  # an explicit 0 does not wait
+
+        self.release.set()
+        self.assertTrue(ran.wait(5))
+
+    def test_exceptions_reach_the_caller(self):
+        def broken():
+            raise ValueError("bad phase id")
+
+        future = self.orc.submit(broken)
+        self.assertIsInstance(future.exception(5), ValueError)
+        self.assertEqual(self.orc.call(broken), {"success": False, "error": "bad phase id"})
+        self.assertEqual(self.orc.call(lambda: "still running"), "still running")
+
+    def test_reads_do_not_wait_for_a_running_command(self):
+        future = self.orc.submit(self.blocking)
+        time.sleep(0.1)
+        self.assertFalse(future.done())
+
+        started = time.time()
+        state = self.orc.get_state()
+        config = self.orc.get_config()
+        self.assertLess(time.time() - started, 0.5)
+        self.assertEqual([phase["id"] for phase in state["session"]["phases"]], ["A", "B"])
+        self.assertEqual(config["max_tasks_per_phase"], 1)
+
+        self.release.set()
+        self.assertEqual(future.result(5), "released")
+
+    def test_queue_limit_rejects_new_commands(self):
+        self.orc.config["max_queued_commands"] = 2
+        self.orc.submit(self.blocking)
+        time.sleep(0.1)
+        queued = [self.orc.submit(lambda: "ok") for _ in range(2)]
+        rejected = self.orc.submit(lambda: "ok")
+
+        self.assertTrue(rejected.done())
+        self.assertIn("Too many queued commands", rejected.result()["error"])
+        self.release.set()
+        self.assertEqual([future.result(5) for future in queued], ["ok", "ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
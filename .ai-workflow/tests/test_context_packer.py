@@ -0,0 +1,114 @@
+"""
+ContextPacker: resolving file, line-range and selector references into
+snippets, merging ranges and packing them within the token budget.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+PAGE = "\n".join(
+    ['<!DOCTYPE html>', '<html>', '<head>', '<link rel="stylesheet" href="css/main.css">', '</head>', '<body>']
+    + [f'<p>filler {i}</p>' for i in range(6)]
+    + ['<section class="hero wide">', '<h1 id="title">Hi</h1>', '</section>']
+    + [f'<p>more {i}</p>' for i in range(6)]
+    + ['</body>', '</html>']
+)
+
+STYLES = """body { margin: 0; }
+
+.hero {
+    padding: 2rem;
+    color: white;
+}
+
+#title { font-size: 2rem; }
+"""
+
+
+def task(body: str, task_id: str = "A1") -> orchestrator.Task:
+    return orchestrator.Task(task_id, "Title", f"### Task {task_id}: Title\n\n{body}", "A", 1, 5)
+
+
+class ContextPackerTest(unittest.TestCase):
+    """A page and a stylesheet; snippets for tasks that refer to them."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        (self.root / "css").mkdir()
+        (self.root / "index.html").write_text(PAGE)
+        (self.root / "css/main.css").write_text(STYLES)
+        logger = orchestrator.Logger(self.root / ".ai-workflow/logs")
+        logger.console = False
+        self.config = {"context_snippet_radius": 1}
+        self.packer = orchestrator.ContextPacker(self.root, logger, self.config)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def snippets(self, body: str) -> list:
+        return [(s["path"], s["start"], s["end"], s["reason"])
+                for s in self.packer.task_snippets(task(body), self.packer._files())]
+
+    def test_explicit_line_ranges(self):
+        self.assertEqual(self.snippets("Fix index.html:3-5 and main.css:1"), [
+            ("index.html", 3, 5, "referenced"),
+            ("css/main.css", 1, 1, "referenced")
+        ])
+
+    def test_selectors_expand_to_the_rule_and_the_markup(self):
+        self.assertEqual(self.snippets("Restyle `.hero` in css/main.css"), [
+            ("css/main.css", 3, 6, ".hero"),
+            ("index.html", 12, 14, ".hero")
+        ])
+
+    def test_overlapping_ranges_merge(self):
+        self.assertEqual(self.snippets("See index.html:12-13, then `#title` and `.hero`"), [
+            ("index.html", 12, 15, "referenced, #title, .hero"),
+            ("css/main.css", 8, 8, "#title"),
+            ("css/main.css", 3, 6, ".hero")
+        ])
+
+    def test_ambiguous_or_missing_files_are_ignored(self):
+        (self.root / "old").mkdir()
+        (self.root / "old/main.css").write_text(".x {}\n")
+        self.assertEqual(self.snippets("Compare main.css:1 with missing.html:2"), [])
+        self.assertEqual(self.snippets("Compare old/main.css:1"), [("old/main.css", 1, 1, "referenced")])
+
+    def test_pack_renders_fenced_blocks(self):
+        packed = self.packer.pack([task("Restyle `#title`")])
+        self.assertEqual(packed["A1"][:6], [
+            "**Context:**", "", "`css/main.css:8-8` (#title)", "```css", "#title { font-size: 2rem; }", "```"
+        ])
+        self.assertEqual(self.packer.last_stats["snippets"], 2)
+        self.assertEqual(self.packer.last_stats["omitted"], 0)
+
+    def test_budget_lists_what_does_not_fit(self):
+        self.config["context_snippet_tokens"] = 30
+        packed = self.packer.pack([task("Restyle `.hero`")])
+        self.assertEqual(packed["A1"][-2], "_Not included (context budget): index.html:12-14_")
+        self.assertEqual(self.packer.last_stats["omitted"], 1)
+        self.assertLessEqual(self.packer.last_stats["tokens"], 30)
+
+    def test_repeated_snippets_are_shown_once_per_phase(self):
+        packed = self.packer.pack([task("Fix `#title`", "A1"), task("Also `#title`", "A2")])
+        self.assertIn("A1", packed)
+        self.assertNotIn("A2", packed)
+
+    def test_index_follows_file_changes(self):
+        self.assertEqual(self.snippets("`.promo`"), [])
+        (self.root / "css/main.css").write_text(STYLES + "\n.promo { color: red; }\n")
+        self.assertEqual(self.snippets("`.promo`"), [("css/main.css", 10, 10, ".promo")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+CssTokenizer / CssAnalyzer: block structure around strings, comments and
+url(), error reporting, nested at-rules and the CSS Usage suite.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+analyze = orchestrator.CssAnalyzer.analyze
+
+
+def kinds(css: str) -> list:
+    return [kind for kind, _, _ in orchestrator.CssTokenizer.tokenize(css)]
+
+
+class CssTokenizerTest(unittest.TestCase):
+
+    def test_braces_and_semicolons_inside_strings(self):
+        tokens = list(orchestrator.CssTokenizer.tokenize('a::after { content: "} ; {"; }'))
+        self.assertIn(("string", '"} ; {"', 20), tokens)
+        self.assertEqual(kinds('a::after { content: "} ; {"; }').count("close"), 1)
+
+        stats = analyze('a::after { content: "} ; {"; color: red }')
+        self.assertEqual((stats["rules"], stats["declarations"], stats["errors"]), (1, 2, []))
+
+    def test_braces_inside_comments(self):
+        stats = analyze('/* .x { } */ .a { color: red; /* ; } */ }')
+        self.assertEqual((stats["rules"], stats["declarations"], stats["errors"]), (1, 1, []))
+        self.assertEqual(stats["rule_list"][0]["selectors"], [".a"])
+
+    def test_url_with_and_without_quotes(self):
+        css = ".a { background: url(data:image/svg+xml;utf8,<svg>{}</svg>); } .b { background: url('x;}.png') }"
+        self.assertEqual(kinds(css).count("url"), 2)
+        stats = analyze(css)
+        self.assertEqual((stats["rules"], stats["declarations"], stats["errors"]), (2, 2, []))
+
+    def test_escaped_quotes(self):
+        stats = analyze(r'.a { content: "say \"}\""; } .b { content: ' + "'it\\'s {'" + '; }')
+        self.assertEqual((stats["rules"], stats["declarations"], stats["errors"]), (2, 2, []))
+
+    def test_unterminated_string_and_comment(self):
+        stats = analyze('.a { content: "open;\n}\n.b { color: red; }\n/* never closed { }')
+        self.assertIn("line 1: Unterminated string", stats["errors"])
+        self.assertIn("line 4: Unterminated comment", stats["errors"])
+        self.assertEqual(stats["rules"], 2)
+
+    def test_structural_errors(self):
+        self.assertEqual(analyze(".a { color: red; }}")["errors"], ["line 1: Unmatched closing brace"])
+        self.assertEqual(analyze(".a {\n color: red;\n")["errors"], ["line 1: Unclosed block (declarations)"])
+        self.assertEqual(analyze("{ color: red }")["errors"], ["line 1: Block without selector"])
+
+
+class CssAnalyzerTest(unittest.TestCase):
+
+    def test_nested_media_and_supports(self):
+        css = """
+        @media (min-width: 40em) {
+            @supports (display: grid) {
+                .grid, .list:is(.a, .b) { display: grid; gap: 1rem; }
+            }
+            .wide { width: 100%; }
+        }
+        .top { color: red; }
+        """
+        stats = analyze(css)
+        self.assertEqual(stats["errors"], [])
+        self.assertEqual((stats["rules"], stats["selectors"], stats["at_rules"]), (3, 4, 2))
+        contexts = {rule["selectors"][0]: rule["context"] for rule in stats["rule_list"]}
+        self.assertEqual(contexts, {
+            ".grid": "@media (min-width: 40em) @supports (display: grid)",
+            ".wide": "@media (min-width: 40em)",
+            ".top": ""
+        })
+        self.assertEqual(stats["rule_list"][0]["selectors"], [".grid", ".list:is(.a, .b)"])
+        self.assertEqual(stats["rule_list"][0]["body"], "display: grid; gap: 1rem;")
+
+    def test_keyframes_font_face_and_imports(self):
+        css = """
+        @import url("base.css");
+        @import 'theme.css';
+        @keyframes spin { from { transform: rotate(0) } to { transform: rotate(360deg) } }
+        @font-face { font-family: X; src: url(x.woff2); }
+        """
+        stats = analyze(css)
+        self.assertEqual(stats["imports"], ["base.css", "theme.css"])
+        self.assertEqual(stats["errors"], [])
+        self.assertEqual(stats["rule_list"], [])  # frames and @font-face are not selectors
+        self.assertEqual((stats["rules"], stats["at_rules"], stats["declarations"]), (2, 4, 4))
+
+
+class CssUsageTest(unittest.TestCase):
+    """The CSS Usage suite on one page and one stylesheet."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        (self.root / "index.html").write_text(
+            '<html><head><link rel="stylesheet" href="site.css"></head>'
+            '<body><div id="main" class="card w--open"><p class="title">Hi</p></div></body></html>'
+        )
+        (self.root / "site.css").write_text(
+            ".card { padding: 1rem; }\n"
+            ".card .title, .ghost { font-weight: bold; }\n"
+            "#main > .title { color: red; }\n"
+            ".ghost { display: none; }\n"
+            ".card:not(.ghost) { margin: 0; }\n"
+            ".w--open { display: block; }\n"
+            ".card { padding: 1rem; }\n"
+        )
+        workflow_dir = self.root / ".ai-workflow"
+        workflow_dir.mkdir()
+        logger = orchestrator.Logger(workflow_dir / "logs")
+        logger.console = False
+        self.runner = orchestrator.TestRunner(self.root, workflow_dir, logger, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_unused_selectors(self):
+        test = self.runner._test_css_usage()
+        metrics = test["metrics"]["files"]["site.css"]
+        self.assertEqual(test["status"], "passed")
+        self.assertEqual(metrics["rules"], 7)
+        self.assertEqual(metrics["unused_selectors"], 2)  # .ghost twice
+        self.assertEqual(metrics["unused_bytes"], len(".ghost { display: none; }"))
+        self.assertEqual(metrics["duplicate_rules"], 1)
+        self.assertIn("site.css: duplicate rule '.card'", test["details"])
+
+    def test_validation_suite(self):
+        self.assertEqual(self.runner._test_css_validity()["status"], "passed")
+        (self.root / "site.css").write_text('.a { content: "}"; }\n.b { color: red;\n')
+        test = self.runner._test_css_validity()
+        self.assertEqual(test["status"], "failed")
+        self.assertEqual(test["details"], ["site.css: line 2: Unclosed block (declarations)"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Diagnostics: who may use the debug endpoints (disabled, no token, wrong
+token, header forms) and the thread stack report.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+
+class DiagnosticsAuthorizeTest(unittest.TestCase):
+    """authorize() against each combination of config and headers."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.logger = orchestrator.Logger(self.root / "logs")
+        self.logger.console = False
+        self.config = {"debug_endpoints": True, "debug_token": "s3cret"}
+        self.diagnostics = orchestrator.Diagnostics(self.config, self.logger, None)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_disabled_is_not_found(self):
+        self.config["debug_endpoints"] = False
+        status, error = self.diagnostics.authorize({"X-Debug-Token": "s3cret"})
+        self.assertEqual(status, 404)
+        self.assertIn("debug_endpoints", error)
+
+    def test_no_configured_token_is_forbidden(self):
+        self.config["debug_token"] = ""
+        self.assertEqual(self.diagnostics.authorize({"X-Debug-Token": ""}),
+                         (403, "Set debug_token to use the debug endpoints"))
+
+    def test_missing_or_wrong_token_is_unauthorized(self):
+        for headers in ({}, {"X-Debug-Token": "wrong"}, {"Authorization": "Bearer wrong"},
+                        {"Authorization": "s3cret"}, {"X-Debug-Token": "s3cret-and-more"}):
+            self.assertEqual(self.diagnostics.authorize(headers), (401, "Missing or wrong debug token"), headers)
+        warnings = [entry for entry in self.logger.get_recent() if entry["level"] == "WARN"]
+        self.assertEqual(len(warnings), 5)
+
+    def test_token_in_either_header(self):
+        self.assertEqual(self.diagnostics.authorize({"X-Debug-Token": "s3cret"}), (0, None))
+        self.assertEqual(self.diagnostics.authorize({"Authorization": "Bearer s3cret"}), (0, None))
+        self.assertEqual(self.diagnostics.authorize({"X-Debug-Token": " s3cret\n"}), (0, None))
+        # X-Debug-Token wins when both are sent
+        self.assertEqual(self.diagnostics.authorize(
+            {"X-Debug-Token": "wrong", "Authorization": "Bearer s3cret"})[0], 401)
+
+    def test_settings_are_read_per_request(self):
+        self.assertEqual(self.diagnostics.authorize({"X-Debug-Token": "s3cret"}), (0, None))
+        self.config["debug_token"] = "rotated"
+        self.assertEqual(self.diagnostics.authorize({"X-Debug-Token": "s3cret"})[0], 401)
+
+    def test_thread_stacks(self):
+        report = self.diagnostics.thread_stacks()
+        self.assertEqual(report["count"], len(report["threads"]))
+        current = [entry for entry in report["threads"] if entry["ident"] == threading.get_ident()]
+        self.assertEqual(len(current), 1)
+        self.assertTrue(any("test_diagnostics.py" in frame for frame in current[0]["stack"]))
+
+    def test_profile_rejects_unknown_sort(self):
+        status, body = self.diagnostics.profile(1, sort="bogus")
+        self.assertEqual(status, 400)
+        self.assertIn("cumulative", body["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+"""
+GitManager against a temporary repository: porcelain v2 status parsing,
+the plumbing commit path, diff-tree numstat parsing and phase deltas.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+
+def git(cwd: Path, *args: str) -> str:
+    """Run git and return its stripped output."""
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+class GitPlumbingTest(unittest.TestCase):
+    """A fresh repository per test; commits go through commit_and_push."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.repo = self.root / "repo"
+        self.repo.mkdir()
+        git(self.repo, "init", "-q", "-b", "main")
+        git(self.repo, "config", "user.email", "test@example.com")
+        git(self.repo, "config", "user.name", "Test")
+
+        self.logger = orchestrator.Logger(self.root / "logs")
+        self.logger.console = False
+        self.git = orchestrator.GitManager(self.repo, self.logger, {"auto_push": False})
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def write(self, path: str, text: str):
+        (self.repo / path).parent.mkdir(parents=True, exist_ok=True)
+        (self.repo / path).write_text(text)
+
+    def commit_all(self, message: str = "setup") -> str:
+        git(self.repo, "add", "-A")
+        git(self.repo, "commit", "-q", "-m", message)
+        return git(self.repo, "rev-parse", "HEAD")
+
+    def entries(self) -> dict:
+        return {entry.path: entry for entry in self.git.status_snapshot()["entries"]}
+
+    def tree(self, rev: str = "HEAD") -> list:
+        return [path for path in git(self.repo, "ls-tree", "-r", "-z", "--name-only", rev).split('\0') if path]
+
+    def test_initial_commit_without_head(self):
+        self.write("index.html", "<p>hi</p>\n")
+        snapshot = self.git.status_snapshot()
+        self.assertIsNone(snapshot["head"])
+        self.assertEqual(snapshot["branch"], "main")
+        self.assertEqual(snapshot["paths"], ["index.html"])
+        self.assertTrue(snapshot["entries"][0].is_untracked)
+
+        commit = self.git.commit_and_push("A", "first")
+        self.assertEqual(git(self.repo, "rev-parse", "HEAD"), commit)
+        self.assertEqual(self.tree(), ["index.html"])
+        stat = self.git.diffstat(commit)
+        self.assertEqual(stat["files"], [
+            {"path": "index.html", "orig_path": None, "added": 1, "deleted": 0, "binary": False}
+        ])
+
+    def test_rename_carries_its_source_path(self):
+        self.write("old.css", ".a { color: red; }\n" * 10)
+        self.commit_all()
+        git(self.repo, "mv", "old.css", "new name.css")
+
+        entry = self.entries()["new name.css"]
+        self.assertEqual(entry.status, "R.")
+        self.assertEqual(entry.orig_path, "old.css")
+        self.assertEqual(entry.paths, ["new name.css", "old.css"])
+
+        commit = self.git.commit_and_push("A", "rename", paths=["new name.css"])
+        self.assertEqual(self.tree(), ["new name.css"])
+        files = self.git.diffstat(commit)["files"]
+        self.assertEqual([(f["orig_path"], f["path"]) for f in files], [("old.css", "new name.css")])
+
+    def test_copy_carries_its_source_path(self):
+        git(self.repo, "config", "status.renames", "copies")
+        self.write("a.js", "console.log('a');\n" * 10)
+        self.commit_all()
+        shutil.copy(self.repo / "a.js", self.repo / "b.js")
+        self.write("a.js", "console.log('a');\n" * 9)  # status only detects copies of modified sources
+        git(self.repo, "add", "-A")
+
+        entry = self.entries()["b.js"]
+        self.assertEqual(entry.status, "C.")
+        self.assertEqual(entry.orig_path, "a.js")
+        self.assertIsNotNone(self.git.commit_and_push("A", "copy", paths=["b.js"]))
+        self.assertEqual(self.tree(), ["a.js", "b.js"])
+        self.assertEqual(git(self.repo, "show", "HEAD:a.js").count("\n"), 8)
+
+    def test_paths_with_spaces_and_newlines(self):
+        self.write("keep.txt", "keep\n")
+        self.commit_all()
+        names = ["with space.html", "new\nline.html", "dir with space/\"quoted\".css"]
+        for name in names:
+            self.write(name, "x\n")
+        self.write("keep.txt", "changed\n")
+
+        self.assertEqual(sorted(self.entries()), sorted(names + ["keep.txt"]))
+        commit = self.git.commit_and_push("A", "odd names")
+        self.assertEqual(sorted(self.tree()), sorted(names + ["keep.txt"]))
+        self.assertEqual(sorted(f["path"] for f in self.git.diffstat(commit)["files"]), sorted(names + ["keep.txt"]))
+        self.assertEqual(self.git.status_snapshot()["entries"], [])
+
+    def test_deleted_files_are_removed_from_the_tree(self):
+        self.write("gone.html", "bye\n")
+        self.write("kept.html", "hi\n")
+        head = self.commit_all()
+        baseline = self.git.baseline_snapshot()
+        (self.repo / "gone.html").unlink()
+
+        self.assertEqual(self.entries()["gone.html"].status, ".D")
+        self.assertEqual(self.git.phase_delta(baseline), ["gone.html"])
+        commit = self.git.commit_and_push("A", "delete")
+        self.assertEqual(git(self.repo, "rev-parse", "HEAD^"), head)
+        self.assertEqual(self.tree(), ["kept.html"])
+        self.assertEqual(self.git.diffstat(commit)["deleted"], 1)
+
+    def test_unmerged_entries(self):
+        self.write("page.html", "base\n")
+        self.commit_all()
+        git(self.repo, "checkout", "-q", "-b", "other")
+        self.write("page.html", "other\n")
+        self.commit_all("other")
+        git(self.repo, "checkout", "-q", "main")
+        self.write("page.html", "main\n")
+        self.commit_all("main")
+        subprocess.run(["git", "merge", "-q", "other"], cwd=self.repo, capture_output=True)
+
+        entry = self.entries()["page.html"]
+        self.assertEqual(entry.status, "UU")
+        self.assertIsNone(entry.orig_path)
+        self.assertFalse(entry.is_untracked)
+
+    def test_update_ref_rejects_a_moved_head(self):
+        self.write("a.html", "a\n")
+        self.commit_all()
+        stale = self.git.status_snapshot()["head"]
+        self.write("b.html", "b\n")
+        concurrent = self.commit_all("concurrent")
+
+        self.write("c.html", "c\n")
+        self.assertIsNone(self.git.commit_paths(["c.html"], "stale", stale))
+        self.assertEqual(git(self.repo, "rev-parse", "HEAD"), concurrent)
+
+    def test_phase_delta_ignores_untouched_dirty_paths(self):
+        self.write("a.html", "a\n")
+        self.write("b.html", "b\n")
+        self.commit_all()
+        self.write("a.html", "dirty before the phase\n")
+        self.write(".ai-workflow/state.json", "{}")
+        baseline = self.git.baseline_snapshot(exclude=(".ai-workflow/",))
+        self.assertEqual(sorted(baseline["dirty"]), ["a.html"])
+
+        self.write("b.html", "committed during the phase\n")
+        git(self.repo, "commit", "-q", "-m", "agent commit", "b.html")
+        self.write("c.html", "new\n")
+        self.write(".ai-workflow/state.json", '{"changed": true}')
+        self.assertEqual(self.git.phase_delta(baseline, exclude=(".ai-workflow/",)), ["b.html", "c.html"])
+
+        self.write("a.html", "edited again during the phase\n")
+        self.assertEqual(self.git.phase_delta(baseline, exclude=(".ai-workflow/",)), ["a.html", "b.html", "c.html"])
+
+    def test_phase_delta_from_an_empty_repository(self):
+        baseline = self.git.baseline_snapshot()
+        self.assertEqual(baseline, {"head": None, "dirty": {}})
+        self.write("index.html", "hi\n")
+        self.commit_all()
+        self.write("new.css", "x\n")
+        self.assertEqual(self.git.phase_delta(baseline), ["index.html", "new.css"])
+
+
+if __name__ == "__main__":
+    unittest.main()
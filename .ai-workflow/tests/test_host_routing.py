@@ -0,0 +1,102 @@
+"""
+OrchestratorHost routing: host pages, project paths rewritten to the
+single-project API, and 404s for unknown projects and paths.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import http.client
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+
+class HostRoutingTest(unittest.TestCase):
+    """A host with two projects behind a real HTTP server."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        for name in ("site", "Site!"):
+            workflow_dir = self.root / name / ".ai-workflow"
+            workflow_dir.mkdir(parents=True)
+            (workflow_dir / "planning.md").write_text(f"### Task A1: {name}\n\nx\n")
+        self.host = orchestrator.OrchestratorHost(
+            [str(self.root / "site"), str(self.root / "Site!")], {"sound_notifications": False}, workers=2
+        )
+        for project in self.host.projects.values():
+            project.logger.console = False
+        self.host.scheduler.start()
+        self.server = orchestrator.ThreadedHTTPServer(
+            ("127.0.0.1", 0), orchestrator.DashboardHandler, host=self.host
+        )
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.host.shutdown()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def request(self, method: str, path: str) -> tuple:
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=10)
+        try:
+            connection.request(method, path, body="{}" if method == "POST" else None)
+            response = connection.getresponse()
+            body = response.read().decode("utf-8")
+            if response.getheader("Content-Type", "").startswith("application/json"):
+                body = json.loads(body)
+            return response.status, body
+        finally:
+            connection.close()
+
+    def test_project_ids(self):
+        self.assertEqual(sorted(self.host.projects), ["site", "site-2"])
+        self.assertEqual(self.host.add_project(str(self.root / "site")), "site")
+
+    def test_host_pages(self):
+        status, body = self.request("GET", "/")
+        self.assertEqual(status, 200)
+        self.assertIn("<html", body.lower())
+
+        status, body = self.request("GET", "/api/projects")
+        self.assertEqual(status, 200)
+        self.assertEqual([project["id"] for project in body["projects"]], ["site", "site-2"])
+        self.assertEqual(self.request("GET", "/api/health"), (200, {"status": "ok", "version": orchestrator.VERSION}))
+
+    def test_project_api_is_rewritten(self):
+        status, body = self.request("POST", "/api/projects/site-2/analyze")
+        self.assertEqual(status, 200)
+        self.assertTrue(body["success"])
+
+        status, body = self.request("GET", "/api/projects/site-2/state")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["session"]["phases"][0]["tasks"][0]["title"], "Site!")
+        self.assertEqual(self.request("GET", "/api/projects/site/state")[1]["session"]["phases"], [])
+
+    def test_project_dashboard(self):
+        status, body = self.request("GET", "/projects/site/")
+        self.assertEqual(status, 200)
+        self.assertEqual(body, (Path(orchestrator.__file__).parent / "dashboard.html").read_text(encoding="utf-8"))
+        self.assertEqual(self.request("GET", "/projects/site")[0], 200)
+        self.assertEqual(self.request("GET", "/projects/site/state")[0], 404)
+
+    def test_unknown_projects_and_paths(self):
+        self.assertEqual(self.request("GET", "/api/projects/nope/state"), (404, {"error": "Unknown project: nope"}))
+        self.assertEqual(self.request("POST", "/api/projects/nope/start")[0], 404)
+        status, body = self.request("GET", "/api/state")
+        self.assertEqual(status, 404)
+        self.assertIn("/api/projects/<id>/", body["error"])
+        self.assertEqual(self.request("GET", "/api/projects/site/nothing")[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+DashboardHandler responses: ETag / Last-Modified validators answered with
+304, and gzip negotiation (q=0 refusals, the GZIP_MIN_BYTES threshold).
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import gzip
+import http.client
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from email.utils import formatdate
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+
+class HttpResponseTest(unittest.TestCase):
+    """One orchestrator behind a real HTTP server."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        workflow_dir = self.root / ".ai-workflow"
+        workflow_dir.mkdir()
+        (workflow_dir / "dashboard.html").write_text("<html>" + "<p>dashboard</p>" * 200 + "</html>")
+        self.orc = orchestrator.Orchestrator(str(self.root), {"sound_notifications": False})
+        self.orc.logger.console = False
+        self.server = orchestrator.ThreadedHTTPServer(
+            ("127.0.0.1", 0), orchestrator.DashboardHandler, orchestrator=self.orc
+        )
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.orc._stop_monitoring()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def get(self, path: str, **headers) -> tuple:
+        """GET a path; header names use underscores (If_None_Match)."""
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=10)
+        try:
+            connection.request("GET", path, headers={
+                name.replace("_", "-"): value for name, value in headers.items()
+            })
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            connection.close()
+
+    def test_small_bodies_are_not_compressed(self):
+        status, headers, body = self.get("/api/health", Accept_Encoding="gzip")
+        self.assertEqual(status, 200)
+        self.assertLess(len(body), orchestrator.GZIP_MIN_BYTES)
+        self.assertNotIn("Content-Encoding", headers)
+        self.assertNotIn("Vary", headers)
+        self.assertIn("ETag", headers)
+
+    def test_large_bodies_are_gzipped_when_accepted(self):
+        _, plain_headers, plain = self.get("/api/config")
+        self.assertGreaterEqual(len(plain), orchestrator.GZIP_MIN_BYTES)
+        self.assertNotIn("Content-Encoding", plain_headers)
+        self.assertEqual(plain_headers["Vary"], "Accept-Encoding")
+
+        status, headers, body = self.get("/api/config", Accept_Encoding="br, gzip")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+        self.assertEqual(int(headers["Content-Length"]), len(body))
+        self.assertEqual(gzip.decompress(body), plain)
+        self.assertEqual(headers["ETag"], plain_headers["ETag"])
+
+    def test_accept_encoding_quality(self):
+        cases = {
+            "gzip": True,
+            "gzip;q=0.5": True,
+            "GZIP ; q=1.0": True,
+            "*": True,
+            "gzip;q=0": False,
+            "gzip; q=0.0, deflate": False,
+            "*;q=0": False,
+            "identity": False,
+            "gzip;q=0.000": False,
+        }
+        for accept, compressed in cases.items():
+            _, headers, _ = self.get("/api/config", Accept_Encoding=accept)
+            self.assertEqual(headers.get("Content-Encoding") == "gzip", compressed, accept)
+
+    def test_if_none_match(self):
+        _, headers, _ = self.get("/api/config")
+        etag = headers["ETag"]
+        for value in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            status, not_modified, body = self.get("/api/config", If_None_Match=value, Accept_Encoding="gzip")
+            self.assertEqual(status, 304, value)
+            self.assertEqual(body, b"")
+            self.assertEqual(not_modified["ETag"], etag)
+            self.assertNotIn("Content-Encoding", not_modified)
+            self.assertNotIn("Content-Length", not_modified)
+
+        self.assertEqual(self.get("/api/config", If_None_Match='"other"')[0], 200)
+
+    def test_if_modified_since_on_files(self):
+        status, headers, body = self.get("/", Accept_Encoding="gzip")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertIn(b"dashboard", gzip.decompress(body))
+        last_modified = headers["Last-Modified"]
+
+        self.assertEqual(self.get("/", If_Modified_Since=last_modified)[0], 304)
+        self.assertEqual(self.get("/", If_Modified_Since=formatdate(0, usegmt=True))[0], 200)
+        self.assertEqual(self.get("/", If_Modified_Since="not a date")[0], 200)
+        # If-None-Match wins over If-Modified-Since
+        self.assertEqual(self.get("/", If_None_Match='"other"', If_Modified_Since=last_modified)[0], 200)
+
+    def test_errors_are_never_not_modified(self):
+        status, headers, _ = self.get("/api/trace/Z")
+        self.assertEqual(status, 404)
+        self.assertEqual(self.get("/api/trace/Z", If_None_Match=headers["ETag"])[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+LayeredConfig: layer precedence, validation messages, hot reload of
+config.json with change notifications, restart-only and locked keys.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+DEFAULTS = {
+    "auto_cascade_delay": 5,
+    "auto_push": True,
+    "max_tasks_per_phase": 6,
+    "max_queued_commands": 100,
+    "log_level": "INFO",
+    "dashboard_port": 8080,
+    "debug_token": ""
+}
+
+
+class LayeredConfigTest(unittest.TestCase):
+    """A config.json next to a handful of known settings."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.config_file = self.root / "config.json"
+        self.logger = orchestrator.Logger(self.root / "logs")
+        self.logger.console = False
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def load(self, saved=None, **kwargs) -> orchestrator.LayeredConfig:
+        if saved is not None:
+            self.config_file.write_text(json.dumps(saved))
+        return orchestrator.LayeredConfig(DEFAULTS, self.config_file, self.logger, **kwargs)
+
+    def save(self, values: dict):
+        self.config_file.write_text(json.dumps({**DEFAULTS, **values}, indent=4))
+
+    def warnings(self) -> list:
+        return [entry["message"] for entry in self.logger.get_recent() if entry["level"] == "WARN"]
+
+    def test_layers_override_in_order(self):
+        config = self.load(
+            {"auto_cascade_delay": 1, "max_tasks_per_phase": 2},
+            overrides={"max_tasks_per_phase": 3},
+            environ={"AI_WORKFLOW_AUTO_CASCADE_DELAY": "2.5", "AI_WORKFLOW_LOG_LEVEL": "DEBUG"},
+            caps={"max_queued_commands": 10}
+        )
+        self.assertEqual(config["auto_cascade_delay"], 2.5)
+        self.assertEqual(config["max_tasks_per_phase"], 3)
+        self.assertEqual(config["log_level"], "DEBUG")  # plain strings need no JSON quotes
+        self.assertEqual(config["max_queued_commands"], 10)
+        self.assertEqual(config.describe()["sources"]["max_tasks_per_phase"], "cli")
+        # Missing defaults are written back to config.json
+        self.assertEqual(json.loads(self.config_file.read_text())["auto_push"], True)
+
+    def test_validation_errors(self):
+        config = self.load({
+            "auto_cascade_dely": 1,
+            "auto_push": "yes",
+            "max_tasks_per_phase": 0,
+            "log_level": "LOUD",
+            "dashboard_port": 8080.5
+        })
+        self.assertEqual(config.errors["config.json"], [
+            "unknown setting 'auto_cascade_dely' (did you mean 'auto_cascade_delay'?)",
+            "'auto_push' must be true or false, got \"yes\"",
+            "'max_tasks_per_phase' must be at least 1, got 0",
+            "'log_level' must be one of DEBUG, INFO, WARN, ERROR, got \"LOUD\"",
+            "'dashboard_port' must be an integer, got 8080.5"
+        ])
+        self.assertEqual({key: config[key] for key in DEFAULTS}, DEFAULTS)
+        self.assertIn("Config (config.json): 'auto_push' must be true or false, got \"yes\"; ignored", self.warnings())
+
+    def test_invalid_json_keeps_the_file(self):
+        self.config_file.write_text("{not json")
+        config = self.load()
+        self.assertEqual(config["max_tasks_per_phase"], 6)
+        self.assertEqual(self.config_file.read_text(), "{not json")
+
+    def test_reload_notifies_subscribers(self):
+        config = self.load()
+        everything, cascade = [], []
+        config.subscribe(lambda changes, source: everything.append((changes, source)))
+        config.subscribe(lambda changes, source: cascade.append(changes), keys=["auto_cascade_delay"])
+
+        self.assertEqual(config.reload(), {})  # unchanged file
+        self.save({"max_tasks_per_phase": 4})
+        self.assertEqual(config.reload(), {"max_tasks_per_phase": (6, 4)})
+        self.assertEqual(everything, [({"max_tasks_per_phase": (6, 4)}, "config.json")])
+        self.assertEqual(cascade, [])
+
+        self.save({"max_tasks_per_phase": 4, "auto_cascade_delay": 0.5})
+        config.reload()
+        self.assertEqual(cascade, [{"auto_cascade_delay": (5, 0.5)}])
+
+    def test_bad_reload_keeps_the_value_in_effect(self):
+        config = self.load({"max_tasks_per_phase": 4})
+        self.save({"max_tasks_per_phase": -1})
+        self.assertEqual(config.reload(), {})
+        self.assertEqual(config["max_tasks_per_phase"], 4)
+        self.assertIn("Config (config.json): 'max_tasks_per_phase' must be at least 1, got -1; keeping 4",
+                      self.warnings())
+
+        self.config_file.write_text("{broken")
+        self.assertEqual(config.reload(), {})
+        self.assertEqual(config["max_tasks_per_phase"], 4)
+
+    def test_restart_only_keys_wait(self):
+        config = self.load()
+        self.save({"dashboard_port": 9000})
+        self.assertEqual(config.reload(), {})
+        self.assertEqual(config["dashboard_port"], 8080)
+        self.assertEqual(config.pending_restart, {"dashboard_port": 9000})
+
+        self.save({"dashboard_port": 8080, "auto_cascade_delay": 10})
+        self.assertEqual(config.reload(), {"auto_cascade_delay": (5, 10)})
+        self.assertEqual(config.pending_restart, {})
+
+    def test_runtime_overrides(self):
+        config = self.load({"auto_cascade_delay": 1})
+        changes, problems = config.set_runtime({
+            "auto_cascade_delay": 3, "debug_token": "secret", "max_queued_commands": 0
+        })
+        self.assertEqual(changes, {"auto_cascade_delay": (1, 3)})
+        self.assertEqual(problems, [
+            "'debug_token' can only be set in config.json, the environment or the command line",
+            "'max_queued_commands' must be at least 1, got 0"
+        ])
+
+        changes, _ = config.set_runtime({"auto_cascade_delay": None})
+        self.assertEqual(changes, {"auto_cascade_delay": (3, 1)})
+
+    def test_secrets_are_masked(self):
+        config = self.load({"debug_token": "hunter2"})
+        self.assertEqual(config["debug_token"], "hunter2")
+        self.assertEqual(config.public()["debug_token"], "***")
+        self.assertEqual(config.describe()["layers"]["file"]["debug_token"], "***")
+        self.assertEqual(config.public({"debug_token": ""})["debug_token"], "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+LogStore: cursor paging, filters, the scan budget and restart recovery.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+START = datetime(2026, 1, 21, 10, 0, 0)
+INTERVAL = 8  # small index blocks so every query crosses several
+
+
+class LogStoreTest(unittest.TestCase):
+    """Queries against a store filled with 100 entries, one second apart."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.store = self.open_store()
+        for i in range(100):
+            self.store.append({
+                "timestamp": (START + timedelta(seconds=i)).isoformat(),
+                "level": "WARN" if i % 10 == 0 else "INFO",
+                "phase": "A" if i < 50 else "B",
+                "message": f"message {i}" + (" needle" if i % 25 == 3 else "")
+            })
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def open_store(self) -> orchestrator.LogStore:
+        return orchestrator.LogStore(self.root, index_interval=INTERVAL)
+
+    @staticmethod
+    def seqs(result) -> list:
+        return [entry["seq"] for entry in result["entries"]]
+
+    def epoch(self, second: int) -> float:
+        return (START + timedelta(seconds=second)).timestamp()
+
+    def test_pages_backwards_with_before(self):
+        first = self.store.query(limit=30)
+        self.assertEqual(self.seqs(first), list(range(70, 100)))
+        self.assertEqual(first["next"], {"before": 70})
+
+        seen = self.seqs(first)
+        cursor = first["next"]
+        while cursor:
+            page = self.store.query(limit=30, **cursor)
+            seen = self.seqs(page) + seen
+            cursor = page["next"]
+        self.assertEqual(seen, list(range(100)))
+
+    def test_tails_forwards_with_after(self):
+        page = self.store.query(limit=5, after=90)
+        self.assertEqual(self.seqs(page), [91, 92, 93, 94, 95])
+        self.assertEqual(page["next"], {"after": 95})
+
+        last = self.store.query(limit=50, after=95)
+        self.assertEqual(self.seqs(last), [96, 97, 98, 99])
+        self.assertEqual(self.store.query(after=99)["next"], {"after": 99})
+
+    def test_filters(self):
+        warnings = self.store.query(limit=100, level="WARN", phase="B")
+        self.assertEqual(self.seqs(warnings), [50, 60, 70, 80, 90])
+        self.assertEqual(self.seqs(self.store.query(limit=100, text="NEEDLE")), [3, 28, 53, 78])
+
+    def test_time_range_across_blocks(self):
+        page = self.store.query(limit=100, since=self.epoch(21), until=self.epoch(45))
+        self.assertEqual(self.seqs(page), list(range(21, 46)))
+        self.assertLess(page["scanned"], 100)  # the index skipped the rest
+
+        page = self.store.query(limit=100, after=0, since=self.epoch(61), until=self.epoch(66))
+        self.assertEqual(self.seqs(page), list(range(61, 67)))
+
+    def test_scan_budget_returns_a_cursor(self):
+        with mock.patch.object(orchestrator, "LOG_QUERY_MAX_SCAN", 20):
+            page = self.store.query(limit=100, text="needle")
+        self.assertEqual(page["scanned"], 20)
+        self.assertTrue(page["more"])
+        self.assertEqual(self.seqs(page), [])
+        self.assertEqual(page["next"], {"before": 80})
+
+        with mock.patch.object(orchestrator, "LOG_QUERY_MAX_SCAN", 20):
+            page = self.store.query(limit=100, text="needle", **page["next"])
+        self.assertEqual(self.seqs(page), [78])
+        self.assertEqual(page["next"], {"before": 60})
+
+    def test_recovers_from_a_torn_line(self):
+        with open(self.store.path, 'ab') as f:
+            f.write(b'{"seq": 100, "timestamp": "2026-01')
+        store = self.open_store()
+        self.assertEqual(store.next_seq, 100)
+        self.assertEqual(store.index, self.store.index)
+
+        store.append({"timestamp": START.isoformat(), "level": "INFO", "phase": None, "message": "after"})
+        self.assertEqual(self.seqs(store.query(limit=2)), [99, 100])
+
+    def test_rebuilds_a_corrupt_index(self):
+        raw = self.store.index_path.read_bytes()
+        self.store.index_path.write_bytes(raw[:30] + b"\xff" * 10 + raw[40:])
+        store = self.open_store()
+        self.assertEqual(store.index, self.store.index)
+        self.assertEqual(store.next_seq, 100)
+
+        self.store.index_path.unlink()
+        store = self.open_store()
+        self.assertEqual(store.index, self.store.index)
+        self.assertEqual(self.seqs(store.query(limit=100, since=self.epoch(95))), [95, 96, 97, 98, 99])
+
+    def test_failed_write_reuses_the_seq_without_indexing(self):
+        entry = {"timestamp": START.isoformat(), "level": "INFO", "phase": None, "message": "kept"}
+        while self.store.next_seq % INTERVAL:
+            self.store.append(dict(entry))
+        boundary = self.store.next_seq
+        index = list(self.store.index)
+
+        real_open = open
+
+        def failing_open(path, *args, **kwargs):
+            if Path(path) == self.store.path:
+                raise OSError("disk full")
+            return real_open(path, *args, **kwargs)
+
+        lost = dict(entry, message="lost")
+        with mock.patch("builtins.open", failing_open):
+            self.store.append(lost)
+        self.assertNotIn("seq", lost)
+        self.assertEqual(self.store.index, index)
+
+        self.store.append(dict(entry))
+        self.assertEqual(self.store.index[-1][0], boundary)
+        block_seqs = [record[0] for record in self.store.index]
+        self.assertEqual(block_seqs, sorted(set(block_seqs)))
+        self.assertEqual(self.open_store().index, self.store.index)
+        self.assertEqual(self.seqs(self.store.query(limit=1)), [boundary])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Metrics: counters, gauges and histogram buckets rendered in Prometheus
+text format, per-registry labels and the disabled no-op path.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+
+class MetricsTest(unittest.TestCase):
+    """A registry with three histogram buckets."""
+
+    def setUp(self):
+        self.metrics = orchestrator.Metrics(buckets=(0.1, 1, 10))
+
+    def test_counters_and_gauges(self):
+        self.metrics.inc("orchestrator_phase_completions_total")
+        self.metrics.inc("orchestrator_phase_completions_total", 2)
+        self.metrics.set("orchestrator_phases", 3, state="pending")
+        self.metrics.set("orchestrator_phases", 1, state="completed")
+        self.metrics.set("orchestrator_phases", 2, state="pending")
+
+        self.assertEqual(self.metrics.render(), "\n".join([
+            "# HELP orchestrator_phase_completions_total Phases reported completed by the agent",
+            "# TYPE orchestrator_phase_completions_total counter",
+            "orchestrator_phase_completions_total 3.0",
+            "# HELP orchestrator_phases Phases in the session, by state",
+            "# TYPE orchestrator_phases gauge",
+            'orchestrator_phases{state="pending"} 2.0',
+            'orchestrator_phases{state="completed"} 1.0',
+        ]) + "\n")
+
+    def test_histogram_buckets_are_cumulative_and_inclusive(self):
+        for value in (0.05, 0.1, 0.5, 1, 20):
+            self.metrics.observe("orchestrator_git_command_seconds", value, command="add")
+
+        lines = self.metrics.render().splitlines()
+        self.assertEqual(lines[1], "# TYPE orchestrator_git_command_seconds histogram")
+        self.assertEqual(lines[2:], [
+            'orchestrator_git_command_seconds_bucket{command="add",le="0.1"} 2.0',
+            'orchestrator_git_command_seconds_bucket{command="add",le="1.0"} 4.0',
+            'orchestrator_git_command_seconds_bucket{command="add",le="10.0"} 4.0',
+            'orchestrator_git_command_seconds_bucket{command="add",le="+Inf"} 5.0',
+            'orchestrator_git_command_seconds_sum{command="add"} 21.65',
+            'orchestrator_git_command_seconds_count{command="add"} 5.0',
+        ])
+
+    def test_timer_observes_once(self):
+        with self.metrics.time("orchestrator_session_save_seconds"):
+            pass
+        samples = self.metrics.samples()["orchestrator_session_save_seconds"]
+        self.assertEqual(samples[3], ("orchestrator_session_save_seconds_bucket", {"le": "+Inf"}, 1))
+        self.assertEqual(samples[-1], ("orchestrator_session_save_seconds_count", {}, 1))
+
+    def test_labels_are_escaped(self):
+        self.metrics.inc("orchestrator_http_requests_total", route='/a"b\\c\nd')
+        self.assertIn('orchestrator_http_requests_total{route="/a\\"b\\\\c\\nd"} 1.0', self.metrics.render())
+
+    def test_registries_are_merged_with_their_labels(self):
+        other = orchestrator.Metrics()
+        self.metrics.set("orchestrator_push_queue_depth", 1)
+        other.set("orchestrator_push_queue_depth", 4)
+        other.add_collector(lambda: [("orchestrator_queued_commands", {}, 2)])
+        other.add_collector(lambda: 1 / 0)  # a broken collector does not break the scrape
+
+        text = orchestrator.render_metrics([(self.metrics, {"project": "a"}), (other, {"project": "b"})])
+        self.assertEqual(text.count("# TYPE orchestrator_push_queue_depth gauge"), 1)
+        self.assertIn('orchestrator_push_queue_depth{project="a"} 1.0', text)
+        self.assertIn('orchestrator_push_queue_depth{project="b"} 4.0', text)
+        self.assertIn('orchestrator_queued_commands{project="b"} 2.0', text)
+
+    def test_unknown_metrics_are_untyped(self):
+        self.metrics.set("custom_value", 1)
+        self.assertEqual(self.metrics.render(), "# HELP custom_value \n# TYPE custom_value untyped\ncustom_value 1.0\n")
+
+    def test_disabled_registry_records_nothing(self):
+        metrics = orchestrator.Metrics(enabled=False)
+        metrics.inc("orchestrator_phase_errors_total")
+        metrics.observe("orchestrator_completion_seconds", 1)
+        with metrics.time("orchestrator_session_save_seconds"):
+            pass
+        self.assertEqual(metrics.samples(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
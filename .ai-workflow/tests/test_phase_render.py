@@ -0,0 +1,95 @@
+"""
+Phase files: the render key, on-demand rendering from the cache and
+syncing the phases/ directory after the plan changes.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+
+def task(task_id: str, body: str) -> orchestrator.Task:
+    return orchestrator.Task(task_id, f"Task {task_id}", f"### Task {task_id}: Title\n\n{body}", task_id[0], 1, 5)
+
+
+class PhaseRenderTest(unittest.TestCase):
+    """Two phases; the first refers to a stylesheet rule."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.workflow_dir = self.root / ".ai-workflow"
+        (self.workflow_dir / "phases").mkdir(parents=True)
+        (self.root / "site.css").write_text(".hero {\n    color: white;\n}\n")
+        logger = orchestrator.Logger(self.workflow_dir / "logs")
+        logger.console = False
+        self.config = {}
+        self.claude = orchestrator.ClaudeCodeManager(self.root, self.workflow_dir, logger, self.config)
+        self.a = orchestrator.Phase("A", "Phase A", [task("A1", "Restyle `.hero` in site.css.")])
+        self.b = orchestrator.Phase("B", "Phase B", [task("B1", "Write the footer.")])
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def phase_files(self) -> list:
+        return sorted(f.name for f in (self.workflow_dir / "phases").glob("phase-*.md"))
+
+    def test_key_follows_tasks_options_and_snippets(self):
+        key = self.claude.phase_key(self.a)
+        self.assertEqual(self.claude.phase_key(self.a), key)
+
+        (self.root / "site.css").write_text(".hero {\n    color: rebeccapurple;\n}\n")
+        changed = self.claude.phase_key(self.a)
+        self.assertNotEqual(changed, key)
+
+        self.config["compact_commands"] = False
+        self.assertNotEqual(self.claude.phase_key(self.a), changed)
+        self.config.pop("compact_commands")
+
+        self.a.tasks[0].content += "\nAlso the hover state."
+        self.assertNotEqual(self.claude.phase_key(self.a), changed)
+
+    def test_render_reuses_the_cached_file(self):
+        content = self.claude.render_phase(self.a)
+        self.assertIn("color: white;", content)
+        self.assertEqual(self.phase_files(), ["phase-A.md"])
+        manifest = self.claude._read_manifest()
+        self.assertEqual(manifest["A"], {"key": self.claude.phase_key(self.a), "file": "phase-A.md"})
+
+        self.assertIs(self.claude.render_phase(self.a), content)
+
+        # A new manager (a restarted orchestrator) reads the file back
+        fresh = orchestrator.ClaudeCodeManager(self.root, self.workflow_dir, self.claude.logger, self.config)
+        self.assertEqual(fresh.render_phase(self.a), content)
+
+    def test_snippet_change_rerenders(self):
+        self.assertIn("color: white;", self.claude.render_phase(self.a))
+        (self.root / "site.css").write_text(".hero {\n    color: rebeccapurple;\n}\n")
+        content = self.claude.render_phase(self.a)
+        self.assertIn("color: rebeccapurple;", content)
+        self.assertEqual((self.workflow_dir / "phases/phase-A.md").read_text(), content)
+
+    def test_sync_drops_stale_files(self):
+        self.claude.render_phase(self.a)
+        self.claude.render_phase(self.b)
+        self.b.tasks[0].content += "\nAnd the copyright line."
+
+        self.assertEqual(self.claude.sync_phase_files([self.a, self.b]), {"kept": 1, "removed": 1})
+        self.assertEqual(self.phase_files(), ["phase-A.md"])
+        self.assertEqual(list(self.claude._read_manifest()), ["A"])
+
+        self.claude.clear_phase_files()
+        self.assertEqual(self.phase_files(), [])
+        self.assertEqual(self.claude._read_manifest(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+PushQueue against a local bare remote: coalescing, backoff and flush.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+
+def git(cwd: Path, *args: str) -> str:
+    """Run git and return its stripped output."""
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+class PushQueueTest(unittest.TestCase):
+    """Drive the real push worker against a bare repository."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.remote = self.root / "remote.git"
+        self.repo = self.root / "repo"
+        git(self.root, "init", "-q", "--bare", str(self.remote))
+        self.repo.mkdir()
+        git(self.repo, "init", "-q", "-b", "main")
+        git(self.repo, "config", "user.email", "test@example.com")
+        git(self.repo, "config", "user.name", "Test")
+        git(self.repo, "remote", "add", "origin", str(self.remote))
+        self.commit("initial")
+        git(self.repo, "push", "-q", "-u", "origin", "main")
+
+        self.logger = orchestrator.Logger(self.root / "logs")
+        self.logger.console = False
+        self.config = {
+            "push_coalesce_window": 0.3,
+            "push_backoff_base": 60,
+            "push_backoff_max": 300,
+            "push_max_attempts": 8
+        }
+        self.git = orchestrator.GitManager(self.repo, self.logger, self.config)
+        self.queue = self.git.push_queue
+
+    def tearDown(self):
+        self.queue.stop(flush_timeout=0)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def commit(self, name: str) -> str:
+        """Commit a new file and return the commit hash."""
+        (self.repo / name).write_text(name)
+        git(self.repo, "add", name)
+        git(self.repo, "commit", "-q", "-m", name)
+        return git(self.repo, "rev-parse", "HEAD")
+
+    def remote_head(self) -> str:
+        return git(self.remote, "rev-parse", "main")
+
+    def wait_for(self, condition, timeout: float = 10.0) -> bool:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if condition():
+                return True
+            time.sleep(0.05)
+        return False
+
+    def test_commits_in_the_window_share_one_push(self):
+        for name in ("a", "b", "c"):
+            head = self.commit(name)
+            self.queue.enqueue(head, "A")
+
+        self.assertTrue(self.wait_for(lambda: not self.queue.get_stats()["depth"]))
+        stats = self.queue.get_stats()
+        self.assertEqual(stats["pushes"], 1)
+        self.assertEqual(stats["commits_pushed"], 3)
+        self.assertEqual(self.remote_head(), head)
+
+    def test_failed_push_backs_off(self):
+        git(self.repo, "remote", "set-url", "origin", str(self.root / "missing.git"))
+        self.queue.enqueue(self.commit("a"), "A")
+
+        self.assertTrue(self.wait_for(lambda: self.queue.get_stats()["failures"] == 1))
+        stats = self.queue.get_stats()
+        self.assertEqual(stats["depth"], 1)
+        self.assertEqual(stats["attempt"], 1)
+        self.assertGreater(stats["next_retry_in"], 50)
+        time.sleep(0.5)
+        self.assertEqual(self.queue.get_stats()["failures"], 1)  # no retry before the backoff
+
+    def test_flush_skips_the_backoff(self):
+        git(self.repo, "remote", "set-url", "origin", str(self.root / "missing.git"))
+        head = self.commit("a")
+        self.queue.enqueue(head, "A")
+        self.assertTrue(self.wait_for(lambda: self.queue.get_stats()["failures"] == 1))
+
+        git(self.repo, "remote", "set-url", "origin", str(self.remote))
+        started = time.time()
+        self.assertTrue(self.queue.flush(timeout=10))
+        self.assertLess(time.time() - started, 5)
+        self.assertEqual(self.remote_head(), head)
+        self.assertIsNone(self.queue.get_stats()["next_retry_in"])
+
+    def test_gives_up_until_the_next_commit(self):
+        self.config.update({"push_backoff_base": 0.05, "push_max_attempts": 2})
+        git(self.repo, "remote", "set-url", "origin", str(self.root / "missing.git"))
+        self.queue.enqueue(self.commit("a"), "A")
+        self.assertTrue(self.wait_for(lambda: self.queue.get_stats()["failures"] == 2))
+        time.sleep(0.3)
+        self.assertEqual(self.queue.get_stats()["failures"], 2)
+
+        git(self.repo, "remote", "set-url", "origin", str(self.remote))
+        head = self.commit("b")
+        self.queue.enqueue(head, "B")
+        self.assertTrue(self.wait_for(lambda: not self.queue.get_stats()["depth"]))
+        self.assertEqual(self.queue.get_stats()["commits_pushed"], 2)
+        self.assertEqual(self.remote_head(), head)
+
+    def test_stop_flushes_queued_commits(self):
+        self.config["push_coalesce_window"] = 60
+        head = self.commit("a")
+        self.queue.enqueue(head, "A")
+        self.queue.stop(flush_timeout=10)
+        self.assertEqual(self.remote_head(), head)
+
+
+if __name__ == "__main__":
+    unittest.main()
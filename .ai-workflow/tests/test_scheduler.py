@@ -0,0 +1,186 @@
+"""
+Scheduler: due-time order, per-owner serialization and tag cancellation;
+and the Orchestrator jobs built on it (stall checks, pause/reset/skip).
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+
+def wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class SchedulerTest(unittest.TestCase):
+    """A scheduler with three loop threads and two owners."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.logger = orchestrator.Logger(self.root / "logs")
+        self.logger.console = False
+        self.scheduler = orchestrator.Scheduler(self.logger, workers=3)
+        self.a = self.scheduler.view("a", self.logger)
+        self.b = self.scheduler.view("b", self.logger)
+        self.ran = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.scheduler.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def record(self, name: str, seconds: float = 0):
+        with self.lock:
+            self.ran.append(("start", name))
+        time.sleep(seconds)
+        with self.lock:
+            self.ran.append(("end", name))
+
+    def finished(self) -> list:
+        with self.lock:
+            return [name for event, name in self.ran if event == "end"]
+
+    def test_jobs_run_in_due_order(self):
+        for delay, name in ((0.3, "third"), (0, "first"), (0.15, "second"), (0, "first-again")):
+            self.a.schedule(delay, self.record, name, args=(name,))
+        self.scheduler.start()
+        self.assertTrue(wait_for(lambda: len(self.finished()) == 4))
+        self.assertEqual(self.finished(), ["first", "first-again", "second", "third"])
+
+    def test_owner_jobs_never_overlap(self):
+        for i in range(3):
+            self.a.schedule(0, self.record, f"a{i}", args=(f"a{i}", 0.1))
+        self.b.schedule(0, self.record, "b0", args=("b0", 0.05))
+        self.scheduler.start()
+        self.assertTrue(wait_for(lambda: len(self.finished()) == 4))
+
+        a_events = [(event, name) for event, name in self.ran if name.startswith("a")]
+        self.assertEqual(a_events, [(event, f"a{i}") for i in range(3) for event in ("start", "end")])
+        # The other owner is not held up behind owner "a"
+        self.assertLess(self.finished().index("b0"), self.finished().index("a1"))
+        self.assertEqual(self.scheduler.get_usage("a")["jobs"], 3)
+
+    def test_cancel_tag(self):
+        self.a.schedule(0.2, self.record, "cascade", "cascade", ("cascade",))
+        self.a.schedule(0.2, self.record, "retry", "retry", ("retry",))
+        self.a.schedule(0.2, self.record, "poll", None, ("poll",))
+        self.b.schedule(0.2, self.record, "other-cascade", "cascade", ("other-cascade",))
+
+        self.assertEqual(sorted(self.a.cancel_tag("cascade", "retry")), ["cascade", "retry"])
+        self.assertEqual(self.a.cancel_tag("cascade"), [])
+        self.assertEqual([job["name"] for job in self.a.get_stats()], ["poll"])
+        self.assertEqual(self.b.pending_count("cascade"), 1)
+
+        self.scheduler.start()
+        self.assertTrue(wait_for(lambda: len(self.finished()) == 2))
+        time.sleep(0.1)
+        self.assertEqual(sorted(self.finished()), ["other-cascade", "poll"])
+
+    def test_failing_job_does_not_stop_the_loop(self):
+        def fail():
+            raise ValueError("boom")
+
+        self.a.schedule(0, fail, "fail")
+        self.a.schedule(0, self.record, "after", args=("after",))
+        self.scheduler.start()
+        self.assertTrue(wait_for(lambda: self.finished() == ["after"]))
+        self.assertTrue(any("Scheduled job 'fail' failed: boom" in entry["message"]
+                            for entry in self.logger.get_recent()))
+
+
+class OrchestratorJobsTest(unittest.TestCase):
+    """Stall checks and the jobs pause, reset and skip cancel."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.project = self.root / "project"
+        self.project.mkdir()
+        for args in (["init", "-q", "-b", "main"], ["config", "user.email", "test@example.com"],
+                     ["config", "user.name", "Test"]):
+            subprocess.run(["git", *args], cwd=self.project, check=True)
+        workflow_dir = self.project / ".ai-workflow"
+        workflow_dir.mkdir()
+        (workflow_dir / "planning.md").write_text("### Task A1: One\n\nx\n\n### Task B1: Two\n\ny\n")
+        self.orc = orchestrator.Orchestrator(str(self.project), {
+            "sound_notifications": False,
+            "status_check_interval": 0.05,
+            "max_tasks_per_phase": 1,
+            "auto_push": False,
+            "auto_cascade": False,
+            "run_tests": False,
+            "retry_delay": 60,
+            "stall_timeout": 0.6
+        })
+        self.orc.logger.console = False
+        self.orc.call(self.orc.analyze_plan)
+        self.orc.call(self.orc.start_workflow)
+        self.phase = self.orc.session.phases[0]
+
+    def tearDown(self):
+        self.orc._stop_monitoring()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def pending(self) -> list:
+        """Pending phase-flow tags (the periodic poll and config jobs aside)."""
+        tags = ("completion", "cascade", "retry", "stall")
+        return sorted(job["tag"] for job in self.orc.call(self.orc.scheduler.get_stats) if job["tag"] in tags)
+
+    def heartbeat(self):
+        orchestrator.StatusProtocol.append_event(self.orc.workflow_dir, {"type": "heartbeat", "phase": "A"})
+
+    def arm(self, *tags: str):
+        for tag in tags:
+            self.orc.scheduler.schedule(60, lambda: None, tag, tag)
+
+    def test_stall_check_rearms_while_the_agent_talks(self):
+        for _ in range(8):
+            self.heartbeat()
+            time.sleep(0.15)
+        self.assertEqual(self.phase.state, orchestrator.PhaseState.RUNNING)
+        self.assertEqual(self.orc.call(self.orc.scheduler.pending_count, "stall"), 1)
+
+        self.assertTrue(wait_for(lambda: self.phase.state == orchestrator.PhaseState.ERROR, timeout=3))
+        self.assertIn("Stalled", self.phase.error)
+        self.assertEqual(self.pending(), ["retry"])
+
+    def test_v1_agent_is_never_stalled(self):
+        time.sleep(1.5)
+        self.assertEqual(self.phase.state, orchestrator.PhaseState.RUNNING)
+        self.assertEqual(self.orc.call(self.orc.scheduler.pending_count, "stall"), 1)
+
+    def test_pause_cancels_cascade_and_retry(self):
+        self.arm("completion", "cascade", "retry")
+        self.orc.call(self.orc.pause_workflow)
+        self.assertEqual(self.pending(), ["completion", "stall"])
+
+    def test_reset_cancels_everything_for_the_session(self):
+        self.arm("completion", "cascade", "retry")
+        self.orc.call(self.orc.reset_workflow)
+        self.assertEqual(self.pending(), [])
+
+    def test_skip_cancels_pending_phase_starts(self):
+        self.arm("completion", "cascade", "retry")
+        self.orc.call(self.orc.skip_phase, "A")
+        self.assertEqual(self.pending(), ["stall"])
+        self.assertEqual(self.phase.state, orchestrator.PhaseState.SKIPPED)
+
+
+if __name__ == "__main__":
+    unittest.main()
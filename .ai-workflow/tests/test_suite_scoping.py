@@ -0,0 +1,70 @@
+"""
+TestRunner suite scoping: which suites a phase's changed files re-run.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<title>Home</title>
+<link rel="stylesheet" href="css/main.css">
+<script src="js/app.js"></script>
+</head>
+<body><h1 class="title">Home</h1></body>
+</html>
+"""
+
+
+class SuiteScopingTest(unittest.TestCase):
+    """A small site whose suites are run once, then scoped by changed files."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        (self.root / "css").mkdir()
+        (self.root / "js").mkdir()
+        (self.root / "index.html").write_text(PAGE)
+        (self.root / "css/main.css").write_text(".title { color: red; }\n")
+        (self.root / "js/app.js").write_text("console.log('hi');\n")
+        workflow_dir = self.root / ".ai-workflow"
+        workflow_dir.mkdir()
+
+        logger = orchestrator.Logger(workflow_dir / "logs")
+        logger.console = False
+        self.runner = orchestrator.TestRunner(self.root, workflow_dir, logger, {})
+        self.runner.run_tests("A")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def suites(self, results) -> dict:
+        return {test["name"]: test for test in results["tests"]}
+
+    def test_js_only_change_reruns_render_cost(self):
+        (self.root / "js/app.js").write_text("console.log('a much longer script than before');\n" * 50)
+        suites = self.suites(self.runner.run_tests("B", ["js/app.js"]))
+
+        render = suites["Render Cost"]
+        self.assertFalse(render.get("scoped_out"))
+        self.assertGreater(render["metrics"]["pages"]["index.html"]["critical_bytes"], 2000)
+        self.assertTrue(suites["CSS Validation"].get("scoped_out"))
+
+    def test_untouched_inputs_are_scoped_out(self):
+        suites = self.suites(self.runner.run_tests("B", ["README.md"]))
+        self.assertTrue(suites["Render Cost"].get("scoped_out"))
+        self.assertFalse(suites["Internal Links"].get("scoped_out"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Tracer and chrome_trace(): handoff spans on a phase and their export as
+Chrome trace-event JSON with per-thread tracks and a per-stage breakdown.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import json
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+
+def span(name: str, ts: float, dur: float, thread: str = "orchestrator-loop", cat: str = "orchestrator", **args):
+    entry = {"name": name, "cat": cat, "ts": ts, "dur": dur, "thread": thread}
+    if args:
+        entry["args"] = args
+    return entry
+
+
+class ChromeTraceTest(unittest.TestCase):
+    """Export of a phase dictionary with hand-written spans."""
+
+    def test_events_tracks_and_totals(self):
+        phase = {"id": "A", "name": "Phase A", "trace": [
+            span("git commit", 100.0, 0.004, cat="git", files=2),
+            span("git push", 100.01, 0.25, thread="push-queue", cat="git"),
+            span("cascade wait", 100.005, 2.0),
+            span("git commit", 102.1, 0.006, cat="git"),
+            span("handoff", 100.0, 2.2, cat="handoff"),
+        ]}
+        trace = orchestrator.chrome_trace(phase)
+
+        self.assertEqual(trace["displayTimeUnit"], "ms")
+        events = trace["traceEvents"]
+        self.assertEqual(events[0], {
+            "name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": "Phase A handoff"}
+        })
+        self.assertEqual(events[1], {
+            "name": "git commit", "cat": "git", "ph": "X", "ts": 100000000, "dur": 4000,
+            "pid": 1, "tid": 1, "args": {"files": 2}
+        })
+        self.assertEqual([event["tid"] for event in events[1:6]], [1, 2, 1, 1, 1])
+        self.assertEqual(events[6:], [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "orchestrator-loop"}},
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": 2, "args": {"name": "push-queue"}},
+        ])
+        self.assertEqual(trace["otherData"], {
+            "phase": "A",
+            "spans": 5,
+            "handoff_ms": 2200.0,
+            "totals_ms": {"cascade wait": 2000.0, "git push": 250.0, "git commit": 10.0}
+        })
+        json.dumps(trace)  # plain JSON all the way down
+
+    def test_phase_without_spans(self):
+        trace = orchestrator.chrome_trace({"id": "B", "name": None, "trace": []})
+        self.assertEqual(trace["traceEvents"][0]["args"], {"name": "B handoff"})
+        self.assertEqual(len(trace["traceEvents"]), 1)
+        self.assertEqual(trace["otherData"], {"phase": "B", "spans": 0, "handoff_ms": None, "totals_ms": {}})
+
+
+class TracerTest(unittest.TestCase):
+    """Spans recorded into Phase.trace."""
+
+    def setUp(self):
+        self.tracer = orchestrator.Tracer(max_spans=4)
+        self.a = orchestrator.Phase("A", "Phase A")
+        self.b = orchestrator.Phase("B", "Phase B")
+
+    def test_handoff_spans_land_on_the_phase(self):
+        with self.tracer.span("ignored"):
+            pass  # no handoff yet
+        self.tracer.begin(self.a)
+        with self.tracer.span("command write", next_phase="B"):
+            pass
+        self.tracer.end()
+        self.tracer.end()  # no-op once closed
+
+        self.assertEqual([s["name"] for s in self.a.trace], ["command write", "handoff"])
+        self.assertEqual(self.a.trace[0]["args"], {"next_phase": "B"})
+        self.assertEqual(self.a.trace[0]["thread"], threading.current_thread().name)
+        self.assertGreaterEqual(self.a.trace[1]["dur"], self.a.trace[0]["dur"])
+        self.assertEqual(orchestrator.chrome_trace(self.a.to_dict())["otherData"]["spans"], 2)
+
+    def test_late_spans_go_to_their_own_phase(self):
+        self.tracer.begin(self.a)
+        self.tracer.end()
+        self.tracer.begin(self.b)
+        self.tracer.record("git push", 1.0, 0.5, "git", phase_id="A")
+        self.assertEqual([s["name"] for s in self.a.trace], ["handoff", "git push"])
+        self.assertEqual(self.b.trace, [])
+
+    def test_retry_replaces_the_trace_and_spans_are_capped(self):
+        self.tracer.begin(self.a)
+        for i in range(6):
+            self.tracer.record(f"step {i}", 1.0, -1)
+        self.assertEqual(len(self.a.trace), 4)
+        self.assertEqual(self.a.trace[0]["dur"], 0.0)
+
+        self.tracer.begin(self.a)
+        self.assertEqual(self.a.trace, [])
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = orchestrator.Tracer(enabled=False)
+        tracer.begin(self.a)
+        with tracer.span("command write"):
+            pass
+        tracer.end()
+        self.assertEqual(self.a.trace, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
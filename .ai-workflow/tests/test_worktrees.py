@@ -0,0 +1,185 @@
+"""
+Phase worktrees: fast-forward and rebase merges, and a conflicting merge
+that is recorded as a phase error and retried from a fresh branch.
+
+Run from the repository root:
+    python -m unittest discover -s .ai-workflow/tests
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orchestrator  # noqa: E402
+
+
+def git(cwd: Path, *args: str) -> str:
+    """Run git and return its stripped output."""
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def init_repo(path: Path):
+    """Create a repository on main with index.html and style.css."""
+    path.mkdir()
+    git(path, "init", "-q", "-b", "main")
+    git(path, "config", "user.email", "test@example.com")
+    git(path, "config", "user.name", "Test")
+    (path / ".gitignore").write_text(".ai-workflow/\n")
+    (path / "index.html").write_text("<p>base</p>\n")
+    (path / "style.css").write_text("p { color: black; }\n")
+    git(path, "add", "-A")
+    git(path, "commit", "-q", "-m", "initial")
+
+
+class WorktreeMergeTest(unittest.TestCase):
+    """WorktreeManager merges against a real repository."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.repo = self.root / "repo"
+        init_repo(self.repo)
+        logger = orchestrator.Logger(self.root / "logs")
+        logger.console = False
+        self.git = orchestrator.GitManager(self.repo, logger, {"auto_push": False})
+        self.worktrees = orchestrator.WorktreeManager(self.git, logger, {})
+
+    def tearDown(self):
+        self.worktrees.cleanup()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def branch_exists(self, phase_id: str) -> bool:
+        return bool(git(self.repo, "branch", "--list", self.worktrees.branch_for(phase_id)))
+
+    def test_fast_forward(self):
+        path = self.worktrees.acquire("A")
+        self.assertEqual(git(path, "rev-parse", "--abbrev-ref", "HEAD"), "ai-workflow/phase-A")
+        (path / "index.html").write_text("<p>phase A</p>\n")
+        commit = self.worktrees.commit("A", "Completed 1 tasks")
+
+        base = git(self.repo, "rev-parse", "HEAD")
+        merge = self.worktrees.merge("A")
+        self.assertEqual(merge["status"], "fast-forward")
+        self.assertEqual(merge["commit"], commit)
+        self.assertEqual(merge["previous"], base)
+        self.assertEqual(merge["files"], ["index.html"])
+        self.assertEqual((self.repo / "index.html").read_text(), "<p>phase A</p>\n")
+
+        self.worktrees.release("A")
+        self.assertFalse(path.exists())
+        self.assertFalse(self.branch_exists("A"))
+
+    def test_nothing_to_merge(self):
+        self.worktrees.acquire("A")
+        self.assertIsNone(self.worktrees.commit("A", "Completed 1 tasks"))
+        self.assertEqual(self.worktrees.merge("A")["status"], "up-to-date")
+
+    def test_rebase_onto_a_moved_main(self):
+        path = self.worktrees.acquire("A")
+        (path / "index.html").write_text("<p>phase A</p>\n")
+        self.worktrees.commit("A", "Completed 1 tasks")
+        (self.repo / "style.css").write_text("p { color: red; }\n")
+        git(self.repo, "commit", "-q", "-am", "main moved")
+        moved = git(self.repo, "rev-parse", "HEAD")
+
+        merge = self.worktrees.merge("A")
+        self.assertEqual(merge["status"], "rebased")
+        self.assertEqual(merge["files"], ["index.html"])
+        self.assertEqual(git(self.repo, "rev-parse", "HEAD^"), moved)
+        self.assertEqual(git(self.repo, "log", "--format=%s", "-1"), "fix: Phase A - Completed 1 tasks")
+        self.assertEqual((self.repo / "style.css").read_text(), "p { color: red; }\n")
+        self.assertEqual((self.repo / "index.html").read_text(), "<p>phase A</p>\n")
+
+    def test_conflict_aborts_the_rebase(self):
+        path = self.worktrees.acquire("A")
+        (path / "index.html").write_text("<p>phase A</p>\n")
+        tip = self.worktrees.commit("A", "Completed 1 tasks")
+        (self.repo / "index.html").write_text("<p>main</p>\n")
+        git(self.repo, "commit", "-q", "-am", "main edit")
+        main = git(self.repo, "rev-parse", "HEAD")
+
+        merge = self.worktrees.merge("A")
+        self.assertEqual(merge["status"], "conflict")
+        self.assertEqual(merge["conflicts"], ["index.html"])
+        self.assertEqual(git(self.repo, "rev-parse", "HEAD"), main)
+        self.assertEqual(git(path, "rev-parse", "HEAD"), tip)
+        self.assertEqual(git(path, "status", "--porcelain"), "")
+
+        saved = self.worktrees.discard("A")
+        self.assertEqual(saved, "refs/ai-workflow/conflicts/phase-A")
+        self.assertEqual(git(self.repo, "rev-parse", saved), tip)
+        self.assertFalse(path.exists())
+        self.assertFalse(self.branch_exists("A"))
+
+
+class WorktreeConflictRetryTest(unittest.TestCase):
+    """A conflicting phase through the Orchestrator's completion pipeline."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.project = self.root / "project"
+        init_repo(self.project)
+        workflow_dir = self.project / ".ai-workflow"
+        workflow_dir.mkdir()
+        (workflow_dir / "planning.md").write_text("### Task A1: Edit\n\nChange the page.\n\n### Task B1: Next\n\nMore.\n")
+        self.orc = orchestrator.Orchestrator(str(self.project), {
+            "sound_notifications": False,
+            "status_check_interval": 0.05,
+            "max_tasks_per_phase": 1,
+            "auto_push": False,
+            "auto_cascade": False,
+            "run_tests": False,
+            "phase_worktrees": True,
+            "retry_delay": 0.2
+        })
+        self.orc.logger.console = False
+        self.orc.call(self.orc.analyze_plan)
+        self.orc.call(self.orc.start_workflow)
+        self.phase = self.orc.session.phases[0]
+
+    def tearDown(self):
+        self.orc._stop_monitoring()
+        self.orc.worktrees.cleanup()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def wait_for(self, condition, timeout: float = 10.0) -> bool:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.orc.call(condition):
+                return True
+            time.sleep(0.05)
+        return False
+
+    def test_conflict_is_a_phase_error_and_retries_fresh(self):
+        worktree = self.orc.worktrees.path_for("A")
+        branch = self.orc.worktrees.branch_for("A")
+        (worktree / "index.html").write_text("<p>phase A</p>\n")
+        (self.project / "index.html").write_text("<p>main</p>\n")
+        git(self.project, "commit", "-q", "-am", "main edit")
+        main = git(self.project, "rev-parse", "HEAD")
+
+        self.orc.call(self.orc._handle_phase_completion, {"state": "completed", "files_modified": []})
+        self.assertTrue(self.wait_for(lambda: self.phase.state == orchestrator.PhaseState.ERROR))
+        self.assertIn("Merge conflict in index.html", self.phase.error)
+        self.assertEqual(self.orc.session.errors[-1]["phase"], "A")
+        self.assertFalse(worktree.exists())
+        self.assertEqual(git(self.project, "branch", "--list", branch), "")
+        self.assertEqual(git(self.project, "show", "refs/ai-workflow/conflicts/phase-A:index.html"), "<p>phase A</p>")
+        self.assertEqual(git(self.project, "rev-parse", "HEAD"), main)
+
+        # The automatic retry checks out a new branch from the current main
+        self.assertTrue(self.wait_for(lambda: self.phase.state == orchestrator.PhaseState.RUNNING))
+        self.assertEqual(self.phase.retry_count, 1)
+        self.assertTrue(worktree.exists())
+        self.assertEqual(git(worktree, "rev-parse", "HEAD"), main)
+        self.assertEqual((worktree / "index.html").read_text(), "<p>main</p>\n")
+
+
+if __name__ == "__main__":
+    unittest.main()